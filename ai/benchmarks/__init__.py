@@ -0,0 +1,6 @@
+"""
+Micro-benchmarks for the AI service hot paths
+
+Run with pytest-benchmark; everything runs offline on synthetic corpora
+with a stub encoder, so no models are downloaded.
+"""
@@ -0,0 +1,108 @@
+"""
+Benchmarks for the local pattern extractors and OpenAI response parsing
+"""
+
+import pytest
+
+from models.extraction_models import MetadataRequest, ObligationRequest
+from utils.offset_index import TextOffsetIndex
+
+from .helpers import run_sync
+from .corpus import metadata_response, obligations_response, source_snippets
+
+LOCAL_EXTRACTORS = [
+    "_extract_project_name",
+    "_extract_client_name",
+    "_extract_contract_value",
+    "_extract_start_date",
+    "_extract_end_date",
+    "_extract_country",
+    "_extract_payment_terms",
+    "_extract_services",
+    "_extract_kpis",
+    "_extract_slas",
+    "_extract_penalty_clauses"
+]
+
+
+@pytest.mark.parametrize("extractor", LOCAL_EXTRACTORS)
+def bench_local_extractor(benchmark, local_extraction, document_text, extractor):
+    extract = getattr(local_extraction, extractor)
+    benchmark(lambda: run_sync(extract(document_text)))
+
+
+def bench_local_obligation_components(benchmark, local_extraction, document_text):
+    sentences = [
+        (document_text[start:end], start)
+        for start, end in local_extraction._iter_sentence_spans(document_text)
+        if local_extraction._score_obligation_sentence(document_text[start:end])
+    ]
+
+    def extract_all():
+        return [
+            run_sync(local_extraction._extract_obligation_components(sentence, offset))
+            for sentence, offset in sentences
+        ]
+
+    benchmark(extract_all)
+
+
+def bench_local_extract_metadata(benchmark, local_extraction, document_text):
+    request = MetadataRequest(text=document_text)
+    result = benchmark(lambda: run_sync(local_extraction.extract_metadata(request, document_text)))
+    assert result.extracted_fields_count > 0
+
+
+def bench_local_extract_obligations(benchmark, local_extraction, document_text):
+    request = ObligationRequest(text=document_text)
+    result = benchmark(lambda: run_sync(local_extraction.extract_obligations(request, document_text)))
+    assert result.total_obligations > 0
+
+
+def bench_openai_find_text_offset(benchmark, openai_extraction, document_text):
+    snippets = source_snippets(document_text, 200)
+    window = (0, len(document_text))
+
+    # The index caches lookups, so each round resolves the snippets against a fresh index
+    def setup():
+        return (TextOffsetIndex(document_text),), {}
+
+    def find_all(offset_index):
+        return [openai_extraction._find_text_offset(snippet, offset_index, window) for snippet in snippets]
+
+    offsets = benchmark.pedantic(find_all, setup=setup, rounds=20)
+    assert any(offsets)
+
+
+def bench_openai_build_offset_index(benchmark, document_text):
+    benchmark(TextOffsetIndex, document_text)
+
+
+def bench_openai_parse_metadata_response(benchmark, openai_extraction, document_text):
+    response = metadata_response(document_text)
+    offset_index = TextOffsetIndex(document_text)
+    window = (0, len(document_text))
+
+    result = benchmark(lambda: run_sync(openai_extraction._parse_metadata_response(response, offset_index, window)))
+    assert result["project_name"] is not None
+
+
+@pytest.mark.parametrize("obligation_count", [10, 100])
+def bench_openai_parse_obligations_response(benchmark, openai_extraction, document_text, obligation_count):
+    response = obligations_response(document_text, obligation_count)
+    offset_index = TextOffsetIndex(document_text)
+    window = (0, len(document_text))
+
+    result = benchmark(lambda: run_sync(openai_extraction._parse_obligations_response(response, offset_index, window)))
+    assert len(result) == obligation_count
+
+
+def bench_openai_parse_truncated_obligations_response(benchmark, openai_extraction, document_text):
+    # A response cut off mid-item falls back to salvaging the complete elements
+    response = obligations_response(document_text, 100)
+    response = response[:int(len(response) * 0.9)]
+    offset_index = TextOffsetIndex(document_text)
+    window = (0, len(document_text))
+
+    result = benchmark(lambda: run_sync(openai_extraction._parse_obligations_response(response, offset_index, window)))
+    assert result
@@ -0,0 +1,32 @@
+"""
+Benchmarks for OCR post-processing on synthetic pages (Tesseract is not run)
+"""
+
+import pytest
+
+from .helpers import run_sync
+from .corpus import page_image, tesseract_data
+
+# (height, width) of an A4 page at each scan resolution
+PAGE_SHAPES = {
+    "150dpi": (1754, 1240),
+    "300dpi": (3508, 2480)
+}
+
+
+@pytest.mark.parametrize("channels", [1, 3], ids=["gray", "rgb"])
+@pytest.mark.parametrize("resolution", list(PAGE_SHAPES))
+def bench_preprocess_image(benchmark, local_ocr, resolution, channels):
+    image = page_image(*PAGE_SHAPES[resolution], channels=channels)
+
+    result = benchmark(lambda: run_sync(local_ocr._preprocess_image(image)))
+    assert result.shape == PAGE_SHAPES[resolution]
+
+
+@pytest.mark.parametrize("paragraphs", [5, 40, 200], ids=["sparse", "page", "dense"])
+def bench_build_paragraphs(benchmark, local_ocr, paragraphs):
+    data = tesseract_data(paragraphs)
+    image_shape = PAGE_SHAPES["300dpi"]
+
+    result = benchmark(lambda: run_sync(local_ocr._build_paragraphs(data, image_shape)))
+    assert len(result) == paragraphs
@@ -0,0 +1,68 @@
+"""
+Benchmarks for chunking, filtering, keyword search and result merging
+"""
+
+import pytest
+
+FILTERS = {
+    "none_match": {"project_ids": ["project-missing"]},
+    "project": {"project_ids": ["project-1", "project-2", "project-3"]},
+    "combined": {
+        "statuses": ["active", "draft"],
+        "document_types": ["contract", "amendment"],
+        "confidence_min": 0.7,
+        "date_range": {"start": "2024-03-01T00:00:00", "end": "2024-10-31T00:00:00"}
+    }
+}
+
+QUERIES = {
+    "short": "penalty for late delivery",
+    "long": "what monthly reports must the contractor submit and within how many days of the end of each month"
+}
+
+
+@pytest.mark.parametrize("chunk_size", [256, 512, 1024])
+def bench_chunk_text(benchmark, indexer, document_text, chunk_size):
+    chunks = benchmark(indexer._chunk_text, document_text, chunk_size)
+    assert chunks
+
+
+@pytest.mark.parametrize("filter_name", list(FILTERS))
+def bench_match_filters(benchmark, indexer, filter_name):
+    chunks = list(indexer.document_store.values())[:5000]
+    filters = FILTERS[filter_name]
+
+    def match_all():
+        return sum(1 for chunk in chunks if indexer._match_filters(chunk, filters))
+
+    benchmark(match_all)
+
+
+@pytest.mark.parametrize("query_name", list(QUERIES))
+@pytest.mark.parametrize("k", [10, 100])
+def bench_keyword_search(benchmark, query_engine, event_loop_runner, query_name, k):
+    query = QUERIES[query_name]
+
+    results = benchmark(lambda: event_loop_runner(query_engine._keyword_search(query, k)))
+    assert len(results) == k
+
+
+def bench_keyword_search_filtered(benchmark, query_engine, event_loop_runner):
+    results = benchmark(
+        lambda: event_loop_runner(query_engine._keyword_search(QUERIES["short"], 10, FILTERS["combined"]))
+    )
+    assert results
+
+
+@pytest.mark.parametrize("result_count", [10, 50, 200])
+def bench_merge_results(benchmark, indexer, query_engine, event_loop_runner, result_count):
+    query = QUERIES["long"]
+    semantic = event_loop_runner(indexer.search(query, k=result_count))
+    keyword = event_loop_runner(query_engine._keyword_search(query, result_count))
+
+    # Merging rescales keyword scores in place, so each round gets fresh copies
+    def setup():
+        return (list(semantic), [dict(result) for result in keyword], result_count), {}
+
+    merged = benchmark.pedantic(query_engine._merge_results, setup=setup, rounds=500)
+    assert len(merged) == result_count
@@ -0,0 +1,78 @@
+"""
+Shared fixtures for the benchmark suite
+"""
+
+import asyncio
+
+import faiss
+import pytest
+
+from rag.faiss_indexer import FAISSIndexer
+from rag.faiss_query import FAISSQueryEngine
+from services.extract_local import LocalExtractionService
+from services.extract_openai import OpenAIExtractionService
+from services.ocr_local import LocalOCRService
+
+from .corpus import DOCUMENT_SIZES, StubEncoder, chunk_documents, contract_text
+
+# Documents of DOCUMENT_SIZES["contract"] characters in the benchmark index (~70 chunks each)
+INDEX_DOCUMENTS = 200
+
+
+@pytest.fixture(scope="session")
+def event_loop_runner():
+    """Run coroutines that do suspend (e.g. executor hops) on one loop for the session"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture(scope="session", params=list(DOCUMENT_SIZES), ids=list(DOCUMENT_SIZES))
+def document_text(request) -> str:
+    """Contract text at each benchmark size"""
+    return contract_text(DOCUMENT_SIZES[request.param], seed=1)
+
+
+@pytest.fixture(scope="session")
+def indexer() -> FAISSIndexer:
+    """Indexer over synthetic documents, embedded with the stub encoder"""
+    indexer = FAISSIndexer(index_path="./.benchmarks/faiss_index")
+    indexer.embedding_model = StubEncoder(indexer.embedding_dimension)
+    indexer._initialized = True  # skip model download and index loading
+
+    chunks = chunk_documents(indexer, INDEX_DOCUMENTS, DOCUMENT_SIZES["contract"])
+    embeddings = indexer.embedding_model.encode([chunk["content"] for chunk in chunks])
+
+    indexer.index = faiss.IndexFlatIP(indexer.embedding_dimension)
+    indexer.index.add(embeddings)
+    indexer.document_store = dict(enumerate(chunks))
+    return indexer
+
+
+@pytest.fixture(scope="session")
+def query_engine(indexer) -> FAISSQueryEngine:
+    """Query engine over the benchmark indexer, without answer generation or reranking"""
+    engine = FAISSQueryEngine()
+    engine.indexer = indexer
+    engine.reranker.enabled = False
+    return engine
+
+
+@pytest.fixture(scope="session")
+def local_extraction() -> LocalExtractionService:
+    """Local extraction service using only its pattern extractors (NER models are not loaded)"""
+    service = LocalExtractionService()
+    service._initialized = True
+    return service
+
+
+@pytest.fixture(scope="session")
+def openai_extraction() -> OpenAIExtractionService:
+    """OpenAI extraction service for parsing only; no client is created"""
+    return OpenAIExtractionService()
+
+
+@pytest.fixture(scope="session")
+def local_ocr() -> LocalOCRService:
+    """Local OCR service (Tesseract is never invoked by these benchmarks)"""
+    return LocalOCRService()
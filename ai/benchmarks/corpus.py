@@ -0,0 +1,270 @@
+"""
+Deterministic synthetic corpora for benchmarks
+
+Text is assembled from contract-like clauses that exercise every extractor
+(project and client names, values, dates, payment terms, services, KPIs,
+SLAs, penalties and obligation sentences), so benchmarks measure matching
+work rather than patterns failing fast on unrelated text.
+"""
+
+import json
+import random
+import zlib
+from typing import List, Dict, Any
+
+import numpy as np
+
+# Corpus sizes in characters: a single page, a typical contract, a bundle with schedules
+DOCUMENT_SIZES = {
+    "page": 3_000,
+    "contract": 30_000,
+    "bundle": 300_000
+}
+
+PROJECTS = ["Terminal 2 Expansion Project", "Northgate Mall Refurbishment Project", "Harbour Bridge Lighting Project"]
+CLIENTS = ["Acme Facilities Inc.", "Northwind Property Management LLC", "Contoso Airports Ltd"]
+COUNTRIES = ["United Kingdom", "Germany", "Netherlands", "Ireland", "United States"]
+MONTHS = ["January", "March", "June", "September", "December"]
+SERVICES = ["cleaning service", "HVAC maintenance", "security support", "waste management service", "consulting"]
+PARTIES = ["The Contractor", "The Service Provider", "The Supplier", "The Client"]
+VERBS = ["shall submit", "must provide", "will maintain", "shall ensure", "is required to deliver", "shall comply with"]
+OBJECTS = [
+    "a written report on all incidents", "the maintenance schedule for all escalators",
+    "adequate staffing at every terminal", "safety procedures set out in Schedule 4",
+    "monthly invoices with supporting time sheets", "quarterly performance statistics"
+]
+FREQUENCIES = ["daily", "weekly", "monthly", "quarterly", "annually", "every 2 weeks"]
+DEADLINES = ["within 10 days", "within 48 hours", "by 31/03/2025", "no later than the fifth working day"]
+FILLER = [
+    "Nothing in this Agreement shall be construed as creating a partnership between the parties.",
+    "Headings are for convenience only and do not affect the interpretation of this Agreement.",
+    "Any notice given under this Agreement must be in writing and delivered by hand or recorded post.",
+    "This Agreement may be executed in any number of counterparts, each of which is an original.",
+    "The parties acknowledge that they have read and understood the terms of this Agreement."
+]
+
+
+def _header(rng: random.Random) -> str:
+    """Contract preamble carrying the single-valued metadata fields"""
+    project = rng.choice(PROJECTS)
+    client = rng.choice(CLIENTS)
+    return (
+        f"SERVICES AGREEMENT\n\n"
+        f"Project Name: {project}\n"
+        f"Client: {client}\n"
+        f"This Agreement is made between {client} and Facility Partners Ltd for the {project}.\n"
+        f"Contract Value: ${rng.randint(1, 9)},{rng.randint(100, 999)},000.00\n"
+        f"The commencement date is {rng.randint(1, 28)} {rng.choice(MONTHS)} 2024 and the expiration date is "
+        f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, 2027.\n"
+        f"The services will be performed in {rng.choice(COUNTRIES)}.\n"
+        f"Payment terms: net {rng.choice([30, 45, 60])} days from receipt of a valid invoice.\n\n"
+    )
+
+
+def _clause(rng: random.Random, number: str) -> str:
+    """One numbered clause mixing obligations with service, KPI, SLA and penalty wording"""
+    kind = rng.randrange(6)
+    party = rng.choice(PARTIES)
+
+    if kind == 0:
+        body = (
+            f"Services: the provider will supply {rng.choice(SERVICES)} and {rng.choice(SERVICES)} "
+            f"for all areas listed in Annex A."
+        )
+    elif kind == 1:
+        body = f"KPI: at least {rng.randint(90, 99)}% of scheduled tasks completed on time each month."
+    elif kind == 2:
+        body = f"Response time for priority incidents: {rng.randint(1, 8)} hours from notification."
+    elif kind == 3:
+        body = (
+            f"Penalty: a fine of ${rng.randint(100, 5000)} shall be charged for each day of delay. "
+            f"Liquidated damages: capped at {rng.randint(5, 15)}% of the Contract Value."
+        )
+    else:
+        body = (
+            f"{party} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(FREQUENCIES)} "
+            f"{rng.choice(DEADLINES)}. {rng.choice(FILLER)}"
+        )
+
+    return f"{number} {body}\n"
+
+
+def contract_text(size: int, seed: int = 0) -> str:
+    """Contract-like text of roughly `size` characters, ending on a sentence boundary"""
+    rng = random.Random(seed)
+    parts = [_header(rng)]
+    length = len(parts[0])
+    section = 1
+
+    while length < size:
+        heading = f"\n{section}. SECTION {section}\n\n"
+        parts.append(heading)
+        length += len(heading)
+
+        for clause in range(1, rng.randint(4, 9)):
+            text = _clause(rng, f"{section}.{clause}")
+            parts.append(text)
+            length += len(text)
+
+        section += 1
+
+    text = "".join(parts)[:size]
+    return text[:text.rfind(".") + 1]
+
+
+def chunk_documents(indexer, document_count: int, document_size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Document store entries for synthetic documents, chunked as the indexer does"""
+    rng = random.Random(seed)
+    chunks = []
+
+    for i in range(document_count):
+        document = {
+            "document_id": f"doc-{i}",
+            "title": f"Contract {i}",
+            "document_type": rng.choice(["contract", "amendment", "schedule"]),
+            "timestamp": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00",
+            "metadata": {
+                "project_id": f"project-{rng.randrange(20)}",
+                "contractor": rng.choice(CLIENTS),
+                "status": rng.choice(["active", "expired", "draft"]),
+                "category": rng.choice(["facilities", "security", "cleaning"]),
+                "confidence": round(rng.uniform(0.5, 1.0), 2)
+            }
+        }
+        text = contract_text(document_size, seed=seed * 100003 + i)
+        chunks.extend(indexer._build_chunk_metadata(document, indexer._chunk_text(text)))
+
+    return chunks
+
+
+def tesseract_data(paragraphs: int, lines_per_paragraph: int = 6, words_per_line: int = 10, seed: int = 0) -> Dict[str, List]:
+    """Output in the shape of pytesseract.image_to_data(..., output_type=DICT)"""
+    rng = random.Random(seed)
+    words = " ".join(FILLER).replace(".", "").split()
+    columns = ["level", "text", "conf", "left", "top", "width", "height"]
+    data = {column: [] for column in columns}
+
+    def add(level: int, text: str, conf: int, left: int, top: int, width: int, height: int):
+        for column, value in zip(columns, (level, text, conf, left, top, width, height)):
+            data[column].append(value)
+
+    top = 50
+    add(1, "", -1, 0, 0, 2480, 3508)
+    for _ in range(paragraphs):
+        add(2, "", -1, 100, top, 2200, lines_per_paragraph * 40)
+        for _ in range(lines_per_paragraph):
+            line = " ".join(rng.choice(words) for _ in range(words_per_line))
+            add(4, line, rng.randint(60, 96), 100, top, rng.randint(1600, 2200), 32)
+            for left, word in enumerate(line.split()):
+                add(5, word, rng.randint(60, 96), 100 + left * 200, top, 180, 32)
+            top += 40
+        top += 30
+
+    return data
+
+
+def page_image(height: int, width: int, channels: int = 3, seed: int = 0) -> np.ndarray:
+    """Scanned-page-like uint8 image: light noisy background with dark text-line bands"""
+    rng = np.random.default_rng(seed)
+    image = rng.normal(235, 12, size=(height, width)).clip(0, 255).astype(np.uint8)
+
+    line_height = max(height // 80, 4)
+    for top in range(height // 20, height - height // 20, line_height * 2):
+        band = image[top:top + line_height, width // 12:width - width // 12]
+        strokes = rng.random(band.shape) < 0.35
+        band[strokes] = rng.integers(0, 80, size=int(strokes.sum()), dtype=np.uint8)
+
+    if channels == 1:
+        return image
+    return np.repeat(image[:, :, None], channels, axis=2)
+
+
+def _snippet(text: str, rng: random.Random, words: int) -> str:
+    """A run of words from the text, sometimes reflowed or retyped as a model would quote it"""
+    tokens = text.split()
+    start = rng.randrange(max(len(tokens) - words, 1))
+    snippet = " ".join(tokens[start:start + words])
+
+    variant = rng.randrange(4)
+    if variant == 1:
+        snippet = snippet.upper()
+    elif variant == 2:
+        snippet = snippet.replace(" the ", " the\n")
+    elif variant == 3 and words > 4:
+        quoted = snippet.split()
+        quoted[len(quoted) // 2] = "said"
+        snippet = " ".join(quoted)
+
+    return snippet
+
+
+def metadata_response(text: str, seed: int = 0) -> str:
+    """Metadata extraction response in the JSON shape the prompt asks for"""
+    rng = random.Random(seed)
+
+    def field(value: str) -> Dict[str, Any]:
+        return {"value": value, "confidence": round(rng.uniform(0.6, 0.99), 2), "source_text": _snippet(text, rng, 8)}
+
+    response = {
+        "project_name": field(rng.choice(PROJECTS)),
+        "client_name": field(rng.choice(CLIENTS)),
+        "contract_value": field("$1,250,000.00"),
+        "start_date": field("2024-03-01"),
+        "end_date": field("2027-12-31"),
+        "country": field(rng.choice(COUNTRIES)),
+        "payment_terms": field("net 30 days"),
+        "list_of_services": [field(service) for service in SERVICES],
+        "kpis": [field(f"{90 + i}% of tasks on time") for i in range(5)],
+        "slas": [field(f"{i} hour response") for i in range(1, 6)],
+        "penalty_clauses": [field(f"${i * 100} per day of delay") for i in range(1, 6)]
+    }
+    return "```json\n" + json.dumps(response, indent=2) + "\n```"
+
+
+def obligations_response(text: str, count: int, seed: int = 0) -> str:
+    """Obligations extraction response with `count` items quoting the text"""
+    rng = random.Random(seed)
+    items = []
+
+    for _ in range(count):
+        item = {
+            "description": {"value": f"{rng.choice(PARTIES)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}",
+                            "confidence": 0.9, "source_text": _snippet(text, rng, 14)},
+            "category": rng.choice(["reporting", "maintenance", "delivery", "compliance", "payment"])
+        }
+        if rng.random() < 0.6:
+            item["frequency"] = {"value": rng.choice(FREQUENCIES), "confidence": 0.8,
+                                 "source_text": _snippet(text, rng, 4)}
+        if rng.random() < 0.4:
+            item["due_date"] = {"value": rng.choice(DEADLINES), "confidence": 0.7,
+                                "source_text": _snippet(text, rng, 5)}
+        items.append(item)
+
+    return json.dumps(items)
+
+
+def source_snippets(text: str, count: int, words: int = 10, seed: int = 0) -> List[str]:
+    """Quoted snippets of the text for offset lookups"""
+    rng = random.Random(seed)
+    return [_snippet(text, rng, words) for _ in range(count)]
+
+
+class StubEncoder:
+    """Offline stand-in for SentenceTransformer: hashed bag-of-words vectors"""
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def encode(self, texts, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                embeddings[row, zlib.crc32(word.encode()) % self.dimension] += 1.0
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings /= np.maximum(norms, 1e-12)
+        return embeddings[0] if single else embeddings
@@ -0,0 +1,528 @@
+"""
+Synthetic contract corpus generator
+
+Builds reproducible corpora from the HTML contracts in seed/contracts/.
+Every contract starts from one seed template and gets new parties, values
+and dates. Its KPI/SLA rows, obligations and penalty clauses are sampled
+from the pool across all templates. Amounts and percentages are rescaled,
+and obligation frequencies and due dates are redrawn. Each contract can be
+written as plain text, a digital PDF with a text layer, or a scanned-image
+PDF. manifest.jsonl records the generated metadata as ground truth.
+
+    python -m benchmarks.generate_corpus --count 10000 --formats text,pdf --output ./corpus
+"""
+
+import argparse
+import json
+import logging
+import random
+import re
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from html.parser import HTMLParser
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+logger = logging.getLogger(__name__)
+
+SEED_CONTRACTS_DIR = Path(__file__).resolve().parents[2] / "seed" / "contracts"
+
+FORMATS = ["text", "pdf", "scanned"]
+FILE_EXTENSIONS = {"text": ".txt", "pdf": ".pdf", "scanned": ".pdf"}
+
+METADATA_FIELDS = {
+    "Project Name": "project_name",
+    "Client Name": "client_name",
+    "Contractor": "contractor",
+    "Contract Value": "contract_value",
+    "Start Date": "start_date",
+    "End Date": "end_date",
+    "Country": "country",
+    "Payment Terms": "payment_terms"
+}
+
+REGIONS = ["Regional", "Metropolitan", "Northern", "Coastal", "Central", "Eastern", "Riverside", "Highland"]
+FACILITIES = [
+    "Transportation Hub", "Shopping Center", "Airport Terminal", "Hospital Campus", "Logistics Park",
+    "Convention Center", "Metro Depot", "Water Treatment Plant", "Stadium", "Office Tower"
+]
+PROJECT_KINDS = ["Development", "Expansion", "Refurbishment", "Modernization", "Operations and Maintenance"]
+AUTHORITIES = [
+    "National Infrastructure Authority", "Urban Development Corporation", "Civil Aviation Authority",
+    "Ministry of Public Works", "Metropolitan Transit Agency", "Ports and Free Zones Authority",
+    "Municipal Facilities Department", "State Health Services Trust"
+]
+COMPANY_NAMES = ["Global", "Premier", "Atlas", "Summit", "Meridian", "Pinnacle", "Horizon", "Sterling", "Keystone"]
+COMPANY_KINDS = ["Construction Consortium", "Commercial Builders", "Facility Services", "Engineering Group", "Contracting"]
+COMPANY_SUFFIXES = ["LLC", "Ltd", "Inc", "Corp", "Company"]
+COUNTRIES = [
+    "United Arab Emirates", "United Kingdom", "United States", "Germany", "France", "Netherlands",
+    "Ireland", "Spain", "Italy", "Canada", "Australia", "Sweden", "Poland", "Switzerland"
+]
+PAYMENT_TERMS = [
+    "Monthly progress payments within {days} days of invoice",
+    "Bi-weekly progress payments within {days} days of invoice",
+    "Quarterly payments within {days} days of a certified statement",
+    "Milestone payments within {days} days of acceptance",
+    "Net {days} days from receipt of a valid invoice"
+]
+SCHEDULES = [
+    ("Daily", "Daily by 6:00 PM"),
+    ("Daily", "Continuous monitoring"),
+    ("Weekly", "Every Monday by 10:00 AM"),
+    ("Weekly", "Every Friday by 5:00 PM"),
+    ("Bi-weekly", "Every other Tuesday"),
+    ("Monthly", "5th of each month"),
+    ("Monthly", "Last working day of each month"),
+    ("Quarterly", "Every 90 days from contract start"),
+    ("Quarterly", "Within 15 days of quarter end"),
+    ("Annually", "Each contract anniversary"),
+    ("Milestone-based", "Per approved project timeline")
+]
+
+# A4 at 72 points per inch
+PAGE_WIDTH_PT, PAGE_HEIGHT_PT = 595, 842
+PAGE_MARGIN_PT = 56
+FONT_SIZE_PT = 10
+LINE_HEIGHT_PT = 13
+LINE_WIDTH_CHARS = 95
+LINES_PER_PAGE = (PAGE_HEIGHT_PT - 2 * PAGE_MARGIN_PT) // LINE_HEIGHT_PT
+
+# Characters outside Latin-1 in the templates, spelled out for the standard PDF fonts
+PDF_REPLACEMENTS = str.maketrans({"≥": ">=", "≤": "<=", "–": "-", "—": "-", "‘": "'", "’": "'", "“": '"', "”": '"', "•": "-"})
+
+OBLIGATION_PATTERN = re.compile(r'\s*<div class="obligation">.*?</div>', re.DOTALL)
+PENALTY_PATTERN = re.compile(r'\s*<div class="penalty">.*?</div>', re.DOTALL)
+KPI_ROW_PATTERN = re.compile(r'\s*<tr>\s*(?:<td>[^<]*</td>\s*){4}</tr>')
+METADATA_ROW_PATTERN = re.compile(r'<tr><td><strong>([^<:]+):</strong></td><td>([^<]*)</td></tr>')
+CONTRACT_NUMBER_PATTERN = re.compile(r'\b[A-Z]{2,3}-\d{4}-\d{3}\b')
+AMOUNT_PATTERN = re.compile(r'\$([\d,]+)')
+PERCENT_PATTERN = re.compile(r'(\d+(?:\.\d+)?)%')
+SCHEDULE_PATTERN = re.compile(
+    r'(<strong>Frequency:</strong>)[^<]*(</p>\s*<p><strong>Due Date:</strong>)[^<]*'
+)
+HEADING_NUMBER_PATTERN = re.compile(r'<h4>\d+\.\d+ ')
+
+
+class ContractTemplate:
+    """A seed contract split into its fixed skeleton and its sampleable parts"""
+
+    def __init__(self, name: str, html: str):
+        self.name = name
+        self.metadata = {
+            METADATA_FIELDS[label]: value
+            for label, value in METADATA_ROW_PATTERN.findall(html) if label in METADATA_FIELDS
+        }
+        self.obligations = [block.strip() for block in OBLIGATION_PATTERN.findall(html)]
+        self.penalties = [block.strip() for block in PENALTY_PATTERN.findall(html)]
+        self.kpi_rows = [row.strip() for row in KPI_ROW_PATTERN.findall(html)]
+
+        # Each repeated part collapses to a single slot where the sampled parts go
+        skeleton = html
+        for field, value in self.metadata.items():
+            skeleton = skeleton.replace(value, "{%s}" % field)
+        for pattern, slot in [(OBLIGATION_PATTERN, "obligations"), (PENALTY_PATTERN, "penalties"), (KPI_ROW_PATTERN, "kpi_rows")]:
+            skeleton = _collapse(pattern, skeleton, "{%s}" % slot)
+        self.skeleton = CONTRACT_NUMBER_PATTERN.sub("{contract_number}", skeleton)
+
+
+def _collapse(pattern: re.Pattern, html: str, slot: str) -> str:
+    """Replace the first match of a pattern with a slot and drop the rest"""
+    matches = list(pattern.finditer(html))
+    if not matches:
+        return html
+
+    parts = [html[:matches[0].start()], "\n        " + slot]
+    for previous, match in zip(matches, matches[1:]):
+        parts.append(html[previous.end():match.start()])
+    parts.append(html[matches[-1].end():])
+    return "".join(parts)
+
+
+def load_templates(directory: Path = SEED_CONTRACTS_DIR) -> List[ContractTemplate]:
+    """Load the seed HTML contracts"""
+    templates = [
+        ContractTemplate(path.stem, path.read_text(encoding="utf-8"))
+        for path in sorted(directory.glob("*.html"))
+    ]
+    if not templates:
+        raise FileNotFoundError(f"No HTML contract templates found in {directory}")
+    return templates
+
+
+def _company(rng: random.Random) -> str:
+    return f"{rng.choice(COMPANY_NAMES)} {rng.choice(COMPANY_KINDS)} {rng.choice(COMPANY_SUFFIXES)}"
+
+
+def _format_date(value: date) -> str:
+    return f"{value:%B} {value.day}, {value.year}"
+
+
+def _scale_amount(match: re.Match, rng: random.Random) -> str:
+    amount = int(match.group(1).replace(",", "")) * rng.uniform(0.4, 2.5)
+    # Two significant figures, as contract amounts usually are
+    magnitude = 10 ** max(len(str(int(amount))) - 2, 0)
+    return f"${int(round(amount / magnitude) * magnitude):,}"
+
+
+def _scale_percent(match: re.Match, rng: random.Random) -> str:
+    value = float(match.group(1))
+    if value >= 90:
+        # Targets near 100% stay plausible
+        return f"{min(100, round(value + rng.uniform(-4, 2)))}%"
+    scaled = value * rng.uniform(0.5, 2.0)
+    return f"{round(scaled, 1) if value < 1 else max(1, round(scaled))}%"
+
+
+def _renumber(blocks: List[str], section: str) -> List[str]:
+    return [
+        HEADING_NUMBER_PATTERN.sub(f"<h4>{section}.{i} ", block, count=1)
+        for i, block in enumerate(blocks, start=1)
+    ]
+
+
+def _section_number(blocks: List[str], default: str) -> str:
+    match = re.search(r'<h4>(\d+)\.', blocks[0]) if blocks else None
+    return match.group(1) if match else default
+
+
+def generate_contract(
+    index: int,
+    templates: List[ContractTemplate],
+    seed: int = 0,
+    obligations: Tuple[int, int] = (6, 30)
+) -> Tuple[str, Dict[str, Any]]:
+    """Generate one contract as HTML, with its ground-truth metadata"""
+    rng = random.Random(seed * 1_000_003 + index)
+    template = rng.choice(templates)
+
+    start = date(2022, 1, 1) + timedelta(days=rng.randrange(5 * 365))
+    end = start + timedelta(days=rng.choice([12, 18, 24, 36, 48, 60]) * 30)
+    value = int(10 ** rng.uniform(6, 8.5)) // 10000 * 10000
+
+    metadata = {
+        "project_name": f"{rng.choice(REGIONS)} {rng.choice(FACILITIES)} {rng.choice(PROJECT_KINDS)}",
+        "client_name": rng.choice(AUTHORITIES),
+        "contractor": _company(rng),
+        "contract_value": f"${value:,} USD",
+        "start_date": _format_date(start),
+        "end_date": _format_date(end),
+        "country": rng.choice(COUNTRIES),
+        "payment_terms": rng.choice(PAYMENT_TERMS).format(days=rng.choice([14, 21, 30, 45, 60]))
+    }
+    contract_number = f"{''.join(word[0] for word in metadata['project_name'].split()[:3]).upper()}-{start.year}-{index % 1000:03d}"
+
+    # Sample the repeated parts from every template, so contracts mix clauses across seeds
+    obligation_pool = [block for t in templates for block in t.obligations]
+    penalty_pool = [block for t in templates for block in t.penalties]
+    kpi_pool = [row for t in templates for row in t.kpi_rows]
+
+    obligation_count = rng.randint(*obligations)
+    sampled_obligations = [
+        SCHEDULE_PATTERN.sub(lambda m, s=rng.choice(SCHEDULES): f"{m.group(1)} {s[0]}{m.group(2)} {s[1]}", block)
+        for block in (rng.choice(obligation_pool) for _ in range(obligation_count))
+    ]
+    sampled_penalties = rng.sample(penalty_pool, rng.randint(2, len(penalty_pool)))
+    sampled_kpis = rng.sample(kpi_pool, rng.randint(3, len(kpi_pool)))
+
+    parts = {
+        "obligations": "\n\n        ".join(
+            _renumber(sampled_obligations, _section_number(template.obligations, "3"))
+        ),
+        "penalties": "\n\n        ".join(_renumber(sampled_penalties, _section_number(template.penalties, "4"))),
+        "kpi_rows": "\n            ".join(sampled_kpis)
+    }
+
+    html = template.skeleton
+    for slot, content in parts.items():
+        html = html.replace("{%s}" % slot, content)
+
+    # Rescale amounts and percentages before the metadata values (which contain amounts) go in
+    html = AMOUNT_PATTERN.sub(lambda m: _scale_amount(m, rng), html)
+    html = PERCENT_PATTERN.sub(lambda m: _scale_percent(m, rng), html)
+
+    html = html.replace("{contract_number}", contract_number)
+    for field, value in metadata.items():
+        html = html.replace("{%s}" % field, value)
+
+    record = {
+        "document_id": f"contract-{index:06d}",
+        "template": template.name,
+        "contract_number": contract_number,
+        "obligation_count": obligation_count,
+        **metadata
+    }
+    return html, record
+
+
+class _TextExtractor(HTMLParser):
+    """HTML to plain text with one line per block and ' | ' between table cells"""
+
+    BLOCK_TAGS = {"p", "div", "h1", "h2", "h3", "h4", "li", "tr", "table", "ul", "br"}
+
+    def __init__(self):
+        super().__init__()
+        self.lines: List[str] = []
+        self.current: List[str] = []
+        self.skip_depth = 0
+        self.cell_index = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("style", "head", "script"):
+            self.skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+            if tag == "li":
+                self.current.append("- ")
+            elif tag == "tr":
+                self.cell_index = 0
+        elif tag in ("td", "th"):
+            if self.cell_index:
+                # Key/value rows read as "Label: value", other rows as "a | b | c"
+                line = "".join(self.current).rstrip()
+                self.current = [line, " " if line.endswith(":") else " | "]
+            self.cell_index += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("style", "head", "script"):
+            self.skip_depth -= 1
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+            if tag in ("div", "table", "ul", "h1", "h2"):
+                self._blank_line()
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.current.append(re.sub(r"\s+", " ", data))
+
+    def _flush(self):
+        line = "".join(self.current).strip()
+        if line and line != "-":
+            self.lines.append(line)
+        self.current = []
+
+    def _blank_line(self):
+        if self.lines and self.lines[-1]:
+            self.lines.append("")
+
+    def text(self) -> str:
+        self._flush()
+        return "\n".join(self.lines).strip() + "\n"
+
+
+def html_to_text(html: str) -> str:
+    """Render contract HTML as plain text"""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+
+def paginate(text: str) -> List[List[str]]:
+    """Wrap text to A4 lines and split it into pages"""
+    lines = []
+    for paragraph in text.translate(PDF_REPLACEMENTS).splitlines():
+        lines.extend(textwrap.wrap(paragraph, LINE_WIDTH_CHARS) or [""])
+    return [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+
+
+def _pdf_string(line: str) -> str:
+    encoded = line.encode("latin-1", "replace").decode("latin-1")
+    return encoded.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def render_pdf(text: str, title: str = "") -> bytes:
+    """Render text as a digital PDF (Helvetica, selectable text layer)"""
+    pages = paginate(text)
+
+    # Objects 1-3 are the catalog, page tree and font; each page adds its page and content objects
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    ]
+    page_ids = []
+
+    for lines in pages:
+        commands = [f"BT /F1 {FONT_SIZE_PT} Tf {LINE_HEIGHT_PT} TL {PAGE_MARGIN_PT} {PAGE_HEIGHT_PT - PAGE_MARGIN_PT} Td"]
+        commands.extend(f"({_pdf_string(line)}) '" for line in lines)
+        commands.append("ET")
+        stream = "\n".join(commands).encode("latin-1")
+
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH_PT} {PAGE_HEIGHT_PT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode("latin-1")
+        )
+        page_ids.append(len(objects))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")
+
+    info_id = len(objects) + 1
+    objects.append(f"<< /Title ({_pdf_string(title)}) /Producer (benchmarks.generate_corpus) >>".encode("latin-1"))
+
+    output = BytesIO()
+    output.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for object_id, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    xref_offset = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(
+        b"trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, info_id, xref_offset)
+    )
+    return output.getvalue()
+
+
+def _load_font(size: int) -> ImageFont.ImageFont:
+    """A scalable font if one is available, else Pillow's built-in font"""
+    for name in ("DejaVuSans.ttf", "LiberationSans-Regular.ttf", "Arial.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def render_scanned_pdf(text: str, seed: int = 0, dpi: int = 150) -> bytes:
+    """Render text as an image-only PDF that looks scanned (skew, blur, noise, speckles)"""
+    rng = np.random.default_rng(seed)
+    scale = dpi / 72
+    width, height = int(PAGE_WIDTH_PT * scale), int(PAGE_HEIGHT_PT * scale)
+    font = _load_font(int(FONT_SIZE_PT * scale))
+
+    images = []
+    for lines in paginate(text):
+        page = Image.new("L", (width, height), color=255)
+        draw = ImageDraw.Draw(page)
+        for row, line in enumerate(lines):
+            y = (PAGE_MARGIN_PT + row * LINE_HEIGHT_PT) * scale
+            draw.text((PAGE_MARGIN_PT * scale, y), line, fill=int(rng.integers(0, 60)), font=font)
+
+        page = page.rotate(float(rng.uniform(-1.2, 1.2)), resample=Image.BILINEAR, fillcolor=255)
+        page = page.filter(ImageFilter.GaussianBlur(radius=float(rng.uniform(0.3, 0.8))))
+
+        pixels = np.asarray(page, dtype=np.float32)
+        pixels += rng.normal(0, 6, size=pixels.shape)
+        pixels[rng.random(pixels.shape) < 0.0008] = 0
+        images.append(Image.fromarray(pixels.clip(0, 255).astype(np.uint8)))
+
+    output = BytesIO()
+    images[0].save(output, format="PDF", save_all=True, append_images=images[1:], resolution=float(dpi), quality=60)
+    return output.getvalue()
+
+
+def _write_contract(task: Tuple[int, List[ContractTemplate], int, Tuple[int, int], List[str], Path, int]) -> Dict[str, Any]:
+    """Generate and write one contract in every requested format (runs in a worker process)"""
+    index, templates, seed, obligations, formats, output_dir, dpi = task
+    html, record = generate_contract(index, templates, seed, obligations)
+    text = html_to_text(html)
+    name = record["document_id"]
+
+    record["characters"] = len(text)
+    record["files"] = {}
+    for file_format in formats:
+        if file_format == "text":
+            content = text.encode("utf-8")
+        elif file_format == "pdf":
+            content = render_pdf(text, title=record["project_name"])
+        else:
+            content = render_scanned_pdf(text, seed=seed * 1_000_003 + index, dpi=dpi)
+
+        path = output_dir / file_format / f"{name}{FILE_EXTENSIONS[file_format]}"
+        path.write_bytes(content)
+        record["files"][file_format] = str(path.relative_to(output_dir))
+
+    return record
+
+
+def generate_corpus(
+    output_dir: Path,
+    count: int,
+    formats: List[str],
+    seed: int = 0,
+    obligations: Tuple[int, int] = (6, 30),
+    dpi: int = 150,
+    workers: int = 1,
+    templates_dir: Path = SEED_CONTRACTS_DIR
+) -> Path:
+    """Write `count` contracts and a manifest.jsonl of their metadata; returns the manifest path"""
+    templates = load_templates(templates_dir)
+    for file_format in formats:
+        (output_dir / file_format).mkdir(parents=True, exist_ok=True)
+
+    tasks = ((i, templates, seed, obligations, formats, output_dir, dpi) for i in range(count))
+    manifest_path = output_dir / "manifest.jsonl"
+    start_time = time.time()
+
+    with open(manifest_path, "w", encoding="utf-8") as manifest:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                records = executor.map(_write_contract, tasks, chunksize=16)
+                _write_records(manifest, records, count, start_time)
+        else:
+            _write_records(manifest, map(_write_contract, tasks), count, start_time)
+
+    return manifest_path
+
+
+def _write_records(manifest, records, count: int, start_time: float):
+    for i, record in enumerate(records, start=1):
+        manifest.write(json.dumps(record) + "\n")
+        if i % 500 == 0 or i == count:
+            logger.info(f"Generated {i}/{count} contracts in {time.time() - start_time:.1f}s")
+
+
+def load_manifest(corpus_dir: Path) -> List[Dict[str, Any]]:
+    """Read a generated corpus manifest"""
+    with open(corpus_dir / "manifest.jsonl", encoding="utf-8") as manifest:
+        return [json.loads(line) for line in manifest if line.strip()]
+
+
+def _parse_range(value: str) -> Tuple[int, int]:
+    low, _, high = value.partition("-")
+    return int(low), int(high or low)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic contract corpus from the seed templates")
+    parser.add_argument("--output", type=Path, default=Path("./corpus"), help="Output directory")
+    parser.add_argument("--count", type=int, default=100, help="Number of contracts")
+    parser.add_argument("--formats", default="text,pdf", help=f"Comma-separated formats: {', '.join(FORMATS)}")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same corpus")
+    parser.add_argument("--obligations", type=_parse_range, default=(6, 30), help="Obligations per contract, e.g. 6-30")
+    parser.add_argument("--dpi", type=int, default=150, help="Resolution of scanned PDFs")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--templates", type=Path, default=SEED_CONTRACTS_DIR, help="Directory of HTML contract templates")
+    args = parser.parse_args(argv)
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"Unknown formats: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    manifest = generate_corpus(
+        args.output, args.count, formats, args.seed, args.obligations, args.dpi, args.workers, args.templates
+    )
+    logger.info(f"Wrote {manifest}")
+
+
+if __name__ == "__main__":
+    main()
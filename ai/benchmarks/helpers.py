@@ -0,0 +1,13 @@
+"""
+Helpers for benchmarking async service methods
+"""
+
+
+def run_sync(coroutine):
+    """Run a coroutine that never suspends (CPU-only async methods) without event loop overhead"""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError("Coroutine suspended; run it on an event loop instead")
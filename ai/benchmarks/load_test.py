@@ -0,0 +1,394 @@
+"""
+End-to-end load driver for the AI service
+
+Sends a weighted mix of requests built from a generated corpus (see
+generate_corpus) with a fixed number of concurrent clients. Requests go
+either to the app in-process through httpx's ASGI transport, with the app
+lifespan run as in production, or to a running server. The driver reports
+throughput, p50/p95/p99 latency per route and resident memory over time.
+
+    python -m benchmarks.generate_corpus --count 200 --output ./corpus
+    python -m benchmarks.load_test --corpus ./corpus --concurrency 16 --duration 120
+    python -m benchmarks.load_test --url http://localhost:8000 --pid 1234 --mix qa=8,health=2
+
+The in-process client always connects from the same address, so set
+RATE_LIMIT_ENABLED=false to measure capacity rather than the rate limiter.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple, Callable, AsyncIterator
+
+import httpx
+import psutil
+
+from .generate_corpus import generate_contract, html_to_text, load_manifest, load_templates
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIX = "qa=6,metadata=2,obligations=2,health=1"
+
+QUESTIONS = [
+    "What are the penalties for late progress reports in the {project_name}?",
+    "How often must the contractor submit safety inspection reports?",
+    "What is the contract value of the {project_name}?",
+    "Which obligations in the {project_name} are due monthly?",
+    "What are the liquidated damages for delays?",
+    "When does the contract with {client_name} end?",
+    "What KPIs apply to construction quality?",
+    "What are the payment terms agreed with {contractor}?"
+]
+
+
+class Corpus:
+    """Contract texts and files to build requests from"""
+
+    def __init__(self, records: List[Dict[str, Any]], texts: List[str], directory: Optional[Path] = None):
+        self.records = records
+        self.texts = texts
+        self.directory = directory
+        self._files: Dict[str, bytes] = {}
+
+    @classmethod
+    def load(cls, directory: Path, limit: int = 500) -> "Corpus":
+        """Load up to `limit` text contracts of a generated corpus"""
+        records = [record for record in load_manifest(directory) if "text" in record["files"]][:limit]
+        if not records:
+            raise ValueError(f"Corpus in {directory} has no text files; generate it with --formats text")
+
+        texts = [(directory / record["files"]["text"]).read_text(encoding="utf-8") for record in records]
+        return cls(records, texts, directory)
+
+    @classmethod
+    def generate(cls, count: int = 50, seed: int = 0) -> "Corpus":
+        """Generate a small text-only corpus in memory"""
+        templates = load_templates()
+        records, texts = [], []
+        for i in range(count):
+            html, record = generate_contract(i, templates, seed)
+            records.append(record)
+            texts.append(html_to_text(html))
+        return cls(records, texts)
+
+    def file(self, index: int, file_format: str) -> Optional[Tuple[str, bytes]]:
+        """(filename, content) of a contract in a rendered format, if the corpus has it"""
+        record = self.records[index]
+        relative = record["files"].get(file_format) if self.directory else None
+        if relative is None:
+            return None
+
+        if relative not in self._files:
+            self._files[relative] = (self.directory / relative).read_bytes()
+        return Path(relative).name, self._files[relative]
+
+
+# A request spec is the method, path and httpx request keyword arguments
+RequestSpec = Tuple[str, str, Dict[str, Any]]
+
+
+def _health(corpus: Corpus, rng: random.Random) -> RequestSpec:
+    return "GET", "/health", {}
+
+
+def _qa(corpus: Corpus, rng: random.Random) -> RequestSpec:
+    record = rng.choice(corpus.records)
+    query = rng.choice(QUESTIONS).format(**record)
+    return "POST", "/qa/query", {"json": {"query": query, "max_results": 5}}
+
+
+def _text_upload(corpus: Corpus, rng: random.Random) -> Tuple[int, Dict[str, Any]]:
+    index = rng.randrange(len(corpus.texts))
+    filename = f"{corpus.records[index]['document_id']}.txt"
+    return index, {"files": {"file": (filename, corpus.texts[index].encode("utf-8"), "text/plain")}}
+
+
+def _metadata(corpus: Corpus, rng: random.Random) -> RequestSpec:
+    _, kwargs = _text_upload(corpus, rng)
+    return "POST", "/nlp/metadata", kwargs
+
+
+def _obligations(corpus: Corpus, rng: random.Random) -> RequestSpec:
+    index, kwargs = _text_upload(corpus, rng)
+    kwargs["params"] = {"document_id": corpus.records[index]["document_id"]}
+    return "POST", "/nlp/obligations", kwargs
+
+
+def _ocr(corpus: Corpus, rng: random.Random) -> RequestSpec:
+    index = rng.randrange(len(corpus.records))
+    upload = corpus.file(index, "scanned") or corpus.file(index, "pdf")
+    if upload is None:
+        raise ValueError("The ocr route needs a corpus generated with --formats pdf or scanned")
+    filename, content = upload
+    return "POST", "/ocr/extract", {"files": {"file": (filename, content, "application/pdf")}}
+
+
+def _ingest(corpus: Corpus, rng: random.Random) -> RequestSpec:
+    index = rng.randrange(len(corpus.texts))
+    record = corpus.records[index]
+    # A fresh document ID per request, so the index grows as it would in production
+    document_id = f"{record['document_id']}-{rng.getrandbits(32):08x}"
+    return "POST", "/ingest", {"json": {
+        "text": corpus.texts[index],
+        "document_id": document_id,
+        "title": record["project_name"]
+    }}
+
+
+ROUTES: Dict[str, Callable[[Corpus, random.Random], RequestSpec]] = {
+    "health": _health,
+    "qa": _qa,
+    "metadata": _metadata,
+    "obligations": _obligations,
+    "ocr": _ocr,
+    "ingest": _ingest
+}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse a route mix such as 'qa=6,metadata=2,health=1'"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in ROUTES:
+            raise ValueError(f"Unknown route '{name}'; choose from {', '.join(ROUTES)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class LoadReport:
+    """Request outcomes and memory samples collected during a run"""
+
+    def __init__(self):
+        self.results: List[Tuple[str, int, float, float]] = []  # route, status (0 = failed), seconds, finished at
+        self.errors: Counter = Counter()
+        self.rss_samples: List[Tuple[float, int]] = []  # elapsed seconds, bytes
+        self.start_time = time.monotonic()
+        self.duration = 0.0
+
+    def record(self, route: str, status: int, seconds: float):
+        self.results.append((route, status, seconds, time.monotonic() - self.start_time))
+
+    def summary(self) -> Dict[str, Any]:
+        """Throughput, latency percentiles and status counts, per route and overall"""
+        routes: Dict[str, List[Tuple[int, float]]] = {}
+        for route, status, seconds, _ in self.results:
+            routes.setdefault(route, []).append((status, seconds))
+
+        def describe(outcomes: List[Tuple[int, float]]) -> Dict[str, Any]:
+            latencies = sorted(seconds for status, seconds in outcomes if status)
+            statuses = Counter(str(status) if status else "failed" for status, _ in outcomes)
+            return {
+                "requests": len(outcomes),
+                "throughput": len(outcomes) / self.duration if self.duration else 0.0,
+                "statuses": dict(sorted(statuses.items())),
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": latencies[-1] if latencies else 0.0
+            }
+
+        rss = [value for _, value in self.rss_samples]
+        return {
+            "duration": self.duration,
+            "overall": describe([(status, seconds) for _, status, seconds, _ in self.results]),
+            "routes": {route: describe(outcomes) for route, outcomes in sorted(routes.items())},
+            "errors": dict(self.errors.most_common(10)),
+            "rss": {
+                "start": rss[0] if rss else None,
+                "peak": max(rss) if rss else None,
+                "end": rss[-1] if rss else None,
+                "samples": self.rss_samples
+            }
+        }
+
+
+def format_report(summary: Dict[str, Any], rss_points: int = 10) -> str:
+    """Human-readable report"""
+    lines = [
+        f"Duration: {summary['duration']:.1f}s",
+        "",
+        f"{'route':<14}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}  statuses"
+    ]
+    for route, stats in list(summary["routes"].items()) + [("all", summary["overall"])]:
+        statuses = " ".join(f"{status}:{count}" for status, count in stats["statuses"].items())
+        lines.append(
+            f"{route:<14}{stats['requests']:>10}{stats['throughput']:>10.2f}"
+            f"{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}{stats['p99'] * 1000:>10.1f}"
+            f"{stats['max'] * 1000:>10.1f}  {statuses}"
+        )
+
+    if summary["errors"]:
+        lines.append("")
+        lines.append("Errors:")
+        lines.extend(f"  {count} x {error}" for error, count in summary["errors"].items())
+
+    samples = summary["rss"]["samples"]
+    if samples:
+        lines.append("")
+        lines.append(
+            f"RSS: start {summary['rss']['start'] / 2**20:.0f} MB, peak {summary['rss']['peak'] / 2**20:.0f} MB, "
+            f"end {summary['rss']['end'] / 2**20:.0f} MB"
+        )
+        step = max(len(samples) // rss_points, 1)
+        lines.extend(f"  {elapsed:>7.1f}s  {rss / 2**20:>8.0f} MB" for elapsed, rss in samples[::step])
+
+    statuses = summary["overall"]["statuses"]
+    if "429" in statuses:
+        lines.append("")
+        lines.append(f"{statuses['429']} requests were rate limited (429); set RATE_LIMIT_ENABLED=false to measure capacity")
+
+    return "\n".join(lines)
+
+
+async def _sample_rss(process: psutil.Process, report: LoadReport, interval: float):
+    """Record the process RSS every `interval` seconds"""
+    while True:
+        try:
+            report.rss_samples.append((time.monotonic() - report.start_time, process.memory_info().rss))
+        except psutil.Error as e:
+            logger.warning(f"RSS sampling stopped: {e}")
+            return
+        await asyncio.sleep(interval)
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    corpus: Corpus,
+    mix: Dict[str, float],
+    concurrency: int,
+    duration: Optional[float] = None,
+    max_requests: Optional[int] = None,
+    seed: int = 0,
+    process: Optional[psutil.Process] = None,
+    sample_interval: float = 1.0
+) -> LoadReport:
+    """Run `concurrency` closed-loop clients until the duration or request count is reached"""
+    report = LoadReport()
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    deadline = report.start_time + duration if duration else math.inf
+    remaining = [max_requests if max_requests else math.inf]
+
+    async def worker(worker_id: int):
+        rng = random.Random(seed * 7919 + worker_id)
+        while time.monotonic() < deadline and remaining[0] > 0:
+            remaining[0] -= 1
+            route = rng.choices(names, weights)[0]
+            method, path, kwargs = ROUTES[route](corpus, rng)
+
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                report.record(route, response.status_code, time.perf_counter() - start)
+                if response.status_code >= 500:
+                    report.errors[f"{route}: HTTP {response.status_code}"] += 1
+            except httpx.HTTPError as e:
+                report.record(route, 0, time.perf_counter() - start)
+                report.errors[f"{route}: {type(e).__name__}"] += 1
+
+    sampler = asyncio.create_task(_sample_rss(process, report, sample_interval)) if process else None
+    try:
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    finally:
+        report.duration = time.monotonic() - report.start_time
+        if sampler:
+            sampler.cancel()
+            if process:
+                report.rss_samples.append((report.duration, process.memory_info().rss))
+
+    return report
+
+
+@asynccontextmanager
+async def in_process_client(timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    """Client for the app in this process, with its startup and shutdown run around the load"""
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            yield client
+
+
+@asynccontextmanager
+async def remote_client(url: str, timeout: float, concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    """Client for a running server"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        yield client
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    corpus = Corpus.load(args.corpus) if args.corpus else Corpus.generate(seed=args.seed)
+    mix = parse_mix(args.mix)
+
+    if args.url:
+        client_context = remote_client(args.url, args.timeout, args.concurrency)
+        process = psutil.Process(args.pid) if args.pid else None
+    else:
+        client_context = in_process_client(args.timeout)
+        process = psutil.Process(os.getpid())
+
+    async with client_context as client:
+        if args.warmup:
+            await run_load(client, corpus, mix, min(args.concurrency, args.warmup), max_requests=args.warmup, seed=args.seed + 1)
+
+        report = await run_load(
+            client, corpus, mix, args.concurrency,
+            duration=args.duration, max_requests=args.requests, seed=args.seed,
+            process=process, sample_interval=args.sample_interval
+        )
+
+    return report.summary()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load test the AI service in-process or against a running server")
+    parser.add_argument("--corpus", type=Path, help="Generated corpus directory (default: 50 contracts generated in memory)")
+    parser.add_argument("--url", help="Base URL of a running server (default: the app in-process)")
+    parser.add_argument("--pid", type=int, help="Server process ID to sample RSS from (with --url)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Route weights from {', '.join(ROUTES)} (default: {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run (0 = until --requests are sent)")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests")
+    parser.add_argument("--warmup", type=int, default=0, help="Requests to send before measuring")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout in seconds")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between RSS samples")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the request sequence")
+    parser.add_argument("--report", type=Path, help="Also write the full report, including RSS samples, as JSON")
+    args = parser.parse_args(argv)
+
+    if not args.duration and not args.requests:
+        parser.error("Set --duration or --requests")
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    summary = asyncio.run(main_async(args))
+
+    print(format_report(summary))
+    if args.report:
+        args.report.write_text(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+"""
+Retrieval quality and speed across FAISS index types, chunk sizes and search modes
+
+Contracts come from generate_corpus, and questions are labelled with the passage that answers them.
+Each labelled passage is a metadata line, an obligation or a KPI row of one contract. A retrieved chunk
+is relevant when it comes from that contract and covers most of the passage (or the passage covers most
+of the chunk). For every chunk size, index type and search mode the benchmark reports:
+
+- recall@k: share of questions with a relevant chunk in the top k
+- MRR: mean reciprocal rank of the first relevant chunk
+- p50/p99 search latency per question, through FAISSQueryEngine with query embeddings precomputed
+- index build time, serialized index size and process RSS growth while building
+- for semantic search, the overlap of approximate indexes' top k with the flat index's (exact) top k
+
+It runs offline with the deterministic stub encoder by default, or with a local
+sentence-transformers model (set HF_HUB_OFFLINE=1 to be sure nothing is downloaded):
+
+    python -m benchmarks.retrieval
+    python -m benchmarks.retrieval --model sentence-transformers/all-MiniLM-L6-v2 --chunk-sizes 512 --report retrieval.json
+
+Index parameters come from the FAISS_* settings (e.g. FAISS_HNSW_EF_SEARCH, FAISS_IVF_NPROBE).
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter
+from typing import Optional, List, Dict, Any, Tuple
+
+import faiss
+import numpy as np
+import psutil
+
+from models.qa_models import QARequest
+from rag.faiss_indexer import FAISSIndexer, CHUNK_OVERLAP, INDEX_TYPES
+from rag.faiss_query import FAISSQueryEngine
+
+from .corpus import StubEncoder
+from .generate_corpus import generate_contract, html_to_text, load_templates
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ("semantic", "keyword", "hybrid")
+
+METADATA_QUESTIONS = {
+    "Contract Value": "What is the total contract value of the {project_name}?",
+    "End Date": "When does the {project_name} contract end?",
+    "Contractor": "Which contractor was appointed for the {project_name}?",
+    "Payment Terms": "What payment terms apply to the {project_name}?"
+}
+OBLIGATION_QUESTION = "Which obligation carries a penalty of {penalty}?"
+KPI_QUESTION = "What is the penalty if the {kpi} target of {target} is not met?"
+
+OBLIGATION_TITLE = re.compile(r"^\d+\.\d+ \S")
+
+
+def _lines(text: str) -> List[Tuple[int, int, str]]:
+    """(start, end, line) for every non-empty line"""
+    return [(match.start(), match.end(), match.group()) for match in re.finditer(r"[^\n]+", text)]
+
+
+def _candidate_questions(record: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
+    """Every question this contract can answer, keyed by the text that identifies its passage"""
+    candidates = []
+    lines = _lines(text)
+
+    def add(kind: str, query: str, key: str, start: int, end: int):
+        candidates.append({
+            "kind": kind, "query": query, "key": key,
+            "document_id": record["document_id"], "spans": [(start, end)]
+        })
+
+    for start, end, line in lines:
+        label = line.partition(": ")[0]
+        if label in METADATA_QUESTIONS:
+            add("metadata", METADATA_QUESTIONS[label].format(**record), record["project_name"] + label, start, end)
+
+        cells = [cell.strip() for cell in line.split(" | ")]
+        if len(cells) == 4 and cells[0] != "KPI/SLA":
+            add("kpi", KPI_QUESTION.format(kpi=cells[0], target=cells[1]), f"{cells[0]} {cells[1]}", start, end)
+
+    # An obligation runs from its numbered title to the next blank line
+    for i, (start, end, line) in enumerate(lines):
+        if not OBLIGATION_TITLE.match(line) or i + 1 == len(lines) or not lines[i + 1][2].startswith("Description:"):
+            continue
+        block_end = end
+        for next_start, next_end, next_line in lines[i + 1:]:
+            if text[block_end:next_start].count("\n") > 1:
+                break
+            block_end = next_end
+            if next_line.startswith("Penalty: "):
+                penalty = next_line[len("Penalty: "):]
+                add("obligation", OBLIGATION_QUESTION.format(penalty=penalty), penalty, start, block_end)
+                break
+
+    return candidates
+
+
+def build_questions(records: List[Dict[str, Any]], texts: List[str], count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Labelled questions whose identifying text belongs to a single contract
+
+    Questions asked twice in one contract (e.g. a repeated obligation) keep every answering passage.
+    """
+    by_key: Dict[str, Dict[str, Any]] = {}
+    documents_per_key: Dict[str, set] = {}
+    for record, text in zip(records, texts):
+        for candidate in _candidate_questions(record, text):
+            key = candidate["key"]
+            documents_per_key.setdefault(key, set()).add(candidate["document_id"])
+            if key in by_key and by_key[key]["document_id"] == candidate["document_id"]:
+                by_key[key]["spans"].extend(candidate["spans"])
+            else:
+                by_key.setdefault(key, candidate)
+
+    unique = [question for key, question in by_key.items() if len(documents_per_key[key]) == 1]
+
+    # Equal shares of each kind where possible, so one kind does not dominate the averages
+    rng = random.Random(seed)
+    kinds: Dict[str, List[Dict[str, Any]]] = {}
+    for question in unique:
+        kinds.setdefault(question["kind"], []).append(question)
+    for questions in kinds.values():
+        rng.shuffle(questions)
+
+    selected = []
+    while len(selected) < count and any(kinds.values()):
+        for questions in kinds.values():
+            if questions and len(selected) < count:
+                selected.append(questions.pop())
+    return selected
+
+
+def chunk_corpus(
+    indexer: FAISSIndexer,
+    records: List[Dict[str, Any]],
+    texts: List[str],
+    chunk_size: int,
+    overlap: int
+) -> Tuple[List[Dict[str, Any]], Dict[str, Tuple[str, int, int]]]:
+    """Document store entries chunked as _chunk_text does, and chunk_id -> (document_id, start, end)"""
+    chunk_metadata = []
+    chunk_spans = {}
+
+    for record, text in zip(records, texts):
+        if len(text) <= chunk_size:
+            spans = [(0, len(text))]
+        else:
+            spans = [(start, end) for start, end in indexer._chunk_spans(text, chunk_size, overlap) if text[start:end].strip()]
+
+        document = {"document_id": record["document_id"], "title": record["project_name"], "metadata": {}}
+        entries = indexer._build_chunk_metadata(document, [text[start:end].strip() for start, end in spans])
+        for entry, (start, end) in zip(entries, spans):
+            chunk_spans[entry["chunk_id"]] = (record["document_id"], start, end)
+        chunk_metadata.extend(entries)
+
+    return chunk_metadata, chunk_spans
+
+
+def is_relevant(question: Dict[str, Any], chunk_span: Tuple[str, int, int]) -> bool:
+    """Whether a chunk covers most of an answering passage, or a passage covers most of the chunk"""
+    document_id, start, end = chunk_span
+    if document_id != question["document_id"]:
+        return False
+
+    for span_start, span_end in question["spans"]:
+        covered = min(end, span_end) - max(start, span_start)
+        if covered > 0 and covered >= 0.5 * min(span_end - span_start, end - start):
+            return True
+    return False
+
+
+def first_relevant_rank(question: Dict[str, Any], results: List[Dict[str, Any]], chunk_spans) -> Optional[int]:
+    """1-based rank of the first relevant result"""
+    for rank, result in enumerate(results, 1):
+        if is_relevant(question, chunk_spans[result["chunk_id"]]):
+            return rank
+    return None
+
+
+def load_encoder(model: str):
+    """The stub encoder, or a sentence-transformers model from the local cache"""
+    if model == "stub":
+        return StubEncoder()
+
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model)
+
+
+def build_index(indexer: FAISSIndexer, embeddings: np.ndarray) -> Dict[str, Any]:
+    """Build the indexer's index over the embeddings, timing it and measuring its size"""
+    process = psutil.Process(os.getpid())
+    gc.collect()
+    rss_before = process.memory_info().rss
+    start = time.perf_counter()
+
+    if indexer.index_type == "ivfpq":
+        # Trained on the whole corpus, as after a rebuild, rather than on the first FAISS_IVF_TRAIN_SIZE vectors
+        indexer.index = indexer._train_ivfpq(embeddings)
+        indexer.index.add(embeddings)
+    else:
+        indexer.index = indexer._create_index()
+        indexer._add_vectors(embeddings)
+
+    return {
+        "build_seconds": time.perf_counter() - start,
+        "index_bytes": int(faiss.serialize_index(indexer.index).size),
+        "rss_growth_bytes": process.memory_info().rss - rss_before
+    }
+
+
+async def evaluate(
+    engine: FAISSQueryEngine,
+    questions: List[Dict[str, Any]],
+    query_embeddings: np.ndarray,
+    chunk_spans: Dict[str, Tuple[str, int, int]],
+    mode: str,
+    ks: List[int]
+) -> Tuple[Dict[str, Any], List[List[str]]]:
+    """Quality and latency of one search mode, plus each question's result chunk IDs"""
+    ranks, latencies, result_ids = [], [], []
+
+    for question, query_embedding in zip(questions, query_embeddings):
+        request = QARequest(query=question["query"], max_results=max(ks), search_mode=mode, confidence_threshold=0.0)
+
+        start = time.perf_counter()
+        results = await engine._search_documents(request, query_embedding=query_embedding.reshape(1, -1))
+        latencies.append(time.perf_counter() - start)
+
+        ranks.append(first_relevant_rank(question, results, chunk_spans))
+        result_ids.append([result["chunk_id"] for result in results])
+
+    stats = {f"recall@{k}": sum(1 for rank in ranks if rank and rank <= k) / len(ranks) for k in ks}
+    stats["mrr"] = sum(1 / rank for rank in ranks if rank) / len(ranks)
+    stats["p50_ms"], stats["p99_ms"] = (float(value) * 1000 for value in np.percentile(latencies, [50, 99]))
+    return stats, result_ids
+
+
+def overlap_at_k(approximate: List[List[str]], exact: List[List[str]], k: int) -> float:
+    """Mean share of the exact top k that the approximate search also returned in its top k"""
+    shares = [
+        len(set(found[:k]) & set(expected[:k])) / len(expected[:k])
+        for found, expected in zip(approximate, exact) if expected
+    ]
+    return sum(shares) / len(shares) if shares else 0.0
+
+
+async def run_benchmark(
+    document_count: int = 100,
+    question_count: int = 300,
+    chunk_sizes: Tuple[int, ...] = (256, 512, 1024),
+    overlap: int = CHUNK_OVERLAP,
+    index_types: Tuple[str, ...] = INDEX_TYPES,
+    modes: Tuple[str, ...] = SEARCH_MODES,
+    ks: Tuple[int, ...] = (1, 5, 10),
+    model: str = "stub",
+    seed: int = 0
+) -> Dict[str, Any]:
+    """Evaluate every chunk size x index type x search mode and return the rows of the comparison"""
+    templates = load_templates()
+    records, texts = [], []
+    for i in range(document_count):
+        html, record = generate_contract(i, templates, seed)
+        records.append(record)
+        texts.append(html_to_text(html))
+
+    questions = build_questions(records, texts, question_count, seed)
+    logger.info(f"{len(questions)} questions over {document_count} contracts")
+
+    encoder = load_encoder(model)
+    ks = sorted(ks)
+    index_types = [index_type for index_type in INDEX_TYPES if index_type in index_types]  # flat first, as the exact reference
+    rows = []
+
+    def make_indexer(index_type: str) -> FAISSIndexer:
+        indexer = FAISSIndexer(index_path="./.benchmarks/retrieval_index", embedding_model=model, index_type=index_type)
+        indexer.embedding_model = encoder
+        indexer._initialized = True  # the encoder is set directly and nothing is loaded from disk
+        return indexer
+
+    query_indexer = make_indexer("flat")
+    start = time.perf_counter()
+    query_embeddings = await query_indexer.embed_queries([question["query"] for question in questions])
+    query_embed_seconds = time.perf_counter() - start
+
+    for chunk_size in chunk_sizes:
+        chunk_metadata, chunk_spans = chunk_corpus(query_indexer, records, texts, chunk_size, overlap)
+
+        start = time.perf_counter()
+        embeddings = await query_indexer.embed_texts([entry["content"] for entry in chunk_metadata])
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        embed_seconds = time.perf_counter() - start
+
+        exact_results = None
+        for index_type in index_types:
+            indexer = make_indexer(index_type)
+            indexer.embedding_dimension = embeddings.shape[1]
+            indexer.document_store = dict(enumerate(chunk_metadata))
+            build = build_index(indexer, embeddings)
+
+            engine = FAISSQueryEngine()
+            engine.indexer = indexer
+            engine.reranker.enabled = False
+
+            for mode in modes:
+                # Keyword search does not use the vector index, so it is measured once per chunk size
+                if mode == "keyword" and index_type != index_types[0]:
+                    continue
+
+                stats, result_ids = await evaluate(engine, questions, query_embeddings, chunk_spans, mode, ks)
+                row = {
+                    "chunk_size": chunk_size,
+                    "index": "-" if mode == "keyword" else index_type,
+                    "mode": mode,
+                    "chunks": len(chunk_metadata),
+                    "embed_seconds": embed_seconds,
+                    **({} if mode == "keyword" else build),
+                    **stats
+                }
+
+                if mode == "semantic":
+                    if index_type == "flat":
+                        exact_results = result_ids
+                    elif exact_results is not None:
+                        row[f"overlap@{ks[-1]}"] = overlap_at_k(result_ids, exact_results, ks[-1])
+
+                rows.append(row)
+                logger.info(f"chunk {chunk_size} {row['index']} {mode}: recall@{ks[-1]} {stats[f'recall@{ks[-1]}']:.3f}")
+
+            del engine, indexer
+            gc.collect()
+
+    return {
+        "model": model,
+        "documents": document_count,
+        "questions": len(questions),
+        "question_kinds": dict(Counter(question["kind"] for question in questions)),
+        "query_embed_seconds": query_embed_seconds,
+        "rows": rows
+    }
+
+
+def format_table(report: Dict[str, Any]) -> str:
+    """Comparison table, one row per chunk size x index type x search mode"""
+    rows = report["rows"]
+    recall_columns = [column for column in rows[0] if column.startswith("recall@")] if rows else []
+    overlap_column = next((column for row in rows for column in row if column.startswith("overlap@")), None)
+
+    header = f"{'chunk':>6} {'index':<6} {'mode':<9}{'chunks':>8}{'build s':>9}{'index MB':>10}{'RSS +MB':>9}"
+    header += "".join(f"{column:>11}" for column in recall_columns)
+    header += f"{'MRR':>7}{'p50 ms':>9}{'p99 ms':>9}"
+    if overlap_column:
+        header += f"{overlap_column + ' exact':>17}"
+
+    lines = [
+        f"Model: {report['model']}, {report['documents']} contracts, {report['questions']} questions "
+        f"({', '.join(f'{count} {kind}' for kind, count in report['question_kinds'].items())})",
+        "",
+        header
+    ]
+
+    def number(row: Dict[str, Any], column: str, scale: float = 1.0, digits: int = 2) -> str:
+        return f"{row[column] / scale:.{digits}f}" if column in row else "-"
+
+    for row in rows:
+        line = (
+            f"{row['chunk_size']:>6} {row['index']:<6} {row['mode']:<9}{row['chunks']:>8}"
+            f"{number(row, 'build_seconds'):>9}{number(row, 'index_bytes', 2**20, 1):>10}"
+            f"{number(row, 'rss_growth_bytes', 2**20, 1):>9}"
+        )
+        line += "".join(f"{row[column]:>11.3f}" for column in recall_columns)
+        line += f"{row['mrr']:>7.3f}{row['p50_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+        if overlap_column:
+            line += f"{number(row, overlap_column, digits=3):>17}"
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def _int_list(value: str) -> Tuple[int, ...]:
+    return tuple(int(part) for part in value.split(","))
+
+
+def _choices(allowed: Tuple[str, ...]):
+    def parse(value: str) -> Tuple[str, ...]:
+        names = tuple(part.strip() for part in value.split(","))
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown {', '.join(unknown)}; choose from {', '.join(allowed)}")
+        return names
+    return parse
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compare retrieval quality and latency across index configurations")
+    parser.add_argument("--documents", type=int, default=100, help="Contracts to generate and index")
+    parser.add_argument("--questions", type=int, default=300, help="Labelled questions to ask")
+    parser.add_argument("--chunk-sizes", type=_int_list, default=(256, 512, 1024), help="Chunk sizes in characters")
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP, help="Chunk overlap in characters")
+    parser.add_argument("--indexes", type=_choices(INDEX_TYPES), default=INDEX_TYPES, help="Index types")
+    parser.add_argument("--modes", type=_choices(SEARCH_MODES), default=SEARCH_MODES, help="Search modes")
+    parser.add_argument("--k", type=_int_list, default=(1, 5, 10), help="Cut-offs for recall@k")
+    parser.add_argument("--model", default="stub", help="'stub' or a locally available sentence-transformers model")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus and question seed")
+    parser.add_argument("--report", help="Also write the rows as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    logger.setLevel(logging.INFO)
+
+    report = asyncio.run(run_benchmark(
+        document_count=args.documents,
+        question_count=args.questions,
+        chunk_sizes=args.chunk_sizes,
+        overlap=args.overlap,
+        index_types=args.indexes,
+        modes=args.modes,
+        ks=args.k,
+        model=args.model,
+        seed=args.seed
+    ))
+
+    print(format_table(report))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,19 +6,33 @@ This microservice provides AI-powered operations including:
 - Metadata extraction from contracts
 - Obligation extraction
 - Q&A RAG system
+- Background OCR and extraction jobs
 """
 
 import logging
 import os
 from contextlib import asynccontextmanager
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from routers import ocr, metadata, obligations, qa
+from routers import ocr, metadata, obligations, qa, jobs, ingest, admin
 from utils.config import get_settings
+from utils.llm_client import initialize_llm_client, close_llm_client, get_llm_client_pool
+from utils.llm_governor import get_llm_governor
+from utils.completion_cache import get_completion_cache
+from utils.result_cache import get_result_cache
+from services.ocr_azure import close_docintel_client
+from utils.job_queue import initialize_job_queue, close_job_queue
+from utils.rate_limit import RateLimitMiddleware, get_rate_limiter
+from utils.metrics import (
+    MetricsMiddleware, MetricFamily, metrics_enabled, set_metrics_enabled, register_collector, render_metrics
+)
+from utils.tracing import TracingMiddleware, get_tracer, close_tracer
+from utils.profiling import RequestProfilingMiddleware
+from rag.faiss_query import get_answer_cache
 
 # Configure logging
 logging.basicConfig(
@@ -48,6 +62,12 @@ async def lifespan(app: FastAPI):
         from rag.faiss_indexer import initialize_faiss_index
         await initialize_faiss_index()
 
+        # Create the shared LLM client
+        await initialize_llm_client()
+
+        # Start the background job workers
+        await initialize_job_queue()
+
         logger.info("AI Operations Microservice started successfully")
         yield
 
@@ -56,6 +76,11 @@ async def lifespan(app: FastAPI):
         raise
     finally:
         logger.info("Shutting down AI Operations Microservice")
+        await close_job_queue()
+        await close_llm_client()
+        await close_docintel_client()
+        get_completion_cache().close()
+        close_tracer()
 
 # Create FastAPI application
 app = FastAPI(
@@ -65,6 +90,12 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Opt-in cProfile of single requests (innermost, so queueing time is not profiled)
+app.add_middleware(RequestProfilingMiddleware)
+
+# Per-client rate limiting and load shedding (added before CORS so 429s still get CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -74,11 +105,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency and concurrency (outermost, so rate-limited requests are counted too)
+set_metrics_enabled(get_settings().metrics_enabled)
+app.add_middleware(MetricsMiddleware)
+
+# Per-request trace (outermost, so its root span covers the whole request)
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(ocr.router, prefix="/ocr", tags=["OCR"])
 app.include_router(metadata.router, prefix="/nlp", tags=["NLP"])
 app.include_router(obligations.router, prefix="/nlp", tags=["NLP"])
 app.include_router(qa.router, prefix="/qa", tags=["Q&A"])
+app.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
+app.include_router(ingest.router, prefix="/ingest", tags=["Ingestion"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
 @app.get("/health")
 async def health_check():
@@ -107,9 +148,53 @@ async def get_providers():
             "azure_openai": bool(settings.azure_openai_api_key),
             "minio_storage": bool(settings.minio_endpoint),
             "database": bool(settings.database_url)
-        }
+        },
+        "llm_client": get_llm_client_pool().get_stats(),
+        "llm_governor": get_llm_governor().get_stats(),
+        "llm_cache": get_completion_cache().get_stats(),
+        "rate_limit": get_rate_limiter().get_stats(),
+        "tracing": get_tracer().get_stats()
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics"""
+    if not metrics_enabled():
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def collect_service_metrics() -> List[MetricFamily]:
+    """Cache hit rates, rate limiter decisions and LLM queue state for /metrics"""
+    cache_stats = {
+        "llm_completion": get_completion_cache().get_stats(),
+        "extraction_result": get_result_cache().get_stats()
+    }
+    answer_cache = get_answer_cache()
+    if answer_cache is not None:
+        cache_stats["qa_answer"] = answer_cache.get_stats()
+
+    lookups = []
+    for cache, stats in cache_stats.items():
+        lookups.append(({"cache": cache, "result": "hit"}, stats.get("hits", 0)))
+        lookups.append(({"cache": cache, "result": "miss"}, stats.get("misses", 0)))
+
+    rate_limit = []
+    for route_class, stats in get_rate_limiter().get_stats()["classes"].items():
+        for outcome in ["admitted", "rejected_rate", "rejected_overload"]:
+            rate_limit.append(({"route_class": route_class, "outcome": outcome}, stats[outcome]))
+
+    governor = get_llm_governor().get_stats()
+
+    return [
+        ("cache_lookups_total", "counter", "Cache lookups by cache and result", lookups),
+        ("rate_limit_requests_total", "counter", "Rate limiter decisions by route class", rate_limit),
+        ("llm_in_flight", "gauge", "LLM calls in progress", [({}, governor["in_flight"])]),
+        ("llm_queued", "gauge", "LLM calls waiting for the rate governor", [({}, governor["queued"])])
+    ]
+
+register_collector(collect_service_metrics)
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom HTTP exception handler"""
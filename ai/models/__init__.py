@@ -5,4 +5,6 @@ Pydantic models for AI Operations Microservice
 from .ocr_models import *
 from .extraction_models import *
 from .qa_models import *
-from .common_models import *
\ No newline at end of file
+from .common_models import *
+from .job_models import *
+from .ingestion_models import *
\ No newline at end of file
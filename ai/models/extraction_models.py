@@ -11,6 +11,38 @@ from .common_models import (
     ExtractedField, TextOffset, BoundingBox, ValidationResult
 )
 
+# Integer request options as (minimum, maximum): smaller values are rejected, larger ones clamped.
+# max_obligations=0 means unbounded; window_tokens below 100 are raised to 100 by the OpenAI service.
+MAX_OBLIGATION_PAGE_SIZE = 500
+MAX_WINDOW_TOKENS = 32000
+INTEGER_OPTION_BOUNDS = {
+    "page": (1, None),
+    "page_size": (1, MAX_OBLIGATION_PAGE_SIZE),
+    "max_obligations": (0, None),
+    "window_tokens": (1, MAX_WINDOW_TOKENS)
+}
+
+
+def validate_extraction_options(options: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Check the integer paging and windowing options and clamp them to their maximum"""
+    if not options:
+        return options
+
+    options = dict(options)
+    for key, (minimum, maximum) in INTEGER_OPTION_BOUNDS.items():
+        value = options.get(key)
+        if value is None:
+            continue
+        if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+            value = int(value)
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f'{key} must be an integer')
+        if value < minimum:
+            raise ValueError(f'{key} must be at least {minimum}')
+        options[key] = min(value, maximum) if maximum is not None else value
+
+    return options
+
 
 class MetadataRequest(BaseModel):
     """Metadata extraction request"""
@@ -39,6 +71,10 @@ class MetadataRequest(BaseModel):
                     raise ValueError(f'Invalid field: {field}')
         return v
 
+    @validator('options')
+    def validate_options(cls, v):
+        return validate_extraction_options(v)
+
 
 class ContractMetadata(BaseModel):
     """Contract metadata extraction result"""
@@ -86,6 +122,10 @@ class ObligationRequest(BaseModel):
             raise ValueError('Provider must be either "local" or "openai"')
         return v
 
+    @validator('options')
+    def validate_options(cls, v):
+        return validate_extraction_options(v)
+
 
 class Obligation(BaseModel):
     """Single obligation"""
@@ -106,6 +146,9 @@ class ObligationResult(BaseModel):
     high_confidence_count: int = Field(..., ge=0, description="Number of high-confidence obligations")
     average_confidence: float = Field(..., ge=0.0, le=1.0, description="Average confidence score")
     categories: Optional[List[str]] = Field(None, description="Identified obligation categories")
+    page: Optional[int] = Field(None, ge=1, description="Page number when results are paginated")
+    page_size: Optional[int] = Field(None, ge=1, description="Page size when results are paginated")
+    has_more: Optional[bool] = Field(None, description="Whether more obligations were found than returned")
     document_info: Optional[DocumentInfo] = Field(None, description="Document information")
     processing_metadata: ProcessingMetadata = Field(..., description="Processing metadata")
 
@@ -131,6 +174,10 @@ class BatchExtractionRequest(BaseModel):
             raise ValueError('Extraction type must be either "metadata" or "obligations"')
         return v
 
+    @validator('options')
+    def validate_options(cls, v):
+        return validate_extraction_options(v)
+
 
 class BatchExtractionResult(BaseModel):
     """Batch extraction result"""
@@ -0,0 +1,64 @@
+"""
+Document ingestion Pydantic models
+"""
+
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, validator
+
+from .common_models import BaseResponse, ProcessingMetadata
+from .ocr_models import OCRResult
+from .extraction_models import MetadataResult, ObligationResult, validate_extraction_options
+
+
+class IngestionRequest(BaseModel):
+    """Ingestion request: OCR, metadata, obligations and indexing in one pass"""
+    file_path: Optional[str] = Field(None, description="Path to file in storage")
+    text: Optional[str] = Field(None, description="Raw text, skipping OCR")
+    document_id: Optional[str] = Field(None, description="Stable document identifier (defaults to file_path, else a hash of the content)")
+    title: Optional[str] = Field(None, description="Document title for the search index")
+    project_id: Optional[str] = Field(None, description="Project the document belongs to")
+    ocr_provider: Optional[str] = Field(None, description="OCR provider (local/azure)")
+    extract_provider: Optional[str] = Field(None, description="Extraction provider (local/openai)")
+    languages: Optional[List[str]] = Field(None, description="Language codes for OCR")
+    extract_metadata: bool = Field(True, description="Whether to extract contract metadata")
+    extract_obligations: bool = Field(True, description="Whether to extract obligations")
+    index: bool = Field(True, description="Whether to add the document to the Q&A index")
+    confidence_threshold: float = Field(0.5, ge=0.0, le=1.0, description="Minimum extraction confidence")
+    include_penalties: bool = Field(True, description="Include penalty information in obligations")
+    include_ocr_result: bool = Field(False, description="Include page-level OCR output in the result")
+    options: Optional[Dict[str, Any]] = Field(None, description="Provider-specific options")
+
+    @validator('ocr_provider')
+    def validate_ocr_provider(cls, v):
+        if v and v not in ['local', 'azure']:
+            raise ValueError('OCR provider must be either "local" or "azure"')
+        return v
+
+    @validator('extract_provider')
+    def validate_extract_provider(cls, v):
+        if v and v not in ['local', 'openai']:
+            raise ValueError('Extraction provider must be either "local" or "openai"')
+        return v
+
+    @validator('options')
+    def validate_options(cls, v):
+        return validate_extraction_options(v)
+
+
+class IngestionResult(BaseModel):
+    """Consolidated ingestion result"""
+    document_id: str = Field(..., description="Document identifier used for the index and obligation store")
+    page_count: int = Field(..., ge=0, description="Number of pages processed")
+    text_length: int = Field(..., ge=0, description="Length of the extracted text")
+    ocr: Optional[OCRResult] = Field(None, description="OCR result, if requested")
+    metadata: Optional[MetadataResult] = Field(None, description="Metadata extraction result")
+    obligations: Optional[ObligationResult] = Field(None, description="Obligation extraction result")
+    indexed_chunks: int = Field(0, ge=0, description="Chunks added to the Q&A index")
+    stage_times: Dict[str, float] = Field(default_factory=dict, description="Seconds from start until each stage finished")
+    errors: Dict[str, str] = Field(default_factory=dict, description="Errors by stage for stages that failed")
+    processing_metadata: ProcessingMetadata = Field(..., description="Processing metadata")
+
+
+class IngestionResponse(BaseResponse):
+    """Ingestion response"""
+    data: Optional[IngestionResult] = Field(None, description="Ingestion result")
@@ -0,0 +1,59 @@
+"""
+Background job Pydantic models
+"""
+
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, validator
+
+from .common_models import BaseResponse
+
+JOB_TYPES = ["ocr", "metadata", "obligations", "batch_ocr", "batch_metadata", "batch_obligations", "ingest"]
+JOB_STATUSES = ["queued", "running", "succeeded", "failed", "cancelled"]
+TERMINAL_JOB_STATUSES = ["succeeded", "failed", "cancelled"]
+
+
+class JobSubmitRequest(BaseModel):
+    """Background job submission"""
+    job_type: str = Field(..., description="Job type (ocr, metadata, obligations, batch_ocr, batch_metadata, batch_obligations)")
+    payload: Dict[str, Any] = Field(..., description="Request body of the equivalent synchronous endpoint")
+    idempotency_key: Optional[str] = Field(None, max_length=200, description="Resubmitting the same key returns the existing job")
+
+    @validator('job_type')
+    def validate_job_type(cls, v):
+        if v not in JOB_TYPES:
+            raise ValueError(f'Job type must be one of: {", ".join(JOB_TYPES)}')
+        return v
+
+
+class JobProgress(BaseModel):
+    """Job progress"""
+    current: int = Field(0, ge=0, description="Completed pages or items")
+    total: Optional[int] = Field(None, ge=0, description="Total pages or items, if known")
+    message: Optional[str] = Field(None, description="Current stage")
+
+
+class JobInfo(BaseModel):
+    """Background job status"""
+    job_id: str = Field(..., description="Job identifier")
+    job_type: str = Field(..., description="Job type")
+    status: str = Field(..., description="Job status (queued, running, succeeded, failed, cancelled)")
+    progress: JobProgress = Field(default_factory=JobProgress, description="Job progress")
+    idempotency_key: Optional[str] = Field(None, description="Idempotency key")
+    attempts: int = Field(0, ge=0, description="Number of times the job was started")
+    error: Optional[str] = Field(None, description="Error message for failed jobs")
+    created_at: datetime = Field(..., description="Submission time")
+    started_at: Optional[datetime] = Field(None, description="Time the latest attempt started")
+    finished_at: Optional[datetime] = Field(None, description="Completion time")
+    result: Optional[Dict[str, Any]] = Field(None, description="Job result, once succeeded")
+
+
+class JobResponse(BaseResponse):
+    """Background job response"""
+    data: Optional[JobInfo] = Field(None, description="Job status")
+    created: Optional[bool] = Field(None, description="False when an existing job was returned for the idempotency key")
+
+
+class JobListResponse(BaseResponse):
+    """Background job list response"""
+    data: List[JobInfo] = Field(default_factory=list, description="Jobs, newest first")
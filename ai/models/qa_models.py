@@ -58,7 +58,7 @@ class QAAnswer(BaseModel):
     """Q&A answer"""
     answer: str = Field(..., description="Generated answer")
     confidence: float = Field(..., ge=0.0, le=1.0, description="Answer confidence score")
-    answer_type: str = Field(..., description="Type of answer (direct/synthesized/not_found)")
+    answer_type: str = Field(..., description="Type of answer (direct/synthesized/structured/not_found/error)")
     sources: List[SourceReference] = Field(..., description="Source references")
     related_queries: Optional[List[str]] = Field(None, description="Related query suggestions")
     explanation: Optional[str] = Field(None, description="Explanation of how answer was derived")
@@ -0,0 +1,190 @@
+"""
+Token-budgeted context packing for RAG answer generation
+"""
+
+import re
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional, Set
+
+from utils.llm_governor import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+class ContextPacker:
+    """Pack search results into a bounded answer context
+
+    Exact and near-identical chunks are dropped, adjacent chunks of the same
+    document are merged with their overlap removed, and the resulting blocks
+    are picked greedily by relevance per token until the budget is spent.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 2000,
+        similarity_threshold: float = 0.85,
+        max_overlap_chars: int = 200,
+        min_overlap_chars: int = 10
+    ):
+        self.token_budget = token_budget
+        self.similarity_threshold = similarity_threshold
+        self.max_overlap_chars = max_overlap_chars
+        self.min_overlap_chars = min_overlap_chars
+
+        self._stats = {
+            "packed": 0,
+            "input_chunks": 0,
+            "output_blocks": 0,
+            "duplicates_dropped": 0,
+            "chunks_merged": 0,
+            "input_tokens": 0,
+            "output_tokens": 0
+        }
+
+    def pack(self, search_results: List[Dict[str, Any]], token_budget: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Pack search results into context blocks, highest relevance first
+
+        Each block has content, document_id, chunk_ids, score and tokens.
+        """
+        budget = token_budget or self.token_budget
+        unique = self._drop_duplicates(search_results)
+        blocks = self._merge_adjacent(unique)
+
+        # Greedy fill by relevance per token
+        ranked = sorted(blocks, key=lambda b: b["score"] / max(b["tokens"], 1), reverse=True)
+        selected = []
+        used = 0
+
+        for block in ranked:
+            if used + block["tokens"] <= budget:
+                selected.append(block)
+                used += block["tokens"]
+
+        # Never send an empty context: trim the most relevant block instead
+        if not selected and blocks:
+            block = max(blocks, key=lambda b: b["score"])
+            content = block["content"][:budget * 4]
+            selected.append({**block, "content": content, "tokens": estimate_tokens(content)})
+            used = selected[0]["tokens"]
+
+        selected.sort(key=lambda b: b["score"], reverse=True)
+
+        self._stats["packed"] += 1
+        self._stats["input_chunks"] += len(search_results)
+        self._stats["output_blocks"] += len(selected)
+        self._stats["input_tokens"] += sum(estimate_tokens(r.get("content", "")) for r in search_results)
+        self._stats["output_tokens"] += used
+
+        return selected
+
+    def pack_texts(self, search_results: List[Dict[str, Any]], token_budget: Optional[int] = None) -> List[str]:
+        """Pack search results and return only the block texts"""
+        return [block["content"] for block in self.pack(search_results, token_budget)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get packing statistics"""
+        packed = self._stats["packed"]
+        input_tokens = self._stats["input_tokens"]
+        return {
+            "token_budget": self.token_budget,
+            "average_context_tokens": self._stats["output_tokens"] / packed if packed else 0.0,
+            "token_reduction": 1 - self._stats["output_tokens"] / input_tokens if input_tokens else 0.0,
+            **self._stats
+        }
+
+    def _drop_duplicates(self, search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop exact and near-identical chunks, keeping the highest scoring copy"""
+        kept = []
+        seen_hashes: Set[str] = set()
+        kept_shingles: List[Set[str]] = []
+
+        for result in sorted(search_results, key=lambda r: r.get("score", 0), reverse=True):
+            content = result.get("content", "")
+            if not content.strip():
+                continue
+
+            words = WORD_PATTERN.findall(content.lower())
+            digest = hashlib.md5(" ".join(words).encode("utf-8")).hexdigest()
+            if digest in seen_hashes:
+                self._stats["duplicates_dropped"] += 1
+                continue
+
+            shingles = self._shingles(words)
+            if any(self._jaccard(shingles, other) >= self.similarity_threshold for other in kept_shingles):
+                self._stats["duplicates_dropped"] += 1
+                continue
+
+            seen_hashes.add(digest)
+            kept_shingles.append(shingles)
+            kept.append(result)
+
+        return kept
+
+    def _merge_adjacent(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge consecutive chunks of the same document into single blocks"""
+        by_document: Dict[str, List[Dict[str, Any]]] = {}
+        blocks = []
+
+        for result in results:
+            if result.get("chunk_index") is None:
+                blocks.append(self._new_block(result))
+            else:
+                by_document.setdefault(result["document_id"], []).append(result)
+
+        for chunks in by_document.values():
+            chunks.sort(key=lambda r: r["chunk_index"])
+            block = self._new_block(chunks[0])
+            last_index = chunks[0]["chunk_index"]
+
+            for chunk in chunks[1:]:
+                if chunk["chunk_index"] == last_index + 1:
+                    block["content"] = self._join_overlapping(block["content"], chunk["content"])
+                    block["chunk_ids"].append(chunk["chunk_id"])
+                    block["score"] = max(block["score"], chunk.get("score", 0.0))
+                    self._stats["chunks_merged"] += 1
+                else:
+                    blocks.append(block)
+                    block = self._new_block(chunk)
+                last_index = chunk["chunk_index"]
+
+            blocks.append(block)
+
+        for block in blocks:
+            block["tokens"] = estimate_tokens(block["content"])
+
+        return blocks
+
+    def _new_block(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Start a context block from one search result"""
+        return {
+            "content": result["content"],
+            "document_id": result.get("document_id"),
+            "title": result.get("title"),
+            "chunk_ids": [result.get("chunk_id")],
+            "score": result.get("score", 0.0)
+        }
+
+    def _join_overlapping(self, left: str, right: str) -> str:
+        """Join two consecutive chunks, removing the text they share"""
+        longest = min(len(left), len(right), self.max_overlap_chars)
+
+        for size in range(longest, self.min_overlap_chars - 1, -1):
+            if left.endswith(right[:size]):
+                return left + right[size:]
+
+        return left + " " + right
+
+    def _shingles(self, words: List[str], size: int = 3) -> Set[str]:
+        """Word shingles used for near-duplicate detection"""
+        if len(words) < size:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+    def _jaccard(self, a: Set[str], b: Set[str]) -> float:
+        """Jaccard similarity of two shingle sets"""
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
@@ -3,11 +3,12 @@ FAISS indexer for building and managing vector indices
 """
 
 import os
+import math
 import pickle
 import logging
 import asyncio
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 import time
 
 import numpy as np
@@ -15,21 +16,42 @@ import faiss
 from sentence_transformers import SentenceTransformer
 
 from utils.config import get_settings
+from utils.metrics import EMBEDDING_BATCH_SIZE, EMBEDDING_SECONDS, FAISS_SEARCH_SECONDS, FAISS_CANDIDATES_SCANNED
+from utils.tracing import span, run_in_executor
 
 logger = logging.getLogger(__name__)
 
+# Default chunking, in characters
+CHUNK_SIZE = 512
+CHUNK_OVERLAP = 50
+
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+
+# k-means wants at least this many training vectors per centroid
+MIN_POINTS_PER_CENTROID = 39
+
 
 class FAISSIndexer:
     """FAISS indexer for document embeddings"""
 
-    def __init__(self, index_path: Optional[str] = None, embedding_model: Optional[str] = None):
+    def __init__(
+        self,
+        index_path: Optional[str] = None,
+        embedding_model: Optional[str] = None,
+        index_type: Optional[str] = None
+    ):
         self.settings = get_settings()
         self.index_path = Path(index_path or self.settings.faiss_index_path)
         self.embedding_model_name = embedding_model or self.settings.embedding_model
+        self.index_type = (index_type or self.settings.faiss_index_type).lower()
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown FAISS index type '{self.index_type}'; choose from {', '.join(INDEX_TYPES)}")
 
         self.embedding_model = None
         self.index = None
         self.document_store = {}  # document_id -> document metadata
+        self.document_versions: Dict[str, int] = {}  # document_id -> times (re-)indexed or deleted
+        self.index_version = 0  # bumped on every index change
         self.embedding_dimension = 384  # Default for all-MiniLM-L6-v2
 
         self._initialized = False
@@ -71,26 +93,26 @@ class FAISSIndexer:
             raise RuntimeError("Embedding model not initialized")
 
         try:
-            loop = asyncio.get_event_loop()
-            embedding = await loop.run_in_executor(
-                None, lambda: self.embedding_model.encode(text, convert_to_numpy=True)
-            )
+            embedding = await run_in_executor(self._encode, text, 1)
             return embedding.astype(np.float32)
 
         except Exception as e:
             logger.error(f"Text embedding failed: {e}")
             raise
 
+    def _encode(self, texts: Union[str, List[str]], batch_size: int) -> np.ndarray:
+        """Run the embedding model (in an executor thread), recording batch size and time"""
+        EMBEDDING_BATCH_SIZE.observe(batch_size)
+        with span("embedding.encode", batch_size=batch_size), EMBEDDING_SECONDS.time():
+            return self.embedding_model.encode(texts, convert_to_numpy=True)
+
     async def _embed_texts(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings for multiple texts"""
         if not self.embedding_model:
             raise RuntimeError("Embedding model not initialized")
 
         try:
-            loop = asyncio.get_event_loop()
-            embeddings = await loop.run_in_executor(
-                None, lambda: self.embedding_model.encode(texts, convert_to_numpy=True)
-            )
+            embeddings = await run_in_executor(self._encode, texts, len(texts))
             return embeddings.astype(np.float32)
 
         except Exception as e:
@@ -106,7 +128,6 @@ class FAISSIndexer:
 
         try:
             logger.info(f"Adding {len(documents)} documents to index")
-            start_time = time.time()
 
             # Prepare embeddings
             texts_to_embed = []
@@ -122,23 +143,8 @@ class FAISSIndexer:
 
                 # Split content into chunks if too long
                 chunks = self._chunk_text(content)
-
-                for i, chunk in enumerate(chunks):
-                    chunk_id = f"{document_id}_chunk_{i}" if len(chunks) > 1 else document_id
-                    texts_to_embed.append(chunk)
-
-                    # Store metadata for each chunk
-                    chunk_metadata = {
-                        "document_id": document_id,
-                        "chunk_id": chunk_id,
-                        "chunk_index": i,
-                        "content": chunk,
-                        "title": doc.get("title", ""),
-                        "metadata": doc.get("metadata", {}),
-                        "document_type": doc.get("document_type"),
-                        "timestamp": doc.get("timestamp")
-                    }
-                    document_metadata.append(chunk_metadata)
+                texts_to_embed.extend(chunks)
+                document_metadata.extend(self._build_chunk_metadata(doc, chunks))
 
             if not texts_to_embed:
                 logger.warning("No valid texts to embed")
@@ -147,99 +153,273 @@ class FAISSIndexer:
             # Generate embeddings
             embeddings = await self._embed_texts(texts_to_embed)
 
-            # Initialize index if needed
-            if self.index is None:
-                self.index = faiss.IndexFlatIP(self.embedding_dimension)  # Inner product for cosine similarity
+            return await self._add_embedded_chunks(document_metadata, embeddings)
 
-            # Add to index
-            loop = asyncio.get_event_loop()
-            start_index = self.index.ntotal
-
-            await loop.run_in_executor(
-                None, lambda: self.index.add(embeddings)
-            )
-
-            # Update document store
-            for i, metadata in enumerate(document_metadata):
-                index_id = start_index + i
-                self.document_store[index_id] = metadata
+        except Exception as e:
+            logger.error(f"Document addition failed: {e}")
+            raise
 
-            # Save index
-            await self._save_index()
+    async def add_chunks(self, document: Dict[str, Any], chunks: List[str], embeddings: np.ndarray) -> int:
+        """Add a document that was already chunked and embedded (see ChunkStream and embed_texts)"""
+        await self._ensure_initialized()
 
-            processing_time = time.time() - start_time
-            logger.info(f"Added {len(texts_to_embed)} chunks to index in {processing_time:.2f}s")
+        if not chunks:
+            return 0
 
-            return len(texts_to_embed)
+        try:
+            return await self._add_embedded_chunks(self._build_chunk_metadata(document, chunks), embeddings)
 
         except Exception as e:
-            logger.error(f"Document addition failed: {e}")
+            logger.error(f"Chunk addition failed: {e}")
             raise
 
+    async def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed document chunks for add_chunks"""
+        await self._ensure_initialized()
+        return await self._embed_texts(texts)
+
+    def _build_chunk_metadata(self, doc: Dict[str, Any], chunks: List[str]) -> List[Dict[str, Any]]:
+        """Build the document store entry for each chunk of a document"""
+        document_id = doc.get("document_id")
+        chunk_metadata = []
+
+        for i, chunk in enumerate(chunks):
+            chunk_id = f"{document_id}_chunk_{i}" if len(chunks) > 1 else document_id
+
+            # Store metadata for each chunk
+            chunk_metadata.append({
+                "document_id": document_id,
+                "chunk_id": chunk_id,
+                "chunk_index": i,
+                "content": chunk,
+                "title": doc.get("title", ""),
+                "metadata": doc.get("metadata", {}),
+                "document_type": doc.get("document_type"),
+                "timestamp": doc.get("timestamp")
+            })
+
+        return chunk_metadata
+
+    async def _add_embedded_chunks(self, document_metadata: List[Dict[str, Any]], embeddings: np.ndarray) -> int:
+        """Add chunk embeddings to the index and their metadata to the document store"""
+        start_time = time.time()
+
+        # Initialize index if needed
+        if self.index is None:
+            self.index = self._create_index()
+
+        # Add to index
+        loop = asyncio.get_event_loop()
+        start_index = self.index.ntotal
+
+        await loop.run_in_executor(
+            None, lambda: self._add_vectors(embeddings)
+        )
+
+        # Update document store
+        for i, metadata in enumerate(document_metadata):
+            index_id = start_index + i
+            self.document_store[index_id] = metadata
+
+        self._bump_versions({metadata["document_id"] for metadata in document_metadata})
+
+        # Save index
+        await self._save_index()
+
+        processing_time = time.time() - start_time
+        logger.info(f"Added {len(document_metadata)} chunks to index in {processing_time:.2f}s")
+
+        return len(document_metadata)
+
+    def _create_index(self) -> faiss.Index:
+        """Empty index of the configured type, scoring by inner product (cosine similarity on normalized vectors)"""
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(self.embedding_dimension, self.settings.faiss_hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.settings.faiss_hnsw_ef_construction
+            self._configure_search(index)
+            return index
+
+        # IVF-PQ needs training data, so it starts flat until _add_vectors has enough vectors
+        return faiss.IndexFlatIP(self.embedding_dimension)
+
+    def _train_ivfpq(self, vectors: np.ndarray) -> faiss.Index:
+        """Empty IVF-PQ index trained on `vectors`, sized so every centroid has enough training points"""
+        count = len(vectors)
+        nlist = self.settings.faiss_ivf_nlist or int(4 * math.sqrt(count))
+        nlist = max(min(nlist, count // MIN_POINTS_PER_CENTROID), 1)
+
+        # Sub-quantizers must split the dimension evenly; fewer code bits when there is little training data
+        pq_m = math.gcd(self.embedding_dimension, self.settings.faiss_pq_m)
+        pq_bits = max(min(int(math.log2(max(count // MIN_POINTS_PER_CENTROID, 1))), 8), 1)
+
+        index = faiss.index_factory(
+            self.embedding_dimension, f"IVF{nlist},PQ{pq_m}x{pq_bits}", faiss.METRIC_INNER_PRODUCT
+        )
+        index.train(vectors)
+        self._configure_search(index)
+        return index
+
+    def _configure_search(self, index: faiss.Index):
+        """Apply the search-time settings, which may differ from those the index was saved with"""
+        if isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = self.settings.faiss_hnsw_ef_search
+        elif isinstance(index, faiss.IndexIVF):
+            index.nprobe = self.settings.faiss_ivf_nprobe
+
+    def _add_vectors(self, embeddings: np.ndarray):
+        """Add vectors to the index (in an executor thread), switching to IVF-PQ once there are enough to train it"""
+        self.index.add(embeddings)
+
+        if (self.index_type == "ivfpq" and isinstance(self.index, faiss.IndexFlat)
+                and self.index.ntotal >= self.settings.faiss_ivf_train_size):
+            vectors = self.index.reconstruct_n(0, self.index.ntotal)
+            index = self._train_ivfpq(vectors)
+            index.add(vectors)  # same order, so document store IDs stay valid
+            self.index = index
+            logger.info(f"Trained IVF-PQ index on {len(vectors)} vectors")
+
+    @staticmethod
+    def _index_kind(index: faiss.Index) -> str:
+        """flat, hnsw or ivfpq for an index built by this class"""
+        if isinstance(index, faiss.IndexHNSW):
+            return "hnsw"
+        if isinstance(index, faiss.IndexIVF):
+            return "ivfpq"
+        return "flat"
+
+    async def embed_query(self, query: str) -> np.ndarray:
+        """Embed a query as a normalized (1, dim) vector ready for search"""
+        await self._ensure_initialized()
+
+        query_embedding = await self._embed_text(query)
+        query_embedding = query_embedding.reshape(1, -1)
+
+        # Normalize for cosine similarity
+        faiss.normalize_L2(query_embedding)
+        return query_embedding
+
+    async def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed many queries in one encode call as a normalized (n, dim) matrix"""
+        await self._ensure_initialized()
+
+        query_embeddings = await self._embed_texts(queries)
+        query_embeddings = np.ascontiguousarray(query_embeddings.reshape(len(queries), -1))
+
+        # Normalize for cosine similarity
+        faiss.normalize_L2(query_embeddings)
+        return query_embeddings
+
     async def search(
         self,
         query: str,
         k: int = 10,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[Dict[str, Any]]:
-        """Search the index"""
+        """Search the index, reusing a precomputed query embedding if given"""
         await self._ensure_initialized()
 
         if self.index is None or self.index.ntotal == 0:
             logger.warning("Index is empty")
             return []
 
-        try:
-            # Generate query embedding
-            query_embedding = await self._embed_text(query)
-            query_embedding = query_embedding.reshape(1, -1)
-
-            # Normalize for cosine similarity
-            faiss.normalize_L2(query_embedding)
+        # Generate query embedding
+        if query_embedding is None:
+            query_embedding = await self.embed_query(query)
 
-            # Search
-            loop = asyncio.get_event_loop()
-            search_k = min(k * 2, self.index.ntotal)  # Get more results for filtering
+        results = await self.search_batch([query], k, filters, query_embeddings=query_embedding)
+        return results[0]
 
-            scores, indices = await loop.run_in_executor(
-                None, lambda: self.index.search(query_embedding, search_k)
-            )
-
-            # Process results
-            results = []
-            for score, idx in zip(scores[0], indices[0]):
-                if idx == -1:  # Invalid index
-                    continue
+    async def search_batch(
+        self,
+        queries: List[str],
+        k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        query_embeddings: Optional[np.ndarray] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Search the index for many queries with one FAISS call over a query matrix"""
+        await self._ensure_initialized()
 
-                document_metadata = self.document_store.get(idx)
-                if not document_metadata:
-                    continue
+        if self.index is None or self.index.ntotal == 0:
+            logger.warning("Index is empty")
+            return [[] for _ in queries]
 
-                # Apply filters
-                if filters and not self._match_filters(document_metadata, filters):
-                    continue
+        try:
+            # Generate query embeddings
+            if query_embeddings is None:
+                query_embeddings = await self.embed_queries(queries)
 
-                result = {
-                    "document_id": document_metadata["document_id"],
-                    "chunk_id": document_metadata["chunk_id"],
-                    "content": document_metadata["content"],
-                    "title": document_metadata["title"],
-                    "score": float(score),
-                    "metadata": document_metadata["metadata"],
-                    "document_type": document_metadata.get("document_type"),
-                    "timestamp": document_metadata.get("timestamp")
-                }
-                results.append(result)
+            # Search
+            search_k = min(k * 2, self.index.ntotal)  # Get more results for filtering
 
-                if len(results) >= k:
-                    break
+            scores, indices = await run_in_executor(self._search_index, query_embeddings, search_k)
 
-            return results
+            return [
+                self._collect_results(row_scores, row_indices, k, filters)
+                for row_scores, row_indices in zip(scores, indices)
+            ]
 
         except Exception as e:
             logger.error(f"Search failed: {e}")
             raise
 
+    def _search_index(self, query_embeddings: np.ndarray, search_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Run a FAISS search (in an executor thread), recording time and vectors compared"""
+        index = self.index
+        kind = self._index_kind(index)
+        stats = {"hnsw": faiss.cvar.hnsw_stats, "ivfpq": faiss.cvar.indexIVF_stats}.get(kind)
+        compared_before = stats.ndis if stats else 0
+
+        with span("faiss.search", queries=len(query_embeddings), k=search_k, vectors=index.ntotal, index=kind), \
+                FAISS_SEARCH_SECONDS.time():
+            scores, indices = index.search(query_embeddings, search_k)
+
+        # A flat index compares every query against every stored vector; approximate indexes count
+        # their distance computations in process-wide stats, so overlapping searches blur the split
+        compared = (stats.ndis - compared_before) / len(query_embeddings) if stats else index.ntotal
+        for _ in range(len(query_embeddings)):
+            FAISS_CANDIDATES_SCANNED.observe(compared)
+        return scores, indices
+
+    def _collect_results(
+        self,
+        scores: np.ndarray,
+        indices: np.ndarray,
+        k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Turn one row of FAISS hits into filtered search results"""
+        results = []
+        for score, idx in zip(scores, indices):
+            if idx == -1:  # Invalid index
+                continue
+
+            document_metadata = self.document_store.get(idx)
+            if not document_metadata:
+                continue
+
+            # Apply filters
+            if filters and not self._match_filters(document_metadata, filters):
+                continue
+
+            result = {
+                "document_id": document_metadata["document_id"],
+                "chunk_id": document_metadata["chunk_id"],
+                "chunk_index": document_metadata.get("chunk_index"),
+                "content": document_metadata["content"],
+                "title": document_metadata["title"],
+                "score": float(score),
+                "metadata": document_metadata["metadata"],
+                "document_type": document_metadata.get("document_type"),
+                "timestamp": document_metadata.get("timestamp")
+            }
+            results.append(result)
+
+            if len(results) >= k:
+                break
+
+        return results
+
     async def delete_documents(self, document_ids: List[str]) -> int:
         """Delete documents from index"""
         await self._ensure_initialized()
@@ -268,6 +448,8 @@ class FAISSIndexer:
                     del self.document_store[index_id]
                     deleted_count += 1
 
+            self._bump_versions(set(document_ids))
+
             # Save updated document store
             await self._save_document_store()
 
@@ -289,6 +471,7 @@ class FAISSIndexer:
 
         return {
             "total_vectors": total_vectors,
+            "index_type": self._index_kind(self.index) if self.index else self.index_type,
             "active_documents": active_documents,
             "total_chunks": len(self.document_store),
             "embedding_dimension": self.embedding_dimension,
@@ -296,12 +479,28 @@ class FAISSIndexer:
             "model": self.embedding_model_name
         }
 
-    def _chunk_text(self, text: str, chunk_size: int = 512, overlap: int = 50) -> List[str]:
+    def _bump_versions(self, document_ids: set):
+        """Record that documents changed so cached answers citing them are invalidated"""
+        for document_id in document_ids:
+            self.document_versions[document_id] = self.document_versions.get(document_id, 0) + 1
+        self.index_version += 1
+
+    def _chunk_text(self, text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
         """Split text into overlapping chunks"""
         if len(text) <= chunk_size:
             return [text]
 
         chunks = []
+        for start, end in self._chunk_spans(text, chunk_size, overlap):
+            chunk = text[start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+
+        return chunks
+
+    def _chunk_spans(self, text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[Tuple[int, int]]:
+        """Get the (start, end) offsets of overlapping chunks"""
+        spans = []
         start = 0
 
         while start < len(text):
@@ -320,16 +519,14 @@ class FAISSIndexer:
                 if last_sentence_end > chunk_size * 0.5:  # Only if we found a reasonable break
                     end = start + last_sentence_end + 1
 
-            chunk = text[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
+            spans.append((start, end))
 
             # Move start with overlap
             start = end - overlap
             if start >= len(text):
                 break
 
-        return chunks
+        return spans
 
     def _match_filters(self, document_metadata: Dict[str, Any], filters: Dict[str, Any]) -> bool:
         """Check if document matches filters"""
@@ -400,7 +597,13 @@ class FAISSIndexer:
                 with open(store_file, 'rb') as f:
                     self.document_store = pickle.load(f)
 
-                logger.info(f"Loaded index with {self.index.ntotal} vectors")
+                self._configure_search(self.index)
+                kind = self._index_kind(self.index)
+                logger.info(f"Loaded {kind} index with {self.index.ntotal} vectors")
+
+                # A flat index still becomes IVF-PQ once it is big enough to train
+                if kind != self.index_type and not (kind == "flat" and self.index_type == "ivfpq"):
+                    logger.warning(f"Existing index is {kind}, not the configured {self.index_type}; rebuild it to switch")
 
             else:
                 logger.info("No existing index found, will create new one")
@@ -476,6 +679,54 @@ class FAISSIndexer:
             await self.initialize()
 
 
+class ChunkStream:
+    """Chunk text that arrives in pieces (e.g. OCR pages) with the same boundaries as whole-text chunking
+
+    A chunk is emitted once enough text follows its start that later pieces can
+    no longer change it; the unfinished tail is kept until the next piece.
+    """
+
+    def __init__(self, indexer: FAISSIndexer, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP):
+        self.indexer = indexer
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self._buffer = ""
+        self._emitted = False
+
+    def feed(self, text: str) -> List[str]:
+        """Add text and return the chunks that are now complete"""
+        self._buffer += text
+        if len(self._buffer) <= self.chunk_size:
+            return []
+
+        chunks = []
+        next_start = 0
+
+        for start, end in self.indexer._chunk_spans(self._buffer, self.chunk_size, self.overlap):
+            if start + self.chunk_size >= len(self._buffer):
+                break
+
+            chunk = self._buffer[start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+            next_start = end - self.overlap
+
+        self._buffer = self._buffer[next_start:]
+        self._emitted = self._emitted or next_start > 0
+        return chunks
+
+    def flush(self) -> List[str]:
+        """Return the remaining chunks once all text has been fed"""
+        if self._emitted:
+            spans = self.indexer._chunk_spans(self._buffer, self.chunk_size, self.overlap)
+            chunks = [self._buffer[start:end].strip() for start, end in spans]
+        else:
+            chunks = [chunk.strip() for chunk in self.indexer._chunk_text(self._buffer, self.chunk_size, self.overlap)]
+
+        self._buffer = ""
+        return [chunk for chunk in chunks if chunk]
+
+
 # Global indexer instance
 _global_indexer: Optional[FAISSIndexer] = None
 
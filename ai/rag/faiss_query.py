@@ -2,21 +2,38 @@
 FAISS query engine for Q&A operations
 """
 
+import heapq
 import logging
 import asyncio
 import time
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from collections import defaultdict
+from contextlib import aclosing
+from typing import List, Dict, Any, Optional, Tuple, Union, AsyncIterator
+from datetime import datetime, date
 
 from models.qa_models import (
     QARequest, QAResult, QAAnswer, SourceReference, ProcessingMetadata
 )
 from .faiss_indexer import get_indexer
+from .context_packer import ContextPacker
+from .semantic_cache import SemanticAnswerCache
+from .reranker import CrossEncoderReranker
+from .obligation_store import get_obligation_store, parse_obligation_intent
 from services.extract_openai import OpenAIExtractionService
 from utils.config import get_settings
+from utils.metrics import KEYWORD_SEARCH_SECONDS
+from utils.tracing import span, run_in_executor
 
 logger = logging.getLogger(__name__)
 
+# Request filters the obligation store can apply exactly
+STRUCTURED_FILTERS = {"project_id", "category"}
+
+QA_SYSTEM_PROMPT = (
+    "You are a helpful assistant that answers questions based on provided context documents. "
+    "Be accurate and concise."
+)
+
 
 class FAISSQueryEngine:
     """FAISS-based query engine for Q&A operations"""
@@ -25,6 +42,17 @@ class FAISSQueryEngine:
         self.settings = get_settings()
         self.indexer = None
         self.answer_generator = None
+        self.context_packer = ContextPacker(
+            token_budget=self.settings.rag_context_token_budget,
+            similarity_threshold=self.settings.rag_context_similarity_threshold
+        )
+        self.answer_cache = SemanticAnswerCache(
+            similarity_threshold=self.settings.qa_semantic_cache_threshold,
+            max_entries=self.settings.qa_semantic_cache_max_entries,
+            ttl_seconds=self.settings.qa_semantic_cache_ttl_seconds,
+            enabled=self.settings.qa_semantic_cache_enabled
+        )
+        self.reranker = CrossEncoderReranker()
 
     async def initialize(self):
         """Initialize query engine"""
@@ -37,6 +65,9 @@ class FAISSQueryEngine:
                 (self.settings.azure_openai_api_key and self.settings.azure_openai_endpoint)):
                 self.answer_generator = OpenAIExtractionService()
 
+            # Load the cross-encoder if reranking is enabled
+            await self.reranker.initialize()
+
             logger.info("FAISS query engine initialized")
 
         except Exception as e:
@@ -50,74 +81,385 @@ class FAISSQueryEngine:
         try:
             await self._ensure_initialized()
 
+            # Answer date, count and aggregate obligation questions exactly
+            structured = await self._answer_from_obligation_store(request, start_time)
+            if structured:
+                return structured
+
+            # Serve repeated-intent queries from the semantic answer cache
+            scope = query_embedding = None
+            if self._use_answer_cache(request):
+                query_embedding = await self.indexer.embed_query(request.query)
+                scope = self.answer_cache.make_scope(request)
+                document_versions = dict(self.indexer.document_versions)
+                index_version = self.indexer.index_version
+
+                cached = self.answer_cache.lookup(scope, query_embedding, document_versions, index_version)
+                if cached:
+                    return self._cached_result(request, *cached, start_time=start_time)
+
             # Search for relevant documents
-            search_results = await self._search_documents(request)
+            with span("qa.search", mode=request.search_mode) as search_span:
+                search_results = await self._search_documents(request, query_embedding)
+                search_span.set_attribute("results", len(search_results))
+            with span("qa.rerank"):
+                search_results, rerank_info = await self._rerank(request, search_results)
 
             # Generate answer
-            answer = await self._generate_answer(request, search_results)
+            with span("qa.answer"):
+                answer = await self._generate_answer(request, search_results)
 
-            # Create processing metadata
-            processing_metadata = ProcessingMetadata(
-                provider="faiss_rag",
-                model=self.settings.embedding_model,
-                processing_time=time.time() - start_time,
-                parameters={
-                    "search_mode": request.search_mode,
-                    "max_results": request.max_results,
-                    "confidence_threshold": request.confidence_threshold,
-                    "filters": request.filters
-                }
-            )
+            result = self._build_result(request, answer, search_results, start_time, extra_parameters=rerank_info)
 
-            return QAResult(
-                query=request.query,
-                answer=answer,
-                search_results_count=len(search_results),
-                processing_metadata=processing_metadata,
-                filters_applied=request.filters
-            )
+            if scope is not None and answer.answer_type != "error":
+                self.answer_cache.store(scope, query_embedding, result, document_versions, index_version)
+
+            return result
 
         except Exception as e:
             logger.error(f"Query processing failed: {e}")
             raise
 
-    async def _search_documents(self, request: QARequest) -> List[Dict[str, Any]]:
+    async def batch_query(
+        self,
+        queries: List[str],
+        request: QARequest,
+        max_concurrency: Optional[int] = None
+    ) -> List[Union[QAResult, Exception]]:
+        """Process many queries sharing one request's filters and search settings
+
+        All queries are embedded in one encode call, searched with one FAISS
+        call and one keyword pass, and answered concurrently up to
+        max_concurrency. Results are in query order; a failed query yields
+        its exception.
+        """
+        start_time = time.time()
+        await self._ensure_initialized()
+
+        requests = [request.copy(update={"query": query}) for query in queries]
+        use_cache = self._use_answer_cache(request)
+
+        # One encode call for the whole batch
+        query_embeddings = None
+        if request.search_mode != "keyword" or use_cache:
+            query_embeddings = await self.indexer.embed_queries(queries)
+
+        results: List[Union[QAResult, Exception, None]] = [None] * len(queries)
+
+        # Answer date, count and aggregate obligation questions exactly
+        for i, individual_request in enumerate(requests):
+            results[i] = await self._answer_from_obligation_store(individual_request, start_time)
+        pending = [i for i in range(len(queries)) if results[i] is None]
+
+        # Serve repeated-intent queries from the semantic answer cache
+        scope = None
+        if use_cache:
+            scope = self.answer_cache.make_scope(request)
+            document_versions = dict(self.indexer.document_versions)
+            index_version = self.indexer.index_version
+            uncached = []
+
+            for i in pending:
+                cached = self.answer_cache.lookup(scope, query_embeddings[i], document_versions, index_version)
+                if cached:
+                    results[i] = self._cached_result(requests[i], *cached, start_time=start_time)
+                else:
+                    uncached.append(i)
+            pending = uncached
+
+        if not pending:
+            return results
+
+        # One FAISS search over the query matrix and one keyword pass
+        batch_results = await self._search_documents_batch(
+            request,
+            [queries[i] for i in pending],
+            query_embeddings[pending] if query_embeddings is not None else None
+        )
+
+        semaphore = asyncio.Semaphore(max(max_concurrency or self.settings.qa_batch_max_concurrency, 1))
+
+        async def answer_query(i: int, search_results: List[Dict[str, Any]]) -> QAResult:
+            search_results, rerank_info = await self._rerank(requests[i], search_results)
+
+            async with semaphore:
+                answer = await self._generate_answer(requests[i], search_results)
+
+            result = self._build_result(
+                requests[i], answer, search_results, start_time,
+                extra_parameters={"batched": True, "batch_size": len(queries), **rerank_info}
+            )
+
+            if scope is not None and answer.answer_type != "error":
+                self.answer_cache.store(scope, query_embeddings[i], result, document_versions, index_version)
+
+            return result
+
+        answered = await asyncio.gather(
+            *(answer_query(i, search_results) for i, search_results in zip(pending, batch_results)),
+            return_exceptions=True
+        )
+
+        for i, result in zip(pending, answered):
+            results[i] = result
+
+        return results
+
+    def _build_result(
+        self,
+        request: QARequest,
+        answer: QAAnswer,
+        search_results: List[Dict[str, Any]],
+        start_time: float,
+        extra_parameters: Optional[Dict[str, Any]] = None,
+        provider: str = "faiss_rag"
+    ) -> QAResult:
+        """Assemble a Q&A result with processing metadata"""
+        processing_metadata = ProcessingMetadata(
+            provider=provider,
+            model=self.settings.embedding_model,
+            processing_time=time.time() - start_time,
+            parameters={
+                "search_mode": request.search_mode,
+                "max_results": request.max_results,
+                "confidence_threshold": request.confidence_threshold,
+                "filters": request.filters,
+                **(extra_parameters or {})
+            }
+        )
+
+        return QAResult(
+            query=request.query,
+            answer=answer,
+            search_results_count=len(search_results),
+            processing_metadata=processing_metadata,
+            filters_applied=request.filters
+        )
+
+    async def _answer_from_obligation_store(self, request: QARequest, start_time: float) -> Optional[QAResult]:
+        """Answer recognized date, count and aggregate obligation questions from the structured store"""
+        if not self.settings.qa_structured_obligations_enabled:
+            return None
+        if (request.options or {}).get('structured', True) is False:
+            return None
+
+        # The store can only apply these filters; anything else needs retrieval to be honoured
+        filters = {key for key, value in (request.filters or {}).items() if value is not None}
+        if filters - STRUCTURED_FILTERS:
+            return None
+
+        store = get_obligation_store()
+        if not len(store):
+            return None
+
+        intent = parse_obligation_intent(request.query, date.today(), store.categories(), request.filters)
+        if intent is None:
+            return None
+
+        # A project the store knows nothing about was probably never recorded, not obligation-free
+        if intent.get("project_id") and not store.has_project(intent["project_id"]):
+            return None
+
+        date_range = intent.get("date_range") or {}
+        records = store.query(
+            start=date_range.get("start"),
+            end=date_range.get("end"),
+            project_id=intent.get("project_id"),
+            category=intent.get("category"),
+            has_penalty=intent.get("has_penalty"),
+            open_only=date_range.get("overdue", False)
+        )
+
+        # Undated recurring obligations that necessarily fall inside a closed range
+        recurring = []
+        if date_range.get("start") and date_range.get("end"):
+            recurring = store.recurring(
+                (date_range["end"] - date_range["start"]).days + 1,
+                project_id=intent.get("project_id"),
+                category=intent.get("category")
+            )
+
+        sources = [
+            SourceReference(
+                document_id=record["document_id"],
+                document_name=record["document_name"],
+                text_snippet=record["description"][:200],
+                relevance_score=1.0
+            )
+            for record in (records + recurring)[:10]
+        ]
+
+        answer = QAAnswer(
+            answer=self._format_structured_answer(intent, records, recurring),
+            confidence=1.0,
+            answer_type="structured",
+            sources=sources,
+            related_queries=await self._get_related_queries(request.query),
+            explanation=f"Answered from {len(store)} extracted obligation records"
+        )
+
+        intent_parameters = {
+            **intent,
+            "date_range": {
+                key: value.isoformat() if isinstance(value, date) else value
+                for key, value in date_range.items()
+            } if date_range else None
+        }
+
+        return self._build_result(
+            request, answer, records, start_time,
+            extra_parameters={"intent": intent_parameters, "recurring_obligations": len(recurring)},
+            provider="obligation_store"
+        )
+
+    def _format_structured_answer(
+        self,
+        intent: Dict[str, Any],
+        records: List[Dict[str, Any]],
+        recurring: List[Dict[str, Any]]
+    ) -> str:
+        """Render a structured obligation answer"""
+        date_range = intent.get("date_range")
+        scope_parts = []
+        if date_range:
+            scope_parts.append("overdue" if date_range.get("overdue") else f"due {date_range['label']}")
+        if intent.get("project_id"):
+            scope_parts.append(f"for project {intent['project_id']}")
+        if intent.get("category"):
+            scope_parts.append(f"in the {intent['category']} category")
+        if intent.get("has_penalty"):
+            scope_parts.append("with penalties")
+        scope = "".join(f" {part}" for part in scope_parts)
+
+        recurring_note = ""
+        if recurring:
+            frequencies = ", ".join(sorted({r["frequency"] for r in recurring}))
+            recurring_note = f" {len(recurring)} recurring obligation(s) ({frequencies}) also apply."
+
+        if intent["action"] == "count":
+            return f"There are {len(records)} obligation(s){scope}." + recurring_note
+
+        if intent["action"] == "aggregate":
+            group_by = intent["group_by"]
+            counts = get_obligation_store().aggregate(group_by, records)
+            breakdown = ", ".join(f"{key}: {count}" for key, count in counts.items()) or "none"
+            label = "project" if group_by == "project_id" else group_by
+            return f"{len(records)} obligation(s){scope} by {label}: {breakdown}." + recurring_note
+
+        if not records:
+            return f"No obligations{scope} were found in the extracted obligations." + recurring_note
+
+        lines = [f"{len(records)} obligation(s){scope}:"]
+        for record in records[:20]:
+            details = [f"due {record['due_date'].isoformat()}" if record["due_date"] else record["frequency"] or "no fixed date"]
+            details.append(record["category"])
+            if record.get("assignee"):
+                details.append(f"assignee: {record['assignee']}")
+            if record.get("penalty"):
+                details.append("penalty applies")
+            lines.append(f"- {record['description']} ({'; '.join(details)})")
+
+        if len(records) > 20:
+            lines.append(f"...and {len(records) - 20} more.")
+
+        return "\n".join(lines) + ("\n" + recurring_note.strip() if recurring_note else "")
+
+    def _cached_result(
+        self, request: QARequest, result: QAResult, similarity: float, start_time: float
+    ) -> QAResult:
+        """Adapt a cached answer to the query it is served for"""
+        cached_query = result.query
+        result.query = request.query
+        result.processing_metadata.processing_time = time.time() - start_time
+        result.processing_metadata.timestamp = datetime.utcnow()
+        result.processing_metadata.parameters = {
+            **(result.processing_metadata.parameters or {}),
+            "semantic_cache_hit": True,
+            "cache_similarity": similarity,
+            "cached_query": cached_query
+        }
+        return result
+
+    def _use_answer_cache(self, request: QARequest) -> bool:
+        """Whether a request may be served from the semantic answer cache (opt out with options.cache=false)"""
+        return (
+            self.answer_cache.enabled and
+            (request.options or {}).get('cache', True) is not False
+        )
+
+    async def _search_documents(
+        self, request: QARequest, query_embedding: Optional[Any] = None
+    ) -> List[Dict[str, Any]]:
         """Search for relevant documents"""
+        results = await self._search_documents_batch(request, [request.query], query_embedding)
+        return results[0]
+
+    async def _search_documents_batch(
+        self,
+        request: QARequest,
+        queries: List[str],
+        query_embeddings: Optional[Any] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Search for relevant documents for many queries sharing the request's search settings"""
         try:
+            # Over-fetch candidates when a rerank stage will trim them
+            max_results = self._candidate_count(request)
+
             # Convert filters to indexer format
             indexer_filters = self._convert_filters(request.filters)
 
             # Perform search
             if request.search_mode == "semantic":
-                results = await self.indexer.search(
-                    query=request.query,
-                    k=request.max_results,
-                    filters=indexer_filters
+                batch_results = await self.indexer.search_batch(
+                    queries,
+                    k=max_results,
+                    filters=indexer_filters,
+                    query_embeddings=query_embeddings
                 )
             elif request.search_mode == "keyword":
-                results = await self._keyword_search(request.query, request.max_results, indexer_filters)
+                batch_results = await self._keyword_search_batch(queries, max_results, indexer_filters)
             else:  # hybrid
-                semantic_results = await self.indexer.search(
-                    query=request.query,
-                    k=request.max_results // 2,
-                    filters=indexer_filters
+                semantic_batch = await self.indexer.search_batch(
+                    queries,
+                    k=max_results // 2,
+                    filters=indexer_filters,
+                    query_embeddings=query_embeddings
                 )
-                keyword_results = await self._keyword_search(
-                    request.query, request.max_results // 2, indexer_filters
+                keyword_batch = await self._keyword_search_batch(
+                    queries, max_results // 2, indexer_filters
                 )
-                results = self._merge_results(semantic_results, keyword_results, request.max_results)
+                batch_results = [
+                    self._merge_results(semantic_results, keyword_results, max_results)
+                    for semantic_results, keyword_results in zip(semantic_batch, keyword_batch)
+                ]
 
             # Filter by confidence threshold
-            filtered_results = [
-                result for result in results
-                if result.get("score", 0) >= request.confidence_threshold
+            return [
+                [
+                    result for result in results
+                    if result.get("score", 0) >= request.confidence_threshold
+                ]
+                for results in batch_results
             ]
 
-            return filtered_results
-
         except Exception as e:
             logger.error(f"Document search failed: {e}")
-            return []
+            return [[] for _ in queries]
+
+    def _candidate_count(self, request: QARequest) -> int:
+        """Number of results to retrieve before reranking"""
+        if self.reranker.enabled:
+            return max(request.max_results, self.settings.rerank_candidates)
+        return request.max_results
+
+    async def _rerank(
+        self, request: QARequest, search_results: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Rerank retrieved candidates down to max_results, returning timing details"""
+        if not self.reranker.enabled:
+            return search_results[:request.max_results], {}
+
+        return await self.reranker.rerank(request.query, search_results, request.max_results)
 
     async def _keyword_search(
         self,
@@ -126,47 +468,93 @@ class FAISSQueryEngine:
         filters: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """Perform keyword-based search"""
+        results = await self._keyword_search_batch([query], k, filters)
+        return results[0]
+
+    async def _keyword_search_batch(
+        self,
+        queries: List[str],
+        k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Perform keyword-based search for many queries in one pass over the document store"""
         try:
-            # Get all documents from indexer
             # Note: This is a simplified implementation
             # For production, consider using a proper text search engine like Elasticsearch
+            documents = list(self.indexer.document_store.items())
 
-            query_words = set(query.lower().split())
-            results = []
+            def score():
+                with span("keyword.search", queries=len(queries), documents=len(documents)), \
+                        KEYWORD_SEARCH_SECONDS.time():
+                    return self._score_keywords(queries, k, filters, documents)
 
-            # Search through document store
-            for index_id, metadata in self.indexer.document_store.items():
-                content = metadata.get("content", "").lower()
-
-                # Apply filters
-                if filters and not self.indexer._match_filters(metadata, filters):
-                    continue
-
-                # Calculate keyword match score
-                content_words = set(content.split())
-                matches = query_words.intersection(content_words)
-                score = len(matches) / len(query_words) if query_words else 0
-
-                if score > 0:
-                    result = {
-                        "document_id": metadata["document_id"],
-                        "chunk_id": metadata["chunk_id"],
-                        "content": metadata["content"],
-                        "title": metadata["title"],
-                        "score": score,
-                        "metadata": metadata["metadata"],
-                        "document_type": metadata.get("document_type"),
-                        "timestamp": metadata.get("timestamp")
-                    }
-                    results.append(result)
-
-            # Sort by score and return top k
-            results.sort(key=lambda x: x["score"], reverse=True)
-            return results[:k]
+            return await run_in_executor(score)
 
         except Exception as e:
             logger.error(f"Keyword search failed: {e}")
-            return []
+            return [[] for _ in queries]
+
+    def _score_keywords(
+        self,
+        queries: List[str],
+        k: int,
+        filters: Optional[Dict[str, Any]],
+        documents: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[List[Dict[str, Any]]]:
+        """Score every query against every chunk, keeping each query's top k"""
+        if k <= 0:
+            return [[] for _ in queries]
+
+        query_words = [set(query.lower().split()) for query in queries]
+
+        # word -> indices of the queries containing it
+        word_queries: Dict[str, List[int]] = defaultdict(list)
+        for i, words in enumerate(query_words):
+            for word in words:
+                word_queries[word].append(i)
+
+        top_hits: List[List[Tuple[float, int, Dict[str, Any]]]] = [[] for _ in queries]
+
+        for position, (index_id, metadata) in enumerate(documents):
+            # Apply filters
+            if filters and not self.indexer._match_filters(metadata, filters):
+                continue
+
+            # Count keyword matches for every query at once
+            content_words = set(metadata.get("content", "").lower().split())
+            match_counts: Dict[int, int] = defaultdict(int)
+            for word in content_words & word_queries.keys():
+                for i in word_queries[word]:
+                    match_counts[i] += 1
+
+            for i, matches in match_counts.items():
+                score = matches / len(query_words[i])
+
+                # Bounded min-heap; earlier chunks win ties as with a stable sort
+                entry = (score, -position, metadata)
+                if len(top_hits[i]) < k:
+                    heapq.heappush(top_hits[i], entry)
+                elif entry[:2] > top_hits[i][0][:2]:
+                    heapq.heapreplace(top_hits[i], entry)
+
+        batch_results = []
+        for hits in top_hits:
+            results = []
+            for score, _, metadata in sorted(hits, key=lambda hit: hit[:2], reverse=True):
+                results.append({
+                    "document_id": metadata["document_id"],
+                    "chunk_id": metadata["chunk_id"],
+                    "chunk_index": metadata.get("chunk_index"),
+                    "content": metadata["content"],
+                    "title": metadata["title"],
+                    "score": score,
+                    "metadata": metadata["metadata"],
+                    "document_type": metadata.get("document_type"),
+                    "timestamp": metadata.get("timestamp")
+                })
+            batch_results.append(results)
+
+        return batch_results
 
     def _merge_results(
         self,
@@ -221,27 +609,19 @@ class FAISSQueryEngine:
                 )
 
             # Create source references
-            sources = []
-            context_texts = []
-
-            for result in search_results:
-                source = SourceReference(
-                    document_id=result["document_id"],
-                    document_name=result.get("title", result["document_id"]),
-                    document_type=result.get("document_type"),
-                    text_snippet=result["content"][:200] + "..." if len(result["content"]) > 200 else result["content"],
-                    deep_link=self._create_deep_link(result),
-                    relevance_score=result["score"]
-                )
-                sources.append(source)
-                context_texts.append(result["content"])
+            sources, context_texts = self._build_sources(search_results)
 
             # Generate answer using AI if available
             if self.answer_generator and request.include_context:
-                answer_text, confidence = await self._generate_ai_answer(
-                    request.query, context_texts
-                )
-                answer_type = "synthesized"
+                try:
+                    answer_text, confidence = await self._generate_ai_answer(
+                        request.query, context_texts, use_cache=self._use_llm_cache(request)
+                    )
+                    answer_type = "synthesized"
+                except Exception as e:
+                    # Keep the sources, but mark the answer as an error so it is never cached
+                    logger.error(f"AI answer generation failed: {e}")
+                    answer_text, confidence, answer_type = "Unable to generate AI answer", 0.0, "error"
             else:
                 # Fallback: return most relevant snippet
                 answer_text = search_results[0]["content"][:500]
@@ -268,14 +648,172 @@ class FAISSQueryEngine:
                 related_queries=None
             )
 
-    async def _generate_ai_answer(self, query: str, context_texts: List[str]) -> tuple[str, float]:
-        """Generate AI-powered answer from context"""
+    async def _generate_ai_answer(
+        self, query: str, context_texts: List[str], use_cache: bool = True
+    ) -> tuple[str, float]:
+        """Generate AI-powered answer from context (raises if the completion fails)"""
+        prompt = self._create_answer_prompt(query, context_texts)
+
+        # Use the extraction service to generate answer
+        # This is a simplified approach - in production, you might want a dedicated QA model
+        answer = await self.answer_generator._chat_completion(
+            QA_SYSTEM_PROMPT, prompt, max_tokens=500, use_cache=use_cache
+        )
+        answer = answer.strip()
+
+        return answer, self._estimate_answer_confidence(answer)
+
+    async def stream_query(self, request: QARequest) -> AsyncIterator[Dict[str, Any]]:
+        """Process a Q&A query as a stream of events
+
+        Yields a "sources" event as soon as retrieval completes, "token" events
+        as the answer is generated, and a final "done" event with confidence and
+        processing metadata (or an "error" event).
+        """
+        start_time = time.time()
+
         try:
-            # Combine context texts
-            combined_context = "\n\n".join(context_texts[:5])  # Limit context size
+            await self._ensure_initialized()
+
+            # Answer date, count and aggregate obligation questions exactly
+            structured = await self._answer_from_obligation_store(request, start_time)
+            if structured:
+                async for event in self._stream_result(structured):
+                    yield event
+                return
+
+            # Search for relevant documents
+            search_results = await self._search_documents(request)
+            search_results, rerank_info = await self._rerank(request, search_results)
+            sources, context_texts = self._build_sources(search_results)
+            retrieval_time = time.time() - start_time
+
+            yield {
+                "event": "sources",
+                "data": {
+                    "query": request.query,
+                    "sources": [source.dict() for source in sources],
+                    "search_results_count": len(search_results),
+                    "retrieval_time": retrieval_time
+                }
+            }
+
+            # Stream the answer
+            if not search_results:
+                answer_text = "I couldn't find any relevant information to answer your question."
+                confidence = 0.0
+                answer_type = "not_found"
+                yield {"event": "token", "data": {"text": answer_text}}
+
+            elif self.answer_generator and request.include_context:
+                prompt = self._create_answer_prompt(request.query, context_texts)
+                answer_parts = []
+
+                # Close the completion stream (and free its LLM slot) as soon as the client disconnects
+                async with aclosing(self.answer_generator._stream_chat_completion(
+                    QA_SYSTEM_PROMPT, prompt, max_tokens=500, use_cache=self._use_llm_cache(request)
+                )) as deltas:
+                    async for delta in deltas:
+                        answer_parts.append(delta)
+                        yield {"event": "token", "data": {"text": delta}}
+
+                answer_text = "".join(answer_parts).strip()
+                confidence = self._estimate_answer_confidence(answer_text)
+                answer_type = "synthesized"
+
+            else:
+                # Fallback: return most relevant snippet
+                answer_text = search_results[0]["content"][:500]
+                confidence = search_results[0]["score"]
+                answer_type = "direct"
+                yield {"event": "token", "data": {"text": answer_text}}
 
-            # Create prompt for answer generation
-            prompt = f"""
+            processing_metadata = ProcessingMetadata(
+                provider="faiss_rag",
+                model=self.settings.embedding_model,
+                processing_time=time.time() - start_time,
+                parameters={
+                    "search_mode": request.search_mode,
+                    "max_results": request.max_results,
+                    "confidence_threshold": request.confidence_threshold,
+                    "filters": request.filters,
+                    "retrieval_time": retrieval_time,
+                    "streamed": True,
+                    **rerank_info
+                }
+            )
+
+            yield {
+                "event": "done",
+                "data": {
+                    "answer": answer_text,
+                    "confidence": confidence,
+                    "answer_type": answer_type,
+                    "related_queries": await self._get_related_queries(request.query),
+                    "explanation": (
+                        f"Answer generated from {len(sources)} relevant document(s)"
+                        if answer_type == "synthesized" else None
+                    ),
+                    "filters_applied": request.filters,
+                    "processing_metadata": processing_metadata.dict()
+                }
+            }
+
+        except Exception as e:
+            logger.error(f"Streaming query processing failed: {e}")
+            yield {"event": "error", "data": {"message": f"Query processing failed: {str(e)}"}}
+
+    async def _stream_result(self, result: QAResult) -> AsyncIterator[Dict[str, Any]]:
+        """Emit a complete result as sources, token and done events"""
+        yield {
+            "event": "sources",
+            "data": {
+                "query": result.query,
+                "sources": [source.dict() for source in result.answer.sources],
+                "search_results_count": result.search_results_count,
+                "retrieval_time": result.processing_metadata.processing_time
+            }
+        }
+        yield {"event": "token", "data": {"text": result.answer.answer}}
+        yield {
+            "event": "done",
+            "data": {
+                "answer": result.answer.answer,
+                "confidence": result.answer.confidence,
+                "answer_type": result.answer.answer_type,
+                "related_queries": result.answer.related_queries,
+                "explanation": result.answer.explanation,
+                "filters_applied": result.filters_applied,
+                "processing_metadata": result.processing_metadata.dict()
+            }
+        }
+
+    def _build_sources(self, search_results: List[Dict[str, Any]]) -> Tuple[List[SourceReference], List[str]]:
+        """Create source references and the packed answer context from search results"""
+        sources = []
+
+        for result in search_results:
+            source = SourceReference(
+                document_id=result["document_id"],
+                document_name=result.get("title", result["document_id"]),
+                document_type=result.get("document_type"),
+                text_snippet=result["content"][:200] + "..." if len(result["content"]) > 200 else result["content"],
+                deep_link=self._create_deep_link(result),
+                relevance_score=result["score"]
+            )
+            sources.append(source)
+
+        context_texts = self.context_packer.pack_texts(search_results)
+
+        return sources, context_texts
+
+    def _create_answer_prompt(self, query: str, context_texts: List[str]) -> str:
+        """Create answer generation prompt"""
+        # Combine context texts (already deduplicated and fitted to the token budget)
+        combined_context = "\n\n".join(context_texts)
+
+        # Create prompt for answer generation
+        return f"""
 Based on the following context documents, answer the user's question.
 Provide a clear, concise answer based only on the information provided.
 If the context doesn't contain enough information to answer the question, say so.
@@ -287,40 +825,13 @@ Context:
 
 Answer:"""
 
-            # Use the extraction service to generate answer
-            # This is a simplified approach - in production, you might want a dedicated QA model
-            client = await self.answer_generator._get_client()
-
-            model = (self.settings.azure_openai_deployment_name
-                    if hasattr(self.settings, 'azure_openai_deployment_name')
-                    else self.settings.openai_model)
-
-            response = await client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant that answers questions based on provided context documents. Be accurate and concise."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.1,
-                max_tokens=500
-            )
-
-            answer = response.choices[0].message.content.strip()
-
-            # Estimate confidence based on answer content
-            confidence = 0.8 if len(answer) > 20 and "don't have enough information" not in answer.lower() else 0.3
+    def _estimate_answer_confidence(self, answer: str) -> float:
+        """Estimate confidence based on answer content"""
+        return 0.8 if len(answer) > 20 and "don't have enough information" not in answer.lower() else 0.3
 
-            return answer, confidence
-
-        except Exception as e:
-            logger.error(f"AI answer generation failed: {e}")
-            return "Unable to generate AI answer", 0.2
+    def _use_llm_cache(self, request: QARequest) -> bool:
+        """Whether a request allows cached completions (opt out with options.llm_cache=false)"""
+        return (request.options or {}).get('llm_cache', True) is not False
 
     async def _get_related_queries(self, query: str) -> Optional[List[str]]:
         """Get related query suggestions"""
@@ -431,6 +942,11 @@ Answer:"""
 _global_query_engine: Optional[FAISSQueryEngine] = None
 
 
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Answer cache of the global query engine, if it has been created"""
+    return _global_query_engine.answer_cache if _global_query_engine is not None else None
+
+
 async def get_query_engine() -> FAISSQueryEngine:
     """Get global query engine instance"""
     global _global_query_engine
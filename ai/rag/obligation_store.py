@@ -0,0 +1,518 @@
+"""
+Structured obligation store for exact date, count and aggregate questions
+
+Extracted obligations are normalized into flat records (due date, frequency,
+category, penalty, project) kept in a SQLite table indexed by due date,
+category, project and document. Questions such as "What obligations are due
+this month for project ABC?" are recognized by parse_obligation_intent and
+answered from the store without retrieval or an LLM call.
+
+The database is shared by all server processes: each document's records are
+replaced in one transaction, and every query reads the committed state.
+"""
+
+import re
+import json
+import sqlite3
+import calendar
+import logging
+import asyncio
+import threading
+from pathlib import Path
+from collections import Counter
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Set, Tuple
+
+from dateutil import parser as date_parser
+
+from models.extraction_models import Obligation, ObligationRequest, ObligationResult
+from utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+MONTHS = {
+    name.lower(): index
+    for index in range(1, 13)
+    for name in (calendar.month_name[index], calendar.month_abbr[index])
+}
+MONTH_PATTERN = r'(?:' + '|'.join(sorted(MONTHS, key=len, reverse=True)) + r')\.?'
+
+EXPLICIT_DATE_PATTERNS = [
+    re.compile(r'\b\d{4}-\d{1,2}-\d{1,2}\b'),
+    re.compile(r'\b\d{1,2}/\d{1,2}/\d{4}\b'),
+    re.compile(r'\b' + MONTH_PATTERN + r'\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}\b', re.IGNORECASE),
+    re.compile(r'\b\d{1,2}(?:st|nd|rd|th)?\s+(?:of\s+)?' + MONTH_PATTERN + r',?\s+\d{4}\b', re.IGNORECASE)
+]
+
+FREQUENCY_PATTERNS = [
+    ("daily", re.compile(r'\b(daily|every day|each day)\b', re.IGNORECASE)),
+    ("biweekly", re.compile(r'\b(bi-?weekly|fortnightly|every (two|2) weeks)\b', re.IGNORECASE)),
+    ("weekly", re.compile(r'\b(weekly|every week|each week)\b', re.IGNORECASE)),
+    ("monthly", re.compile(r'\b(monthly|every month|each month)\b', re.IGNORECASE)),
+    ("quarterly", re.compile(r'\b(quarterly|every quarter|each quarter)\b', re.IGNORECASE)),
+    ("annually", re.compile(r'\b(annual(ly)?|yearly|every year|each year)\b', re.IGNORECASE))
+]
+
+# Recurring obligations that fall inside any range of at least this many days
+FREQUENCY_PERIOD_DAYS = {
+    "daily": 1, "weekly": 7, "biweekly": 14, "monthly": 28, "quarterly": 90, "annually": 365
+}
+
+OBLIGATION_NOUNS = re.compile(r'\b(obligations?|deadlines?|deliverables?|duty|duties)\b', re.IGNORECASE)
+# "due" only signals an obligation question when a date follows ("due next week", "due by 5 June"),
+# not in "due to force majeure"
+DUE_DATE_TERMS = re.compile(
+    r'\b(?:overdue|past due|due\s+(?:(?:on|by|in|before|until|during|for|within)\s+)?'
+    r'(?:today|tomorrow|(?:this|next|last|coming)\s+(?:week|month|year)|the\s+next\s+\d+|\d|'
+    + MONTH_PATTERN + r'(?!\w)))',
+    re.IGNORECASE
+)
+COUNT_TERMS = re.compile(r'\b(how many|number of|count)\b', re.IGNORECASE)
+GROUP_TERMS = re.compile(r'\b(?:by|per|for each|grouped by|breakdown by)\s+(category|project|frequency|assignee)\b', re.IGNORECASE)
+PROJECT_TERM = re.compile(r'\bproject\s+(?:"([^"]+)"|\'([^\']+)\'|([A-Za-z0-9][\w\-]*))', re.IGNORECASE)
+GROUP_PREFIX = re.compile(r'\b(?:by|per|for each|grouped by|breakdown by)\s+$', re.IGNORECASE)
+# Unquoted project IDs must look like codes (PRJ-101, P42, ABC), not words ("this", "due")
+PROJECT_ID = re.compile(r'(?=[\w\-]*[\d\-])[\w\-]+|[A-Z][A-Z0-9_]+')
+PENALTY_TERMS = re.compile(r'\b(with|having|carry|carrying) (a )?penalt(y|ies)\b', re.IGNORECASE)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS obligations (
+    record_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    document_id TEXT NOT NULL,
+    document_name TEXT,
+    project_id TEXT,
+    project_key TEXT,
+    description TEXT NOT NULL,
+    category TEXT NOT NULL,
+    due_date TEXT,
+    due_text TEXT,
+    frequency TEXT,
+    penalty TEXT,
+    assignee TEXT,
+    status TEXT NOT NULL,
+    confidence REAL
+);
+CREATE INDEX IF NOT EXISTS idx_obligations_due_date ON obligations (due_date);
+CREATE INDEX IF NOT EXISTS idx_obligations_project ON obligations (project_key);
+CREATE INDEX IF NOT EXISTS idx_obligations_category ON obligations (category);
+CREATE INDEX IF NOT EXISTS idx_obligations_document ON obligations (document_id);
+"""
+
+_INSERT = (
+    "INSERT INTO obligations (document_id, document_name, project_id, project_key, description, category, "
+    "due_date, due_text, frequency, penalty, assignee, status, confidence) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def parse_explicit_date(text: str) -> Optional[date]:
+    """Parse the first explicit calendar date in text (relative phrases are ignored)"""
+    if not text:
+        return None
+
+    for pattern in EXPLICIT_DATE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            try:
+                return date_parser.parse(match.group()).date()
+            except (ValueError, OverflowError):
+                continue
+
+    return None
+
+
+def normalize_frequency(*texts: Optional[str]) -> Optional[str]:
+    """Map frequency wording to daily/weekly/biweekly/monthly/quarterly/annually"""
+    for text in texts:
+        if not text:
+            continue
+        for frequency, pattern in FREQUENCY_PATTERNS:
+            if pattern.search(text):
+                return frequency
+    return None
+
+
+def _month_range(year: int, month: int) -> Tuple[date, date]:
+    """First and last day of a month"""
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _shift_month(day: date, months: int) -> Tuple[int, int]:
+    """Year and month a number of months away"""
+    index = day.year * 12 + day.month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def parse_date_range(query: str, today: date) -> Optional[Dict[str, Any]]:
+    """Recognize a due-date range in a question"""
+    text = query.lower()
+
+    if re.search(r'\b(overdue|past due|missed)\b', text):
+        return {"label": "overdue", "start": None, "end": today - timedelta(days=1), "overdue": True}
+
+    if re.search(r'\btoday\b', text):
+        return {"label": "today", "start": today, "end": today}
+
+    if re.search(r'\btomorrow\b', text):
+        tomorrow = today + timedelta(days=1)
+        return {"label": "tomorrow", "start": tomorrow, "end": tomorrow}
+
+    match = re.search(r'\b(this|next|last) week\b', text)
+    if match:
+        offset = {"this": 0, "next": 1, "last": -1}[match.group(1)]
+        start = today - timedelta(days=today.weekday()) + timedelta(weeks=offset)
+        return {"label": match.group(), "start": start, "end": start + timedelta(days=6)}
+
+    match = re.search(r'\b(this|next|last) month\b', text)
+    if match:
+        offset = {"this": 0, "next": 1, "last": -1}[match.group(1)]
+        start, end = _month_range(*_shift_month(today, offset))
+        return {"label": match.group(), "start": start, "end": end}
+
+    match = re.search(r'\b(this|next|last) year\b', text)
+    if match:
+        year = today.year + {"this": 0, "next": 1, "last": -1}[match.group(1)]
+        return {"label": match.group(), "start": date(year, 1, 1), "end": date(year, 12, 31)}
+
+    match = re.search(r'\b(?:next|within|in the next|coming)\s+(\d+)\s+days?\b', text)
+    if match:
+        days = int(match.group(1))
+        return {"label": f"in the next {days} days", "start": today, "end": today + timedelta(days=days)}
+
+    match = re.search(r'\b(before|by|until|after|since)\s+(.+)$', query, re.IGNORECASE)
+    if match:
+        boundary = parse_explicit_date(match.group(2))
+        if boundary:
+            if match.group(1).lower() in ("after", "since"):
+                return {"label": f"after {boundary.isoformat()}", "start": boundary + timedelta(days=1), "end": None}
+            return {"label": f"by {boundary.isoformat()}", "start": None, "end": boundary}
+
+    match = re.search(r'\b(?:in|during|for)\s+(' + MONTH_PATTERN + r')(?:\s+(\d{4}))?\b', text)
+    if match:
+        month = MONTHS[match.group(1).rstrip('.')]
+        year = int(match.group(2)) if match.group(2) else today.year
+        start, end = _month_range(year, month)
+        return {"label": f"in {calendar.month_name[month]} {year}", "start": start, "end": end}
+
+    return None
+
+
+def parse_project_filter(query: str) -> Optional[str]:
+    """Project ID named in a question ("project PRJ-101", 'project "Tower B"'), ignoring "by project" groupings"""
+    for match in PROJECT_TERM.finditer(query):
+        if GROUP_PREFIX.search(query[:match.start()]):
+            continue
+        quoted = match.group(1) or match.group(2)
+        if quoted and quoted.strip():
+            return quoted.strip()
+        token = (match.group(3) or "").rstrip('?.,')
+        if token and PROJECT_ID.fullmatch(token):
+            return token
+    return None
+
+
+def parse_obligation_intent(
+    query: str,
+    today: date,
+    known_categories: Optional[Set[str]] = None,
+    filters: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Recognize a date, count or aggregate question about obligations
+
+    Returns None for anything that needs free-text understanding, so the
+    question goes through RAG instead.
+    """
+    # "due" alone is not enough ("How many days notice is due before termination?",
+    # "penalty for late delivery due to force majeure in June"), the question must
+    # be about obligations or ask what is due on a date
+    has_noun = bool(OBLIGATION_NOUNS.search(query))
+    if not has_noun and not DUE_DATE_TERMS.search(query):
+        return None
+
+    intent: Dict[str, Any] = {"action": "list"}
+
+    date_range = parse_date_range(query, today)
+    if date_range:
+        intent["date_range"] = date_range
+
+    # Counts and aggregates need an obligation noun ("How many days are due ..." is not one)
+    if has_noun:
+        group_match = GROUP_TERMS.search(query)
+        if group_match:
+            intent["action"] = "aggregate"
+            intent["group_by"] = {"project": "project_id"}.get(group_match.group(1).lower(), group_match.group(1).lower())
+        elif COUNT_TERMS.search(query):
+            intent["action"] = "count"
+
+    project_id = parse_project_filter(query)
+    if project_id:
+        intent["project_id"] = project_id
+    elif filters and filters.get("project_id"):
+        intent["project_id"] = filters["project_id"]
+
+    query_lower = query.lower()
+    for category in sorted(known_categories or []):
+        if category and re.search(r'\b' + re.escape(category.lower()) + r'\b', query_lower):
+            intent["category"] = category
+            break
+    if "category" not in intent and filters and filters.get("category"):
+        intent["category"] = filters["category"]
+
+    if PENALTY_TERMS.search(query):
+        intent["has_penalty"] = True
+
+    # Only date, count and aggregate questions are answered exactly; anything
+    # else ("who is responsible for ...") needs the document text
+    if intent["action"] == "list" and "date_range" not in intent:
+        return None
+
+    return intent
+
+
+async def all_obligations(
+    result: ObligationResult, extraction_service: Any, request: ObligationRequest, text: str
+) -> List[Obligation]:
+    """Every obligation behind an extraction result
+
+    A result cut to one page or to the top OBLIGATION_MAX_RESULTS is re-read
+    unbounded with the service's iter_obligations, so the store's counts and
+    aggregates cover the whole document.
+    """
+    if result.page is None and not result.has_more:
+        return result.obligations
+    return [obligation async for obligation in extraction_service.iter_obligations(request, text)]
+
+
+class ObligationStore:
+    """Obligation records in a SQLite database with due-date, category, project and document indexes"""
+
+    def __init__(self, store_path: Optional[str] = None):
+        settings = get_settings()
+        self.store_path = Path(store_path or Path(settings.faiss_index_path) / "obligations.sqlite3")
+        # JSON file written by earlier versions, imported once into the database
+        self.legacy_path = self.store_path.with_name("obligations.json")
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def load(self):
+        """Open the database, creating the schema and importing a legacy JSON store"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+
+            try:
+                self.store_path.parent.mkdir(parents=True, exist_ok=True)
+                # Other processes may hold the write lock briefly; wait for it rather than failing
+                conn = sqlite3.connect(str(self.store_path), check_same_thread=False, timeout=30)
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                conn.commit()
+                self._conn = conn
+
+                self._import_legacy()
+                count = self._conn.execute("SELECT COUNT(*) FROM obligations").fetchone()[0]
+                logger.info(f"Loaded {count} structured obligations")
+
+            except Exception as e:
+                logger.error(f"Obligation store loading failed: {e}")
+
+    async def add_obligations(
+        self,
+        obligations: List[Obligation],
+        document_id: str,
+        project_id: Optional[str] = None,
+        document_name: Optional[str] = None
+    ) -> int:
+        """Replace a document's obligations with newly extracted ones"""
+        records = []
+        for obligation in obligations:
+            description = obligation.description.value
+            due_text = obligation.due_date.value if obligation.due_date else None
+            frequency_text = obligation.frequency.value if obligation.frequency else None
+
+            records.append({
+                "document_id": document_id,
+                "document_name": document_name or document_id,
+                "project_id": project_id,
+                "description": description,
+                "category": (obligation.category or "general").lower(),
+                "due_date": parse_explicit_date(due_text) or parse_explicit_date(description),
+                "due_text": due_text,
+                "frequency": normalize_frequency(frequency_text, due_text, description),
+                "penalty": obligation.penalty_text.value if obligation.penalty_text else None,
+                "assignee": obligation.assignee.value if obligation.assignee else None,
+                "status": obligation.status or "pending",
+                "confidence": obligation.description.confidence
+            })
+
+        try:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, lambda: self._replace_document(document_id, records))
+        except Exception as e:
+            logger.error(f"Obligation store saving failed: {e}")
+
+        return len(records)
+
+    def query(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        project_id: Optional[str] = None,
+        category: Optional[str] = None,
+        has_penalty: Optional[bool] = None,
+        open_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Records matching all given constraints, ordered by due date"""
+        clauses, params = self._scope(project_id, category)
+
+        if start is not None:
+            clauses.append("due_date >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            clauses.append("due_date <= ?")
+            params.append(end.isoformat())
+        if has_penalty is not None:
+            clauses.append("(COALESCE(penalty, '') != '') = ?")
+            params.append(int(has_penalty))
+        if open_only:
+            clauses.append("status NOT IN ('completed', 'cancelled')")
+
+        return self._select(clauses, params)
+
+    def recurring(
+        self,
+        min_period_days: int,
+        project_id: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Undated recurring obligations whose period fits in a range of min_period_days"""
+        frequencies = [frequency for frequency, days in FREQUENCY_PERIOD_DAYS.items() if days <= min_period_days]
+        if not frequencies:
+            return []
+
+        clauses, params = self._scope(project_id, category)
+        clauses.append("due_date IS NULL")
+        clauses.append(f"frequency IN ({', '.join('?' for _ in frequencies)})")
+        return self._select(clauses, params + frequencies)
+
+    def aggregate(self, group_by: str, records: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Count records per value of a field"""
+        return dict(Counter(str(r.get(group_by) or "unspecified") for r in records).most_common())
+
+    def has_project(self, project_id: str) -> bool:
+        """Whether any record belongs to a project"""
+        rows = self._read("SELECT 1 FROM obligations WHERE project_key = ? LIMIT 1", (str(project_id).lower(),))
+        return bool(rows)
+
+    def categories(self) -> Set[str]:
+        """Categories present in the store"""
+        return {row["category"] for row in self._read("SELECT DISTINCT category FROM obligations")}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics"""
+        totals = self._read(
+            "SELECT COUNT(*) AS records, COUNT(due_date) AS dated_records, "
+            "COUNT(DISTINCT document_id) AS documents, COUNT(DISTINCT project_key) AS projects FROM obligations"
+        )
+        categories = self._read("SELECT category, COUNT(*) AS count FROM obligations GROUP BY category")
+        return {
+            **(dict(totals[0]) if totals else {"records": 0, "dated_records": 0, "documents": 0, "projects": 0}),
+            "categories": {row["category"]: row["count"] for row in categories},
+            "path": str(self.store_path)
+        }
+
+    def __len__(self) -> int:
+        rows = self._read("SELECT COUNT(*) FROM obligations")
+        return rows[0][0] if rows else 0
+
+    def _scope(self, project_id: Optional[str], category: Optional[str]) -> Tuple[List[str], List[Any]]:
+        """WHERE clauses for the project and category constraints"""
+        clauses, params = [], []
+        if project_id is not None:
+            clauses.append("project_key = ?")
+            params.append(str(project_id).lower())
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(str(category).lower())
+        return clauses, params
+
+    def _select(self, clauses: List[str], params: List[Any]) -> List[Dict[str, Any]]:
+        """Records matching the clauses, undated ones last"""
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._read(
+            f"SELECT * FROM obligations{where} ORDER BY due_date IS NULL, due_date, description", params
+        )
+        return [self._to_record(row) for row in rows]
+
+    def _read(self, sql: str, params: Any = ()) -> List[sqlite3.Row]:
+        """Run a read query; indexed lookups are fast enough to run inline"""
+        with self._lock:
+            if self._conn is None:
+                return []
+            return self._conn.execute(sql, params).fetchall()
+
+    def _replace_document(self, document_id: str, records: List[Dict[str, Any]]):
+        """Swap a document's records in one transaction (runs in an executor thread)"""
+        with self._lock:
+            if self._conn is None:
+                raise RuntimeError("Obligation store is not loaded")
+            with self._conn:
+                self._conn.execute("DELETE FROM obligations WHERE document_id = ?", (document_id,))
+                self._conn.executemany(_INSERT, [self._to_row(record) for record in records])
+
+    def _import_legacy(self):
+        """Move records from the JSON file used by earlier versions into the database (lock held)"""
+        if not self.legacy_path.exists():
+            return
+
+        # Take the write lock first so only one process imports
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.legacy_path.exists() and not self._conn.execute("SELECT 1 FROM obligations LIMIT 1").fetchone():
+                records = json.loads(self.legacy_path.read_text(encoding="utf-8"))
+                for record in records:
+                    record["due_date"] = date.fromisoformat(record["due_date"]) if record.get("due_date") else None
+                self._conn.executemany(_INSERT, [self._to_row(record) for record in records])
+                logger.info(f"Imported {len(records)} obligations from {self.legacy_path}")
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            raise
+
+        try:
+            self.legacy_path.replace(self.legacy_path.with_suffix(".json.imported"))
+        except FileNotFoundError:
+            pass  # renamed by another process
+
+    @staticmethod
+    def _to_row(record: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Column values for a record"""
+        project_id = record.get("project_id")
+        return (
+            record["document_id"], record.get("document_name"), project_id,
+            str(project_id).lower() if project_id else None, record["description"], record["category"],
+            record["due_date"].isoformat() if record.get("due_date") else None, record.get("due_text"),
+            record.get("frequency"), record.get("penalty"), record.get("assignee"),
+            record.get("status") or "pending", record.get("confidence")
+        )
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        """Record dict for a row"""
+        record = {key: row[key] for key in row.keys() if key not in ("record_id", "project_key")}
+        record["due_date"] = date.fromisoformat(record["due_date"]) if record["due_date"] else None
+        return record
+
+
+@lru_cache()
+def get_obligation_store() -> ObligationStore:
+    """Get cached obligation store instance"""
+    store = ObligationStore()
+    store.load()
+    return store
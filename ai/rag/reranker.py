@@ -0,0 +1,161 @@
+"""
+Cross-encoder reranking of retrieved chunks
+"""
+
+import math
+import time
+import logging
+import asyncio
+from typing import List, Dict, Any, Tuple
+
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+from utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """Rescore (query, chunk) pairs with a cross-encoder under a latency budget
+
+    The model runs with PyTorch, optionally dynamically quantized to int8, or
+    with ONNX Runtime through optimum when RERANK_BACKEND=onnx. If the budget
+    is exceeded or the model is unavailable, the retrieval order is kept.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.enabled = self.settings.rerank_enabled
+        self._tokenizer = None
+        self._model = None
+        self._backend = None
+        self._load_lock = asyncio.Lock()
+
+    async def initialize(self):
+        """Load the cross-encoder"""
+        if not self.enabled or self._model is not None:
+            return
+
+        async with self._load_lock:
+            if self._model is not None:
+                return
+
+            try:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, self._load_model)
+                logger.info(f"Cross-encoder reranker loaded ({self._backend}): {self.settings.rerank_model}")
+
+            except Exception as e:
+                logger.error(f"Cross-encoder reranker initialization failed, reranking disabled: {e}")
+                self.enabled = False
+
+    def _load_model(self):
+        """Blocking model load for the configured backend"""
+        model_name = self.settings.rerank_model
+        self._tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        if self.settings.rerank_backend == "onnx":
+            try:
+                from optimum.onnxruntime import ORTModelForSequenceClassification
+
+                self._model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+                self._backend = "onnx"
+                return
+
+            except ImportError:
+                logger.warning("optimum[onnxruntime] is not installed; falling back to the PyTorch reranker")
+
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+
+        if self.settings.rerank_quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            self._backend = "torch-int8"
+        else:
+            self._backend = "torch"
+
+        self._model = model
+
+    async def rerank(
+        self, query: str, results: List[Dict[str, Any]], top_k: int
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Return the top_k results by cross-encoder score and timing details
+
+        Each kept result's score becomes the cross-encoder relevance (0-1) and
+        the original score is kept as retrieval_score.
+        """
+        await self.initialize()
+
+        info: Dict[str, Any] = {
+            "rerank_model": self.settings.rerank_model,
+            "rerank_backend": self._backend,
+            "rerank_candidates": len(results),
+            "rerank_applied": False
+        }
+
+        if not self.enabled or self._model is None or len(results) <= 1:
+            return results[:top_k], info
+
+        start_time = time.time()
+        deadline = start_time + self.settings.rerank_latency_budget_ms / 1000
+        batch_size = max(self.settings.rerank_batch_size, 1)
+        loop = asyncio.get_event_loop()
+        scores: List[float] = []
+
+        try:
+            for batch_start in range(0, len(results), batch_size):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+
+                passages = [r["content"] for r in results[batch_start:batch_start + batch_size]]
+                batch_scores = await asyncio.wait_for(
+                    loop.run_in_executor(None, lambda: self._score_batch(query, passages)),
+                    timeout=remaining
+                )
+                scores.extend(batch_scores)
+
+        except asyncio.TimeoutError:
+            info["rerank_fallback"] = "latency_budget_exceeded"
+            info["rerank_time_ms"] = (time.time() - start_time) * 1000
+            logger.warning(
+                f"Reranking exceeded {self.settings.rerank_latency_budget_ms}ms budget, "
+                f"keeping retrieval order"
+            )
+            return results[:top_k], info
+
+        except Exception as e:
+            info["rerank_fallback"] = "error"
+            info["rerank_time_ms"] = (time.time() - start_time) * 1000
+            logger.error(f"Reranking failed, keeping retrieval order: {e}")
+            return results[:top_k], info
+
+        reranked = []
+        for result, score in sorted(zip(results, scores), key=lambda pair: pair[1], reverse=True)[:top_k]:
+            reranked.append({**result, "retrieval_score": result.get("score", 0.0), "score": score})
+
+        info["rerank_applied"] = True
+        info["rerank_time_ms"] = (time.time() - start_time) * 1000
+        return reranked, info
+
+    def _score_batch(self, query: str, passages: List[str]) -> List[float]:
+        """Score one batch of (query, passage) pairs"""
+        encoded = self._tokenizer(
+            [query] * len(passages),
+            passages,
+            padding=True,
+            truncation=True,
+            max_length=self.settings.rerank_max_length,
+            return_tensors="pt"
+        )
+
+        with torch.no_grad():
+            logits = self._model(**encoded).logits
+
+        # Single-logit relevance models (e.g. ms-marco) vs two-class models
+        if logits.shape[-1] == 1:
+            values = logits[:, 0].tolist()
+            return [1 / (1 + math.exp(-value)) for value in values]
+
+        return torch.softmax(logits, dim=-1)[:, -1].tolist()
@@ -0,0 +1,177 @@
+"""
+Semantic answer cache for Q&A queries
+
+Answers are stored with the normalized query embedding, the filters and
+search parameters they were produced under, and the versions of the
+documents they cite. A new query is served from the cache when its embedding
+is close enough to a cached one under identical parameters and none of the
+cited documents has been re-indexed since.
+"""
+
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+import numpy as np
+
+from models.qa_models import QARequest, QAResult
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """In-memory answer cache keyed on query embedding similarity"""
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 1000,
+        ttl_seconds: int = 3600,
+        enabled: bool = True
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+
+        # scope key -> entry id -> entry, plus a global LRU order of entry ids
+        self._scopes: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self._order: "OrderedDict[int, str]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "invalidations": 0,
+            "evictions": 0
+        }
+
+    def make_scope(self, request: QARequest) -> str:
+        """Key for the parameters a cached answer must share with the new query"""
+        return json.dumps({
+            "filters": request.filters,
+            "search_mode": request.search_mode,
+            "max_results": request.max_results,
+            "confidence_threshold": request.confidence_threshold,
+            "include_context": request.include_context
+        }, sort_keys=True, default=str)
+
+    def lookup(
+        self,
+        scope: str,
+        embedding: np.ndarray,
+        document_versions: Dict[str, int],
+        index_version: int
+    ) -> Optional[Tuple[QAResult, float]]:
+        """Find a valid cached answer for a similar query, returning it with its similarity"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entries = self._scopes.get(scope)
+            if not entries:
+                self._stats["misses"] += 1
+                return None
+
+            ids = list(entries.keys())
+            matrix = np.vstack([entries[entry_id]["embedding"] for entry_id in ids])
+            similarities = matrix @ embedding.reshape(-1)
+
+            # Try candidates above the threshold, most similar first
+            for position in np.argsort(-similarities):
+                similarity = float(similarities[position])
+                if similarity < self.similarity_threshold:
+                    break
+
+                entry_id = ids[position]
+                entry = entries[entry_id]
+
+                if not self._is_valid(entry, document_versions, index_version):
+                    self._remove(entry_id)
+                    self._stats["invalidations"] += 1
+                    continue
+
+                self._order.move_to_end(entry_id)
+                self._stats["hits"] += 1
+                return entry["result"].copy(deep=True), similarity
+
+            self._stats["misses"] += 1
+            return None
+
+    def store(
+        self,
+        scope: str,
+        embedding: np.ndarray,
+        result: QAResult,
+        document_versions: Dict[str, int],
+        index_version: int
+    ):
+        """Cache an answer with the versions of the documents it cites"""
+        if not self.enabled:
+            return
+
+        cited = {source.document_id for source in result.answer.sources}
+
+        entry = {
+            "embedding": embedding.reshape(-1).astype(np.float32),
+            "result": result.copy(deep=True),
+            "document_versions": {doc_id: document_versions.get(doc_id, 0) for doc_id in cited},
+            # Answers citing nothing depend on the whole index (e.g. "not found")
+            "index_version": None if cited else index_version,
+            "created_at": time.time()
+        }
+
+        with self._lock:
+            self._scopes.setdefault(scope, {})[self._next_id] = entry
+            self._order[self._next_id] = scope
+            self._next_id += 1
+            self._stats["stores"] += 1
+
+            while len(self._order) > self.max_entries:
+                self._remove(next(iter(self._order)))
+                self._stats["evictions"] += 1
+
+    def clear(self) -> int:
+        """Remove all cached answers and return the number removed"""
+        with self._lock:
+            removed = len(self._order)
+            self._scopes = {}
+            self._order = OrderedDict()
+            return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._order),
+            "similarity_threshold": self.similarity_threshold,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            **self._stats
+        }
+
+    def _is_valid(self, entry: Dict[str, Any], document_versions: Dict[str, int], index_version: int) -> bool:
+        """Whether an entry is unexpired and its documents are unchanged"""
+        if self.ttl_seconds and time.time() - entry["created_at"] > self.ttl_seconds:
+            return False
+
+        if entry["index_version"] is not None and entry["index_version"] != index_version:
+            return False
+
+        return all(
+            document_versions.get(doc_id, 0) == version
+            for doc_id, version in entry["document_versions"].items()
+        )
+
+    def _remove(self, entry_id: int):
+        """Remove one entry from its scope and the LRU order"""
+        scope = self._order.pop(entry_id)
+        entries = self._scopes[scope]
+        del entries[entry_id]
+        if not entries:
+            del self._scopes[scope]
@@ -2,4 +2,4 @@
 API routers for AI Operations Microservice
 """
 
-from . import ocr, metadata, obligations, qa
\ No newline at end of file
+from . import ocr, metadata, obligations, qa, jobs, ingest, admin
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""
+Admin API router: on-demand profiling of the live process
+
+All endpoints require the `X-Admin-Token` header to match ADMIN_TOKEN and
+are disabled when no token is configured.
+"""
+
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from utils.config import get_settings
+from utils.profiling import (
+    ProfilerBusyError, TRACEMALLOC_TARGETS, get_sampling_profiler, get_request_profiler,
+    get_tracemalloc_session, is_admin_token
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Reject requests without a valid admin token"""
+    if not get_settings().admin_token:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/profile")
+async def sample_profile(
+    seconds: float = Query(10.0, gt=0, description="Sampling duration (capped by PROFILING_MAX_SECONDS)"),
+    interval: float = Query(0.01, gt=0, description="Seconds between samples"),
+    format: str = Query("collapsed", description="collapsed or speedscope"),
+    include_idle: bool = Query(False, description="Include threads waiting for work")
+):
+    """
+    Sample the stacks of all threads for a number of seconds
+
+    `collapsed` returns one `thread;frame;...;frame count` line per stack (for flamegraph.pl or
+    speedscope); `speedscope` returns a file for https://www.speedscope.app.
+    """
+    if format not in ["collapsed", "speedscope"]:
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'speedscope'")
+
+    try:
+        profiler = get_sampling_profiler()
+        profile = await profiler.profile(seconds, interval, include_idle)
+
+        if format == "speedscope":
+            return JSONResponse(
+                profiler.to_speedscope(profile),
+                headers={"Content-Disposition": "attachment; filename=profile.speedscope.json"}
+            )
+        return PlainTextResponse(profiler.to_collapsed(profile))
+
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Sampling profile failed: {e}")
+        raise HTTPException(status_code=500, detail="Sampling profile failed")
+
+
+@router.get("/profiles")
+async def list_request_profiles():
+    """
+    List stored request profiles
+
+    Send a single `/nlp/*`, `/ocr/*` or `/ingest` request with `X-Profile: 1` and `X-Admin-Token`
+    to profile it with cProfile; the response carries the profile ID in `X-Profile-Id`.
+    """
+    return {"profiles": get_request_profiler().list()}
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_request_profile(profile_id: str):
+    """Get a request profile as pstats text sorted by cumulative time"""
+    report = get_request_profiler().get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    header = f"# {report['method']} {report['path']} took {report['duration']:.3f}s\n"
+    return PlainTextResponse(header + report["report"])
+
+
+@router.get("/tracemalloc")
+async def get_tracemalloc_status():
+    """Get tracemalloc status and traced memory"""
+    return get_tracemalloc_session().status()
+
+
+@router.post("/tracemalloc/start")
+async def start_tracemalloc(
+    frames: int = Query(1, ge=1, le=25, description="Stack frames stored per allocation")
+):
+    """
+    Start tracing allocations
+
+    Tracing slows allocation-heavy code and uses memory for every live block, so it stops
+    automatically after PROFILING_TRACEMALLOC_MAX_SECONDS.
+    """
+    return get_tracemalloc_session().start(frames)
+
+
+@router.post("/tracemalloc/snapshot")
+async def snapshot_tracemalloc(
+    target: Optional[str] = Query(None, description=f"Limit to allocations from: {', '.join(TRACEMALLOC_TARGETS)}"),
+    group_by: str = Query("lineno", description="lineno, filename or traceback"),
+    limit: int = Query(25, ge=1, le=200, description="Entries to return")
+):
+    """
+    Take a snapshot and return the largest allocation changes since the previous snapshot
+
+    The first snapshot after starting returns the largest allocations. `document_store` covers the
+    FAISS document store; `models` covers the embedding, NER and reranker models and the result cache.
+    Start with `frames` > 1 so allocations made inside library code are attributed to these modules.
+    """
+    if group_by not in ["lineno", "filename", "traceback"]:
+        raise HTTPException(status_code=400, detail="group_by must be 'lineno', 'filename' or 'traceback'")
+
+    try:
+        return await get_tracemalloc_session().snapshot(target, group_by, limit)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"tracemalloc snapshot failed: {e}")
+        raise HTTPException(status_code=500, detail="tracemalloc snapshot failed")
+
+
+@router.post("/tracemalloc/stop")
+async def stop_tracemalloc():
+    """Stop tracing allocations and discard the baseline snapshot"""
+    return get_tracemalloc_session().stop()
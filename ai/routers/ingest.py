@@ -0,0 +1,117 @@
+"""
+Document ingestion API router
+"""
+
+import logging
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, UploadFile, File, HTTPException
+
+from models.ingestion_models import IngestionRequest, IngestionResponse
+from services.ingestion import IngestionService, OCR_EXTENSIONS
+from utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("", response_model=IngestionResponse)
+async def ingest_document(request: IngestionRequest):
+    """
+    Ingest a contract in one pass: OCR, metadata, obligations and Q&A indexing
+
+    The file is downloaded once and its pages are streamed into extraction and
+    embedding while OCR continues. Use the `ingest` job type for large documents.
+
+    - **file_path**: Path to the file in storage (PDF, image or text) - optional if text is provided
+    - **text**: Raw text content, skipping OCR
+    - **document_id**: Stable document identifier (defaults to file_path)
+    - **project_id**: Project the document belongs to
+    - **extract_metadata** / **extract_obligations** / **index**: Stages to run
+    - **include_ocr_result**: Include page-level OCR output (also enables layout and table extraction)
+    """
+    if not request.file_path and request.text is None:
+        raise HTTPException(status_code=400, detail="Either file_path or text must be provided")
+
+    return await run_ingestion(request)
+
+
+@router.post("/upload", response_model=IngestionResponse)
+async def ingest_uploaded_document(
+    file: UploadFile = File(...),
+    document_id: Optional[str] = None,
+    title: Optional[str] = None,
+    project_id: Optional[str] = None,
+    ocr_provider: Optional[str] = None,
+    extract_provider: Optional[str] = None,
+    extract_metadata: bool = True,
+    extract_obligations: bool = True,
+    index: bool = True,
+    include_ocr_result: bool = False
+):
+    """
+    Ingest an uploaded contract in one pass (same stages as `/ingest`)
+
+    - **file**: Document file (PDF, image or .txt)
+    - **document_id**: Stable identifier; defaults to a hash of the file content (the filename is used as the title)
+    """
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No file provided")
+
+    settings = get_settings()
+    file_content = await file.read()
+
+    if len(file_content) > settings.max_file_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size: {settings.max_file_size} bytes"
+        )
+
+    file_ext = Path(file.filename).suffix.lower()
+    if file_ext not in OCR_EXTENSIONS + ['.txt']:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type. Supported: .txt, {', '.join(OCR_EXTENSIONS)}"
+        )
+
+    try:
+        request = IngestionRequest(
+            document_id=document_id,
+            title=title,
+            project_id=project_id,
+            ocr_provider=ocr_provider,
+            extract_provider=extract_provider,
+            extract_metadata=extract_metadata,
+            extract_obligations=extract_obligations,
+            index=index,
+            include_ocr_result=include_ocr_result
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await run_ingestion(request, file_content, file.filename)
+
+
+async def run_ingestion(
+    request: IngestionRequest, file_content: Optional[bytes] = None, filename: Optional[str] = None
+) -> IngestionResponse:
+    """Run the ingestion pipeline and map failures to HTTP errors"""
+    try:
+        result = await IngestionService().ingest(request, file_content, filename)
+
+        if result.errors:
+            message = f"Ingestion completed with errors in: {', '.join(sorted(result.errors))}"
+        else:
+            message = "Document ingested successfully"
+
+        return IngestionResponse(success=not result.errors, message=message, data=result)
+
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Ingestion failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Ingestion failed: {str(e)}")
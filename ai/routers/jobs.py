@@ -0,0 +1,526 @@
+"""
+Background job API router
+
+OCR and extraction requests submitted here return a job ID immediately and
+are processed by the job queue workers. Payloads are the request bodies of
+the equivalent synchronous endpoints.
+"""
+
+import uuid
+import asyncio
+import hashlib
+import logging
+import shutil
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Tuple
+
+from fastapi import APIRouter, UploadFile, File, HTTPException, Header, Response
+
+from models.job_models import (
+    JobSubmitRequest, JobResponse, JobListResponse, JOB_TYPES, JOB_STATUSES
+)
+from models.ocr_models import OCRRequest, OCRBatchRequest, OCRBatchResult
+from models.extraction_models import (
+    MetadataRequest, ObligationRequest, BatchExtractionRequest, BatchExtractionResult
+)
+from models.ingestion_models import IngestionRequest
+from services.ocr_azure import AzureOCRService
+from services.ocr_local import LocalOCRService
+from services.extract_local import LocalExtractionService
+from services.extract_openai import OpenAIExtractionService
+from services.ingestion import IngestionService
+from utils.config import get_settings
+from utils.storage_client import get_storage_client
+from utils.result_cache import get_result_cache
+from utils.llm_governor import llm_priority
+from utils.job_queue import get_job_queue, JobContext, JobConflictError
+from routers.ocr import get_ocr_service, process_single_file, validate_ocr_request
+from routers.metadata import process_single_metadata_file, validate_metadata_request
+from routers.obligations import (
+    get_extraction_service, record_extraction, process_single_obligation_file,
+    validate_obligation_request
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+REQUEST_MODELS = {
+    "ocr": OCRRequest,
+    "metadata": MetadataRequest,
+    "obligations": ObligationRequest,
+    "batch_ocr": OCRBatchRequest,
+    "batch_metadata": BatchExtractionRequest,
+    "batch_obligations": BatchExtractionRequest,
+    "ingest": IngestionRequest
+}
+
+SUPPORTED_OCR_EXTENSIONS = ['.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.bmp']
+
+
+@router.post("", response_model=JobResponse, status_code=202)
+async def submit_job(
+    request: JobSubmitRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None)
+):
+    """
+    Submit an OCR or extraction job
+
+    - **job_type**: ocr, metadata, obligations, batch_ocr, batch_metadata or batch_obligations
+    - **payload**: Request body of the matching synchronous endpoint (storage file paths or text)
+    - **idempotency_key**: Optional; the `Idempotency-Key` header takes precedence
+
+    Returns 202 with the new job, or 200 with the existing job when the idempotency key was seen before.
+    """
+    try:
+        payload = await validate_job_payload(request.job_type, request.payload)
+        job, created = await get_job_queue().submit(
+            request.job_type, payload, idempotency_key=idempotency_key or request.idempotency_key
+        )
+
+        if not created:
+            response.status_code = 200
+
+        return JobResponse(
+            success=True,
+            message="Job queued" if created else "Existing job returned for idempotency key",
+            data=job,
+            created=created
+        )
+
+    except JobConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Job submission failed: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/ocr-upload", response_model=JobResponse, status_code=202)
+async def submit_ocr_upload_job(
+    response: Response,
+    file: UploadFile = File(...),
+    provider: Optional[str] = None,
+    languages: Optional[str] = None,
+    extract_layout: bool = True,
+    extract_tables: bool = True,
+    idempotency_key: Optional[str] = Header(None)
+):
+    """
+    Submit an OCR job for an uploaded document
+
+    Takes the same parameters as `/ocr/extract`. The file is kept with the job until it finishes.
+    """
+    input_dir = None
+
+    try:
+        if not file.filename:
+            raise HTTPException(status_code=400, detail="No file provided")
+
+        settings = get_settings()
+        file_content = await file.read()
+
+        if len(file_content) > settings.max_file_size:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size: {settings.max_file_size} bytes"
+            )
+
+        filename = Path(file.filename).name
+        file_ext = Path(filename).suffix.lower()
+        if file_ext not in SUPPORTED_OCR_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type. Supported: {', '.join(SUPPORTED_OCR_EXTENSIONS)}"
+            )
+
+        payload = await validate_job_payload("ocr", {
+            "provider": provider,
+            "languages": [lang.strip() for lang in languages.split(',')] if languages else None,
+            "extract_layout": extract_layout,
+            "extract_tables": extract_tables
+        }, uploaded=True)
+        payload["upload"] = {
+            "filename": filename,
+            "size": len(file_content),
+            "sha256": hashlib.sha256(file_content).hexdigest()
+        }
+
+        queue = get_job_queue()
+        job_id = uuid.uuid4().hex
+        input_dir = queue.input_dir(job_id)
+
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, lambda: _write_upload(input_dir / filename, file_content))
+
+        job, created = await queue.submit("ocr", payload, idempotency_key=idempotency_key, job_id=job_id)
+
+        if not created:
+            shutil.rmtree(input_dir, ignore_errors=True)
+            response.status_code = 200
+
+        return JobResponse(
+            success=True,
+            message="Job queued" if created else "Existing job returned for idempotency key",
+            data=job,
+            created=created
+        )
+
+    except JobConflictError as e:
+        shutil.rmtree(input_dir, ignore_errors=True)
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        if input_dir is not None:
+            shutil.rmtree(input_dir, ignore_errors=True)
+        logger.error(f"OCR upload job submission failed: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("", response_model=JobListResponse)
+async def list_jobs(status: Optional[str] = None, job_type: Optional[str] = None, limit: int = 50):
+    """
+    List jobs, newest first (results omitted)
+
+    - **status**: Filter by status (queued, running, succeeded, failed, cancelled)
+    - **job_type**: Filter by job type
+    - **limit**: Maximum number of jobs (1-500)
+    """
+    if status and status not in JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Status must be one of: {', '.join(JOB_STATUSES)}")
+    if job_type and job_type not in JOB_TYPES:
+        raise HTTPException(status_code=400, detail=f"Job type must be one of: {', '.join(JOB_TYPES)}")
+
+    try:
+        jobs = await get_job_queue().list_jobs(status, job_type, max(1, min(limit, 500)))
+        return JobListResponse(success=True, message=f"{len(jobs)} jobs", data=jobs)
+
+    except Exception as e:
+        logger.error(f"Listing jobs failed: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/stats")
+async def get_job_stats():
+    """Get job queue statistics"""
+    try:
+        return await get_job_queue().get_stats()
+
+    except Exception as e:
+        logger.error(f"Failed to get job queue stats: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get job queue stats")
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, wait: float = 0, include_result: bool = True):
+    """
+    Get job status, progress and result
+
+    - **wait**: Long-poll for up to this many seconds until the job finishes
+    - **include_result**: Set to false to poll progress without fetching a large result
+    """
+    try:
+        timeout = max(0.0, min(wait, get_settings().job_long_poll_max_seconds))
+        job = await get_job_queue().wait(job_id, timeout, include_result)
+
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        return JobResponse(success=True, message=f"Job {job.status}", data=job)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Getting job {job_id} failed: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.delete("/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    try:
+        job = await get_job_queue().cancel(job_id)
+
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        return JobResponse(success=True, message=f"Job {job.status}", data=job)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Cancelling job {job_id} failed: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+async def validate_job_payload(job_type: str, payload: Dict[str, Any], uploaded: bool = False) -> Dict[str, Any]:
+    """Validate a job payload against the synchronous endpoint's rules and normalize it"""
+    request = REQUEST_MODELS[job_type](**payload)
+
+    if job_type == "ocr":
+        if not uploaded and not request.file_path:
+            raise ValueError("file_path is required")
+        validation = await validate_ocr_request(request)
+    elif job_type == "metadata":
+        if not request.text and not request.file_path:
+            raise ValueError("Either text or file_path must be provided")
+        validation = await validate_metadata_request(request)
+    elif job_type == "obligations":
+        if not request.text and not request.file_path:
+            raise ValueError("Either text or file_path must be provided")
+        validation = await validate_obligation_request(request)
+    elif job_type == "ingest":
+        if request.text is None and not request.file_path:
+            raise ValueError("Either text or file_path must be provided")
+        validation = None
+    else:
+        max_files = 100 if job_type == "batch_ocr" else 50
+        if len(request.file_paths) > max_files:
+            raise ValueError(f"Maximum {max_files} files per batch")
+        if job_type != "batch_ocr" and request.extraction_type != job_type[len("batch_"):]:
+            raise ValueError(f"extraction_type must be '{job_type[len('batch_'):]}' for this job type")
+        validation = None
+
+    if validation is not None and not validation.is_valid:
+        raise ValueError("; ".join(validation.errors))
+
+    return request.dict()
+
+
+def _write_upload(path: Path, content: bytes):
+    """Store an uploaded file with its job"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+async def _get_ocr_service(provider: Optional[str]):
+    """Get the OCR service for a provider, or the configured default"""
+    if provider == "azure":
+        return AzureOCRService()
+    if provider:
+        return LocalOCRService()
+    return await get_ocr_service()
+
+
+async def _get_extraction_service(provider: Optional[str]):
+    """Get the extraction service for a provider, or the configured default"""
+    if provider == "openai":
+        return OpenAIExtractionService()
+    if provider:
+        return LocalExtractionService()
+    return await get_extraction_service()
+
+
+async def _download(file_path: str) -> bytes:
+    """Download a file from storage"""
+    storage_client = get_storage_client()
+    await storage_client.initialize()
+
+    if not await storage_client.file_exists(file_path):
+        raise ValueError(f"File not found in storage: {file_path}")
+
+    return await storage_client.download_file(file_path)
+
+
+async def _load_text(text: Optional[str], file_path: Optional[str]) -> str:
+    """Get extraction input text, downloading a text file from storage if needed"""
+    if text:
+        return text
+
+    try:
+        return (await _download(file_path)).decode('utf-8')
+    except UnicodeDecodeError:
+        raise ValueError("File is not a text file. Use an OCR job first to extract text.")
+
+
+async def _run_batch(
+    context: JobContext,
+    file_paths: List[str],
+    parallel: bool,
+    process_file: Callable[[str], Awaitable[Any]]
+) -> Tuple[List[Any], List[str]]:
+    """Process batch files with bounded concurrency, reporting progress per file"""
+    semaphore = asyncio.Semaphore(get_settings().job_batch_concurrency if parallel else 1)
+    completed = 0
+
+    async def run(file_path: str):
+        nonlocal completed
+        async with semaphore:
+            try:
+                return await process_file(file_path)
+            finally:
+                completed += 1
+                await context.report_progress(completed, len(file_paths), "files")
+
+    await context.report_progress(0, len(file_paths), "files")
+    outcomes = await asyncio.gather(*[run(path) for path in file_paths], return_exceptions=True)
+
+    results, failed_files = [], []
+    for file_path, outcome in zip(file_paths, outcomes):
+        if isinstance(outcome, Exception):
+            failed_files.append(file_path)
+            logger.error(f"Job {context.job_id} failed to process {file_path}: {outcome}")
+        else:
+            results.append(outcome)
+
+    return results, failed_files
+
+
+async def run_ocr_job(context: JobContext) -> Dict[str, Any]:
+    """Run OCR on an uploaded or stored document"""
+    payload = {k: v for k, v in context.payload.items() if k != "upload"}
+    request = OCRRequest(**payload)
+
+    input_file = context.input_file()
+    if input_file is not None:
+        loop = asyncio.get_event_loop()
+        file_content = await loop.run_in_executor(None, input_file.read_bytes)
+        filename = input_file.name
+    else:
+        file_content = await _download(request.file_path)
+        filename = request.file_path.split('/')[-1]
+
+    async def report_pages(done: int, total: int):
+        await context.report_progress(done, total, "ocr")
+
+    ocr_service = await _get_ocr_service(request.provider)
+    try:
+        result = await ocr_service.extract_text(request, file_content, filename, progress_callback=report_pages)
+        return result.dict()
+    finally:
+        if hasattr(ocr_service, 'close'):
+            await ocr_service.close()
+
+
+async def run_metadata_job(context: JobContext) -> Dict[str, Any]:
+    """Extract metadata from text or a stored text file"""
+    request = MetadataRequest(**context.payload)
+    with llm_priority("batch"):
+        text_content = await _load_text(request.text, request.file_path)
+        await context.report_progress(0, 1, "extracting")
+
+        extraction_service = await _get_extraction_service(request.provider)
+        try:
+            result = await get_result_cache().get_or_extract(
+                "metadata", extraction_service, request, text_content
+            )
+            return result.dict()
+        finally:
+            if hasattr(extraction_service, 'close'):
+                await extraction_service.close()
+
+
+async def run_obligations_job(context: JobContext) -> Dict[str, Any]:
+    """Extract obligations from text or a stored text file"""
+    request = ObligationRequest(**context.payload)
+    with llm_priority("batch"):
+        text_content = await _load_text(request.text, request.file_path)
+        await context.report_progress(0, 1, "extracting")
+
+        extraction_service = await _get_extraction_service(request.provider)
+        try:
+            result = await get_result_cache().get_or_extract(
+                "obligations", extraction_service, request, text_content
+            )
+            await record_extraction(result, extraction_service, request, text_content)
+            return result.dict()
+        finally:
+            if hasattr(extraction_service, 'close'):
+                await extraction_service.close()
+
+
+async def run_batch_ocr_job(context: JobContext) -> Dict[str, Any]:
+    """Run OCR over stored documents"""
+    request = OCRBatchRequest(**context.payload)
+    start_time = time.time()
+
+    storage_client = get_storage_client()
+    await storage_client.initialize()
+
+    ocr_service = await _get_ocr_service(request.provider)
+    try:
+        results, failed_files = await _run_batch(
+            context, request.file_paths, request.parallel_processing,
+            lambda file_path: process_single_file(ocr_service, storage_client, file_path, request)
+        )
+    finally:
+        if hasattr(ocr_service, 'close'):
+            await ocr_service.close()
+
+    return OCRBatchResult(
+        results=results,
+        total_files=len(request.file_paths),
+        successful_files=len(results),
+        failed_files=failed_files,
+        total_processing_time=time.time() - start_time
+    ).dict()
+
+
+async def _run_batch_extraction_job(context: JobContext, process_file: Callable) -> Dict[str, Any]:
+    """Run metadata or obligation extraction over stored text files"""
+    request = BatchExtractionRequest(**context.payload)
+    start_time = time.time()
+
+    storage_client = get_storage_client()
+    await storage_client.initialize()
+
+    extraction_service = await _get_extraction_service(request.provider)
+    try:
+        with llm_priority("batch"):
+            results, failed_files = await _run_batch(
+                context, request.file_paths, request.parallel_processing,
+                lambda file_path: process_file(extraction_service, storage_client, file_path, request)
+            )
+    finally:
+        if hasattr(extraction_service, 'close'):
+            await extraction_service.close()
+
+    confidences = [r.overall_confidence for r in results]
+    return BatchExtractionResult(
+        results=results,
+        total_files=len(request.file_paths),
+        successful_files=len(results),
+        failed_files=failed_files,
+        total_processing_time=time.time() - start_time,
+        average_confidence=sum(confidences) / len(confidences) if confidences else 0.0
+    ).dict()
+
+
+async def run_batch_metadata_job(context: JobContext) -> Dict[str, Any]:
+    """Extract metadata from stored text files"""
+    return await _run_batch_extraction_job(context, process_single_metadata_file)
+
+
+async def run_batch_obligations_job(context: JobContext) -> Dict[str, Any]:
+    """Extract obligations from stored text files"""
+    return await _run_batch_extraction_job(context, process_single_obligation_file)
+
+
+async def run_ingest_job(context: JobContext) -> Dict[str, Any]:
+    """Run the single-pass ingestion pipeline on a stored document or text"""
+    request = IngestionRequest(**context.payload)
+    with llm_priority("batch"):
+        result = await IngestionService().ingest(request, progress_callback=context.report_progress)
+        return result.dict()
+
+
+JOB_HANDLERS = {
+    "ocr": run_ocr_job,
+    "metadata": run_metadata_job,
+    "obligations": run_obligations_job,
+    "batch_ocr": run_batch_ocr_job,
+    "batch_metadata": run_batch_metadata_job,
+    "batch_obligations": run_batch_obligations_job,
+    "ingest": run_ingest_job
+}
+
+for _job_type, _handler in JOB_HANDLERS.items():
+    get_job_queue().register_handler(_job_type, _handler)
@@ -16,6 +16,8 @@ from services.extract_local import LocalExtractionService
 from services.extract_openai import OpenAIExtractionService
 from utils.config import get_settings
 from utils.storage_client import get_storage_client
+from utils.result_cache import get_result_cache
+from utils.llm_governor import llm_priority
 
 logger = logging.getLogger(__name__)
 
@@ -111,7 +113,9 @@ async def extract_metadata(
 
         # Extract metadata
         try:
-            result = await extraction_service.extract_metadata(request, text_content)
+            result = await get_result_cache().get_or_extract(
+                "metadata", extraction_service, request, text_content
+            )
 
             return MetadataResponse(
                 success=True,
@@ -191,7 +195,9 @@ async def extract_metadata_from_storage(
 
         # Extract metadata
         try:
-            result = await extraction_service.extract_metadata(request, text_content)
+            result = await get_result_cache().get_or_extract(
+                "metadata", extraction_service, request, text_content
+            )
 
             return MetadataResponse(
                 success=True,
@@ -257,71 +263,73 @@ async def batch_extract_metadata(
         else:
             extraction_service = await get_extraction_service()
 
-        # Process files
-        import asyncio
-        import time
-
-        start_time = time.time()
-        results = []
-        failed_files = []
-
-        try:
-            if request.parallel_processing:
-                # Process in parallel
-                tasks = []
-                for file_path in request.file_paths:
-                    task = process_single_metadata_file(
-                        extraction_service, storage_client, file_path, request
-                    )
-                    tasks.append(task)
-
-                completed_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                for i, result in enumerate(completed_results):
-                    if isinstance(result, Exception):
-                        failed_files.append(request.file_paths[i])
-                        logger.error(f"Failed to process {request.file_paths[i]}: {result}")
-                    else:
-                        results.append(result)
-
-            else:
-                # Process sequentially
-                for file_path in request.file_paths:
-                    try:
-                        result = await process_single_metadata_file(
+        # Batch work yields to interactive LLM calls
+        with llm_priority("batch"):
+            # Process files
+            import asyncio
+            import time
+
+            start_time = time.time()
+            results = []
+            failed_files = []
+
+            try:
+                if request.parallel_processing:
+                    # Process in parallel
+                    tasks = []
+                    for file_path in request.file_paths:
+                        task = process_single_metadata_file(
                             extraction_service, storage_client, file_path, request
                         )
-                        results.append(result)
-                    except Exception as e:
-                        failed_files.append(file_path)
-                        logger.error(f"Failed to process {file_path}: {e}")
-
-            total_processing_time = time.time() - start_time
-
-            # Calculate average confidence
-            all_confidences = [r.overall_confidence for r in results]
-            average_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0.0
-
-            from models.extraction_models import BatchExtractionResult
-            batch_result = BatchExtractionResult(
-                results=results,
-                total_files=len(request.file_paths),
-                successful_files=len(results),
-                failed_files=failed_files,
-                total_processing_time=total_processing_time,
-                average_confidence=average_confidence
-            )
+                        tasks.append(task)
+
+                    completed_results = await asyncio.gather(*tasks, return_exceptions=True)
+
+                    for i, result in enumerate(completed_results):
+                        if isinstance(result, Exception):
+                            failed_files.append(request.file_paths[i])
+                            logger.error(f"Failed to process {request.file_paths[i]}: {result}")
+                        else:
+                            results.append(result)
+
+                else:
+                    # Process sequentially
+                    for file_path in request.file_paths:
+                        try:
+                            result = await process_single_metadata_file(
+                                extraction_service, storage_client, file_path, request
+                            )
+                            results.append(result)
+                        except Exception as e:
+                            failed_files.append(file_path)
+                            logger.error(f"Failed to process {file_path}: {e}")
+
+                total_processing_time = time.time() - start_time
+
+                # Calculate average confidence
+                all_confidences = [r.overall_confidence for r in results]
+                average_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0.0
+
+                from models.extraction_models import BatchExtractionResult
+                batch_result = BatchExtractionResult(
+                    results=results,
+                    total_files=len(request.file_paths),
+                    successful_files=len(results),
+                    failed_files=failed_files,
+                    total_processing_time=total_processing_time,
+                    average_confidence=average_confidence
+                )
 
-            return BatchExtractionResponse(
-                success=True,
-                message=f"Processed {len(results)}/{len(request.file_paths)} files successfully",
-                data=batch_result
-            )
+                return BatchExtractionResponse(
+                    success=True,
+                    message=f"Processed {len(results)}/{len(request.file_paths)} files successfully",
+                    data=batch_result
+                )
 
-        finally:
-            # Clean up OpenAI client if used
-            if hasattr(extraction_service, 'close'):
-                await extraction_service.close()
+            finally:
+                # Clean up OpenAI client if used
+                if hasattr(extraction_service, 'close'):
+                    await extraction_service.close()
 
     except HTTPException:
         raise
@@ -358,7 +366,9 @@ async def process_single_metadata_file(
         )
 
         # Extract metadata
-        result = await extraction_service.extract_metadata(individual_request, text_content)
+        result = await get_result_cache().get_or_extract(
+            "metadata", extraction_service, individual_request, text_content
+        )
         return result
 
     except Exception as e:
@@ -379,6 +389,29 @@ async def get_metadata_capabilities():
         raise HTTPException(status_code=500, detail="Failed to get capabilities")
 
 
+@router.get("/extraction-cache")
+async def get_extraction_cache_stats():
+    """Get extraction result cache statistics (shared by metadata and obligations)"""
+    try:
+        return get_result_cache().get_stats()
+
+    except Exception as e:
+        logger.error(f"Extraction cache stats error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get cache statistics")
+
+
+@router.delete("/extraction-cache")
+async def clear_extraction_cache():
+    """Clear all cached extraction results"""
+    try:
+        removed = await get_result_cache().clear()
+        return {"success": True, "message": f"Removed {removed} cached results"}
+
+    except Exception as e:
+        logger.error(f"Extraction cache clear error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to clear cache")
+
+
 async def validate_metadata_request(request: MetadataRequest) -> ValidationResult:
     """Validate metadata extraction request"""
     errors = []
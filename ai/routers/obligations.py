@@ -2,20 +2,25 @@
 Obligation extraction API router
 """
 
+import json
+import hashlib
 import logging
-from typing import Optional
+from typing import Optional, List
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from models.extraction_models import (
-    ObligationRequest, ObligationResponse, BatchExtractionRequest, BatchExtractionResponse,
-    ExtractionCapabilities, ValidationResult
+    ObligationRequest, ObligationResponse, ObligationResult, BatchExtractionRequest, BatchExtractionResponse,
+    ExtractionCapabilities, ValidationResult, Obligation
 )
 from models.common_models import ErrorResponse
 from services.extract_local import LocalExtractionService
 from services.extract_openai import OpenAIExtractionService
 from utils.config import get_settings
 from utils.storage_client import get_storage_client
+from utils.result_cache import get_result_cache
+from utils.llm_governor import llm_priority
+from rag.obligation_store import get_obligation_store, all_obligations
 
 logger = logging.getLogger(__name__)
 
@@ -44,7 +49,9 @@ async def extract_obligations(
     text: Optional[str] = None,
     provider: Optional[str] = None,
     confidence_threshold: float = 0.5,
-    include_penalties: bool = True
+    include_penalties: bool = True,
+    project_id: Optional[str] = None,
+    document_id: Optional[str] = None
 ):
     """
     Extract contractual obligations from document or text
@@ -54,6 +61,8 @@ async def extract_obligations(
     - **provider**: Extraction provider (local/openai) - optional, uses default if not specified
     - **confidence_threshold**: Minimum confidence threshold (0.0-1.0)
     - **include_penalties**: Whether to include penalty information
+    - **project_id**: Project the document belongs to (for structured Q&A)
+    - **document_id**: Stable document identifier (for structured Q&A)
     """
     try:
         # Validate input
@@ -79,11 +88,19 @@ async def extract_obligations(
             text_content = text
 
         # Create request
+        options = {
+            key: value for key, value in (
+                ("project_id", project_id),
+                ("document_id", document_id),
+                ("document_name", file.filename if file else None)
+            ) if value
+        }
         request = ObligationRequest(
             text=text_content,
             provider=provider,
             confidence_threshold=confidence_threshold,
-            include_penalties=include_penalties
+            include_penalties=include_penalties,
+            options=options or None
         )
 
         # Validate request
@@ -106,7 +123,10 @@ async def extract_obligations(
 
         # Extract obligations
         try:
-            result = await extraction_service.extract_obligations(request, text_content)
+            result = await get_result_cache().get_or_extract(
+                "obligations", extraction_service, request, text_content
+            )
+            await record_extraction(result, extraction_service, request, text_content)
 
             return ObligationResponse(
                 success=True,
@@ -186,7 +206,10 @@ async def extract_obligations_from_storage(
 
         # Extract obligations
         try:
-            result = await extraction_service.extract_obligations(request, text_content)
+            result = await get_result_cache().get_or_extract(
+                "obligations", extraction_service, request, text_content
+            )
+            await record_extraction(result, extraction_service, request, text_content)
 
             return ObligationResponse(
                 success=True,
@@ -211,6 +234,109 @@ async def extract_obligations_from_storage(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.post("/obligations-stream")
+async def extract_obligations_stream(request: ObligationRequest):
+    """
+    Extract obligations and stream each one as soon as it is parsed
+
+    Responds with newline-delimited JSON: one `obligation` event per obligation,
+    then a `done` event with totals (or an `error` event).
+
+    - **text**: Raw text content - optional if file_path is provided
+    - **file_path**: Path to a text file in storage - optional if text is provided
+    - **provider**: Extraction provider (local/openai)
+    - **confidence_threshold**: Minimum confidence threshold
+    - **include_penalties**: Whether to include penalty information
+    """
+    try:
+        if not request.text and not request.file_path:
+            raise HTTPException(status_code=400, detail="Either text or file_path must be provided")
+
+        # Validate request
+        validation = await validate_obligation_request(request)
+        if not validation.is_valid:
+            raise HTTPException(status_code=400, detail="; ".join(validation.errors))
+
+        # Get text content
+        if request.text:
+            text_content = request.text
+        else:
+            storage_client = get_storage_client()
+            await storage_client.initialize()
+
+            if not await storage_client.file_exists(request.file_path):
+                raise HTTPException(status_code=404, detail="File not found in storage")
+
+            file_content = await storage_client.download_file(request.file_path)
+
+            try:
+                text_content = file_content.decode('utf-8')
+            except UnicodeDecodeError:
+                raise HTTPException(
+                    status_code=400,
+                    detail="File is not a text file. Use OCR endpoint first to extract text."
+                )
+
+        # Get extraction service
+        if request.provider:
+            if request.provider == "openai":
+                extraction_service = OpenAIExtractionService()
+            else:
+                extraction_service = LocalExtractionService()
+        else:
+            extraction_service = await get_extraction_service()
+
+        async def event_stream():
+            import time
+
+            start_time = time.time()
+            total = 0
+            streamed = []
+
+            try:
+                async for obligation in extraction_service.iter_obligations(request, text_content):
+                    total += 1
+                    streamed.append(obligation)
+                    event = {"event": "obligation", "data": obligation.dict()}
+                    yield json.dumps(event, default=str) + "\n"
+
+                await record_obligations(streamed, request, text_content)
+
+                event = {
+                    "event": "done",
+                    "data": {
+                        "total_obligations": total,
+                        "provider": extraction_service.provider,
+                        "model": extraction_service.model_name,
+                        "processing_time": time.time() - start_time
+                    }
+                }
+                yield json.dumps(event, default=str) + "\n"
+
+            except Exception as e:
+                logger.error(f"Streaming obligation extraction failed: {e}")
+                event = {
+                    "event": "error",
+                    "data": {"message": f"Obligation extraction failed: {str(e)}", "total_obligations": total}
+                }
+                yield json.dumps(event) + "\n"
+
+        return StreamingResponse(
+            event_stream(),
+            media_type="application/x-ndjson",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"  # disable proxy buffering
+            }
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Obligations stream endpoint error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.post("/batch-obligations", response_model=BatchExtractionResponse)
 async def batch_extract_obligations(
     request: BatchExtractionRequest,
@@ -252,71 +378,73 @@ async def batch_extract_obligations(
         else:
             extraction_service = await get_extraction_service()
 
-        # Process files
-        import asyncio
-        import time
-
-        start_time = time.time()
-        results = []
-        failed_files = []
-
-        try:
-            if request.parallel_processing:
-                # Process in parallel
-                tasks = []
-                for file_path in request.file_paths:
-                    task = process_single_obligation_file(
-                        extraction_service, storage_client, file_path, request
-                    )
-                    tasks.append(task)
-
-                completed_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                for i, result in enumerate(completed_results):
-                    if isinstance(result, Exception):
-                        failed_files.append(request.file_paths[i])
-                        logger.error(f"Failed to process {request.file_paths[i]}: {result}")
-                    else:
-                        results.append(result)
-
-            else:
-                # Process sequentially
-                for file_path in request.file_paths:
-                    try:
-                        result = await process_single_obligation_file(
+        # Batch work yields to interactive LLM calls
+        with llm_priority("batch"):
+            # Process files
+            import asyncio
+            import time
+
+            start_time = time.time()
+            results = []
+            failed_files = []
+
+            try:
+                if request.parallel_processing:
+                    # Process in parallel
+                    tasks = []
+                    for file_path in request.file_paths:
+                        task = process_single_obligation_file(
                             extraction_service, storage_client, file_path, request
                         )
-                        results.append(result)
-                    except Exception as e:
-                        failed_files.append(file_path)
-                        logger.error(f"Failed to process {file_path}: {e}")
-
-            total_processing_time = time.time() - start_time
-
-            # Calculate average confidence
-            all_confidences = [r.average_confidence for r in results]
-            average_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0.0
-
-            from models.extraction_models import BatchExtractionResult
-            batch_result = BatchExtractionResult(
-                results=results,
-                total_files=len(request.file_paths),
-                successful_files=len(results),
-                failed_files=failed_files,
-                total_processing_time=total_processing_time,
-                average_confidence=average_confidence
-            )
+                        tasks.append(task)
+
+                    completed_results = await asyncio.gather(*tasks, return_exceptions=True)
+
+                    for i, result in enumerate(completed_results):
+                        if isinstance(result, Exception):
+                            failed_files.append(request.file_paths[i])
+                            logger.error(f"Failed to process {request.file_paths[i]}: {result}")
+                        else:
+                            results.append(result)
+
+                else:
+                    # Process sequentially
+                    for file_path in request.file_paths:
+                        try:
+                            result = await process_single_obligation_file(
+                                extraction_service, storage_client, file_path, request
+                            )
+                            results.append(result)
+                        except Exception as e:
+                            failed_files.append(file_path)
+                            logger.error(f"Failed to process {file_path}: {e}")
+
+                total_processing_time = time.time() - start_time
+
+                # Calculate average confidence
+                all_confidences = [r.average_confidence for r in results]
+                average_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0.0
+
+                from models.extraction_models import BatchExtractionResult
+                batch_result = BatchExtractionResult(
+                    results=results,
+                    total_files=len(request.file_paths),
+                    successful_files=len(results),
+                    failed_files=failed_files,
+                    total_processing_time=total_processing_time,
+                    average_confidence=average_confidence
+                )
 
-            return BatchExtractionResponse(
-                success=True,
-                message=f"Processed {len(results)}/{len(request.file_paths)} files successfully",
-                data=batch_result
-            )
+                return BatchExtractionResponse(
+                    success=True,
+                    message=f"Processed {len(results)}/{len(request.file_paths)} files successfully",
+                    data=batch_result
+                )
 
-        finally:
-            # Clean up OpenAI client if used
-            if hasattr(extraction_service, 'close'):
-                await extraction_service.close()
+            finally:
+                # Clean up OpenAI client if used
+                if hasattr(extraction_service, 'close'):
+                    await extraction_service.close()
 
     except HTTPException:
         raise
@@ -325,6 +453,38 @@ async def batch_extract_obligations(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+async def record_obligations(obligations: List[Obligation], request: ObligationRequest, text: str):
+    """Add extracted obligations to the structured store used by /qa/query"""
+    try:
+        options = request.options or {}
+        document_id = (
+            options.get("document_id") or request.file_path or
+            hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        )
+        await get_obligation_store().add_obligations(
+            obligations,
+            document_id=document_id,
+            project_id=options.get("project_id"),
+            document_name=options.get("document_name") or request.file_path
+        )
+
+    except Exception as e:
+        logger.error(f"Recording structured obligations failed: {e}")
+
+
+async def record_extraction(
+    result: ObligationResult, extraction_service, request: ObligationRequest, text: str
+):
+    """Record the full obligation set behind a (possibly paged or top-N) extraction result"""
+    try:
+        obligations = await all_obligations(result, extraction_service, request, text)
+    except Exception as e:
+        logger.error(f"Recording structured obligations failed: {e}")
+        return
+
+    await record_obligations(obligations, request, text)
+
+
 async def process_single_obligation_file(
     extraction_service, storage_client, file_path: str, batch_request: BatchExtractionRequest
 ):
@@ -354,7 +514,10 @@ async def process_single_obligation_file(
         )
 
         # Extract obligations
-        result = await extraction_service.extract_obligations(individual_request, text_content)
+        result = await get_result_cache().get_or_extract(
+            "obligations", extraction_service, individual_request, text_content
+        )
+        await record_extraction(result, extraction_service, individual_request, text_content)
         return result
 
     except Exception as e:
@@ -16,6 +16,7 @@ from services.ocr_local import LocalOCRService
 from services.ocr_azure import AzureOCRService
 from utils.config import get_settings
 from utils.storage_client import get_storage_client, upload_temp_file
+from utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -186,7 +187,8 @@ async def extract_text_from_storage(
 
         # Process document
         try:
-            result = await ocr_service.extract_text(request, file_content, filename)
+            with span("ocr.extract", provider=request.provider or "default", filename=filename, bytes=len(file_content)):
+                result = await ocr_service.extract_text(request, file_content, filename)
 
             return OCRResponse(
                 success=True,
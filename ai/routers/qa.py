@@ -2,10 +2,11 @@
 Q&A RAG system API router
 """
 
+import json
 import logging
 from typing import Optional, Dict, Any, List
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from models.qa_models import (
     QARequest, QAResponse, QABatchRequest, QABatchResponse,
@@ -15,7 +16,9 @@ from models.qa_models import (
 from models.common_models import ErrorResponse
 from rag.faiss_query import get_query_engine
 from rag.faiss_indexer import get_indexer
+from rag.obligation_store import get_obligation_store
 from utils.config import get_settings
+from utils.llm_governor import llm_priority
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +75,56 @@ async def query_documents(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.post("/query-stream")
+async def query_documents_stream(
+    request: QARequest,
+    format: str = Query("sse", description="Stream format (sse/ndjson)")
+):
+    """
+    Query documents and stream the answer as it is generated
+
+    Emits a `sources` event once retrieval completes, `token` events with answer
+    text deltas, and a final `done` event with confidence and processing metadata
+    (or an `error` event).
+
+    - **format**: `sse` for Server-Sent Events, `ndjson` for newline-delimited JSON
+    """
+    try:
+        if format not in ["sse", "ndjson"]:
+            raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+
+        # Validate request
+        validation = await validate_qa_request(request)
+        if not validation.is_valid:
+            raise HTTPException(status_code=400, detail="; ".join(validation.errors))
+
+        # Get query engine
+        query_engine = await get_query_engine()
+
+        async def event_stream():
+            async for event in query_engine.stream_query(request):
+                if format == "ndjson":
+                    yield json.dumps(event, default=str) + "\n"
+                else:
+                    yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+        media_type = "application/x-ndjson" if format == "ndjson" else "text/event-stream"
+        return StreamingResponse(
+            event_stream(),
+            media_type=media_type,
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"  # disable proxy buffering
+            }
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Q&A stream endpoint error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.post("/batch-query", response_model=QABatchResponse)
 async def batch_query_documents(
     request: QABatchRequest,
@@ -94,83 +147,74 @@ async def batch_query_documents(
         if len(request.queries) > 50:
             raise HTTPException(status_code=400, detail="Maximum 50 queries per batch")
 
-        # Get query engine
-        query_engine = await get_query_engine()
+        # Batch work yields to interactive LLM calls
+        with llm_priority("batch"):
+            # Get query engine
+            query_engine = await get_query_engine()
 
-        # Process queries
-        import asyncio
-        import time
+            # Process queries
+            import time
 
-        start_time = time.time()
-        results = []
-        failed_queries = []
+            start_time = time.time()
+            results = []
+            failed_queries = []
 
-        try:
-            if request.parallel_processing:
-                # Process in parallel
-                tasks = []
-                for query in request.queries:
-                    individual_request = QARequest(
-                        query=query,
-                        filters=request.filters,
-                        max_results=request.max_results_per_query,
-                        confidence_threshold=request.confidence_threshold,
-                        options=request.options
-                    )
-                    task = query_engine.query(individual_request)
-                    tasks.append(task)
-
-                completed_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                for i, result in enumerate(completed_results):
-                    if isinstance(result, Exception):
-                        failed_queries.append(request.queries[i])
-                        logger.error(f"Failed to process query '{request.queries[i]}': {result}")
-                    else:
-                        results.append(result)
-
-            else:
-                # Process sequentially
+            try:
+                individual_requests = []
                 for query in request.queries:
                     try:
-                        individual_request = QARequest(
+                        individual_requests.append(QARequest(
                             query=query,
                             filters=request.filters,
                             max_results=request.max_results_per_query,
                             confidence_threshold=request.confidence_threshold,
                             options=request.options
-                        )
-                        result = await query_engine.query(individual_request)
-                        results.append(result)
-                    except Exception as e:
+                        ))
+                    except ValueError as e:
                         failed_queries.append(query)
                         logger.error(f"Failed to process query '{query}': {e}")
 
-            total_processing_time = time.time() - start_time
-
-            # Calculate average confidence
-            all_confidences = [r.answer.confidence for r in results]
-            average_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0.0
+                if individual_requests:
+                    # Shared embedding, search and keyword passes; answers run concurrently
+                    # unless parallel processing is turned off
+                    completed_results = await query_engine.batch_query(
+                        [r.query for r in individual_requests],
+                        individual_requests[0],
+                        max_concurrency=None if request.parallel_processing else 1
+                    )
 
-            from models.qa_models import QABatchResult
-            batch_result = QABatchResult(
-                results=results,
-                total_queries=len(request.queries),
-                successful_queries=len(results),
-                failed_queries=failed_queries,
-                total_processing_time=total_processing_time,
-                average_confidence=average_confidence
-            )
+                    for individual_request, result in zip(individual_requests, completed_results):
+                        if isinstance(result, Exception):
+                            failed_queries.append(individual_request.query)
+                            logger.error(f"Failed to process query '{individual_request.query}': {result}")
+                        else:
+                            results.append(result)
+
+                total_processing_time = time.time() - start_time
+
+                # Calculate average confidence
+                all_confidences = [r.answer.confidence for r in results]
+                average_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0.0
+
+                from models.qa_models import QABatchResult
+                batch_result = QABatchResult(
+                    results=results,
+                    total_queries=len(request.queries),
+                    successful_queries=len(results),
+                    failed_queries=failed_queries,
+                    total_processing_time=total_processing_time,
+                    average_confidence=average_confidence
+                )
 
-            return QABatchResponse(
-                success=True,
-                message=f"Processed {len(results)}/{len(request.queries)} queries successfully",
-                data=batch_result
-            )
+                return QABatchResponse(
+                    success=True,
+                    message=f"Processed {len(results)}/{len(request.queries)} queries successfully",
+                    data=batch_result
+                )
 
-        except Exception as e:
-            logger.error(f"Batch query processing failed: {e}")
-            raise HTTPException(status_code=500, detail=f"Batch processing failed: {str(e)}")
+            except Exception as e:
+                logger.error(f"Batch query processing failed: {e}")
+                raise HTTPException(status_code=500, detail=f"Batch processing failed: {str(e)}")
 
     except HTTPException:
         raise
@@ -359,6 +403,8 @@ async def get_qa_metrics():
     try:
         indexer = await get_indexer()
         stats = await indexer.get_index_stats()
+        query_engine = await get_query_engine()
+        packing_stats = query_engine.context_packer.get_stats()
 
         # In a real implementation, you'd track these metrics over time
         metrics = QAMetrics(
@@ -373,14 +419,17 @@ async def get_qa_metrics():
             index_health={
                 "total_documents": stats["active_documents"],
                 "total_vectors": stats["total_vectors"],
+                "index_type": stats["index_type"],
                 "index_size_mb": stats["index_size_bytes"] / (1024 * 1024),
                 "last_updated": "2024-01-01T00:00:00Z"  # Would be actual timestamp
             },
             performance_stats={
                 "avg_search_time_ms": 150.0,
                 "avg_answer_generation_time_ms": 800.0,
-                "cache_hit_rate": 0.85,
-                "error_rate": 0.02
+                "cache_hit_rate": float(query_engine.answer_cache.get_stats()["hit_rate"]),
+                "error_rate": 0.02,
+                "avg_context_tokens": float(packing_stats["average_context_tokens"]),
+                "context_token_reduction": float(packing_stats["token_reduction"])
             }
         )
 
@@ -391,6 +440,42 @@ async def get_qa_metrics():
         raise HTTPException(status_code=500, detail="Failed to get metrics")
 
 
+@router.get("/answer-cache")
+async def get_answer_cache_stats():
+    """Get semantic answer cache statistics"""
+    try:
+        query_engine = await get_query_engine()
+        return query_engine.answer_cache.get_stats()
+
+    except Exception as e:
+        logger.error(f"Answer cache stats error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get cache statistics")
+
+
+@router.delete("/answer-cache")
+async def clear_answer_cache():
+    """Clear all cached answers"""
+    try:
+        query_engine = await get_query_engine()
+        removed = query_engine.answer_cache.clear()
+        return {"success": True, "message": f"Removed {removed} cached answers"}
+
+    except Exception as e:
+        logger.error(f"Answer cache clear error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to clear cache")
+
+
+@router.get("/obligation-store")
+async def get_obligation_store_stats():
+    """Get statistics of the structured obligation store used for date and count questions"""
+    try:
+        return get_obligation_store().get_stats()
+
+    except Exception as e:
+        logger.error(f"Obligation store stats error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get obligation store statistics")
+
+
 @router.get("/search-preview")
 async def search_preview(
     query: str = Query(..., description="Search query"),
@@ -4,9 +4,10 @@ Local metadata and obligation extraction using transformer models
 
 import logging
 import asyncio
+import heapq
 import re
 import time
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Iterable, AsyncIterable, AsyncIterator, Union
 from datetime import datetime, date
 import json
 
@@ -28,10 +29,22 @@ from utils.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Text can be a whole document or consecutive chunks of it (e.g. OCR pages)
+TextSource = Union[str, Iterable[str], AsyncIterable[str]]
+
+# Obligation indicators
+OBLIGATION_KEYWORDS = [
+    "shall", "must", "will", "required", "obligation", "responsible",
+    "duty", "commitment", "ensure", "provide", "deliver", "maintain",
+    "comply", "adhere", "follow", "perform", "complete", "submit"
+]
+
 
 class LocalExtractionService:
     """Local extraction service using transformer models"""
 
+    provider = "local"
+
     def __init__(self):
         self.settings = get_settings()
         self._tokenizer = None
@@ -40,6 +53,11 @@ class LocalExtractionService:
         self._nlp = None
         self._initialized = False
 
+    @property
+    def model_name(self) -> str:
+        """Model used for local extraction"""
+        return self.settings.local_extract_model
+
     async def initialize(self):
         """Initialize models and tokenizers"""
         if self._initialized:
@@ -52,6 +70,9 @@ class LocalExtractionService:
             model_name = self.settings.local_extract_model
             loop = asyncio.get_event_loop()
 
+            if self.settings.ner_num_threads > 0:
+                torch.set_num_threads(self.settings.ner_num_threads)
+
             self._tokenizer = await loop.run_in_executor(
                 None, lambda: AutoTokenizer.from_pretrained(model_name)
             )
@@ -59,6 +80,7 @@ class LocalExtractionService:
             self._ner_model = await loop.run_in_executor(
                 None, lambda: AutoModelForTokenClassification.from_pretrained(model_name)
             )
+            self._ner_model.eval()
 
             # Load classification model for obligation categorization
             self._classification_model = await loop.run_in_executor(
@@ -97,9 +119,10 @@ class LocalExtractionService:
             if not request.extract_fields or 'ProjectName' in request.extract_fields:
                 metadata.project_name = await self._extract_project_name(text)
 
-            # Client name extraction
+            # Client name extraction (pattern matching, refined by batched NER when enabled)
             if not request.extract_fields or 'ClientName' in request.extract_fields:
-                metadata.client_name = await self._extract_client_name(text)
+                entities = await self._extract_entities(text)
+                metadata.client_name = await self._extract_client_name(text, entities)
 
             # Contract value extraction
             if not request.extract_fields or 'ContractValue' in request.extract_fields:
@@ -186,36 +209,45 @@ class LocalExtractionService:
         start_time = time.time()
 
         try:
-            # Find obligation-related sentences
-            obligation_sentences = await self._find_obligation_sentences(text)
+            options = request.options or {}
+            max_obligations = options.get('max_obligations', self.settings.obligation_max_results)
+            page_size = options.get('page_size')
+            page = options.get('page') or 1
+
+            # Bounded mode keeps the best-scoring obligations in a min-heap;
+            # unbounded mode keeps everything, or only the requested page
+            bounded = bool(max_obligations) and not page_size
+            page_start = (page - 1) * page_size if page_size else 0
 
+            heap = []
             obligations = []
             categories = set()
-
-            for sentence_data in obligation_sentences:
-                sentence = sentence_data['text']
-                offset = sentence_data['offset']
-
-                # Extract obligation components
-                obligation = await self._extract_obligation_components(sentence, offset)
-
-                if obligation and obligation.description.confidence >= request.confidence_threshold:
+            total_found = 0
+            high_confidence_count = 0
+            confidence_sum = 0.0
+
+            async for score, position, obligation in self._iter_scored_obligations(request, text):
+                total_found += 1
+                confidence_sum += obligation.description.confidence
+                if obligation.description.confidence >= 0.8:
+                    high_confidence_count += 1
+                if obligation.category:
+                    categories.add(obligation.category)
+
+                if bounded:
+                    entry = (score, -position, obligation)
+                    if len(heap) < max_obligations:
+                        heapq.heappush(heap, entry)
+                    else:
+                        heapq.heappushpop(heap, entry)
+                elif not page_size or page_start <= total_found - 1 < page_start + page_size:
                     obligations.append(obligation)
 
-                    # Add category if available
-                    if obligation.category:
-                        categories.add(obligation.category)
-
-            # Calculate metrics
-            high_confidence_count = sum(
-                1 for o in obligations
-                if o.description.confidence >= 0.8
-            )
+            if bounded:
+                # Highest score first, document order within equal scores
+                obligations = [entry[2] for entry in sorted(heap, key=lambda e: (-e[0], -e[1]))]
 
-            average_confidence = (
-                sum(o.description.confidence for o in obligations) / len(obligations)
-                if obligations else 0.0
-            )
+            average_confidence = confidence_sum / total_found if total_found else 0.0
 
             # Create processing metadata
             processing_metadata = ProcessingMetadata(
@@ -225,16 +257,23 @@ class LocalExtractionService:
                 parameters={
                     "confidence_threshold": request.confidence_threshold,
                     "include_penalties": request.include_penalties,
+                    "max_obligations": max_obligations if bounded else None,
                     "options": request.options
                 }
             )
 
             return ObligationResult(
                 obligations=obligations,
-                total_obligations=len(obligations),
+                total_obligations=total_found,
                 high_confidence_count=high_confidence_count,
                 average_confidence=average_confidence,
                 categories=list(categories) if categories else None,
+                page=page if page_size else None,
+                page_size=page_size,
+                has_more=(
+                    total_found > page_start + len(obligations) if page_size
+                    else total_found > len(obligations)
+                ),
                 processing_metadata=processing_metadata
             )
 
@@ -242,6 +281,78 @@ class LocalExtractionService:
             logger.error(f"Obligation extraction failed: {e}")
             raise
 
+    async def iter_obligations(self, request: ObligationRequest, text: TextSource) -> AsyncIterator[Obligation]:
+        """Stream obligations in document order as soon as each sentence is processed"""
+        await self.initialize()
+
+        async for _, _, obligation in self._iter_scored_obligations(request, text):
+            yield obligation
+
+    async def _iter_scored_obligations(
+        self, request: ObligationRequest, text: TextSource
+    ) -> AsyncIterator[Tuple[int, int, Obligation]]:
+        """Yield (score, position, obligation) for every obligation sentence above the threshold"""
+        position = 0
+
+        async for sentence, offset in self._iter_sentences(text):
+            score = self._score_obligation_sentence(sentence)
+            if score == 0:
+                continue
+
+            obligation = await self._extract_obligation_components(sentence, offset)
+
+            if obligation and obligation.description.confidence >= request.confidence_threshold:
+                yield score, position, obligation
+                position += 1
+
+    async def _iter_text_chunks(self, text: TextSource) -> AsyncIterator[str]:
+        """Yield consecutive chunks of a text, an iterable of pages, or an async iterable of pages"""
+        if isinstance(text, str):
+            window_size = self.settings.obligation_window_chars
+            for start in range(0, len(text), window_size):
+                yield text[start:start + window_size]
+
+        elif hasattr(text, '__aiter__'):
+            async for chunk in text:
+                yield chunk
+
+        else:
+            for chunk in text:
+                yield chunk
+
+    async def _iter_sentences(self, text: TextSource) -> AsyncIterator[Tuple[str, int]]:
+        """Stream (sentence, document offset) pairs over sliding windows of the text
+
+        Chunks are treated as consecutive slices of one document. The tail of each
+        window after its last sentence terminator is carried into the next window,
+        so only one window plus one partial sentence is held in memory at a time.
+        """
+        window_size = self.settings.obligation_window_chars
+        carry = ""
+        carry_offset = 0
+
+        async for chunk in self._iter_text_chunks(text):
+            window = carry + chunk
+            last_end = max(window.rfind('.'), window.rfind('!'), window.rfind('?'))
+
+            # Flush text without any terminator once it outgrows the window
+            if last_end == -1 and len(window) > window_size:
+                last_end = len(window) - 1
+
+            for start, end in self._iter_sentence_spans(window[:last_end + 1]):
+                yield window[start:end], carry_offset + start
+
+            carry = window[last_end + 1:]
+            carry_offset += last_end + 1
+
+        for start, end in self._iter_sentence_spans(carry):
+            yield carry[start:end], carry_offset + start
+
+    def _score_obligation_sentence(self, sentence: str) -> int:
+        """Count the obligation keywords present in a sentence"""
+        sentence_lower = sentence.lower()
+        return sum(1 for keyword in OBLIGATION_KEYWORDS if keyword in sentence_lower)
+
     async def _extract_project_name(self, text: str) -> Optional[ExtractedField]:
         """Extract project name using pattern matching and NER"""
         try:
@@ -280,7 +391,9 @@ class LocalExtractionService:
             logger.error(f"Project name extraction failed: {e}")
             return None
 
-    async def _extract_client_name(self, text: str) -> Optional[ExtractedField]:
+    async def _extract_client_name(
+        self, text: str, entities: Optional[List[Dict[str, Any]]] = None
+    ) -> Optional[ExtractedField]:
         """Extract client name using NER and patterns"""
         try:
             # Pattern-based extraction for client
@@ -305,12 +418,25 @@ class LocalExtractionService:
                             best_confidence = confidence
                             best_match = (client_name, match.start(), match.end())
 
+            best_source = "pattern_matching"
+
+            # Organizations found by NER; contracts name their parties early, so take the first one
+            organizations = [
+                entity for entity in (entities or [])
+                if entity['label'] in ('ORG', 'ORGANIZATION') and len(entity['text']) > 2
+            ]
+            if organizations and organizations[0]['score'] > best_confidence:
+                entity = organizations[0]
+                best_confidence = entity['score']
+                best_match = (entity['text'], entity['start'], entity['end'])
+                best_source = "ner"
+
             if best_match:
                 return ExtractedField(
                     value=best_match[0],
                     confidence=best_confidence,
                     text_offset=TextOffset(start=best_match[1], end=best_match[2]),
-                    source="pattern_matching"
+                    source=best_source
                 )
 
             return None
@@ -319,6 +445,163 @@ class LocalExtractionService:
             logger.error(f"Client name extraction failed: {e}")
             return None
 
+    async def _extract_entities(self, text: str) -> List[Dict[str, Any]]:
+        """Run batched NER over the document sentences"""
+        if not self.settings.ner_enabled or self._ner_model is None:
+            return []
+
+        if not getattr(self._tokenizer, 'is_fast', False):
+            logger.warning("NER requires a fast tokenizer for offset mapping; skipping NER")
+            return []
+
+        try:
+            spans = list(self._iter_sentence_spans(text))
+            if not spans:
+                return []
+
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(None, lambda: self._run_ner_batched(text, spans))
+
+        except Exception as e:
+            logger.error(f"NER extraction failed: {e}")
+            return []
+
+    def _iter_sentence_spans(self, text: str):
+        """Yield (start, end) character spans of the sentences in text"""
+        for match in re.finditer(r'[^.!?]+[.!?]*', text):
+            start, end = match.span()
+            # Trim surrounding whitespace without losing document offsets
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            if end - start > 10:
+                yield start, end
+
+    def _build_ner_batches(self, lengths: List[int]) -> List[List[int]]:
+        """Group sentence indices into length-bucketed batches within the token budget"""
+        budget = max(self.settings.ner_max_tokens_per_batch, self.settings.ner_max_sequence_length)
+
+        # Sorting by length keeps padding to a minimum within each batch
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+        batches = []
+        current = []
+        current_max = 0
+
+        for index in order:
+            batch_max = max(current_max, lengths[index])
+            # Padded cost of a batch is its longest sequence times its size
+            if current and batch_max * (len(current) + 1) > budget:
+                batches.append(current)
+                current = []
+                batch_max = lengths[index]
+
+            current.append(index)
+            current_max = batch_max
+
+        if current:
+            batches.append(current)
+
+        return batches
+
+    def _run_ner_batched(self, text: str, spans: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        """Run token classification over sentence spans and map entities to document offsets"""
+        max_length = self.settings.ner_max_sequence_length
+        sentences = [text[start:end] for start, end in spans]
+
+        # Tokenize once without padding to learn the sequence lengths
+        lengths = [
+            len(ids) for ids in self._tokenizer(
+                sentences, truncation=True, max_length=max_length
+            )['input_ids']
+        ]
+
+        id2label = self._ner_model.config.id2label
+        entities = []
+
+        for batch in self._build_ner_batches(lengths):
+            encoded = self._tokenizer(
+                [sentences[i] for i in batch],
+                padding='longest',
+                truncation=True,
+                max_length=max_length,
+                return_offsets_mapping=True,
+                return_tensors='pt'
+            )
+            offset_mapping = encoded.pop('offset_mapping').tolist()
+
+            with torch.inference_mode():
+                logits = self._ner_model(**encoded).logits
+
+            probabilities = torch.softmax(logits, dim=-1)
+            scores, predictions = probabilities.max(dim=-1)
+
+            for row, sentence_index in enumerate(batch):
+                entities.extend(self._group_entities(
+                    predictions[row].tolist(),
+                    scores[row].tolist(),
+                    offset_mapping[row],
+                    encoded['attention_mask'][row].tolist(),
+                    id2label,
+                    text,
+                    spans[sentence_index][0]
+                ))
+
+        entities.sort(key=lambda entity: entity['start'])
+        return entities
+
+    def _group_entities(
+        self,
+        predictions: List[int],
+        scores: List[float],
+        offsets: List[Tuple[int, int]],
+        attention_mask: List[int],
+        id2label: Dict[int, str],
+        text: str,
+        sentence_start: int
+    ) -> List[Dict[str, Any]]:
+        """Merge BIO-tagged tokens into entities with document character offsets"""
+        entities = []
+        current = None
+
+        for prediction, score, (token_start, token_end), mask in zip(
+            predictions, scores, offsets, attention_mask
+        ):
+            # Skip padding and special tokens
+            if not mask or token_start == token_end:
+                continue
+
+            label = id2label.get(prediction, 'O')
+            prefix, _, entity_type = label.partition('-')
+            if not entity_type:
+                prefix, entity_type = '', label
+
+            if entity_type == 'O':
+                current = None
+                continue
+
+            start = sentence_start + token_start
+            end = sentence_start + token_end
+
+            if current and current['label'] == entity_type and prefix not in ('B', 'S'):
+                current['end'] = end
+                current['scores'].append(score)
+            else:
+                current = {'label': entity_type, 'start': start, 'end': end, 'scores': [score]}
+                entities.append(current)
+
+        return [
+            {
+                'label': entity['label'],
+                'text': text[entity['start']:entity['end']],
+                'start': entity['start'],
+                'end': entity['end'],
+                'score': sum(entity['scores']) / len(entity['scores'])
+            }
+            for entity in entities
+        ]
+
     async def _extract_contract_value(self, text: str) -> Optional[ExtractedField]:
         """Extract contract value using currency patterns"""
         try:
@@ -590,45 +873,6 @@ class LocalExtractionService:
             logger.error(f"Penalty clauses extraction failed: {e}")
             return None
 
-    async def _find_obligation_sentences(self, text: str) -> List[Dict[str, Any]]:
-        """Find sentences that likely contain obligations"""
-        try:
-            # Obligation indicators
-            obligation_keywords = [
-                "shall", "must", "will", "required", "obligation", "responsible",
-                "duty", "commitment", "ensure", "provide", "deliver", "maintain",
-                "comply", "adhere", "follow", "perform", "complete", "submit"
-            ]
-
-            sentences = re.split(r'[.!?]+', text)
-            obligation_sentences = []
-
-            current_offset = 0
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if len(sentence) > 10:
-                    # Check if sentence contains obligation keywords
-                    score = sum(1 for keyword in obligation_keywords
-                              if keyword.lower() in sentence.lower())
-
-                    if score > 0:
-                        obligation_sentences.append({
-                            'text': sentence,
-                            'offset': current_offset,
-                            'score': score
-                        })
-
-                current_offset += len(sentence) + 1
-
-            # Sort by score
-            obligation_sentences.sort(key=lambda x: x['score'], reverse=True)
-
-            return obligation_sentences[:50]  # Limit to top 50
-
-        except Exception as e:
-            logger.error(f"Obligation sentence finding failed: {e}")
-            return []
-
     async def _extract_obligation_components(self, sentence: str, offset: int) -> Optional[Obligation]:
         """Extract obligation components from a sentence"""
         try:
@@ -5,12 +5,13 @@ OpenAI/Azure OpenAI extraction service for metadata and obligations
 import logging
 import asyncio
 import json
+import re
 import time
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable, AsyncIterator
 from datetime import datetime
+from contextlib import aclosing
 
 import openai
-from openai import AsyncOpenAI, AsyncAzureOpenAI
 
 from models.extraction_models import (
     MetadataRequest, MetadataResult, ContractMetadata,
@@ -19,77 +20,81 @@ from models.extraction_models import (
 )
 from models.common_models import TextOffset, DocumentInfo
 from utils.config import get_settings
+from utils.llm_client import get_llm_client_pool
+from utils.llm_governor import get_llm_governor, estimate_tokens
+from utils.completion_cache import get_completion_cache
+from utils.json_stream import JSONArrayStreamParser, parse_json_array_elements
+from utils.offset_index import TextOffsetIndex
 
 logger = logging.getLogger(__name__)
 
+METADATA_SYSTEM_PROMPT = (
+    "You are an expert at extracting structured information from legal contracts. "
+    "Extract the requested metadata and return it as valid JSON."
+)
+
+OBLIGATIONS_SYSTEM_PROMPT = (
+    "You are an expert at identifying and extracting contractual obligations from legal documents. "
+    "Extract all obligations with their details and return as valid JSON."
+)
+
+# Rough characters-per-token ratio used to size windows without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Clause boundaries, strongest first: blank lines, numbered/headed clauses, sentence ends
+CLAUSE_BOUNDARY_PATTERNS = [
+    re.compile(r'\n\s*\n'),
+    re.compile(r'\n(?=\s*(?:\d+(?:\.\d+)*[.)]?\s|\(?[a-z]\)\s|(?:article|section|clause|schedule|annex)\b))', re.IGNORECASE),
+    re.compile(r'(?<=[.;:!?])\s+'),
+    re.compile(r'\s+')
+]
+
 
 class OpenAIExtractionService:
     """OpenAI/Azure OpenAI extraction service"""
 
+    provider = "openai"
+
     def __init__(self):
         self.settings = get_settings()
-        self._client = None
 
-    async def _get_client(self):
-        """Get OpenAI client (Azure or regular OpenAI)"""
-        if self._client:
-            return self._client
-
-        # Prefer Azure OpenAI if configured
-        if self.settings.azure_openai_api_key and self.settings.azure_openai_endpoint:
-            self._client = AsyncAzureOpenAI(
-                api_key=self.settings.azure_openai_api_key,
-                api_version=self.settings.azure_openai_api_version,
-                azure_endpoint=self.settings.azure_openai_endpoint
-            )
-            logger.info("Using Azure OpenAI client")
-
-        elif self.settings.openai_api_key:
-            self._client = AsyncOpenAI(
-                api_key=self.settings.openai_api_key
-            )
-            logger.info("Using OpenAI client")
-
-        else:
-            raise ValueError("No OpenAI API credentials configured")
+    @property
+    def model_name(self) -> str:
+        """Model or deployment name used for completions"""
+        return (self.settings.azure_openai_deployment_name
+                if hasattr(self.settings, 'azure_openai_deployment_name')
+                else self.settings.openai_model)
 
-        return self._client
+    async def _get_client(self):
+        """Get the shared application-scoped OpenAI client (Azure or regular OpenAI)"""
+        return await get_llm_client_pool().get_client()
 
     async def extract_metadata(self, request: MetadataRequest, text: str) -> MetadataResult:
         """Extract contract metadata using OpenAI"""
         start_time = time.time()
 
         try:
-            client = await self._get_client()
-
-            # Create extraction prompt
-            prompt = self._create_metadata_prompt(text, request)
-
             # Get model name
-            model = (self.settings.azure_openai_deployment_name
-                    if hasattr(self.settings, 'azure_openai_deployment_name')
-                    else self.settings.openai_model)
+            model = self.model_name
+            windows = self._split_into_windows(text, self._get_window_tokens(request))
+            offset_index = await self._build_offset_index(text)
 
-            # Call OpenAI API
-            response = await client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert at extracting structured information from legal contracts. Extract the requested metadata and return it as valid JSON."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.1,
-                max_tokens=2000
-            )
+            async def extract_window(index: int, window_start: int, window_end: int) -> Dict[str, Any]:
+                prompt = self._create_metadata_prompt(
+                    text[window_start:window_end], request, part=(index + 1, len(windows))
+                )
+                result_text = await self._chat_completion(
+                    METADATA_SYSTEM_PROMPT, prompt, max_tokens=2000, use_cache=self._use_llm_cache(request)
+                )
+                return await self._parse_metadata_response(
+                    result_text, offset_index, (window_start, window_end)
+                )
+
+            # Map: extract from every window concurrently
+            window_results = await self._map_windows(extract_window, windows)
 
-            # Parse response
-            result_text = response.choices[0].message.content
-            metadata_dict = await self._parse_metadata_response(result_text, text)
+            # Reduce: keep the best value per field and merge list fields
+            metadata_dict = self._merge_metadata_results(window_results)
 
             # Create metadata object
             metadata = ContractMetadata(**metadata_dict)
@@ -122,7 +127,9 @@ class OpenAIExtractionService:
                     "extract_fields": request.extract_fields,
                     "confidence_threshold": request.confidence_threshold,
                     "temperature": 0.1,
-                    "max_tokens": 2000
+                    "max_tokens": 2000,
+                    "windows": len(windows),
+                    "max_concurrency": self._get_window_concurrency()
                 }
             )
 
@@ -143,36 +150,27 @@ class OpenAIExtractionService:
         start_time = time.time()
 
         try:
-            client = await self._get_client()
-
-            # Create extraction prompt
-            prompt = self._create_obligations_prompt(text, request)
-
             # Get model name
-            model = (self.settings.azure_openai_deployment_name
-                    if hasattr(self.settings, 'azure_openai_deployment_name')
-                    else self.settings.openai_model)
+            model = self.model_name
+            windows = self._split_into_windows(text, self._get_window_tokens(request))
+            offset_index = await self._build_offset_index(text)
 
-            # Call OpenAI API
-            response = await client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert at identifying and extracting contractual obligations from legal documents. Extract all obligations with their details and return as valid JSON."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.1,
-                max_tokens=3000
-            )
+            async def extract_window(index: int, window_start: int, window_end: int) -> List[Obligation]:
+                prompt = self._create_obligations_prompt(
+                    text[window_start:window_end], request, part=(index + 1, len(windows))
+                )
+                result_text = await self._chat_completion(
+                    OBLIGATIONS_SYSTEM_PROMPT, prompt, max_tokens=3000, use_cache=self._use_llm_cache(request)
+                )
+                return await self._parse_obligations_response(
+                    result_text, offset_index, (window_start, window_end)
+                )
+
+            # Map: extract from every window concurrently
+            window_results = await self._map_windows(extract_window, windows)
 
-            # Parse response
-            result_text = response.choices[0].message.content
-            obligations_list = await self._parse_obligations_response(result_text, text)
+            # Reduce: merge in document order and drop duplicates across windows
+            obligations_list = self._merge_obligation_results(window_results)
 
             # Filter by confidence threshold
             filtered_obligations = [
@@ -203,7 +201,9 @@ class OpenAIExtractionService:
                     "confidence_threshold": request.confidence_threshold,
                     "include_penalties": request.include_penalties,
                     "temperature": 0.1,
-                    "max_tokens": 3000
+                    "max_tokens": 3000,
+                    "windows": len(windows),
+                    "max_concurrency": self._get_window_concurrency()
                 }
             )
 
@@ -220,12 +220,340 @@ class OpenAIExtractionService:
             logger.error(f"OpenAI obligation extraction failed: {e}")
             raise
 
-    def _create_metadata_prompt(self, text: str, request: MetadataRequest) -> str:
-        """Create metadata extraction prompt"""
+    async def iter_obligations(self, request: ObligationRequest, text: str) -> AsyncIterator[Obligation]:
+        """Stream obligations as soon as each object in the model output closes
+
+        Windows are streamed concurrently, so obligations arrive in completion
+        order rather than document order. Duplicates across windows are dropped.
+        """
+        windows = self._split_into_windows(text, self._get_window_tokens(request))
+        semaphore = asyncio.Semaphore(self._get_window_concurrency())
+        queue: asyncio.Queue = asyncio.Queue()
+        use_cache = self._use_llm_cache(request)
+        offset_index = await self._build_offset_index(text)
+
+        async def stream_window(index: int, window_start: int, window_end: int):
+            try:
+                async with semaphore:
+                    prompt = self._create_obligations_prompt(
+                        text[window_start:window_end], request, part=(index + 1, len(windows))
+                    )
+                    parser = JSONArrayStreamParser()
+
+                    async with aclosing(self._stream_chat_completion(
+                        OBLIGATIONS_SYSTEM_PROMPT, prompt, max_tokens=3000, use_cache=use_cache
+                    )) as deltas:
+                        async for delta in deltas:
+                            for item in parser.feed(delta):
+                                try:
+                                    obligation = self._build_obligation(
+                                        item, offset_index, (window_start, window_end)
+                                    )
+                                except Exception as e:
+                                    logger.warning(f"Skipping invalid obligation item: {e}")
+                                    continue
+                                if obligation:
+                                    await queue.put(obligation)
+
+            except Exception as e:
+                await queue.put(e)
+            finally:
+                # Signal that this window is finished
+                await queue.put(None)
+
+        tasks = [
+            asyncio.create_task(stream_window(i, start, end))
+            for i, (start, end) in enumerate(windows)
+        ]
+        remaining = len(tasks)
+        seen = set()
+
+        try:
+            while remaining:
+                item = await queue.get()
+
+                if item is None:
+                    remaining -= 1
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+
+                if item.description.confidence < request.confidence_threshold:
+                    continue
 
-        # Truncate text if too long
-        if len(text) > 10000:
-            text = text[:10000] + "..."
+                key = self._normalize_value(item.description.value)
+                if key in seen:
+                    continue
+                seen.add(key)
+
+                yield item
+
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _chat_completion(
+        self, system_prompt: str, prompt: str, max_tokens: int, use_cache: bool = True
+    ) -> str:
+        """Run a single chat completion and return the message content"""
+        client = await self._get_client()
+        pool = get_llm_client_pool()
+
+        # Identical prompts and parameters are served from the completion cache
+        cache = get_completion_cache()
+        cache_key = None
+        if use_cache and cache.enabled:
+            cache_key = self._completion_cache_key(system_prompt, prompt, max_tokens)
+            cached = await cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        async def create():
+            async with pool.track_request():
+                return await client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": system_prompt
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    temperature=0.1,
+                    max_tokens=max_tokens
+                )
+
+        # Providers count max_tokens against the tokens-per-minute quota
+        estimated_tokens = estimate_tokens(system_prompt) + estimate_tokens(prompt) + max_tokens
+        response = await get_llm_governor().run(create, estimated_tokens)
+        content = response.choices[0].message.content or ""
+
+        if cache_key and content:
+            usage = getattr(response, "usage", None)
+            await cache.set(
+                cache_key,
+                content,
+                prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+                completion_tokens=getattr(usage, "completion_tokens", 0) or 0
+            )
+
+        return content
+
+    async def _stream_chat_completion(
+        self, system_prompt: str, prompt: str, max_tokens: int, use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """Run a chat completion and yield content deltas as they arrive
+
+        The governor admits the call when the stream is opened and holds its
+        concurrency slot until the stream is exhausted or closed; a cached
+        completion is yielded as a single delta.
+        """
+        client = await self._get_client()
+        pool = get_llm_client_pool()
+
+        cache = get_completion_cache()
+        cache_key = None
+        if use_cache and cache.enabled:
+            cache_key = self._completion_cache_key(system_prompt, prompt, max_tokens)
+            cached = await cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        async def create():
+            return await client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": system_prompt
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                temperature=0.1,
+                max_tokens=max_tokens,
+                stream=True
+            )
+
+        estimated_tokens = estimate_tokens(system_prompt) + estimate_tokens(prompt) + max_tokens
+        governor = get_llm_governor()
+        parts = []
+
+        async with pool.track_request():
+            stream = await governor.run(create, estimated_tokens, keep_slot=True)
+
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+            finally:
+                # Runs on exhaustion, errors, cancellation and aclose() by the consumer
+                try:
+                    await stream.close()
+                finally:
+                    await governor.release(estimated_tokens, estimated_tokens)
+
+        # Streamed responses carry no usage, so cache with estimated token counts
+        content = "".join(parts)
+        if cache_key and content:
+            await cache.set(
+                cache_key,
+                content,
+                prompt_tokens=estimate_tokens(system_prompt) + estimate_tokens(prompt),
+                completion_tokens=estimate_tokens(content)
+            )
+
+    def _completion_cache_key(self, system_prompt: str, prompt: str, max_tokens: int) -> str:
+        """Build the completion cache key for a chat call"""
+        pool = get_llm_client_pool()
+        return get_completion_cache().make_key(
+            pool.provider,
+            self.settings.azure_openai_endpoint if pool.provider == "azure" else None,
+            self.model_name,
+            system_prompt,
+            prompt,
+            {"temperature": 0.1, "max_tokens": max_tokens}
+        )
+
+    def _use_llm_cache(self, request: Any) -> bool:
+        """Whether a request allows cached completions (opt out with options.llm_cache=false)"""
+        options = request.options or {}
+        return options.get('llm_cache', True) is not False
+
+    def _get_window_tokens(self, request: Any) -> int:
+        """Get the per-window token budget, allowing a per-request override (validated by the request model)"""
+        options = request.options or {}
+        return max(options.get('window_tokens') or self.settings.openai_window_tokens, 100)
+
+    def _get_window_concurrency(self) -> int:
+        """Get how many windows of one document are sent at once (never more than the governor admits)"""
+        return max(min(self.settings.openai_max_concurrency, self.settings.llm_max_concurrent_requests), 1)
+
+    def _split_into_windows(self, text: str, max_tokens: int) -> List[Tuple[int, int]]:
+        """Split text into clause-aligned (start, end) windows of at most max_tokens each"""
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        windows = []
+        start = 0
+
+        while len(text) - start > max_chars:
+            limit = start + max_chars
+            # Do not accept a boundary that would leave a window less than half full
+            floor = start + max_chars // 2
+            end = limit
+
+            for pattern in CLAUSE_BOUNDARY_PATTERNS:
+                boundary = None
+                for match in pattern.finditer(text, floor, limit):
+                    boundary = match.end()
+                if boundary is not None and boundary > start:
+                    end = boundary
+                    break
+
+            windows.append((start, end))
+            start = end
+
+        if start < len(text) or not windows:
+            windows.append((start, len(text)))
+
+        return windows
+
+    async def _map_windows(
+        self,
+        extract_window: Callable[[int, int, int], Awaitable[Any]],
+        windows: List[Tuple[int, int]]
+    ) -> List[Any]:
+        """Run extract_window over all windows concurrently, preserving window order"""
+        semaphore = asyncio.Semaphore(self._get_window_concurrency())
+
+        async def run(index: int, window: Tuple[int, int]) -> Any:
+            async with semaphore:
+                return await extract_window(index, window[0], window[1])
+
+        return await asyncio.gather(*(run(i, w) for i, w in enumerate(windows)))
+
+    def _describe_part(self, part: Optional[Tuple[int, int]]) -> str:
+        """Describe which part of a split contract a prompt covers"""
+        if not part or part[1] <= 1:
+            return ""
+        return (
+            f"\nThis is part {part[0]} of {part[1]} of the contract. "
+            "Only extract information present in this part.\n"
+        )
+
+    def _normalize_value(self, value: str) -> str:
+        """Normalize an extracted value for duplicate detection"""
+        return re.sub(r'\W+', ' ', value.lower()).strip()
+
+    def _merge_metadata_results(self, window_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge per-window metadata into a single result"""
+        merged: Dict[str, Any] = {}
+
+        for window_result in window_results:
+            for field_name, field_value in window_result.items():
+                if field_value is None:
+                    merged.setdefault(field_name, None)
+                    continue
+
+                if isinstance(field_value, list):
+                    merged[field_name] = (merged.get(field_name) or []) + field_value
+                else:
+                    # Single-valued field: keep the most confident value, first window wins ties
+                    current = merged.get(field_name)
+                    if current is None or field_value.confidence > current.confidence:
+                        merged[field_name] = field_value
+
+        for field_name, field_value in merged.items():
+            if isinstance(field_value, list):
+                merged[field_name] = self._dedupe_fields(field_value) or None
+
+        return merged
+
+    def _dedupe_fields(self, fields: List[ExtractedField]) -> List[ExtractedField]:
+        """Drop duplicate values, keeping the most confident occurrence in first-seen order"""
+        best: Dict[str, ExtractedField] = {}
+
+        for field in fields:
+            key = self._normalize_value(field.value)
+            if key not in best or field.confidence > best[key].confidence:
+                best[key] = field
+
+        return list(best.values())
+
+    def _merge_obligation_results(self, window_results: List[List[Obligation]]) -> List[Obligation]:
+        """Merge per-window obligations in document order, dropping duplicates"""
+        best: Dict[str, Obligation] = {}
+
+        for obligations in window_results:
+            for obligation in obligations:
+                key = self._normalize_value(obligation.description.value)
+                current = best.get(key)
+                if current is None or obligation.description.confidence > current.description.confidence:
+                    best[key] = obligation
+
+        def position(obligation: Obligation) -> int:
+            offset = obligation.description.text_offset
+            return offset.start if offset else -1
+
+        # Keep window order for obligations without a resolved offset
+        ordered = list(best.values())
+        located = sorted((o for o in ordered if position(o) >= 0), key=position)
+        unlocated = [o for o in ordered if position(o) < 0]
+        return located + unlocated
+
+    def _create_metadata_prompt(
+        self, text: str, request: MetadataRequest, part: Optional[Tuple[int, int]] = None
+    ) -> str:
+        """Create metadata extraction prompt"""
 
         fields_to_extract = request.extract_fields or [
             "ProjectName", "ClientName", "ContractValue", "StartDate", "EndDate",
@@ -258,19 +586,17 @@ Expected JSON structure:
 }}
 
 If a field is not found or cannot be determined with reasonable confidence, set it to null.
-
+{self._describe_part(part)}
 Contract text:
 {text}
 """
         return prompt
 
-    def _create_obligations_prompt(self, text: str, request: ObligationRequest) -> str:
+    def _create_obligations_prompt(
+        self, text: str, request: ObligationRequest, part: Optional[Tuple[int, int]] = None
+    ) -> str:
         """Create obligations extraction prompt"""
 
-        # Truncate text if too long
-        if len(text) > 12000:
-            text = text[:12000] + "..."
-
         penalty_instruction = (
             "Include penalty information if available."
             if request.include_penalties
@@ -303,13 +629,15 @@ Return results as a JSON array:
 ]
 
 Look for obligations indicated by words like: shall, must, will, required, responsible, duty, ensure, provide, deliver, maintain, comply, etc.
-
+{self._describe_part(part)}
 Contract text:
 {text}
 """
         return prompt
 
-    async def _parse_metadata_response(self, response_text: str, original_text: str) -> Dict[str, Any]:
+    async def _parse_metadata_response(
+        self, response_text: str, offset_index: TextOffsetIndex, window: Tuple[int, int]
+    ) -> Dict[str, Any]:
         """Parse metadata extraction response"""
         try:
             # Clean up response text
@@ -335,28 +663,14 @@ Contract text:
                     extracted_list = []
                     for item in field_data:
                         if isinstance(item, dict) and 'value' in item:
-                            text_offset = self._find_text_offset(
-                                item.get('source_text', ''), original_text
+                            extracted_list.append(
+                                self._build_extracted_field(item, offset_index, window)
                             )
-                            extracted_list.append(ExtractedField(
-                                value=item['value'],
-                                confidence=item.get('confidence', 0.8),
-                                text_offset=text_offset,
-                                source="openai"
-                            ))
                     result[field_name] = extracted_list if extracted_list else None
 
                 elif isinstance(field_data, dict) and 'value' in field_data:
                     # Handle single field
-                    text_offset = self._find_text_offset(
-                        field_data.get('source_text', ''), original_text
-                    )
-                    result[field_name] = ExtractedField(
-                        value=field_data['value'],
-                        confidence=field_data.get('confidence', 0.8),
-                        text_offset=text_offset,
-                        source="openai"
-                    )
+                    result[field_name] = self._build_extracted_field(field_data, offset_index, window)
                 else:
                     result[field_name] = None
 
@@ -379,7 +693,9 @@ Contract text:
                 "penalty_clauses": None
             }
 
-    async def _parse_obligations_response(self, response_text: str, original_text: str) -> List[Obligation]:
+    async def _parse_obligations_response(
+        self, response_text: str, offset_index: TextOffsetIndex, window: Tuple[int, int]
+    ) -> List[Obligation]:
         """Parse obligations extraction response"""
         try:
             # Clean up response text
@@ -389,123 +705,94 @@ Contract text:
             if response_text.endswith("```"):
                 response_text = response_text[:-3]
 
-            # Parse JSON
-            parsed = json.loads(response_text)
+            # Parse JSON, salvaging complete objects from a truncated or malformed tail
+            try:
+                parsed = json.loads(response_text)
+            except json.JSONDecodeError as e:
+                parsed = parse_json_array_elements(response_text)
+                logger.warning(f"Obligations response was not valid JSON ({e}), salvaged {len(parsed)} items")
 
             obligations = []
 
             for item in parsed:
-                if not isinstance(item, dict) or 'description' not in item:
+                try:
+                    obligation = self._build_obligation(item, offset_index, window)
+                except Exception as e:
+                    logger.warning(f"Skipping invalid obligation item: {e}")
                     continue
 
-                # Extract description
-                desc_data = item['description']
-                if not isinstance(desc_data, dict) or 'value' not in desc_data:
-                    continue
+                if obligation:
+                    obligations.append(obligation)
 
-                desc_offset = self._find_text_offset(
-                    desc_data.get('source_text', ''), original_text
-                )
-                description = ExtractedField(
-                    value=desc_data['value'],
-                    confidence=desc_data.get('confidence', 0.8),
-                    text_offset=desc_offset,
-                    source="openai"
-                )
+            return obligations
 
-                # Extract optional fields
-                frequency = None
-                if item.get('frequency') and isinstance(item['frequency'], dict):
-                    freq_data = item['frequency']
-                    freq_offset = self._find_text_offset(
-                        freq_data.get('source_text', ''), original_text
-                    )
-                    frequency = ExtractedField(
-                        value=freq_data['value'],
-                        confidence=freq_data.get('confidence', 0.8),
-                        text_offset=freq_offset,
-                        source="openai"
-                    )
+        except Exception as e:
+            logger.error(f"Obligations response parsing failed: {e}")
+            return []
 
-                due_date = None
-                if item.get('due_date') and isinstance(item['due_date'], dict):
-                    due_data = item['due_date']
-                    due_offset = self._find_text_offset(
-                        due_data.get('source_text', ''), original_text
-                    )
-                    due_date = ExtractedField(
-                        value=due_data['value'],
-                        confidence=due_data.get('confidence', 0.8),
-                        text_offset=due_offset,
-                        source="openai"
-                    )
+    def _build_obligation(
+        self, item: Any, offset_index: TextOffsetIndex, window: Tuple[int, int]
+    ) -> Optional[Obligation]:
+        """Build an obligation from one parsed response item"""
+        if not isinstance(item, dict) or 'description' not in item:
+            return None
 
-                penalty_text = None
-                if item.get('penalty_text') and isinstance(item['penalty_text'], dict):
-                    penalty_data = item['penalty_text']
-                    penalty_offset = self._find_text_offset(
-                        penalty_data.get('source_text', ''), original_text
-                    )
-                    penalty_text = ExtractedField(
-                        value=penalty_data['value'],
-                        confidence=penalty_data.get('confidence', 0.8),
-                        text_offset=penalty_offset,
-                        source="openai"
-                    )
+        # Extract description
+        desc_data = item['description']
+        if not isinstance(desc_data, dict) or 'value' not in desc_data:
+            return None
 
-                assignee = None
-                if item.get('assignee') and isinstance(item['assignee'], dict):
-                    assignee_data = item['assignee']
-                    assignee_offset = self._find_text_offset(
-                        assignee_data.get('source_text', ''), original_text
-                    )
-                    assignee = ExtractedField(
-                        value=assignee_data['value'],
-                        confidence=assignee_data.get('confidence', 0.8),
-                        text_offset=assignee_offset,
-                        source="openai"
-                    )
+        description = self._build_extracted_field(desc_data, offset_index, window)
 
-                obligation = Obligation(
-                    description=description,
-                    frequency=frequency,
-                    due_date=due_date,
-                    penalty_text=penalty_text,
-                    category=item.get('category', 'general'),
-                    assignee=assignee,
-                    status="pending"
-                )
+        # Extract optional fields
+        optional_fields = {}
+        for field_name in ['frequency', 'due_date', 'penalty_text', 'assignee']:
+            field_data = item.get(field_name)
+            optional_fields[field_name] = (
+                self._build_extracted_field(field_data, offset_index, window)
+                if field_data and isinstance(field_data, dict) and 'value' in field_data
+                else None
+            )
 
-                obligations.append(obligation)
+        return Obligation(
+            description=description,
+            category=item.get('category', 'general'),
+            status="pending",
+            **optional_fields
+        )
 
-            return obligations
+    def _build_extracted_field(
+        self, field_data: Dict[str, Any], offset_index: TextOffsetIndex, window: Tuple[int, int]
+    ) -> ExtractedField:
+        """Build an extracted field from a parsed {value, confidence, source_text} object"""
+        text_offset = self._find_text_offset(
+            field_data.get('source_text', ''), offset_index, window
+        )
+        return ExtractedField(
+            value=field_data['value'],
+            confidence=field_data.get('confidence', 0.8),
+            text_offset=text_offset,
+            source="openai"
+        )
 
-        except Exception as e:
-            logger.error(f"Obligations response parsing failed: {e}")
-            return []
+    async def _build_offset_index(self, text: str) -> TextOffsetIndex:
+        """Build the per-document offset index off the event loop"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, TextOffsetIndex, text)
 
-    def _find_text_offset(self, source_text: str, original_text: str) -> Optional[TextOffset]:
-        """Find text offset in original document"""
-        if not source_text or not original_text:
+    def _find_text_offset(
+        self, source_text: str, offset_index: TextOffsetIndex, window: Tuple[int, int]
+    ) -> Optional[TextOffset]:
+        """Find text offset in original document, preferring matches inside the source window"""
+        if not source_text or not offset_index.text:
             return None
 
         try:
-            # Clean and normalize text for matching
-            source_clean = source_text.strip()[:50]  # Use first 50 chars for matching
-
-            # Find approximate position
-            start_pos = original_text.find(source_clean)
-            if start_pos == -1:
-                # Try case-insensitive search
-                start_pos = original_text.lower().find(source_clean.lower())
-
-            if start_pos != -1:
-                return TextOffset(
-                    start=start_pos,
-                    end=start_pos + len(source_clean)
-                )
+            span = offset_index.find(source_text, lo=window[0], hi=window[1])
+            if span is None:
+                return None
 
-            return None
+            return TextOffset(start=span[0], end=span[1])
 
         except Exception as e:
             logger.error(f"Text offset finding failed: {e}")
@@ -513,9 +800,7 @@ Contract text:
 
     async def get_capabilities(self) -> Dict[str, Any]:
         """Get OpenAI extraction service capabilities"""
-        model = (self.settings.azure_openai_deployment_name
-                if hasattr(self.settings, 'azure_openai_deployment_name')
-                else self.settings.openai_model)
+        model = self.model_name
 
         return {
             "provider": "openai",
@@ -530,7 +815,7 @@ Contract text:
                     "Description", "Frequency", "DueDate", "PenaltyText", "Category", "Assignee"
                 ]
             },
-            "max_text_length": 15000,  # Accounting for prompt overhead
+            "max_text_length": 100000,  # Longer texts are split into windows
             "supported_languages": ["en", "es", "fr", "de", "it", "pt", "ru", "zh", "ja", "ko"],
             "features": {
                 "confidence_scores": True,
@@ -543,6 +828,5 @@ Contract text:
         }
 
     async def close(self):
-        """Close the OpenAI client"""
-        if self._client:
-            await self._client.close()
\ No newline at end of file
+        """No-op: the shared OpenAI client is closed on application shutdown"""
+        pass
\ No newline at end of file
@@ -0,0 +1,463 @@
+"""
+End-to-end document ingestion: OCR, metadata, obligations and indexing in one pass
+
+The file is downloaded once and OCR'd page by page. Each page is fanned out to
+the stages that can work incrementally: index chunks are embedded as soon as
+they are complete, and the local obligation extractor consumes pages as a
+stream. Metadata extraction (and obligation extraction with the OpenAI
+provider) needs the whole text and starts as soon as OCR finishes.
+"""
+
+import time
+import hashlib
+import logging
+import asyncio
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Callable, Awaitable, AsyncIterator, Union
+
+import numpy as np
+
+from models.ingestion_models import IngestionRequest, IngestionResult
+from models.ocr_models import OCRRequest, OCRResult, OCRPage
+from models.extraction_models import MetadataRequest, MetadataResult, ObligationRequest, ObligationResult
+from models.common_models import DocumentInfo, ProcessingMetadata
+from services.ocr_azure import AzureOCRService
+from services.ocr_local import LocalOCRService
+from services.extract_local import LocalExtractionService
+from services.extract_openai import OpenAIExtractionService
+from rag.faiss_indexer import get_indexer, ChunkStream
+from rag.obligation_store import get_obligation_store, all_obligations
+from utils.config import get_settings
+from utils.storage_client import get_storage_client
+from utils.result_cache import get_result_cache
+
+logger = logging.getLogger(__name__)
+
+OCR_EXTENSIONS = ['.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.bmp']
+
+# Marks the end of the page stream
+_END_OF_DOCUMENT = object()
+
+ProgressCallback = Callable[[int, Optional[int], Optional[str]], Awaitable[None]]
+
+
+class IngestionService:
+    """Single-pass pipelined ingestion of a contract"""
+
+    def __init__(self):
+        self.settings = get_settings()
+
+    async def ingest(
+        self,
+        request: IngestionRequest,
+        file_content: Optional[bytes] = None,
+        filename: Optional[str] = None,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> IngestionResult:
+        """Run OCR, extraction and indexing concurrently and return one consolidated result
+
+        OCR failures fail the ingestion; failures in later stages are reported in
+        `errors` while the other stages still complete.
+        """
+        start_time = time.time()
+        stage_times: Dict[str, float] = {}
+
+        def mark(stage: str):
+            stage_times[stage] = time.time() - start_time
+
+        # Download once
+        if request.text is None and file_content is None:
+            if not request.file_path:
+                raise ValueError("Either text, file_path or an uploaded file must be provided")
+            file_content = await self._download(request.file_path)
+            mark("download")
+
+        filename = Path(filename or request.file_path or "document.txt").name
+        source = request.text.encode("utf-8") if request.text is not None else file_content
+        document_id = request.document_id or request.file_path or hashlib.sha256(source).hexdigest()[:16]
+
+        ocr_service = None
+        if request.text is None and Path(filename).suffix.lower() in OCR_EXTENSIONS:
+            ocr_service = self._get_ocr_service(request.ocr_provider)
+
+        extraction_service = None
+        if request.extract_metadata or request.extract_obligations:
+            extraction_service = self._get_extraction_service(request.extract_provider)
+
+        # Pages are fanned out to every stage that consumes them incrementally
+        subscribers: List[asyncio.Queue] = []
+
+        def subscribe() -> asyncio.Queue:
+            queue = asyncio.Queue()
+            subscribers.append(queue)
+            return queue
+
+        loop = asyncio.get_event_loop()
+        text_future = loop.create_future()
+        ocr_pages: List[OCRPage] = []
+        tasks: Dict[str, asyncio.Task] = {}
+
+        if request.extract_metadata:
+            tasks["metadata"] = asyncio.create_task(self._run_stage(
+                "metadata", mark, self._extract_metadata(request, extraction_service, document_id, filename, text_future)
+            ))
+
+        if request.extract_obligations:
+            # The local extractor reads pages as they arrive; OpenAI windows need the whole text
+            pages = subscribe() if isinstance(extraction_service, LocalExtractionService) else None
+            tasks["obligations"] = asyncio.create_task(self._run_stage(
+                "obligations", mark,
+                self._extract_obligations(request, extraction_service, document_id, filename, pages, text_future)
+            ))
+
+        if request.index:
+            tasks["index"] = asyncio.create_task(self._run_stage(
+                "index", mark,
+                self._index(request, document_id, filename, subscribe(), tasks.get("metadata"))
+            ))
+
+        try:
+            await self._produce_pages(
+                request, ocr_service, file_content, filename, subscribers, text_future, ocr_pages, progress_callback
+            )
+            mark("ocr" if ocr_service else "text")
+
+            if progress_callback:
+                await progress_callback(len(ocr_pages), len(ocr_pages), "extracting")
+
+            outcomes = dict(zip(tasks, await asyncio.gather(*tasks.values(), return_exceptions=True)))
+
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            if extraction_service is not None and hasattr(extraction_service, 'close'):
+                await extraction_service.close()
+            if ocr_service is not None and hasattr(ocr_service, 'close'):
+                await ocr_service.close()
+
+        errors = {
+            stage: str(outcome) or type(outcome).__name__
+            for stage, outcome in outcomes.items() if isinstance(outcome, BaseException)
+        }
+
+        def outcome(stage: str) -> Any:
+            value = outcomes.get(stage)
+            return None if isinstance(value, BaseException) else value
+
+        full_text = text_future.result()
+        processing_time = time.time() - start_time
+
+        return IngestionResult(
+            document_id=document_id,
+            page_count=len(ocr_pages) if ocr_service else 1,
+            text_length=len(full_text),
+            ocr=self._build_ocr_result(
+                ocr_service, ocr_pages, full_text, filename, file_content, request, processing_time
+            ) if ocr_service and request.include_ocr_result else None,
+            metadata=outcome("metadata"),
+            obligations=outcome("obligations"),
+            indexed_chunks=outcome("index") or 0,
+            stage_times=stage_times,
+            errors=errors,
+            processing_metadata=ProcessingMetadata(
+                provider="ingestion",
+                processing_time=processing_time,
+                parameters={
+                    "ocr_provider": self._ocr_provider_name(ocr_service) if ocr_service else None,
+                    "extract_provider": getattr(extraction_service, "provider", None),
+                    "stages": ["ocr" if ocr_service else "text", *tasks]
+                }
+            )
+        )
+
+    async def _produce_pages(
+        self,
+        request: IngestionRequest,
+        ocr_service: Optional[Union[LocalOCRService, AzureOCRService]],
+        file_content: Optional[bytes],
+        filename: str,
+        subscribers: List[asyncio.Queue],
+        text_future: asyncio.Future,
+        ocr_pages: List[OCRPage],
+        progress_callback: Optional[ProgressCallback]
+    ):
+        """OCR the document page by page, publish each page and resolve the full text"""
+        parts = []
+
+        def publish(text: str):
+            parts.append(text)
+            for queue in subscribers:
+                queue.put_nowait(text)
+
+        try:
+            if ocr_service is None:
+                publish(self._decode_text(request, file_content))
+            else:
+                ocr_request = OCRRequest(
+                    file_path=request.file_path,
+                    provider=request.ocr_provider,
+                    languages=request.languages,
+                    extract_layout=request.include_ocr_result,
+                    extract_tables=request.include_ocr_result,
+                    options=request.options
+                )
+
+                async for page in ocr_service.iter_pages(ocr_request, file_content, filename):
+                    ocr_pages.append(page)
+                    publish(page.text + "\n")
+
+                    if progress_callback:
+                        await progress_callback(len(ocr_pages), None, "ocr")
+
+            # Offsets from streamed extraction refer to the concatenated pages, so only trailing whitespace is removed
+            text_future.set_result("".join(parts).rstrip())
+
+        except asyncio.CancelledError:
+            text_future.cancel()
+            raise
+
+        except Exception as e:
+            text_future.set_exception(e)
+            # Mark the exception as retrieved in case no stage is waiting for the text
+            text_future.exception()
+            raise
+
+        finally:
+            for queue in subscribers:
+                queue.put_nowait(_END_OF_DOCUMENT)
+
+    async def _run_stage(self, stage: str, mark: Callable[[str], None], coro: Awaitable[Any]) -> Any:
+        """Run one stage, recording when it finished and logging failures"""
+        try:
+            return await coro
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Ingestion {stage} stage failed: {e}")
+            raise
+        finally:
+            mark(stage)
+
+    async def _extract_metadata(
+        self,
+        request: IngestionRequest,
+        extraction_service: Any,
+        document_id: str,
+        filename: str,
+        text_future: asyncio.Future
+    ) -> MetadataResult:
+        """Extract contract metadata once the full text is available"""
+        text = await text_future
+
+        metadata_request = MetadataRequest(
+            file_path=request.file_path,
+            provider=request.extract_provider,
+            confidence_threshold=request.confidence_threshold,
+            options=self._extraction_options(request, document_id, filename)
+        )
+        return await get_result_cache().get_or_extract("metadata", extraction_service, metadata_request, text)
+
+    async def _extract_obligations(
+        self,
+        request: IngestionRequest,
+        extraction_service: Any,
+        document_id: str,
+        filename: str,
+        pages: Optional[asyncio.Queue],
+        text_future: asyncio.Future
+    ) -> ObligationResult:
+        """Extract obligations from the page stream, or from the full text, and record them for Q&A"""
+        obligation_request = ObligationRequest(
+            file_path=request.file_path,
+            provider=request.extract_provider,
+            confidence_threshold=request.confidence_threshold,
+            include_penalties=request.include_penalties,
+            options=self._extraction_options(request, document_id, filename)
+        )
+        cache = get_result_cache()
+
+        if pages is not None:
+            result = await extraction_service.extract_obligations(obligation_request, self._read_pages(pages))
+            text = await text_future
+            await self._cache_result(cache, "obligations", extraction_service, obligation_request, text, result)
+        else:
+            text = await text_future
+            result = await cache.get_or_extract("obligations", extraction_service, obligation_request, text)
+
+        await get_obligation_store().add_obligations(
+            await all_obligations(result, extraction_service, obligation_request, text),
+            document_id=document_id,
+            project_id=request.project_id,
+            document_name=filename
+        )
+
+        return result
+
+    async def _index(
+        self,
+        request: IngestionRequest,
+        document_id: str,
+        filename: str,
+        pages: asyncio.Queue,
+        metadata_task: Optional[asyncio.Task]
+    ) -> int:
+        """Embed chunks as pages arrive, then replace the document in the index"""
+        indexer = await get_indexer()
+        stream = ChunkStream(indexer)
+        batch_size = max(self.settings.ingest_embed_batch_size, 1)
+
+        chunks: List[str] = []
+        embeddings: List[np.ndarray] = []
+        pending: List[str] = []
+
+        async def embed(batch: List[str]):
+            embeddings.append(await indexer.embed_texts(batch))
+            chunks.extend(batch)
+
+        async for text in self._read_pages(pages):
+            pending.extend(stream.feed(text))
+            while len(pending) >= batch_size:
+                await embed(pending[:batch_size])
+                pending = pending[batch_size:]
+
+        pending.extend(stream.flush())
+        for start in range(0, len(pending), batch_size):
+            await embed(pending[start:start + batch_size])
+
+        if not chunks:
+            return 0
+
+        # Filterable fields from the extracted metadata, when available
+        metadata = {"project_id": request.project_id, "file_path": request.file_path, "source": "ingestion"}
+        if metadata_task is not None:
+            try:
+                contract = (await asyncio.shield(metadata_task)).metadata
+                metadata["contractor"] = contract.client_name.value if contract.client_name else None
+                metadata["project_name"] = contract.project_name.value if contract.project_name else None
+            except Exception:
+                pass
+
+        document = {
+            "document_id": document_id,
+            "title": request.title or filename,
+            "metadata": {key: value for key, value in metadata.items() if value is not None},
+            "document_type": "contract",
+            "timestamp": datetime.utcnow()
+        }
+
+        # Replace chunks from an earlier ingestion of the same document
+        await indexer.delete_documents([document_id])
+        return await indexer.add_chunks(document, chunks, np.vstack(embeddings))
+
+    async def _read_pages(self, queue: asyncio.Queue) -> AsyncIterator[str]:
+        """Iterate over published pages until the end of the document"""
+        while True:
+            text = await queue.get()
+            if text is _END_OF_DOCUMENT:
+                return
+            yield text
+
+    async def _cache_result(
+        self, cache: Any, kind: str, extraction_service: Any, request: Any, text: str, result: Any
+    ):
+        """Store a streamed extraction result so later /nlp requests for the same text hit the cache"""
+        if not cache.enabled or (request.options or {}).get("cache") is False or result.page is not None:
+            return
+
+        key = cache.make_key(
+            kind,
+            getattr(extraction_service, "provider", type(extraction_service).__name__),
+            getattr(extraction_service, "model_name", ""),
+            request,
+            text
+        )
+        await cache.set(kind, key, result)
+
+    async def _download(self, file_path: str) -> bytes:
+        """Download the document from storage"""
+        storage_client = get_storage_client()
+        await storage_client.initialize()
+
+        if not await storage_client.file_exists(file_path):
+            raise FileNotFoundError(f"File not found in storage: {file_path}")
+
+        return await storage_client.download_file(file_path)
+
+    def _decode_text(self, request: IngestionRequest, file_content: Optional[bytes]) -> str:
+        """Get the text of a document that needs no OCR"""
+        if request.text is not None:
+            return request.text
+
+        try:
+            return file_content.decode('utf-8')
+        except UnicodeDecodeError:
+            raise ValueError(f"Unsupported file type. Supported: .txt, {', '.join(OCR_EXTENSIONS)}")
+
+    def _extraction_options(self, request: IngestionRequest, document_id: str, filename: str) -> Dict[str, Any]:
+        """Request options for the extraction stages"""
+        options = dict(request.options or {})
+        options.update({"document_id": document_id, "document_name": filename})
+        if request.project_id:
+            options["project_id"] = request.project_id
+        return options
+
+    def _get_ocr_service(self, provider: Optional[str]) -> Union[LocalOCRService, AzureOCRService]:
+        """Get the OCR service for a provider, or the configured default"""
+        provider = provider or self.settings.ai_ocr_provider
+        if provider == "azure":
+            if not self.settings.azure_docintel_endpoint or not self.settings.azure_docintel_key:
+                raise ValueError("Azure Document Intelligence not configured")
+            return AzureOCRService()
+        return LocalOCRService()
+
+    def _get_extraction_service(self, provider: Optional[str]) -> Union[LocalExtractionService, OpenAIExtractionService]:
+        """Get the extraction service for a provider, or the configured default"""
+        provider = provider or self.settings.ai_extract_provider
+        if provider == "openai":
+            if not self.settings.openai_api_key and not (
+                self.settings.azure_openai_api_key and self.settings.azure_openai_endpoint
+            ):
+                raise ValueError("OpenAI/Azure OpenAI not configured")
+            return OpenAIExtractionService()
+        return LocalExtractionService()
+
+    def _ocr_provider_name(self, ocr_service: Union[LocalOCRService, AzureOCRService]) -> str:
+        """Provider name of an OCR service"""
+        return "azure" if isinstance(ocr_service, AzureOCRService) else "local"
+
+    def _build_ocr_result(
+        self,
+        ocr_service: Union[LocalOCRService, AzureOCRService],
+        pages: List[OCRPage],
+        full_text: str,
+        filename: str,
+        file_content: bytes,
+        request: IngestionRequest,
+        processing_time: float
+    ) -> OCRResult:
+        """Assemble the streamed pages into an OCR result"""
+        provider = self._ocr_provider_name(ocr_service)
+        language = pages[0].language if pages and pages[0].language else None
+
+        return OCRResult(
+            text=full_text.strip(),
+            confidence=sum(page.confidence for page in pages) / len(pages) if pages else 0.0,
+            pages=pages,
+            language=language,
+            document_info=DocumentInfo(
+                filename=filename,
+                file_size=len(file_content),
+                mime_type=ocr_service._get_mime_type(
+                    Path(filename).suffix.lower() if provider == "local" else filename
+                ),
+                page_count=len(pages) or None,
+                language=language
+            ),
+            processing_metadata=ProcessingMetadata(
+                provider=provider,
+                model="tesseract" if provider == "local" else "document-intelligence",
+                processing_time=processing_time,
+                parameters={"languages": request.languages, "streamed": True}
+            )
+        )
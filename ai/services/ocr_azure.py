@@ -2,10 +2,12 @@
 Azure Document Intelligence OCR service
 """
 
+import io
+import re
 import logging
 import asyncio
 import time
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable, AsyncIterator
 from datetime import datetime
 
 import aiohttp
@@ -18,60 +20,66 @@ from models.ocr_models import (
     BoundingBox, DocumentInfo, ProcessingMetadata
 )
 from utils.config import get_settings
+from utils.metrics import OCR_PAGE_SECONDS, OCR_STAGE_SECONDS
+from utils.tracing import span
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
 
 logger = logging.getLogger(__name__)
 
+# Page objects in a PDF, excluding the /Pages tree nodes
+_PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
 
 class AzureOCRService:
     """Azure Document Intelligence OCR service"""
 
     def __init__(self):
         self.settings = get_settings()
-        self._client = None
 
     async def _get_client(self) -> DocumentIntelligenceClient:
-        """Get Azure Document Intelligence client"""
-        if not self._client:
-            if not self.settings.azure_docintel_endpoint or not self.settings.azure_docintel_key:
-                raise ValueError("Azure Document Intelligence credentials not configured")
-
-            self._client = DocumentIntelligenceClient(
-                endpoint=self.settings.azure_docintel_endpoint,
-                credential=AzureKeyCredential(self.settings.azure_docintel_key)
-            )
-
-        return self._client
+        """Get the shared Azure Document Intelligence client"""
+        return await get_docintel_client()
 
-    async def extract_text(self, request: OCRRequest, file_content: bytes, filename: str) -> OCRResult:
-        """Extract text from document using Azure Document Intelligence"""
+    async def extract_text(
+        self,
+        request: OCRRequest,
+        file_content: bytes,
+        filename: str,
+        progress_callback: Optional[Callable[[int, int], Awaitable[None]]] = None
+    ) -> OCRResult:
+        """Extract text using Azure Document Intelligence, reporting (page ranges done, total) if a callback is given"""
         start_time = time.time()
 
         try:
             client = await self._get_client()
 
-            # Determine model to use based on request
-            model_id = "prebuilt-read"  # General OCR model
-            if request.extract_tables:
-                model_id = "prebuilt-layout"  # Layout model for tables
+            model_id = self._get_model_id(request)
+            page_ranges = await self._plan_page_ranges(file_content, filename)
 
-            # Prepare analyze request
-            analyze_request = AnalyzeDocumentRequest(bytes_source=file_content)
+            completed = 0
 
-            # Start analysis
-            async with client:
-                poller = await client.begin_analyze_document(
-                    model_id=model_id,
-                    analyze_request=analyze_request,
-                    content_type="application/octet-stream"
-                )
+            async def analyze_range(pages: Optional[str]) -> Any:
+                nonlocal completed
+                result = await self._analyze(client, model_id, file_content, pages)
+                completed += 1
+                if progress_callback:
+                    await progress_callback(completed, len(page_ranges))
+                return result
 
-                # Wait for completion
-                result = await poller.result()
+            # Analyze page ranges concurrently; the shared semaphore bounds in-flight calls
+            results = await asyncio.gather(*[analyze_range(pages) for pages in page_ranges])
 
             # Process the result
             ocr_result = await self._process_azure_result(
-                result, request, filename, file_content, start_time
+                results, request, filename, file_content, start_time
             )
+            ocr_result.processing_metadata.parameters["page_ranges"] = [
+                pages for pages in page_ranges if pages
+            ]
 
             return ocr_result
 
@@ -79,26 +87,124 @@ class AzureOCRService:
             logger.error(f"Azure OCR extraction failed: {e}")
             raise
 
+    async def iter_pages(self, request: OCRRequest, file_content: bytes, filename: str) -> AsyncIterator[OCRPage]:
+        """Yield OCR pages in document order as each page range completes"""
+        client = await self._get_client()
+        model_id = self._get_model_id(request)
+        page_ranges = await self._plan_page_ranges(file_content, filename)
+
+        tasks = [
+            asyncio.ensure_future(self._analyze(client, model_id, file_content, pages))
+            for pages in page_ranges
+        ]
+        page_count = 0
+
+        try:
+            for task in tasks:
+                result = await task
+                for page in getattr(result, 'pages', None) or []:
+                    page_count += 1
+                    page_num = getattr(page, 'page_number', None) or page_count
+                    yield await self._process_azure_page(page, page_num, request)
+
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _get_model_id(self, request: OCRRequest) -> str:
+        """Determine model to use based on request"""
+        if request.extract_tables:
+            return "prebuilt-layout"  # Layout model for tables
+        return "prebuilt-read"  # General OCR model
+
+    async def _analyze(
+        self,
+        client: DocumentIntelligenceClient,
+        model_id: str,
+        file_content: bytes,
+        pages: Optional[str]
+    ) -> Any:
+        """Analyze the whole document or one page range"""
+        kwargs = {"pages": pages} if pages else {}
+
+        async with get_docintel_semaphore():
+            start = time.perf_counter()
+            with span("ocr.analyze", model=model_id, pages=pages or "all"):
+                poller = await client.begin_analyze_document(
+                    model_id=model_id,
+                    analyze_request=AnalyzeDocumentRequest(bytes_source=file_content),
+                    content_type="application/octet-stream",
+                    **kwargs
+                )
+
+                # Wait for completion
+                result = await poller.result()
+
+        # Azure analyzes a range as one call; attribute the time evenly to its pages
+        page_count = len(getattr(result, "pages", None) or []) or 1
+        per_page = (time.perf_counter() - start) / page_count
+        for _ in range(page_count):
+            OCR_PAGE_SECONDS.observe(per_page, provider="azure")
+            OCR_STAGE_SECONDS.observe(per_page, provider="azure", stage="analyze")
+
+        return result
+
+    async def _plan_page_ranges(self, file_content: bytes, filename: str) -> List[Optional[str]]:
+        """Split large PDFs into page ranges; other documents are analyzed in one call"""
+        pages_per_request = self.settings.azure_ocr_pages_per_request
+        if pages_per_request <= 0 or self._get_mime_type(filename) != "application/pdf":
+            return [None]
+
+        loop = asyncio.get_event_loop()
+        page_count = await loop.run_in_executor(None, lambda: self._count_pdf_pages(file_content))
+        if page_count <= pages_per_request:
+            return [None]
+
+        return [
+            f"{first}-{min(first + pages_per_request - 1, page_count)}"
+            for first in range(1, page_count + 1, pages_per_request)
+        ]
+
+    def _count_pdf_pages(self, file_content: bytes) -> int:
+        """Count PDF pages, using pypdf when installed and a byte scan otherwise"""
+        if PdfReader is not None:
+            try:
+                return len(PdfReader(io.BytesIO(file_content)).pages)
+            except Exception as e:
+                logger.warning(f"pypdf page count failed, falling back to byte scan: {e}")
+
+        # Compressed object streams hide page objects from the scan; those PDFs
+        # count as 0 pages and are analyzed in a single call
+        return len(_PDF_PAGE_PATTERN.findall(file_content))
+
     async def _process_azure_result(
         self,
-        result: Any,
+        results: List[Any],
         request: OCRRequest,
         filename: str,
         file_content: bytes,
         start_time: float
     ) -> OCRResult:
-        """Process Azure Document Intelligence result"""
+        """Process and merge Azure Document Intelligence results in page order"""
 
         try:
+            # Collect pages from every page range, numbered as in the source document
+            azure_pages: List[Tuple[int, Any]] = []
+            for result in results:
+                if hasattr(result, 'pages') and result.pages:
+                    for page in result.pages:
+                        page_num = getattr(page, 'page_number', None) or len(azure_pages) + 1
+                        azure_pages.append((page_num, page))
+            azure_pages.sort(key=lambda item: item[0])
+
             # Extract pages
             ocr_pages = []
             full_text = ""
 
-            if hasattr(result, 'pages') and result.pages:
-                for page_idx, page in enumerate(result.pages):
-                    ocr_page = await self._process_azure_page(page, page_idx + 1, request)
-                    ocr_pages.append(ocr_page)
-                    full_text += ocr_page.text + "\n"
+            for page_num, page in azure_pages:
+                ocr_page = await self._process_azure_page(page, page_num, request)
+                ocr_pages.append(ocr_page)
+                full_text += ocr_page.text + "\n"
 
             # Calculate overall confidence
             if ocr_pages:
@@ -108,8 +214,10 @@ class AzureOCRService:
 
             # Detect language
             detected_language = "en"  # Default
-            if hasattr(result, 'languages') and result.languages:
-                detected_language = result.languages[0].locale
+            for result in results:
+                if hasattr(result, 'languages') and result.languages:
+                    detected_language = result.languages[0].locale
+                    break
 
             # Create document info
             document_info = DocumentInfo(
@@ -126,7 +234,7 @@ class AzureOCRService:
                 model="document-intelligence",
                 processing_time=time.time() - start_time,
                 parameters={
-                    "model_id": "prebuilt-read" if not request.extract_tables else "prebuilt-layout",
+                    "model_id": self._get_model_id(request),
                     "extract_layout": request.extract_layout,
                     "extract_tables": request.extract_tables,
                     "options": request.options
@@ -377,6 +485,55 @@ class AzureOCRService:
         }
 
     async def close(self):
-        """Close the Azure client"""
-        if self._client:
-            await self._client.close()
\ No newline at end of file
+        """Release per-request resources; the shared client is closed on shutdown"""
+        return None
+
+
+# Global Document Intelligence client, kept open for the application's lifetime
+_global_docintel_client: Optional[DocumentIntelligenceClient] = None
+_global_docintel_semaphore: Optional[asyncio.Semaphore] = None
+_docintel_lock = asyncio.Lock()
+
+
+async def get_docintel_client() -> DocumentIntelligenceClient:
+    """Get the shared Document Intelligence client, creating it on first use"""
+    global _global_docintel_client
+
+    if _global_docintel_client is not None:
+        return _global_docintel_client
+
+    async with _docintel_lock:
+        if _global_docintel_client is None:
+            settings = get_settings()
+            if not settings.azure_docintel_endpoint or not settings.azure_docintel_key:
+                raise ValueError("Azure Document Intelligence credentials not configured")
+
+            _global_docintel_client = DocumentIntelligenceClient(
+                endpoint=settings.azure_docintel_endpoint,
+                credential=AzureKeyCredential(settings.azure_docintel_key)
+            )
+            logger.info("Using shared Azure Document Intelligence client")
+
+    return _global_docintel_client
+
+
+def get_docintel_semaphore() -> asyncio.Semaphore:
+    """Get the semaphore bounding concurrent analyze calls across all requests"""
+    global _global_docintel_semaphore
+
+    if _global_docintel_semaphore is None:
+        _global_docintel_semaphore = asyncio.Semaphore(
+            max(get_settings().azure_ocr_max_concurrency, 1)
+        )
+
+    return _global_docintel_semaphore
+
+
+async def close_docintel_client():
+    """Close the shared Document Intelligence client on shutdown"""
+    global _global_docintel_client
+
+    if _global_docintel_client is not None:
+        await _global_docintel_client.close()
+        _global_docintel_client = None
+        logger.info("Shared Azure Document Intelligence client closed")
@@ -7,7 +7,7 @@ import logging
 import asyncio
 import tempfile
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Awaitable, AsyncIterator, Tuple
 from datetime import datetime
 import time
 
@@ -22,6 +22,8 @@ from models.ocr_models import (
     BoundingBox, DocumentInfo, ProcessingMetadata
 )
 from utils.config import get_settings
+from utils.metrics import OCR_PAGE_SECONDS, OCR_STAGE_SECONDS
+from utils.tracing import span, in_current_context
 
 logger = logging.getLogger(__name__)
 
@@ -41,30 +43,33 @@ class LocalOCRService:
         if self.settings.tesseract_data_path:
             os.environ['TESSDATA_PREFIX'] = self.settings.tesseract_data_path
 
-    async def extract_text(self, request: OCRRequest, file_content: bytes, filename: str) -> OCRResult:
-        """Extract text from document using Tesseract"""
+    async def extract_text(
+        self,
+        request: OCRRequest,
+        file_content: bytes,
+        filename: str,
+        progress_callback: Optional[Callable[[int, int], Awaitable[None]]] = None
+    ) -> OCRResult:
+        """Extract text from document using Tesseract, reporting (pages done, total) if a callback is given"""
         start_time = time.time()
 
         try:
             # Determine file type
             file_ext = Path(filename).suffix.lower()
 
-            if file_ext == '.pdf':
-                pages_data = await self._process_pdf(file_content, request)
-            elif file_ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
-                pages_data = await self._process_image(file_content, request)
-            else:
-                raise ValueError(f"Unsupported file type: {file_ext}")
-
             # Process pages
             ocr_pages = []
             full_text = ""
 
-            for page_num, page_data in enumerate(pages_data, 1):
-                ocr_page = await self._process_page(page_data, page_num, request)
+            async for page_num, page_count, page_data in self._iter_page_images(file_content, file_ext, request):
+                with span("ocr.page", page=page_num):
+                    ocr_page = await self._process_page(page_data, page_num, request)
                 ocr_pages.append(ocr_page)
                 full_text += ocr_page.text + "\n"
 
+                if progress_callback:
+                    await progress_callback(page_num, page_count)
+
             # Calculate overall confidence
             if ocr_pages:
                 overall_confidence = sum(page.confidence for page in ocr_pages) / len(ocr_pages)
@@ -106,35 +111,94 @@ class LocalOCRService:
             logger.error(f"OCR extraction failed: {e}")
             raise
 
-    async def _process_pdf(self, pdf_content: bytes, request: OCRRequest) -> List[np.ndarray]:
-        """Process PDF file and convert to images"""
+    async def iter_pages(self, request: OCRRequest, file_content: bytes, filename: str) -> AsyncIterator[OCRPage]:
+        """Yield OCR pages in document order as each one is recognized"""
+        file_ext = Path(filename).suffix.lower()
+
+        async for page_num, _, page_data in self._iter_page_images(file_content, file_ext, request):
+            with span("ocr.page", page=page_num):
+                ocr_page = await self._process_page(page_data, page_num, request)
+            yield ocr_page
+
+    async def _iter_page_images(
+        self, file_content: bytes, file_ext: str, request: OCRRequest
+    ) -> AsyncIterator[Tuple[int, int, np.ndarray]]:
+        """Yield (page number, page count, image) for each page of a PDF or image"""
+        if file_ext == '.pdf':
+            async for page in self._iter_pdf_pages(file_content):
+                yield page
+        elif file_ext in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
+            pages_data = await self._process_image(file_content, request)
+            for page_num, page_data in enumerate(pages_data, 1):
+                yield page_num, len(pages_data), page_data
+        else:
+            raise ValueError(f"Unsupported file type: {file_ext}")
+
+    async def _iter_pdf_pages(self, pdf_content: bytes) -> AsyncIterator[Tuple[int, int, np.ndarray]]:
+        """Rasterize a PDF in page batches, converting the next batch while the current one is recognized"""
         try:
             # Create temporary file
             with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
                 temp_file.write(pdf_content)
                 temp_path = temp_file.name
 
+            loop = asyncio.get_event_loop()
+            next_batch = None
+
             try:
-                # Convert PDF to images
-                loop = asyncio.get_event_loop()
-                images = await loop.run_in_executor(
-                    None,
-                    lambda: pdf2image.convert_from_path(
-                        temp_path,
-                        dpi=300,  # High DPI for better OCR
-                        fmt='RGB'
-                    )
-                )
+                try:
+                    info = await loop.run_in_executor(None, lambda: pdf2image.pdfinfo_from_path(temp_path))
+                    page_count = int(info["Pages"])
+                except Exception as e:
+                    logger.warning(f"PDF page count failed, rasterizing all pages at once: {e}")
+                    page_count = None
+
+                batch_pages = max(self.settings.ocr_rasterize_batch_pages, 1)
+                if page_count is None:
+                    batches = [(None, None)]
+                else:
+                    batches = [
+                        (first, min(first + batch_pages - 1, page_count))
+                        for first in range(1, page_count + 1, batch_pages)
+                    ]
+
+                def rasterize(first_page: Optional[int], last_page: Optional[int]) -> List[np.ndarray]:
+                    start = time.perf_counter()
+                    with span("ocr.rasterize", first_page=first_page, last_page=last_page):
+                        # Convert PDF pages to images
+                        images = pdf2image.convert_from_path(
+                            temp_path,
+                            dpi=300,  # High DPI for better OCR
+                            fmt='RGB',
+                            first_page=first_page,
+                            last_page=last_page
+                        )
+                        # Convert PIL images to numpy arrays
+                        arrays = [np.array(img) for img in images]
+
+                    per_page = (time.perf_counter() - start) / max(len(arrays), 1)
+                    for _ in arrays:
+                        OCR_STAGE_SECONDS.observe(per_page, provider="local", stage="rasterize")
+                    return arrays
 
-                # Convert PIL images to numpy arrays
-                pages_data = []
-                for img in images:
-                    img_array = np.array(img)
-                    pages_data.append(img_array)
+                page_num = 0
+                next_batch = loop.run_in_executor(None, in_current_context(rasterize, *batches[0]))
 
-                return pages_data
+                for batch_index in range(len(batches)):
+                    pages_data = await next_batch
+                    next_batch = None
+                    if batch_index + 1 < len(batches):
+                        next_batch = loop.run_in_executor(None, in_current_context(rasterize, *batches[batch_index + 1]))
+
+                    for page_data in pages_data:
+                        page_num += 1
+                        yield page_num, page_count or len(pages_data), page_data
 
             finally:
+                if next_batch is not None:
+                    # Let an in-flight conversion finish before removing its input file
+                    await asyncio.gather(next_batch, return_exceptions=True)
+
                 # Cleanup temporary file
                 os.unlink(temp_path)
 
@@ -176,30 +240,34 @@ class LocalOCRService:
 
     async def _process_page(self, image_array: np.ndarray, page_num: int, request: OCRRequest) -> OCRPage:
         """Process a single page image"""
+        page_start = time.perf_counter()
+
         try:
             # Preprocess image for better OCR
-            processed_image = await self._preprocess_image(image_array)
+            with span("ocr.preprocess"), OCR_STAGE_SECONDS.time(provider="local", stage="preprocess"):
+                processed_image = await self._preprocess_image(image_array)
 
             # Configure Tesseract
             config = self._build_tesseract_config(request)
 
             loop = asyncio.get_event_loop()
 
-            # Extract text data with detailed information
-            data = await loop.run_in_executor(
-                None,
-                lambda: pytesseract.image_to_data(
-                    processed_image,
-                    config=config,
-                    output_type=pytesseract.Output.DICT
+            with span("ocr.recognize"), OCR_STAGE_SECONDS.time(provider="local", stage="recognize"):
+                # Extract text data with detailed information
+                data = await loop.run_in_executor(
+                    None,
+                    lambda: pytesseract.image_to_data(
+                        processed_image,
+                        config=config,
+                        output_type=pytesseract.Output.DICT
+                    )
                 )
-            )
 
-            # Extract plain text for the page
-            page_text = await loop.run_in_executor(
-                None,
-                lambda: pytesseract.image_to_string(processed_image, config=config)
-            )
+                # Extract plain text for the page
+                page_text = await loop.run_in_executor(
+                    None,
+                    lambda: pytesseract.image_to_string(processed_image, config=config)
+                )
 
             # Calculate page confidence
             confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
@@ -210,10 +278,14 @@ class LocalOCRService:
             tables = []
 
             if request.extract_layout:
-                paragraphs = await self._build_paragraphs(data, image_array.shape)
+                with span("ocr.layout"), OCR_STAGE_SECONDS.time(provider="local", stage="layout"):
+                    paragraphs = await self._build_paragraphs(data, image_array.shape)
 
             if request.extract_tables:
-                tables = await self._extract_tables(processed_image, image_array.shape)
+                with span("ocr.tables"), OCR_STAGE_SECONDS.time(provider="local", stage="tables"):
+                    tables = await self._extract_tables(processed_image, image_array.shape)
+
+            OCR_PAGE_SECONDS.observe(time.perf_counter() - page_start, provider="local")
 
             return OCRPage(
                 page_number=page_num,
@@ -0,0 +1,32 @@
+"""
+Tests for extraction request option validation
+"""
+
+import pytest
+
+from models.extraction_models import MetadataRequest, ObligationRequest, MAX_OBLIGATION_PAGE_SIZE, MAX_WINDOW_TOKENS
+
+
+@pytest.mark.parametrize("options", [
+    {"page": 0},
+    {"page_size": "ten"},
+    {"max_obligations": -1},
+    {"window_tokens": 0},
+    {"window_tokens": "abc"},
+    {"page": 1.5}
+])
+def test_invalid_options_are_rejected(options):
+    with pytest.raises(ValueError):
+        ObligationRequest(text="text", options=options)
+
+
+def test_options_are_converted_and_clamped():
+    request = ObligationRequest(text="text", options={"page": "2", "page_size": 10 ** 6, "project_id": "PRJ-1"})
+
+    assert request.options == {"page": 2, "page_size": MAX_OBLIGATION_PAGE_SIZE, "project_id": "PRJ-1"}
+
+
+def test_metadata_window_tokens_are_clamped():
+    request = MetadataRequest(text="text", options={"window_tokens": 10 ** 7})
+
+    assert request.options["window_tokens"] == MAX_WINDOW_TOKENS
@@ -0,0 +1,123 @@
+"""
+Tests for the FAISS query engine's answer caching and structured obligation answers
+"""
+
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+
+import rag.faiss_query as faiss_query
+from models.common_models import ExtractedField
+from models.extraction_models import Obligation
+from models.qa_models import QARequest
+from rag.faiss_query import FAISSQueryEngine
+from rag.obligation_store import ObligationStore
+from rag.semantic_cache import SemanticAnswerCache
+
+SEARCH_RESULTS = [{
+    "chunk_id": "contract-1_0",
+    "document_id": "contract-1",
+    "title": "Maintenance Contract",
+    "content": "The contractor shall submit a monthly maintenance report.",
+    "score": 0.9,
+    "metadata": {}
+}]
+
+
+@pytest.fixture
+def engine() -> FAISSQueryEngine:
+    """Query engine with a fake indexer and retrieval, and an enabled answer cache"""
+    engine = FAISSQueryEngine()
+    engine.indexer = SimpleNamespace(
+        embed_query=AsyncMock(return_value=np.ones(8, dtype=np.float32) / np.sqrt(8)),
+        document_versions={"contract-1": 1},
+        index_version=1
+    )
+    engine.answer_cache = SemanticAnswerCache(similarity_threshold=0.95, max_entries=10, ttl_seconds=60)
+    engine.reranker.enabled = False
+    engine._search_documents = AsyncMock(return_value=SEARCH_RESULTS)
+    return engine
+
+
+def make_request() -> QARequest:
+    return QARequest(query="What reports must the contractor submit?", options={"structured": False})
+
+
+@pytest.mark.asyncio
+async def test_failed_llm_answer_is_not_cached(engine):
+    engine.answer_generator = SimpleNamespace(_chat_completion=AsyncMock(side_effect=RuntimeError("upstream 503")))
+
+    result = await engine.query(make_request())
+
+    assert result.answer.answer_type == "error"
+    assert result.answer.confidence == 0.0
+    assert result.answer.sources
+    assert engine.answer_cache.get_stats()["entries"] == 0
+
+    # The next identical question retries the LLM instead of replaying the failure
+    engine.answer_generator._chat_completion = AsyncMock(return_value="A monthly maintenance report is required.")
+    result = await engine.query(make_request())
+
+    assert result.answer.answer_type == "synthesized"
+    assert engine.answer_cache.get_stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_synthesized_answer_is_cached(engine):
+    engine.answer_generator = SimpleNamespace(
+        _chat_completion=AsyncMock(return_value="A monthly maintenance report is required.")
+    )
+
+    await engine.query(make_request())
+    result = await engine.query(make_request())
+
+    assert engine.answer_generator._chat_completion.await_count == 1
+    assert result.processing_metadata.parameters["semantic_cache_hit"] is True
+
+
+@pytest.fixture
+def obligation_store(tmp_path, monkeypatch) -> ObligationStore:
+    """Empty obligation store used by the engine"""
+    store = ObligationStore(str(tmp_path / "obligations.sqlite3"))
+    store.load()
+    monkeypatch.setattr(faiss_query, "get_obligation_store", lambda: store)
+    return store
+
+
+async def add_obligation_due_next_week(store: ObligationStore, project_id: str = "PRJ-1"):
+    due = (date.today() + timedelta(days=7)).isoformat()
+    await store.add_obligations(
+        [Obligation(
+            description=ExtractedField(value=f"Submit the safety report by {due}", confidence=0.9, source="test"),
+            due_date=ExtractedField(value=due, confidence=0.9, source="test")
+        )],
+        document_id="contract-1",
+        project_id=project_id
+    )
+
+
+def structured_request(filters=None) -> QARequest:
+    return QARequest(query="How many obligations are due in the next 30 days?", filters=filters)
+
+
+@pytest.mark.asyncio
+async def test_structured_answer_applies_supported_filters(engine, obligation_store):
+    await add_obligation_due_next_week(obligation_store)
+    engine.settings.qa_structured_obligations_enabled = True
+
+    result = await engine._answer_from_obligation_store(structured_request({"project_id": "PRJ-1"}), 0.0)
+
+    assert result.answer.answer_type == "structured"
+    assert result.answer.answer.startswith("There are 1 obligation(s)")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("filters", [{"document_type": "lease"}, {"project_id": "PRJ-404"}])
+async def test_structured_answer_falls_back_to_rag(engine, obligation_store, filters):
+    await add_obligation_due_next_week(obligation_store)
+    engine.settings.qa_structured_obligations_enabled = True
+
+    assert await engine._answer_from_obligation_store(structured_request(filters), 0.0) is None
@@ -0,0 +1,109 @@
+"""
+Tests for obligation question parsing and the shared obligation store
+"""
+
+import asyncio
+import json
+from datetime import date
+
+import pytest
+
+from models.common_models import ExtractedField
+from models.extraction_models import Obligation
+from rag.obligation_store import ObligationStore, parse_obligation_intent
+
+TODAY = date(2026, 10, 18)
+
+
+@pytest.mark.parametrize("query", [
+    "What is the penalty for late delivery due to force majeure in June?",
+    "How many days notice is due before termination?",
+    "Who is responsible for maintenance obligations in project DEF?"
+])
+def test_non_structured_questions_go_to_rag(query):
+    assert parse_obligation_intent(query, TODAY) is None
+
+
+def test_due_with_date_is_a_list_intent():
+    intent = parse_obligation_intent("What is due next week?", TODAY)
+
+    assert intent["action"] == "list"
+    assert intent["date_range"]["start"] == date(2026, 10, 19)
+
+
+def test_group_by_project_is_not_a_project_filter():
+    intent = parse_obligation_intent("How many obligations by project this month?", TODAY)
+
+    assert intent["action"] == "aggregate"
+    assert intent["group_by"] == "project_id"
+    assert "project_id" not in intent
+
+
+def test_project_filter_requires_an_id():
+    intent = parse_obligation_intent("How many deadlines for project PRJ-101 next month?", TODAY)
+
+    assert intent["action"] == "count"
+    assert intent["project_id"] == "PRJ-101"
+
+
+def make_obligation(description: str, due: str = None, category: str = None) -> Obligation:
+    return Obligation(
+        description=ExtractedField(value=description, confidence=0.9, source="test"),
+        due_date=ExtractedField(value=due, confidence=0.9, source="test") if due else None,
+        category=category
+    )
+
+
+def open_store(path) -> ObligationStore:
+    store = ObligationStore(str(path))
+    store.load()
+    return store
+
+
+@pytest.mark.asyncio
+async def test_store_is_shared_between_instances(tmp_path):
+    # Two instances stand in for two server processes using the same database
+    writer, reader = open_store(tmp_path / "obligations.sqlite3"), open_store(tmp_path / "obligations.sqlite3")
+
+    await writer.add_obligations(
+        [make_obligation("Submit the report", "2026-11-02", "reporting"), make_obligation("Pay the fee", "2026-10-20")],
+        document_id="contract-1",
+        project_id="PRJ-1"
+    )
+
+    records = reader.query(start=date(2026, 10, 1), end=date(2026, 11, 30), project_id="prj-1")
+    assert [r["description"] for r in records] == ["Pay the fee", "Submit the report"]
+    assert records[0]["due_date"] == date(2026, 10, 20)
+    assert reader.categories() == {"reporting", "general"}
+
+    # Re-extraction replaces the document's records
+    await reader.add_obligations([make_obligation("Pay the fee", "2026-10-21")], document_id="contract-1")
+    assert len(writer) == 1
+    assert not writer.has_project("PRJ-1")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_adds_keep_every_document(tmp_path):
+    store = open_store(tmp_path / "obligations.sqlite3")
+
+    await asyncio.gather(*[
+        store.add_obligations([make_obligation(f"Obligation {i}", "2026-12-01")], document_id=f"contract-{i}")
+        for i in range(20)
+    ])
+
+    assert store.get_stats()["documents"] == 20
+
+
+def test_legacy_json_store_is_imported(tmp_path):
+    (tmp_path / "obligations.json").write_text(json.dumps([{
+        "document_id": "contract-1", "document_name": "contract-1", "project_id": None,
+        "description": "Renew the insurance", "category": "insurance", "due_date": "2027-01-15",
+        "due_text": None, "frequency": None, "penalty": None, "assignee": None,
+        "status": "pending", "confidence": 0.8
+    }]))
+
+    store = open_store(tmp_path / "obligations.sqlite3")
+
+    assert len(store) == 1
+    assert store.query(category="insurance")[0]["due_date"] == date(2027, 1, 15)
+    assert not (tmp_path / "obligations.json").exists()
@@ -0,0 +1,75 @@
+"""
+Tests for the extraction result cache
+"""
+
+import asyncio
+
+import pytest
+
+from models.common_models import ProcessingMetadata
+from models.extraction_models import ObligationRequest, ObligationResult
+from utils.result_cache import ExtractionResultCache
+
+TEXT = "The contractor shall submit a monthly report."
+
+
+class SlowExtractionService:
+    """Extraction service stand-in that counts calls and can be held mid-extraction"""
+
+    provider = "test"
+    model_name = "test-model"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def extract_obligations(self, request: ObligationRequest, text: str) -> ObligationResult:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return ObligationResult(
+            obligations=[],
+            total_obligations=3,
+            high_confidence_count=0,
+            average_confidence=0.0,
+            processing_metadata=ProcessingMetadata(provider="test", processing_time=0.0, parameters={})
+        )
+
+
+@pytest.fixture
+def cache(tmp_path) -> ExtractionResultCache:
+    return ExtractionResultCache(str(tmp_path / "cache"))
+
+
+@pytest.mark.asyncio
+async def test_caller_changes_do_not_reach_the_cache(cache):
+    service = SlowExtractionService()
+    request = ObligationRequest(text=TEXT)
+
+    result = await cache.get_or_extract("obligations", service, request, TEXT)
+    result.total_obligations = 99
+    result.processing_metadata.parameters["page"] = 2
+
+    cached = await cache.get_or_extract("obligations", service, request, TEXT)
+
+    assert service.calls == 1
+    assert cached.total_obligations == 3
+    assert "page" not in cached.processing_metadata.parameters
+
+
+@pytest.mark.asyncio
+async def test_waiter_extracts_when_the_leader_is_cancelled(cache):
+    service = SlowExtractionService(delay=0.05)
+    request = ObligationRequest(text=TEXT)
+
+    leader = asyncio.create_task(cache.get_or_extract("obligations", service, request, TEXT))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_extract("obligations", service, request, TEXT))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    result = await waiter
+
+    assert result.total_obligations == 3
+    assert service.calls == 2
+    with pytest.raises(asyncio.CancelledError):
+        await leader
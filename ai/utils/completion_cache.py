@@ -0,0 +1,291 @@
+"""
+Persistent LLM completion cache
+
+Chat completions are content-addressed by model, deployment, a hash of the
+normalized prompts and the generation parameters, and stored in a local
+SQLite database with a TTL and a total size limit. Identical low-temperature
+calls (re-extracting an unchanged contract, repeated dashboard questions)
+are answered from disk instead of the provider.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import asyncio
+import sqlite3
+import threading
+from functools import lru_cache
+from typing import Optional, Dict, Any
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Prune at most once per this many writes
+PRUNE_INTERVAL = 50
+
+
+class CompletionCache:
+    """SQLite-backed completion cache with TTL and size limits"""
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl_seconds: int = 7 * 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        prompt_cost_per_1k: float = 0.0,
+        completion_cost_per_1k: float = 0.0,
+        enabled: bool = True
+    ):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.prompt_cost_per_1k = prompt_cost_per_1k
+        self.completion_cost_per_1k = completion_cost_per_1k
+        self.enabled = enabled
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "expired": 0,
+            "evictions": 0,
+            "errors": 0,
+            "prompt_tokens_saved": 0,
+            "completion_tokens_saved": 0
+        }
+
+    def make_key(
+        self,
+        provider: Optional[str],
+        endpoint: Optional[str],
+        model: str,
+        system_prompt: str,
+        prompt: str,
+        parameters: Dict[str, Any]
+    ) -> str:
+        """Build the content address for a chat completion"""
+        prompt_hash = hashlib.sha256(
+            (self._normalize(system_prompt) + "\x00" + self._normalize(prompt)).encode("utf-8")
+        ).hexdigest()
+
+        key_data = {
+            "provider": provider,
+            "endpoint": endpoint,
+            "model": model,
+            "prompt_sha256": prompt_hash,
+            "parameters": parameters
+        }
+
+        serialized = json.dumps(key_data, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Get a cached completion, or None if missing or expired"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, lambda: self._get(key))
+
+    async def set(self, key: str, content: str, prompt_tokens: int = 0, completion_tokens: int = 0):
+        """Store a completion"""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(
+            None, lambda: self._set(key, content, prompt_tokens, completion_tokens)
+        )
+
+    async def clear(self) -> int:
+        """Remove all cached completions and return the number removed"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._clear)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics including tokens and cost saved"""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        dollars_saved = (
+            self._stats["prompt_tokens_saved"] / 1000 * self.prompt_cost_per_1k +
+            self._stats["completion_tokens_saved"] / 1000 * self.completion_cost_per_1k
+        )
+
+        stats = {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "max_bytes": self.max_bytes,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            "tokens_saved": self._stats["prompt_tokens_saved"] + self._stats["completion_tokens_saved"],
+            "dollars_saved": round(dollars_saved, 4),
+            **self._stats
+        }
+
+        if self.enabled and self._conn is not None:
+            try:
+                with self._lock:
+                    entries, total_bytes = self._conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+                    ).fetchone()
+                stats.update({"entries": entries, "bytes": total_bytes})
+            except Exception as e:
+                logger.error(f"Completion cache stats failed: {e}")
+
+        return stats
+
+    def _normalize(self, text: str) -> str:
+        """Normalize whitespace so formatting-only prompt differences share an entry"""
+        return re.sub(r'\s+', ' ', text).strip()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema on first use"""
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_completions_last_accessed ON completions (last_accessed)"
+            )
+            conn.commit()
+            self._conn = conn
+
+        return self._conn
+
+    def _get(self, key: str) -> Optional[str]:
+        """Blocking cache lookup"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT content, prompt_tokens, completion_tokens, created_at "
+                    "FROM completions WHERE key = ?",
+                    (key,)
+                ).fetchone()
+
+                if row is None:
+                    self._stats["misses"] += 1
+                    return None
+
+                content, prompt_tokens, completion_tokens, created_at = row
+                now = time.time()
+
+                if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                    conn.commit()
+                    self._stats["expired"] += 1
+                    self._stats["misses"] += 1
+                    return None
+
+                conn.execute(
+                    "UPDATE completions SET last_accessed = ?, hit_count = hit_count + 1 WHERE key = ?",
+                    (now, key)
+                )
+                conn.commit()
+
+            self._stats["hits"] += 1
+            self._stats["prompt_tokens_saved"] += prompt_tokens
+            self._stats["completion_tokens_saved"] += completion_tokens
+            return content
+
+        except Exception as e:
+            logger.error(f"Completion cache read failed: {e}")
+            self._stats["errors"] += 1
+            return None
+
+    def _set(self, key: str, content: str, prompt_tokens: int, completion_tokens: int):
+        """Blocking cache write"""
+        try:
+            now = time.time()
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO completions "
+                    "(key, content, prompt_tokens, completion_tokens, size, created_at, last_accessed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, content, prompt_tokens, completion_tokens,
+                     len(content.encode("utf-8")), now, now)
+                )
+                conn.commit()
+                self._stats["writes"] += 1
+
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= PRUNE_INTERVAL:
+                    self._writes_since_prune = 0
+                    self._prune(conn, now)
+
+        except Exception as e:
+            logger.error(f"Completion cache write failed: {e}")
+            self._stats["errors"] += 1
+
+    def _prune(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries, then least recently used ones beyond the size limit"""
+        if self.ttl_seconds:
+            cursor = conn.execute(
+                "DELETE FROM completions WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self._stats["expired"] += cursor.rowcount
+
+        total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if self.max_bytes and total_bytes > self.max_bytes:
+            target = int(self.max_bytes * 0.9)
+            rows = conn.execute(
+                "SELECT key, size FROM completions ORDER BY last_accessed ASC"
+            ).fetchall()
+
+            stale_keys = []
+            for key, size in rows:
+                if total_bytes <= target:
+                    break
+                stale_keys.append((key,))
+                total_bytes -= size
+
+            conn.executemany("DELETE FROM completions WHERE key = ?", stale_keys)
+            self._stats["evictions"] += len(stale_keys)
+
+        conn.commit()
+
+    def _clear(self) -> int:
+        """Blocking removal of all entries"""
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute("DELETE FROM completions")
+            conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+@lru_cache()
+def get_completion_cache() -> CompletionCache:
+    """Get cached completion cache instance"""
+    settings = get_settings()
+    return CompletionCache(
+        db_path=settings.llm_cache_path,
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+        max_bytes=settings.llm_cache_max_bytes,
+        prompt_cost_per_1k=settings.llm_prompt_cost_per_1k,
+        completion_cost_per_1k=settings.llm_completion_cost_per_1k,
+        enabled=settings.llm_cache_enabled
+    )
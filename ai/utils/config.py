@@ -25,10 +25,35 @@ class Settings(BaseSettings):
     # OpenAI Configuration
     openai_api_key: Optional[str] = Field(default=None, env="OPENAI_API_KEY")
     openai_model: str = Field(default="gpt-4", env="OPENAI_MODEL")
+    openai_window_tokens: int = Field(default=3000, env="OPENAI_WINDOW_TOKENS")  # per map-reduce window
+    openai_max_concurrency: int = Field(default=4, env="OPENAI_MAX_CONCURRENCY")  # windows per document; capped by llm_max_concurrent_requests
+
+    # Shared LLM HTTP Client Configuration
+    llm_max_connections: int = Field(default=20, env="LLM_MAX_CONNECTIONS")
+    llm_max_keepalive_connections: int = Field(default=10, env="LLM_MAX_KEEPALIVE_CONNECTIONS")
+    llm_keepalive_expiry: float = Field(default=60.0, env="LLM_KEEPALIVE_EXPIRY")  # seconds
+    llm_timeout: float = Field(default=120.0, env="LLM_TIMEOUT")  # seconds
+
+    # LLM Rate Governor Configuration (0 = no limit)
+    llm_requests_per_minute: int = Field(default=0, env="LLM_REQUESTS_PER_MINUTE")
+    llm_tokens_per_minute: int = Field(default=0, env="LLM_TOKENS_PER_MINUTE")
+    llm_max_concurrent_requests: int = Field(default=16, env="LLM_MAX_CONCURRENT_REQUESTS")  # all LLM calls in the process
+    llm_max_retries: int = Field(default=5, env="LLM_MAX_RETRIES")
+    llm_quota_headroom: float = Field(default=0.9, env="LLM_QUOTA_HEADROOM")  # fraction of quota to use
+
+    # LLM Completion Cache Configuration
+    llm_cache_enabled: bool = Field(default=True, env="LLM_CACHE_ENABLED")
+    llm_cache_path: str = Field(default="./llm_cache/completions.sqlite3", env="LLM_CACHE_PATH")
+    llm_cache_ttl_seconds: int = Field(default=7 * 24 * 3600, env="LLM_CACHE_TTL_SECONDS")  # 0 = no expiry
+    llm_cache_max_bytes: int = Field(default=256 * 1024 * 1024, env="LLM_CACHE_MAX_BYTES")  # 256MB
+    llm_prompt_cost_per_1k: float = Field(default=0.03, env="LLM_PROMPT_COST_PER_1K")  # USD, for savings reporting
+    llm_completion_cost_per_1k: float = Field(default=0.06, env="LLM_COMPLETION_COST_PER_1K")
 
     # Azure Document Intelligence Configuration
     azure_docintel_endpoint: Optional[str] = Field(default=None, env="AZURE_DOCINTEL_ENDPOINT")
     azure_docintel_key: Optional[str] = Field(default=None, env="AZURE_DOCINTEL_KEY")
+    azure_ocr_pages_per_request: int = Field(default=50, env="AZURE_OCR_PAGES_PER_REQUEST")  # 0 = never split PDFs
+    azure_ocr_max_concurrency: int = Field(default=4, env="AZURE_OCR_MAX_CONCURRENCY")
 
     # MinIO Configuration
     minio_endpoint: Optional[str] = Field(default=None, env="MINIO_ENDPOINT")
@@ -45,10 +70,58 @@ class Settings(BaseSettings):
     # FAISS Configuration
     faiss_index_path: str = Field(default="./faiss_index", env="FAISS_INDEX_PATH")
     embedding_model: str = Field(default="sentence-transformers/all-MiniLM-L6-v2", env="EMBEDDING_MODEL")
+    faiss_index_type: str = Field(default="flat", env="FAISS_INDEX_TYPE")  # flat, hnsw or ivfpq (applies to new indexes)
+    faiss_hnsw_m: int = Field(default=32, env="FAISS_HNSW_M")  # graph neighbours per vector
+    faiss_hnsw_ef_construction: int = Field(default=128, env="FAISS_HNSW_EF_CONSTRUCTION")
+    faiss_hnsw_ef_search: int = Field(default=64, env="FAISS_HNSW_EF_SEARCH")
+    faiss_ivf_nlist: int = Field(default=0, env="FAISS_IVF_NLIST")  # 0 = about 4 * sqrt(training vectors)
+    faiss_ivf_nprobe: int = Field(default=16, env="FAISS_IVF_NPROBE")  # lists scanned per query
+    faiss_ivf_train_size: int = Field(default=10000, env="FAISS_IVF_TRAIN_SIZE")  # vectors kept flat before IVF-PQ is trained
+    faiss_pq_m: int = Field(default=48, env="FAISS_PQ_M")  # code bytes per vector, divides the embedding dimension
+
+    # RAG Answer Context Configuration
+    rag_context_token_budget: int = Field(default=2000, env="RAG_CONTEXT_TOKEN_BUDGET")
+    rag_context_similarity_threshold: float = Field(default=0.85, env="RAG_CONTEXT_SIMILARITY_THRESHOLD")  # near-duplicate cutoff
+
+    # Q&A Semantic Answer Cache Configuration
+    qa_semantic_cache_enabled: bool = Field(default=True, env="QA_SEMANTIC_CACHE_ENABLED")
+    qa_semantic_cache_threshold: float = Field(default=0.95, env="QA_SEMANTIC_CACHE_THRESHOLD")  # cosine similarity
+    qa_semantic_cache_max_entries: int = Field(default=1000, env="QA_SEMANTIC_CACHE_MAX_ENTRIES")
+    qa_semantic_cache_ttl_seconds: int = Field(default=3600, env="QA_SEMANTIC_CACHE_TTL_SECONDS")  # 0 = no expiry
+
+    # Q&A Reranking Configuration
+    rerank_enabled: bool = Field(default=False, env="RERANK_ENABLED")
+    rerank_model: str = Field(default="cross-encoder/ms-marco-MiniLM-L-6-v2", env="RERANK_MODEL")
+    rerank_backend: str = Field(default="torch", env="RERANK_BACKEND")  # torch or onnx
+    rerank_quantize: bool = Field(default=False, env="RERANK_QUANTIZE")  # int8 dynamic quantization (torch)
+    rerank_candidates: int = Field(default=30, env="RERANK_CANDIDATES")  # over-fetched before reranking
+    rerank_batch_size: int = Field(default=16, env="RERANK_BATCH_SIZE")
+    rerank_max_length: int = Field(default=256, env="RERANK_MAX_LENGTH")
+    rerank_latency_budget_ms: int = Field(default=300, env="RERANK_LATENCY_BUDGET_MS")
+
+    # Q&A Batch Configuration
+    qa_batch_max_concurrency: int = Field(default=8, env="QA_BATCH_MAX_CONCURRENCY")  # answers generated at once per batch
+
+    # Structured Obligation Q&A Configuration
+    qa_structured_obligations_enabled: bool = Field(default=True, env="QA_STRUCTURED_OBLIGATIONS_ENABLED")
+
+    # Background Job Configuration
+    job_queue_enabled: bool = Field(default=True, env="JOB_QUEUE_ENABLED")
+    job_queue_path: str = Field(default="./jobs/jobs.db", env="JOB_QUEUE_PATH")
+    job_workers: int = Field(default=2, env="JOB_WORKERS")
+    job_batch_concurrency: int = Field(default=4, env="JOB_BATCH_CONCURRENCY")  # files processed at once per batch job
+    job_max_attempts: int = Field(default=3, env="JOB_MAX_ATTEMPTS")  # restarts a job interrupted mid-run survives
+    job_stale_seconds: float = Field(default=120.0, env="JOB_STALE_SECONDS")  # running job without a heartbeat is requeued
+    job_retention_hours: int = Field(default=72, env="JOB_RETENTION_HOURS")  # 0 = keep finished jobs
+    job_long_poll_max_seconds: float = Field(default=60.0, env="JOB_LONG_POLL_MAX_SECONDS")
+
+    # Ingestion Pipeline Configuration
+    ingest_embed_batch_size: int = Field(default=32, env="INGEST_EMBED_BATCH_SIZE")  # chunks embedded at once while OCR runs
 
     # Tesseract Configuration
     tesseract_cmd: str = Field(default="tesseract", env="TESSERACT_CMD")
     tesseract_data_path: Optional[str] = Field(default=None, env="TESSDATA_PREFIX")
+    ocr_rasterize_batch_pages: int = Field(default=4, env="OCR_RASTERIZE_BATCH_PAGES")  # PDF pages rendered per pdftoppm call
 
     # Model Configuration
     local_extract_model: str = Field(
@@ -56,13 +129,56 @@ class Settings(BaseSettings):
         env="LOCAL_EXTRACT_MODEL"
     )
 
+    # Local NER Configuration (requires a text token-classification model with a fast tokenizer)
+    ner_enabled: bool = Field(default=False, env="NER_ENABLED")
+    ner_num_threads: int = Field(default=0, env="NER_NUM_THREADS")  # 0 = torch default
+    ner_max_tokens_per_batch: int = Field(default=8192, env="NER_MAX_TOKENS_PER_BATCH")
+    ner_max_sequence_length: int = Field(default=256, env="NER_MAX_SEQUENCE_LENGTH")
+
+    # Obligation Extraction Configuration
+    obligation_max_results: int = Field(default=50, env="OBLIGATION_MAX_RESULTS")  # 0 = unbounded
+    obligation_window_chars: int = Field(default=20000, env="OBLIGATION_WINDOW_CHARS")
+
+    # Extraction Result Cache Configuration
+    extraction_cache_enabled: bool = Field(default=True, env="EXTRACTION_CACHE_ENABLED")
+    extraction_cache_path: str = Field(default="./extraction_cache", env="EXTRACTION_CACHE_PATH")
+    extraction_cache_max_entries: int = Field(default=1024, env="EXTRACTION_CACHE_MAX_ENTRIES")
+    extraction_cache_max_disk_entries: int = Field(default=10000, env="EXTRACTION_CACHE_MAX_DISK_ENTRIES")
+    extraction_model_version: str = Field(default="1", env="EXTRACTION_MODEL_VERSION")  # bump to invalidate cached results
+
     # Application Configuration
     debug: bool = Field(default=False, env="DEBUG")
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
     max_file_size: int = Field(default=50 * 1024 * 1024, env="MAX_FILE_SIZE")  # 50MB
 
-    # Rate Limiting
-    rate_limit_per_minute: int = Field(default=60, env="RATE_LIMIT_PER_MINUTE")
+    # Metrics Configuration
+    metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")  # Prometheus /metrics endpoint
+
+    # Tracing Configuration
+    tracing_enabled: bool = Field(default=True, env="TRACING_ENABLED")
+    tracing_sample_rate: float = Field(default=0.01, env="TRACING_SAMPLE_RATE")  # share of requests exported
+    tracing_exporter: str = Field(default="jsonl", env="TRACING_EXPORTER")  # jsonl or otlp
+    tracing_export_path: str = Field(default="./traces/spans.jsonl", env="TRACING_EXPORT_PATH")
+    tracing_otlp_endpoint: Optional[str] = Field(default=None, env="TRACING_OTLP_ENDPOINT")  # e.g. http://localhost:4318/v1/traces
+    tracing_slow_request_seconds: float = Field(default=10.0, env="TRACING_SLOW_REQUEST_SECONDS")  # log span tree; 0 = off
+
+    # Admin and Profiling Configuration (admin endpoints are disabled without a token)
+    admin_token: Optional[str] = Field(default=None, env="ADMIN_TOKEN")
+    profiling_max_seconds: float = Field(default=60.0, env="PROFILING_MAX_SECONDS")
+    profiling_max_output_bytes: int = Field(default=2 * 1024 * 1024, env="PROFILING_MAX_OUTPUT_BYTES")
+    profiling_tracemalloc_max_seconds: float = Field(default=900.0, env="PROFILING_TRACEMALLOC_MAX_SECONDS")  # auto-stop
+
+    # Rate Limiting (per client; 0 = no limit)
+    rate_limit_enabled: bool = Field(default=True, env="RATE_LIMIT_ENABLED")
+    rate_limit_per_minute: int = Field(default=60, env="RATE_LIMIT_PER_MINUTE")  # heavy routes: /ocr, /nlp, /ingest
+    rate_limit_interactive_per_minute: int = Field(default=120, env="RATE_LIMIT_INTERACTIVE_PER_MINUTE")  # /qa
+    rate_limit_jobs_per_minute: int = Field(default=30, env="RATE_LIMIT_JOBS_PER_MINUTE")  # job submissions and cancels
+    rate_limit_cheap_per_minute: int = Field(default=600, env="RATE_LIMIT_CHEAP_PER_MINUTE")  # /health, /qa/suggestions, GET /jobs
+    rate_limit_heavy_max_concurrency: int = Field(default=8, env="RATE_LIMIT_HEAVY_MAX_CONCURRENCY")  # all clients
+    rate_limit_heavy_max_queue_wait: float = Field(default=30.0, env="RATE_LIMIT_HEAVY_MAX_QUEUE_WAIT")
+    rate_limit_interactive_max_concurrency: int = Field(default=32, env="RATE_LIMIT_INTERACTIVE_MAX_CONCURRENCY")
+    rate_limit_interactive_max_queue_wait: float = Field(default=2.0, env="RATE_LIMIT_INTERACTIVE_MAX_QUEUE_WAIT")
+    rate_limit_trust_proxy_headers: bool = Field(default=False, env="RATE_LIMIT_TRUST_PROXY_HEADERS")  # key clients by X-Forwarded-For
 
     class Config:
         env_file = ".env"
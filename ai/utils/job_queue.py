@@ -0,0 +1,627 @@
+"""
+Persistent background job queue
+
+Jobs are stored in a local SQLite database so queued and interrupted work
+survives restarts. A pool of asyncio workers claims jobs in submission order
+and runs the handler registered for the job type. Handlers report progress
+through a JobContext, and jobs can be cancelled while queued or running.
+
+Several server processes (e.g. gunicorn workers) can share one database. A claim
+is a guarded UPDATE, so each job is claimed once. The claiming queue
+heartbeats its running jobs, and only jobs whose heartbeat has gone stale are
+recovered. Cancellation is a flag in the database that the owning process
+picks up, and long-polls re-read the database, so both work through any process.
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import shutil
+import sqlite3
+import hashlib
+import logging
+import asyncio
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Tuple
+
+from models.job_models import JobInfo, JobProgress, TERMINAL_JOB_STATUSES
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    job_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    payload_hash TEXT NOT NULL,
+    idempotency_key TEXT UNIQUE,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    progress_current INTEGER NOT NULL DEFAULT 0,
+    progress_total INTEGER,
+    progress_message TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT,
+    heartbeat_at REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+"""
+
+# Columns added after the first schema, created on older databases when opened
+_MIGRATIONS = {
+    "owner": "ALTER TABLE jobs ADD COLUMN owner TEXT",
+    "heartbeat_at": "ALTER TABLE jobs ADD COLUMN heartbeat_at REAL",
+    "cancel_requested": "ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0"
+}
+
+_TERMINAL_PLACEHOLDERS = ", ".join("?" for _ in TERMINAL_JOB_STATUSES)
+
+JobHandler = Callable[["JobContext"], Awaitable[Dict[str, Any]]]
+
+
+class JobConflictError(ValueError):
+    """Idempotency key reused for a different job"""
+
+
+class JobContext:
+    """Handle passed to job handlers for reading input and reporting progress"""
+
+    def __init__(self, queue: "JobQueue", job_id: str, job_type: str, payload: Dict[str, Any]):
+        self.queue = queue
+        self.job_id = job_id
+        self.job_type = job_type
+        self.payload = payload
+        self._last_progress_write = 0.0
+
+    def input_file(self) -> Optional[Path]:
+        """Get the file uploaded with the job, if any"""
+        input_dir = self.queue.input_dir(self.job_id)
+        if not input_dir.exists():
+            return None
+        return next((path for path in input_dir.iterdir() if path.is_file()), None)
+
+    async def report_progress(self, current: int, total: Optional[int] = None, message: Optional[str] = None):
+        """Record progress; intermediate updates are throttled"""
+        now = time.time()
+        finished = total is not None and current >= total
+        if not finished and now - self._last_progress_write < self.queue.progress_interval:
+            return
+
+        self._last_progress_write = now
+        await self.queue._execute(
+            lambda conn: conn.execute(
+                "UPDATE jobs SET progress_current = ?, progress_total = ?, progress_message = ? WHERE job_id = ?",
+                (current, total, message, self.job_id)
+            )
+        )
+
+
+class JobQueue:
+    """SQLite-backed job queue drained by a pool of asyncio workers"""
+
+    def __init__(
+        self,
+        db_path: str,
+        workers: int = 2,
+        max_attempts: int = 3,
+        retention_hours: int = 72,
+        poll_interval: float = 1.0,
+        progress_interval: float = 0.5,
+        stale_after: float = 120.0
+    ):
+        self.db_path = Path(db_path)
+        self.inputs_path = self.db_path.parent / "inputs"
+        self.workers = max(workers, 1)
+        self.max_attempts = max_attempts
+        self.retention_hours = retention_hours
+        self.poll_interval = poll_interval
+        self.progress_interval = progress_interval
+        self.stale_after = stale_after  # seconds without a heartbeat before a running job is recovered
+        self.heartbeat_interval = max(stale_after / 4, poll_interval)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._handlers: Dict[str, JobHandler] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancel_requested: set = set()
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._last_purge = 0.0
+        self._last_heartbeat = 0.0
+
+        self._stats = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "recovered": 0
+        }
+
+    def register_handler(self, job_type: str, handler: JobHandler):
+        """Register the coroutine that runs jobs of a type"""
+        self._handlers[job_type] = handler
+
+    def input_dir(self, job_id: str) -> Path:
+        """Directory holding files uploaded with a job"""
+        return self.inputs_path / job_id
+
+    async def start(self):
+        """Open the database, recover interrupted jobs and start the workers"""
+        if self._worker_tasks:
+            return
+
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._open)
+        await self._recover_stale()
+
+        self._wakeup = asyncio.Event()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker_loop(i)) for i in range(self.workers)
+        ]
+        self._monitor_task = asyncio.create_task(self._monitor_loop())
+        logger.info(f"Job queue {self.owner} started with {self.workers} workers: {self.db_path}")
+
+    async def close(self):
+        """Stop the workers and put running jobs back in the queue"""
+        interrupted = list(self._running)
+
+        tasks = self._worker_tasks + ([self._monitor_task] if self._monitor_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._monitor_task = None
+
+        if self._conn is not None:
+            # A graceful shutdown does not count as a failed attempt
+            await self._execute(lambda conn: conn.executemany(
+                "UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), owner = NULL, "
+                "heartbeat_at = NULL WHERE job_id = ? AND status = 'running' AND owner = ?",
+                [(job_id, self.owner) for job_id in interrupted]
+            ))
+            await asyncio.get_event_loop().run_in_executor(None, self._close_connection)
+
+        logger.info("Job queue closed")
+
+    async def submit(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> Tuple[JobInfo, bool]:
+        """Queue a job; returns the job and whether it was newly created
+
+        Resubmitting an idempotency key returns the existing job, and raises
+        JobConflictError if it was used for a different job type or payload.
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"No handler registered for job type: {job_type}")
+
+        serialized = json.dumps(payload, sort_keys=True, default=str)
+        payload_hash = hashlib.sha256(f"{job_type}:{serialized}".encode("utf-8")).hexdigest()
+        job_id = job_id or uuid.uuid4().hex
+
+        def insert(conn: sqlite3.Connection):
+            if idempotency_key:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()
+                if row is not None:
+                    if row["payload_hash"] != payload_hash:
+                        raise JobConflictError(
+                            f"Idempotency key already used for a different job: {row['job_id']}"
+                        )
+                    return row, False
+
+            conn.execute(
+                "INSERT INTO jobs (job_id, job_type, status, payload, payload_hash, idempotency_key, created_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, job_type, serialized, payload_hash, idempotency_key, time.time())
+            )
+            return conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone(), True
+
+        row, created = await self._execute(insert)
+
+        if created:
+            self._stats["submitted"] += 1
+            if self._wakeup is not None:
+                self._wakeup.set()
+        else:
+            self._stats["deduplicated"] += 1
+
+        return self._to_info(row, include_result=True), created
+
+    async def get(self, job_id: str, include_result: bool = True) -> Optional[JobInfo]:
+        """Get a job by ID"""
+        row = await self._execute(
+            lambda conn: conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        )
+        return self._to_info(row, include_result) if row is not None else None
+
+    async def wait(self, job_id: str, timeout: float, include_result: bool = True) -> Optional[JobInfo]:
+        """Long-poll: return once the job finishes or the timeout expires
+
+        Jobs finished by this process wake the waiter at once; the database is re-read every
+        poll interval to see jobs finished by another process.
+        """
+        deadline = time.monotonic() + max(timeout, 0)
+
+        while True:
+            # Register before reading so a completion in between is not missed
+            event = self._waiters.setdefault(job_id, asyncio.Event())
+
+            job = await self.get(job_id, include_result)
+            remaining = deadline - time.monotonic()
+            if job is None or job.status in TERMINAL_JOB_STATUSES:
+                self._waiters.pop(job_id, None)
+                return job
+            if remaining <= 0:
+                return job
+
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(remaining, self.poll_interval))
+            except asyncio.TimeoutError:
+                pass
+
+    async def list_jobs(
+        self, status: Optional[str] = None, job_type: Optional[str] = None, limit: int = 50
+    ) -> List[JobInfo]:
+        """List jobs, newest first, without results"""
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if job_type:
+            clauses.append("job_type = ?")
+            params.append(job_type)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = await self._execute(lambda conn: conn.execute(
+            f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", (*params, limit)
+        ).fetchall())
+        return [self._to_info(row, include_result=False) for row in rows]
+
+    async def cancel(self, job_id: str) -> Optional[JobInfo]:
+        """Cancel a queued or running job; finished jobs are returned unchanged"""
+        cancelled_queued = await self._execute(lambda conn: conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ?, error = 'Cancelled before start' "
+            "WHERE job_id = ? AND status = 'queued'",
+            (time.time(), job_id)
+        ).rowcount)
+
+        if cancelled_queued:
+            self._stats["cancelled"] += 1
+            await self._remove_inputs(job_id)
+            self._notify(job_id)
+            return await self.get(job_id, include_result=False)
+
+        # A running job may belong to another process, which sees the flag on its next monitor pass
+        flagged = await self._execute(lambda conn: conn.execute(
+            "UPDATE jobs SET cancel_requested = 1 WHERE job_id = ? AND status = 'running'", (job_id,)
+        ).rowcount)
+        if not flagged:
+            return await self.get(job_id, include_result=False)
+
+        self._cancel_local(job_id)
+        # Give the owning worker a chance to record the cancellation
+        return await self.wait(job_id, timeout=max(5.0, self.poll_interval * 3), include_result=False)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Get queue statistics"""
+        counts = {}
+        if self._conn is not None:
+            rows = await self._execute(lambda conn: conn.execute(
+                "SELECT status, COUNT(*) AS count FROM jobs GROUP BY status"
+            ).fetchall())
+            counts = {row["status"]: row["count"] for row in rows}
+
+        return {
+            "started": self._conn is not None,
+            "owner": self.owner,
+            "workers": self.workers,
+            "active_jobs": len(self._running),
+            "queued": counts.get("queued", 0),
+            "jobs_by_status": counts,
+            "handlers": sorted(self._handlers),
+            **self._stats
+        }
+
+    async def _worker_loop(self, worker_id: int):
+        """Claim and run jobs until cancelled"""
+        while True:
+            try:
+                self._wakeup.clear()
+                row = await self._execute(self._claim_next)
+
+                if row is None:
+                    await self._maybe_purge()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                await self._run(row)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _monitor_loop(self):
+        """Heartbeat this process's running jobs, act on cancel flags and recover stale claims"""
+        while True:
+            try:
+                await asyncio.sleep(self.poll_interval)
+
+                if self._running:
+                    running = list(self._running)
+                    placeholders = ", ".join("?" for _ in running)
+                    flagged = await self._execute(lambda conn: conn.execute(
+                        f"SELECT job_id FROM jobs WHERE owner = ? AND cancel_requested = 1 "
+                        f"AND job_id IN ({placeholders})",
+                        (self.owner, *running)
+                    ).fetchall())
+                    for row in flagged:
+                        self._cancel_local(row["job_id"])
+
+                now = time.time()
+                if now - self._last_heartbeat >= self.heartbeat_interval:
+                    self._last_heartbeat = now
+                    if self._running:
+                        await self._execute(lambda conn: conn.execute(
+                            "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = 'running'",
+                            (now, self.owner)
+                        ))
+                    await self._recover_stale()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job queue monitor error: {e}")
+
+    def _cancel_local(self, job_id: str):
+        """Cancel a job if this process is running it"""
+        task = self._running.get(job_id)
+        if task is not None and not task.done() and job_id not in self._cancel_requested:
+            self._cancel_requested.add(job_id)
+            task.cancel()
+
+    async def _recover_stale(self):
+        """Requeue running jobs whose owner stopped heartbeating, failing those out of attempts"""
+        recovered, abandoned = await self._execute(self._recover_interrupted)
+        self._stats["recovered"] += recovered
+        if recovered or abandoned:
+            logger.info(f"Job queue recovered {recovered} interrupted jobs, failed {abandoned}")
+
+    async def _run(self, row: sqlite3.Row):
+        """Run one claimed job and record its outcome"""
+        job_id, job_type = row["job_id"], row["job_type"]
+        context = JobContext(self, job_id, job_type, json.loads(row["payload"]))
+
+        task = asyncio.ensure_future(self._handlers[job_type](context))
+        self._running[job_id] = task
+
+        try:
+            result = await task
+
+        except asyncio.CancelledError:
+            if job_id not in self._cancel_requested:
+                # Shutdown; close() puts the job back in the queue
+                raise
+            await self._finish(job_id, "cancelled", error="Cancelled while running")
+
+        except Exception as e:
+            logger.error(f"Job {job_id} ({job_type}) failed: {e}")
+            await self._finish(job_id, "failed", error=getattr(e, "detail", None) or str(e) or type(e).__name__)
+
+        else:
+            await self._finish(job_id, "succeeded", result=result)
+
+        finally:
+            self._running.pop(job_id, None)
+            self._cancel_requested.discard(job_id)
+
+    async def _finish(
+        self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None
+    ):
+        """Record a terminal status and wake long-polling clients"""
+        serialized = json.dumps(result, default=str) if result is not None else None
+
+        # Only the current owner records the outcome; a stale claim may have been recovered and rerun
+        updated = await self._execute(lambda conn: conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, "
+            "progress_current = CASE WHEN ? = 'succeeded' AND progress_total IS NOT NULL "
+            "THEN progress_total ELSE progress_current END "
+            "WHERE job_id = ? AND status = 'running' AND owner = ?",
+            (status, serialized, error, time.time(), status, job_id, self.owner)
+        ).rowcount)
+
+        if not updated:
+            logger.warning(f"Job {job_id} finished as {status} after its claim was recovered; outcome discarded")
+            return
+
+        self._stats[status] += 1
+        await self._remove_inputs(job_id)
+        self._notify(job_id)
+
+    def _notify(self, job_id: str):
+        """Wake clients waiting on a job"""
+        event = self._waiters.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _remove_inputs(self, job_id: str):
+        """Delete files uploaded with a finished job"""
+        input_dir = self.input_dir(job_id)
+        if input_dir.exists():
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, lambda: shutil.rmtree(input_dir, ignore_errors=True))
+
+    async def _maybe_purge(self):
+        """Remove finished jobs past the retention period, at most every few minutes"""
+        now = time.time()
+        if self.retention_hours <= 0 or now - self._last_purge < 300:
+            return
+
+        self._last_purge = now
+        cutoff = now - self.retention_hours * 3600
+        purged = await self._execute(lambda conn: conn.execute(
+            f"DELETE FROM jobs WHERE status IN ({_TERMINAL_PLACEHOLDERS}) AND finished_at < ?",
+            (*TERMINAL_JOB_STATUSES, cutoff)
+        ).rowcount)
+
+        if purged:
+            logger.info(f"Purged {purged} finished jobs")
+
+    async def _execute(self, operation: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run a database operation in a thread, serialized and committed"""
+        def run():
+            with self._db_lock:
+                if self._conn is None:
+                    raise RuntimeError("Job queue is not started")
+                result = operation(self._conn)
+                self._conn.commit()
+                return result
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, run)
+
+    def _open(self):
+        """Open the database and create the schema"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Other processes may hold the write lock briefly; wait for it rather than failing
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, statement in _MIGRATIONS.items():
+            if column not in columns:
+                try:
+                    conn.execute(statement)
+                except sqlite3.OperationalError:
+                    pass  # added by another process in the meantime
+        conn.commit()
+
+        with self._db_lock:
+            self._conn = conn
+
+    def _close_connection(self):
+        """Close the database connection"""
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _recover_interrupted(self, conn: sqlite3.Connection) -> Tuple[int, int]:
+        """Requeue running jobs whose owner stopped heartbeating, failing those out of attempts"""
+        now = time.time()
+        stale = "status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)"
+        cutoff = now - self.stale_after
+
+        abandoned = conn.execute(
+            f"UPDATE jobs SET status = 'failed', finished_at = ?, owner = NULL, "
+            f"error = 'Interrupted too many times' WHERE {stale} AND attempts >= ?",
+            (now, cutoff, self.max_attempts)
+        ).rowcount
+        recovered = conn.execute(
+            f"UPDATE jobs SET status = 'queued', owner = NULL, heartbeat_at = NULL, cancel_requested = 0 WHERE {stale}",
+            (cutoff,)
+        ).rowcount
+        return recovered, abandoned
+
+    def _claim_next(self, conn: sqlite3.Connection) -> Optional[sqlite3.Row]:
+        """Mark the oldest queued job as running and return it"""
+        # The status guard makes the claim atomic across processes; if another process won
+        # the race for a job, try the next one
+        for _ in range(5):
+            row = conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+
+            now = time.time()
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, error = NULL, "
+                "owner = ?, heartbeat_at = ?, cancel_requested = 0 WHERE job_id = ? AND status = 'queued'",
+                (now, self.owner, now, row["job_id"])
+            ).rowcount
+            if claimed:
+                return conn.execute("SELECT * FROM jobs WHERE job_id = ?", (row["job_id"],)).fetchone()
+
+        return None
+
+    def _to_info(self, row: sqlite3.Row, include_result: bool) -> JobInfo:
+        """Convert a database row to a JobInfo"""
+        def timestamp(value: Optional[float]) -> Optional[datetime]:
+            return datetime.utcfromtimestamp(value) if value is not None else None
+
+        return JobInfo(
+            job_id=row["job_id"],
+            job_type=row["job_type"],
+            status=row["status"],
+            progress=JobProgress(
+                current=row["progress_current"],
+                total=row["progress_total"],
+                message=row["progress_message"]
+            ),
+            idempotency_key=row["idempotency_key"],
+            attempts=row["attempts"],
+            error=row["error"],
+            created_at=timestamp(row["created_at"]),
+            started_at=timestamp(row["started_at"]),
+            finished_at=timestamp(row["finished_at"]),
+            result=json.loads(row["result"]) if include_result and row["result"] else None
+        )
+
+
+# Global job queue instance
+_global_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get global job queue instance"""
+    global _global_job_queue
+
+    if _global_job_queue is None:
+        settings = get_settings()
+        _global_job_queue = JobQueue(
+            db_path=settings.job_queue_path,
+            workers=settings.job_workers,
+            max_attempts=settings.job_max_attempts,
+            retention_hours=settings.job_retention_hours,
+            stale_after=settings.job_stale_seconds
+        )
+
+    return _global_job_queue
+
+
+async def initialize_job_queue():
+    """Start the job workers at startup if enabled"""
+    if get_settings().job_queue_enabled:
+        await get_job_queue().start()
+
+
+async def close_job_queue():
+    """Stop the job workers on shutdown"""
+    if _global_job_queue is not None:
+        await _global_job_queue.close()
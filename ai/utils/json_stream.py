@@ -0,0 +1,100 @@
+"""
+Incremental parsing of JSON arrays produced by streamed LLM output
+"""
+
+import json
+import logging
+from typing import Any, List
+
+logger = logging.getLogger(__name__)
+
+
+class JSONArrayStreamParser:
+    """Incrementally parse the elements of a top-level JSON array
+
+    Text is fed in arbitrary chunks (e.g. completion deltas). Each object or
+    array element is returned as soon as it closes, so a truncated or
+    malformed tail only loses the element it occurs in. Anything before the
+    opening bracket, such as a markdown code fence, is ignored.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._closed = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._element: List[str] = []
+        self.errors = 0
+
+    @property
+    def closed(self) -> bool:
+        """Whether the top-level array has been closed"""
+        return self._closed
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume a chunk of text and return the elements completed by it"""
+        completed = []
+
+        for char in chunk:
+            if self._closed:
+                break
+
+            if not self._started:
+                if char == '[':
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                self._element.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth >= 2:
+                    self._element.append(char)
+
+            elif char in '{[':
+                self._depth += 1
+                self._element.append(char)
+
+            elif char in '}]':
+                if self._depth >= 2:
+                    self._element.append(char)
+                self._depth -= 1
+
+                if self._depth == 1:
+                    element = self._parse_element()
+                    if element is not None:
+                        completed.append(element)
+                elif self._depth == 0:
+                    self._closed = True
+
+            elif self._depth >= 2:
+                self._element.append(char)
+
+        return completed
+
+    def _parse_element(self) -> Any:
+        """Decode the buffered element, skipping it if it is malformed"""
+        text = "".join(self._element)
+        self._element = []
+
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            self.errors += 1
+            logger.warning(f"Skipping malformed JSON array element: {e}")
+            return None
+
+
+def parse_json_array_elements(text: str) -> List[Any]:
+    """Salvage every complete element from a possibly truncated JSON array"""
+    return JSONArrayStreamParser().feed(text)
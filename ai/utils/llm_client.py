@@ -0,0 +1,169 @@
+"""
+Application-scoped OpenAI/Azure OpenAI client with a pooled HTTP connection
+
+Extraction and Q&A share one long-lived client per provider so requests
+reuse keep-alive connections instead of paying connection and TLS setup on
+every call. The client is created during application startup and closed on
+shutdown.
+"""
+
+import logging
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, Union
+
+import httpx
+from openai import AsyncOpenAI, AsyncAzureOpenAI
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMClientPool:
+    """Long-lived LLM client sharing a tuned httpx connection pool"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.provider: Optional[str] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._client: Optional[Union[AsyncOpenAI, AsyncAzureOpenAI]] = None
+        self._lock = asyncio.Lock()
+
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._total_requests = 0
+        self._failed_requests = 0
+
+    async def get_client(self) -> Union[AsyncOpenAI, AsyncAzureOpenAI]:
+        """Get the shared client, creating it on first use"""
+        if self._client:
+            return self._client
+
+        async with self._lock:
+            if not self._client:
+                self._client = self._create_client()
+
+        return self._client
+
+    def _create_client(self) -> Union[AsyncOpenAI, AsyncAzureOpenAI]:
+        """Create the provider client on top of a pooled HTTP client"""
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.settings.llm_max_connections,
+                max_keepalive_connections=self.settings.llm_max_keepalive_connections,
+                keepalive_expiry=self.settings.llm_keepalive_expiry
+            ),
+            timeout=httpx.Timeout(self.settings.llm_timeout, connect=10.0)
+        )
+
+        # Prefer Azure OpenAI if configured
+        if self.settings.azure_openai_api_key and self.settings.azure_openai_endpoint:
+            self.provider = "azure"
+            client = AsyncAzureOpenAI(
+                api_key=self.settings.azure_openai_api_key,
+                api_version=self.settings.azure_openai_api_version,
+                azure_endpoint=self.settings.azure_openai_endpoint,
+                http_client=self._http_client,
+                max_retries=0  # retries are handled by the LLM governor
+            )
+            logger.info("Using shared Azure OpenAI client")
+
+        elif self.settings.openai_api_key:
+            self.provider = "openai"
+            client = AsyncOpenAI(
+                api_key=self.settings.openai_api_key,
+                http_client=self._http_client,
+                max_retries=0  # retries are handled by the LLM governor
+            )
+            logger.info("Using shared OpenAI client")
+
+        else:
+            self._http_client = None
+            raise ValueError("No OpenAI API credentials configured")
+
+        return client
+
+    @asynccontextmanager
+    async def track_request(self):
+        """Track an in-flight request for pool utilization reporting"""
+        self._in_flight += 1
+        self._total_requests += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+        try:
+            yield
+        except Exception:
+            self._failed_requests += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get client and connection pool statistics"""
+        max_connections = self.settings.llm_max_connections
+        stats = {
+            "initialized": self._client is not None,
+            "provider": self.provider,
+            "max_connections": max_connections,
+            "max_keepalive_connections": self.settings.llm_max_keepalive_connections,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "total_requests": self._total_requests,
+            "failed_requests": self._failed_requests,
+            "utilization": self._in_flight / max_connections if max_connections else 0.0
+        }
+        stats.update(self._get_connection_stats())
+        return stats
+
+    def _get_connection_stats(self) -> Dict[str, Any]:
+        """Best-effort open/idle connection counts from the underlying transport"""
+        try:
+            pool = getattr(getattr(self._http_client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []) or [])
+            idle = sum(1 for conn in connections if conn.is_idle())
+            return {"open_connections": len(connections), "idle_connections": idle}
+        except Exception:
+            return {}
+
+    async def close(self):
+        """Close the shared client and its connections"""
+        if self._client:
+            await self._client.close()
+        elif self._http_client:
+            await self._http_client.aclose()
+
+        self._client = None
+        self._http_client = None
+        logger.info("Shared LLM client closed")
+
+
+# Global LLM client pool instance
+_global_llm_client_pool: Optional[LLMClientPool] = None
+
+
+def get_llm_client_pool() -> LLMClientPool:
+    """Get global LLM client pool instance"""
+    global _global_llm_client_pool
+
+    if _global_llm_client_pool is None:
+        _global_llm_client_pool = LLMClientPool()
+
+    return _global_llm_client_pool
+
+
+async def initialize_llm_client():
+    """Create the shared LLM client at startup if credentials are configured"""
+    settings = get_settings()
+
+    if settings.openai_api_key or (settings.azure_openai_api_key and settings.azure_openai_endpoint):
+        await get_llm_client_pool().get_client()
+
+
+async def close_llm_client():
+    """Close the shared LLM client on shutdown"""
+    global _global_llm_client_pool
+
+    if _global_llm_client_pool is not None:
+        await _global_llm_client_pool.close()
+        _global_llm_client_pool = None
@@ -0,0 +1,317 @@
+"""
+Rate and concurrency governor for LLM calls
+
+Every chat completion passes through a shared governor that enforces the
+deployment's requests-per-minute and tokens-per-minute quotas with token
+buckets, caps concurrent calls, and admits waiting callers in priority
+order so interactive Q&A is served ahead of batch work. Rate-limit errors
+pause all callers for the provider's Retry-After and are retried with
+jittered exponential backoff.
+"""
+
+import time
+import heapq
+import random
+import logging
+import asyncio
+import itertools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Callable, Awaitable, TypeVar
+
+import openai
+
+from .config import get_settings
+from .metrics import LLM_CALL_SECONDS, LLM_QUEUE_SECONDS, LLM_TOKENS, LLM_RETRIES
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Lower rank is admitted first
+PRIORITY_RANKS = {
+    "interactive": 0,
+    "batch": 1
+}
+
+_llm_priority: ContextVar[str] = ContextVar("llm_priority", default="interactive")
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError
+)
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """Run LLM calls made in this context (and tasks it spawns) at the given priority"""
+    token = _llm_priority.set(priority)
+    try:
+        yield
+    finally:
+        _llm_priority.reset(token)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate used for budgeting (about 4 characters per token)"""
+    return max(len(text) // 4, 1)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity per minute"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def refill(self, now: float):
+        """Add tokens accrued since the last refill"""
+        if self.enabled:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until the bucket holds amount tokens"""
+        if not self.enabled:
+            return 0.0
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        """Take tokens from the bucket (may go negative to record debt)"""
+        if self.enabled:
+            self.tokens -= min(amount, self.capacity)
+
+
+class LLMGovernor:
+    """Token-bucket RPM/TPM governor with priority admission and 429-aware retries"""
+
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        max_concurrency: int = 16,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        headroom: float = 0.9
+    ):
+        # Aim slightly under the quota so bursts don't trip the provider limiter
+        self._requests = TokenBucket(requests_per_minute * headroom)
+        self._tokens = TokenBucket(tokens_per_minute * headroom)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._condition = asyncio.Condition()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._blocked_until = 0.0
+
+        self._stats = {
+            "admitted": 0,
+            "completed": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "failed": 0,
+            "total_wait_time": 0.0,
+            "admitted_by_priority": {name: 0 for name in PRIORITY_RANKS}
+        }
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        estimated_tokens: int,
+        priority: Optional[str] = None,
+        keep_slot: bool = False
+    ) -> T:
+        """Run an LLM call under the rate budget, retrying transient failures
+
+        With keep_slot the concurrency slot stays taken after a successful call
+        (e.g. a response stream that is still being read); the caller must
+        release it once done.
+        """
+        priority = priority or _llm_priority.get()
+
+        for attempt in range(self.max_retries + 1):
+            with span("llm.wait", priority=priority):
+                await self.acquire(estimated_tokens, priority)
+            used_tokens = estimated_tokens
+            succeeded = False
+
+            call_start = time.perf_counter()
+            try:
+                with span("llm.call", attempt=attempt + 1, estimated_tokens=estimated_tokens) as call_span:
+                    result = await call()
+                LLM_CALL_SECONDS.observe(time.perf_counter() - call_start, outcome="success")
+                usage = getattr(result, "usage", None)
+                if usage is not None and getattr(usage, "total_tokens", None):
+                    used_tokens = usage.total_tokens
+                    call_span.set_attribute("tokens", used_tokens)
+                    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", None) or 0, kind="prompt")
+                    LLM_TOKENS.inc(getattr(usage, "completion_tokens", None) or 0, kind="completion")
+                self._stats["completed"] += 1
+                succeeded = True
+                return result
+
+            except RETRYABLE_ERRORS as e:
+                LLM_CALL_SECONDS.observe(time.perf_counter() - call_start, outcome=type(e).__name__)
+                if attempt >= self.max_retries:
+                    self._stats["failed"] += 1
+                    raise
+
+                retry_after = self._get_retry_after(e)
+                if isinstance(e, openai.RateLimitError):
+                    self._stats["rate_limited"] += 1
+                    # Pause everyone: the quota is shared by all callers
+                    self._block_for(retry_after if retry_after is not None else self._backoff(attempt))
+
+                delay = max(retry_after or 0.0, self._backoff(attempt))
+                self._stats["retries"] += 1
+                LLM_RETRIES.inc(error=type(e).__name__)
+                logger.warning(
+                    f"LLM call failed ({type(e).__name__}), retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{self.max_retries})"
+                )
+
+            except Exception as e:
+                LLM_CALL_SECONDS.observe(time.perf_counter() - call_start, outcome=type(e).__name__)
+                self._stats["failed"] += 1
+                raise
+
+            finally:
+                if not (keep_slot and succeeded):
+                    await self.release(estimated_tokens, used_tokens)
+
+            await asyncio.sleep(delay)
+
+    async def acquire(self, estimated_tokens: int, priority: str = "interactive"):
+        """Wait until the call is at the head of the queue and the budget allows it"""
+        entry = (PRIORITY_RANKS.get(priority, len(PRIORITY_RANKS)), next(self._sequence))
+        wait_start = time.monotonic()
+
+        async with self._condition:
+            heapq.heappush(self._waiters, entry)
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._requests.refill(now)
+                    self._tokens.refill(now)
+
+                    timeout = None
+                    if self._waiters[0] == entry and self._in_flight < self.max_concurrency:
+                        timeout = max(
+                            self._blocked_until - now,
+                            self._requests.time_until(1),
+                            self._tokens.time_until(estimated_tokens)
+                        )
+
+                        if timeout <= 0:
+                            heapq.heappop(self._waiters)
+                            self._requests.consume(1)
+                            self._tokens.consume(estimated_tokens)
+                            self._in_flight += 1
+
+                            self._stats["admitted"] += 1
+                            self._stats["total_wait_time"] += now - wait_start
+                            LLM_QUEUE_SECONDS.observe(now - wait_start)
+                            if priority in self._stats["admitted_by_priority"]:
+                                self._stats["admitted_by_priority"][priority] += 1
+
+                            # Let the next waiter re-check the budget
+                            self._condition.notify_all()
+                            return
+
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        pass
+
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._condition.notify_all()
+                raise
+
+    async def release(self, estimated_tokens: int, used_tokens: int):
+        """Release a concurrency slot and correct the token budget with actual usage"""
+        async with self._condition:
+            self._in_flight -= 1
+            self._tokens.consume(used_tokens - estimated_tokens)
+            self._condition.notify_all()
+
+    def _block_for(self, seconds: float):
+        """Stop admitting calls for the given number of seconds"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _get_retry_after(self, error: Exception) -> Optional[float]:
+        """Read Retry-After (seconds or milliseconds) from a provider error response"""
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            return None
+
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000.0
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except (TypeError, ValueError):
+            return None
+
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get governor statistics"""
+        now = time.monotonic()
+        return {
+            "requests_per_minute": self._requests.capacity,
+            "tokens_per_minute": self._tokens.capacity,
+            "available_requests": self._requests.tokens if self._requests.enabled else None,
+            "available_tokens": self._tokens.tokens if self._tokens.enabled else None,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "blocked_for": max(self._blocked_until - now, 0.0),
+            **self._stats
+        }
+
+
+# Global governor instance
+_global_llm_governor: Optional[LLMGovernor] = None
+
+
+def get_llm_governor() -> LLMGovernor:
+    """Get global LLM governor instance"""
+    global _global_llm_governor
+
+    if _global_llm_governor is None:
+        settings = get_settings()
+        _global_llm_governor = LLMGovernor(
+            requests_per_minute=settings.llm_requests_per_minute,
+            tokens_per_minute=settings.llm_tokens_per_minute,
+            max_concurrency=settings.llm_max_concurrent_requests,
+            max_retries=settings.llm_max_retries,
+            headroom=settings.llm_quota_headroom
+        )
+
+    return _global_llm_governor
@@ -0,0 +1,380 @@
+"""
+Low-overhead Prometheus metrics
+
+Counters and histograms are sharded per thread: a thread only ever updates
+its own shard, so recording a value on the event loop or in an executor
+thread takes no lock. Shards are summed when /metrics is scraped. State that
+is cheaper to read than to track (queue depths, cache sizes, hit counts kept
+by other components) comes from collector callbacks run at scrape time.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from bisect import bisect_left
+from typing import Optional, Dict, Any, List, Tuple, Callable, Iterable, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers sub-millisecond lookups through multi-minute OCR jobs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+COUNT_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+# A collector returns (name, type, help, [(labels, value), ...]) families
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+_enabled = True
+
+
+def set_metrics_enabled(enabled: bool):
+    """Turn recording on or off; disabled metrics cost one global lookup per call"""
+    global _enabled
+    _enabled = enabled
+
+
+def metrics_enabled() -> bool:
+    """Whether metrics are being recorded"""
+    return _enabled
+
+
+class _Metric:
+    """Base class holding one value shard per thread"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[Tuple[str, ...], Any]] = []
+        self._shards_lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _shard(self) -> Dict[Tuple[str, ...], Any]:
+        """This thread's shard, created (under a lock) on the thread's first update"""
+        try:
+            return self._local.values
+        except AttributeError:
+            values = {}
+            with self._shards_lock:
+                self._shards.append(values)
+            self._local.values = values
+            return values
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _snapshot(self) -> List[Dict[Tuple[str, ...], Any]]:
+        """Copy of every shard (list() of a dict view runs without releasing the GIL)"""
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [
+            {key: (list(value) if isinstance(value, list) else value) for key, value in list(shard.items())}
+            for shard in shards
+        ]
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not _enabled:
+            return
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def collect(self) -> List[str]:
+        totals: Dict[Tuple[str, ...], float] = {}
+        for shard in self._snapshot():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0.0) + value
+
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(totals.items())
+        ]
+
+
+class Gauge(Counter):
+    """Value that goes up and down (summed over threads, so use inc/dec)"""
+
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class _Timer:
+    """Context manager observing its elapsed time into a histogram"""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, **labels):
+        if not _enabled:
+            return
+        shard = self._shard()
+        key = self._key(labels)
+        # Per-bucket counts (the last slot is +Inf) followed by the running sum
+        entry = shard.get(key)
+        if entry is None:
+            entry = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def time(self, **labels) -> _Timer:
+        """Time a block: `with HISTOGRAM.time(stage="x"):`"""
+        return _Timer(self, labels)
+
+    def collect(self) -> List[str]:
+        merged: Dict[Tuple[str, ...], List[float]] = {}
+        for shard in self._snapshot():
+            for key, entry in shard.items():
+                total = merged.get(key)
+                if total is None:
+                    merged[key] = entry
+                else:
+                    for i, value in enumerate(entry):
+                        total[i] += value
+
+        lines = []
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for key, entry in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, entry[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(entry[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Registered metrics and scrape-time collectors"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]):
+        """Add a callback returning metric families computed at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.collect())
+
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+                continue
+
+            for name, metric_type, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    label_names = tuple(labels)
+                    lines.append(
+                        f"{name}{_format_labels(label_names, tuple(str(labels[n]) for n in label_names))} "
+                        f"{_format_value(value)}"
+                    )
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = Registry()
+
+
+def register_collector(collector: Callable[[], Iterable[MetricFamily]]):
+    """Add a scrape-time collector to the global registry"""
+    REGISTRY.register_collector(collector)
+
+
+def render_metrics() -> str:
+    """Render the global registry"""
+    return REGISTRY.render()
+
+
+# HTTP
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being served", ("route",)
+)
+
+# OCR
+OCR_PAGE_SECONDS = Histogram("ocr_page_duration_seconds", "Time to OCR one page", ("provider",))
+OCR_STAGE_SECONDS = Histogram(
+    "ocr_stage_duration_seconds", "Per-page OCR time by stage", ("provider", "stage")
+)
+
+# Embeddings and retrieval
+EMBEDDING_BATCH_SIZE = Histogram("embedding_batch_size", "Texts per embedding call", buckets=SIZE_BUCKETS)
+EMBEDDING_SECONDS = Histogram("embedding_duration_seconds", "Embedding model encode time")
+FAISS_SEARCH_SECONDS = Histogram("faiss_search_duration_seconds", "FAISS search time per call")
+FAISS_CANDIDATES_SCANNED = Histogram(
+    "faiss_candidates_scanned", "Vectors compared per query", buckets=COUNT_BUCKETS
+)
+KEYWORD_SEARCH_SECONDS = Histogram("keyword_search_duration_seconds", "Keyword search time per call")
+
+# LLM
+LLM_CALL_SECONDS = Histogram("llm_call_duration_seconds", "LLM call latency per attempt", ("outcome",))
+LLM_QUEUE_SECONDS = Histogram("llm_queue_wait_seconds", "Time waiting for the LLM rate governor")
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens used by LLM calls", ("kind",))
+LLM_RETRIES = Counter("llm_retries_total", "Retried LLM calls", ("error",))
+
+# Storage
+STORAGE_DOWNLOAD_BYTES = Counter("storage_download_bytes_total", "Bytes downloaded from storage", ("backend",))
+STORAGE_DOWNLOAD_SECONDS = Histogram("storage_download_duration_seconds", "Storage download time", ("backend",))
+
+
+def _collect_executor() -> List[MetricFamily]:
+    """Queue depth and threads of the event loop's default executor"""
+    try:
+        executor = getattr(asyncio.get_running_loop(), "_default_executor", None)
+    except RuntimeError:
+        executor = None
+
+    queued = executor._work_queue.qsize() if executor is not None else 0
+    threads = len(executor._threads) if executor is not None else 0
+    return [
+        ("executor_queue_depth", "gauge", "Tasks waiting for a default executor thread", [({}, queued)]),
+        ("executor_threads", "gauge", "Default executor threads started", [({}, threads)])
+    ]
+
+
+register_collector(_collect_executor)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency and concurrency"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _enabled:
+            await self.app(scope, receive, send)
+            return
+
+        # Routing has not run yet, so resolve the route template up front
+        route = _match_route(scope)
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(route=route)
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(route=route)
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start_time,
+                method=scope["method"], route=_route_label(scope), status=status["code"]
+            )
+
+
+def _match_route(scope: Dict[str, Any]) -> str:
+    """Route template the application will dispatch a request to, or 'unmatched'"""
+    from starlette.routing import Match
+
+    app = scope.get("app")
+    partial = None
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+        if match == Match.PARTIAL and partial is None:
+            partial = getattr(route, "path", None)
+
+    return partial or "unmatched"
+
+
+def _route_label(scope: Dict[str, Any]) -> str:
+    """Route template for a served request (e.g. /jobs/{job_id}), or 'unmatched'"""
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+
+    if "endpoint" not in scope:
+        return "unmatched"
+
+    path = scope["path"]
+    for name, value in (scope.get("path_params") or {}).items():
+        path = path.replace(str(value), "{" + name + "}", 1)
+    return path
@@ -0,0 +1,176 @@
+"""
+Offset index for resolving extracted snippets back to source text positions
+
+The index is built once per document. Text is normalized (lowercased,
+whitespace collapsed, typographic quotes and dashes folded) with a map from
+normalized to original positions, and word n-grams are indexed so each
+snippet lookup only touches the places its n-grams occur. Snippets that do
+not match exactly are aligned by n-gram voting, which tolerates small
+differences such as reflowed lines or a changed word.
+"""
+
+import re
+from collections import defaultdict, Counter
+from typing import Optional, List, Dict, Tuple
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+CHARACTER_FOLDS = str.maketrans({
+    '‘': "'", '’': "'", '“': '"', '”': '"',
+    '–': '-', '—': '-', ' ': ' '
+})
+
+
+class TextOffsetIndex:
+    """Word n-gram index over a normalized copy of a document"""
+
+    def __init__(
+        self,
+        text: str,
+        ngram_size: int = 3,
+        min_match_ratio: float = 0.5,
+        max_postings: int = 500
+    ):
+        self.text = text
+        self.ngram_size = ngram_size
+        self.min_match_ratio = min_match_ratio
+        self.max_postings = max_postings
+
+        self._normalized, self._positions = self._normalize_with_map(text)
+
+        # Token spans in normalized coordinates
+        self._token_spans: List[Tuple[int, int]] = []
+        tokens = []
+        for match in TOKEN_PATTERN.finditer(self._normalized):
+            self._token_spans.append((match.start(), match.end()))
+            tokens.append(match.group())
+
+        self._ngrams: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+        for n in {1, ngram_size}:
+            for i in range(len(tokens) - n + 1):
+                self._ngrams[tuple(tokens[i:i + n])].append(i)
+
+        self._cache: Dict[Tuple[str, int, Optional[int]], Optional[Tuple[int, int]]] = {}
+
+    def find(self, snippet: str, lo: int = 0, hi: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """Resolve a snippet to (start, end) in the original text
+
+        Matches starting inside [lo, hi) are preferred, so callers that know
+        which part of the document a snippet came from get that occurrence.
+        """
+        if not snippet or not snippet.strip():
+            return None
+
+        cache_key = (snippet, lo, hi)
+        if cache_key not in self._cache:
+            self._cache[cache_key] = self._find(snippet, lo, hi)
+        return self._cache[cache_key]
+
+    def find_many(
+        self, snippets: List[str], lo: int = 0, hi: Optional[int] = None
+    ) -> List[Optional[Tuple[int, int]]]:
+        """Resolve many snippets against the same document"""
+        return [self.find(snippet, lo, hi) for snippet in snippets]
+
+    def _find(self, snippet: str, lo: int, hi: Optional[int]) -> Optional[Tuple[int, int]]:
+        """Exact lookup through the n-gram index, falling back to n-gram voting"""
+        normalized_snippet, _ = self._normalize_with_map(snippet)
+        snippet_tokens = TOKEN_PATTERN.findall(normalized_snippet)
+        if not snippet_tokens:
+            return None
+
+        n = self.ngram_size if len(snippet_tokens) >= self.ngram_size else 1
+        first_ngram = tuple(snippet_tokens[:n])
+
+        # Normalized offset of the first token inside the snippet
+        lead = TOKEN_PATTERN.search(normalized_snippet).start()
+        body = normalized_snippet[lead:].rstrip()
+
+        # Exact match: verify candidate positions of the first n-gram
+        exact = []
+        for token_pos in self._ngrams.get(first_ngram, []):
+            norm_start = self._token_spans[token_pos][0]
+            if self._normalized.startswith(body, norm_start):
+                exact.append((norm_start, norm_start + len(body)))
+
+        if exact:
+            return self._to_original(self._pick(exact, lo, hi))
+
+        return self._find_approximate(snippet_tokens, lo, hi)
+
+    def _find_approximate(
+        self, snippet_tokens: List[str], lo: int, hi: Optional[int]
+    ) -> Optional[Tuple[int, int]]:
+        """Align a snippet by voting on the start token implied by each shared n-gram"""
+        n = self.ngram_size if len(snippet_tokens) >= self.ngram_size else 1
+        snippet_ngrams = [
+            tuple(snippet_tokens[j:j + n]) for j in range(len(snippet_tokens) - n + 1)
+        ]
+
+        votes: Counter = Counter()
+        for j, ngram in enumerate(snippet_ngrams):
+            postings = self._ngrams.get(ngram)
+            # Very common n-grams carry little position information
+            if not postings or len(postings) > self.max_postings:
+                continue
+            for token_pos in postings:
+                votes[token_pos - j] += 1
+
+        if not votes:
+            return None
+
+        best_votes = max(votes.values())
+        if best_votes < max(1, self.min_match_ratio * len(snippet_ngrams)):
+            return None
+
+        candidates = []
+        for start_token, count in votes.items():
+            if count != best_votes:
+                continue
+            first = max(start_token, 0)
+            last = min(start_token + len(snippet_tokens), len(self._token_spans)) - 1
+            if last < first:
+                continue
+            candidates.append((self._token_spans[first][0], self._token_spans[last][1]))
+
+        if not candidates:
+            return None
+
+        return self._to_original(self._pick(candidates, lo, hi))
+
+    def _pick(
+        self, spans: List[Tuple[int, int]], lo: int, hi: Optional[int]
+    ) -> Tuple[int, int]:
+        """Pick the first span starting inside [lo, hi) in original coordinates, else the first span"""
+        spans = sorted(spans)
+        for span in spans:
+            original_start = self._positions[span[0]]
+            if original_start >= lo and (hi is None or original_start < hi):
+                return span
+        return spans[0]
+
+    def _to_original(self, span: Tuple[int, int]) -> Tuple[int, int]:
+        """Map a normalized (start, end) span to original text positions"""
+        start, end = span
+        return self._positions[start], self._positions[end - 1] + 1
+
+    @staticmethod
+    def _normalize_with_map(text: str) -> Tuple[str, List[int]]:
+        """Lowercase, fold typographic characters and collapse whitespace, keeping a position map"""
+        folded = text.translate(CHARACTER_FOLDS).lower()
+        chars = []
+        positions = []
+        previous_space = True  # also strips leading whitespace
+
+        for i, char in enumerate(folded):
+            if char.isspace():
+                if previous_space:
+                    continue
+                char = ' '
+                previous_space = True
+            else:
+                previous_space = False
+            chars.append(char)
+            positions.append(i)
+
+        return "".join(chars), positions
@@ -0,0 +1,441 @@
+"""
+On-demand profiling for live workers
+
+Three tools, all bounded so they are safe to run in production:
+
+- SamplingProfiler samples every thread's stack from a dedicated thread
+  for a fixed duration and reports aggregated stacks as collapsed-stack
+  text (flamegraph.pl, speedscope) or speedscope JSON.
+- RequestProfiler runs cProfile around a single request selected by the
+  X-Profile header and keeps the last few reports for download.
+- TracemallocSession starts tracemalloc, takes snapshots and diffs each
+  against the previous one, optionally limited to the document store and
+  model code. It stops itself after a time limit.
+
+Only one sampling profile and one request profile run at a time, and every
+report is cut to a maximum size.
+"""
+
+import io
+import sys
+import hmac
+import time
+import uuid
+import pstats
+import asyncio
+import cProfile
+import logging
+import threading
+import tracemalloc
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Deeper frames are cut from sampled stacks
+MAX_STACK_DEPTH = 128
+
+MIN_SAMPLE_INTERVAL = 0.001
+
+# Request profiles kept for download
+MAX_REQUEST_PROFILES = 10
+
+# Code whose allocations are traced by the tracemalloc presets
+TRACEMALLOC_TARGETS = {
+    "document_store": ["*/rag/faiss_indexer.py", "*/rag/faiss_query.py"],
+    "models": [
+        "*/services/extract_local.py", "*/rag/reranker.py", "*/rag/faiss_indexer.py",
+        "*/transformers/*", "*/sentence_transformers/*", "*/utils/result_cache.py"
+    ]
+}
+
+
+class ProfilerBusyError(RuntimeError):
+    """Another profile of the same kind is already running"""
+
+
+def truncate_text(text: str, max_bytes: int) -> str:
+    """Cut text to at most max_bytes (UTF-8) on a line boundary"""
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+    cut = encoded[:max_bytes].decode("utf-8", errors="ignore")
+    cut = cut[:cut.rfind("\n") + 1] if "\n" in cut else cut
+    return cut + f"# truncated to {max_bytes} bytes\n"
+
+
+class SamplingProfiler:
+    """Wall-clock stack sampler for all threads of the process"""
+
+    def __init__(self, max_seconds: float, max_output_bytes: int):
+        self.max_seconds = max_seconds
+        self.max_output_bytes = max_output_bytes
+        # A dedicated thread, so sampling still runs when the default executor is saturated
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sampling-profiler")
+        self._lock = asyncio.Lock()
+
+    async def profile(self, seconds: float, interval: float, include_idle: bool = False) -> Dict[str, Any]:
+        """Sample for the given seconds and return aggregated stacks"""
+        if self._lock.locked():
+            raise ProfilerBusyError("A sampling profile is already running")
+
+        seconds = min(max(seconds, 0.1), self.max_seconds)
+        interval = max(interval, MIN_SAMPLE_INTERVAL)
+
+        async with self._lock:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self._executor, self._sample, seconds, interval, include_idle)
+
+    def _sample(self, seconds: float, interval: float, include_idle: bool) -> Dict[str, Any]:
+        own_thread = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        start = time.perf_counter()
+        deadline = start + seconds
+
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({_short_path(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.reverse()
+
+                if not include_idle and stack and _is_idle(stack[-1]):
+                    continue
+
+                stacks[(names.get(thread_id, str(thread_id)),) + tuple(stack)] += 1
+
+            samples += 1
+            time.sleep(interval)
+
+        return {
+            "duration": time.perf_counter() - start,
+            "interval": interval,
+            "samples": samples,
+            "stacks": stacks
+        }
+
+    def to_collapsed(self, profile: Dict[str, Any]) -> str:
+        """Collapsed-stack text: one 'thread;frame;frame count' line per stack, most frequent first"""
+        lines = [
+            ";".join(frame.replace(";", ":") for frame in stack) + f" {count}\n"
+            for stack, count in profile["stacks"].most_common()
+        ]
+        return truncate_text("".join(lines), self.max_output_bytes)
+
+    def to_speedscope(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Speedscope sampled profile per thread, dropping the rarest stacks beyond the size cap"""
+        frames: List[Dict[str, Any]] = []
+        frame_index: Dict[str, int] = {}
+        threads: "OrderedDict[str, Dict[str, list]]" = OrderedDict()
+        size = 0
+        dropped = 0
+
+        for stack, count in profile["stacks"].most_common():
+            # Rough JSON size of the sample plus any new frames
+            size += 16 + 8 * len(stack) + sum(len(f) + 32 for f in stack if f not in frame_index)
+            if size > self.max_output_bytes:
+                dropped += count
+                continue
+
+            indices = []
+            for name in stack[1:]:
+                if name not in frame_index:
+                    frame_index[name] = len(frames)
+                    frames.append({"name": name})
+                indices.append(frame_index[name])
+
+            thread = threads.setdefault(stack[0], {"samples": [], "weights": []})
+            thread["samples"].append(indices)
+            thread["weights"].append(count * profile["interval"])
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"ai-operations {profile['duration']:.1f}s",
+            "exporter": "ai-operations",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(thread["weights"]),
+                    "samples": thread["samples"],
+                    "weights": thread["weights"]
+                }
+                for name, thread in threads.items()
+            ],
+            "droppedSamples": dropped
+        }
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to site-packages, the service root or the standard library"""
+    for marker in ("site-packages/", "/ai/"):
+        index = filename.rfind(marker)
+        if index >= 0:
+            return filename[index + len(marker):]
+
+    index = filename.find("/python3.")
+    if index >= 0 and "/" in filename[index + 1:]:
+        return filename[filename.index("/", index + 1) + 1:]
+    return filename
+
+
+# Leaf frames of threads blocked waiting for work
+_IDLE_FRAMES = ("wait (threading.py", "get (queue.py", "select (selectors.py", "_worker (concurrent/futures/thread.py")
+
+
+def _is_idle(frame: str) -> bool:
+    return frame.startswith(_IDLE_FRAMES)
+
+
+class RequestProfiler:
+    """cProfile for one request at a time, keeping the last few reports"""
+
+    def __init__(self, max_output_bytes: int):
+        self.max_output_bytes = max_output_bytes
+        self._active = False
+        self._reports: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """Enable a profiler, or return None if one is already running"""
+        if self._active:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool is active in this thread
+            return None
+        self._active = True
+        return profiler
+
+    def finish(self, profiler: cProfile.Profile, profile_id: str, method: str, path: str, duration: float):
+        """Stop the profiler and store its report under profile_id"""
+        profiler.disable()
+        self._active = False
+
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        stats.sort_stats("cumulative").print_stats(60)
+
+        self._reports[profile_id] = {
+            "profile_id": profile_id,
+            "method": method,
+            "path": path,
+            "duration": duration,
+            "created_at": time.time(),
+            "report": truncate_text(output.getvalue(), self.max_output_bytes)
+        }
+        while len(self._reports) > MAX_REQUEST_PROFILES:
+            self._reports.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return self._reports.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [
+            {key: value for key, value in report.items() if key != "report"}
+            for report in reversed(self._reports.values())
+        ]
+
+
+class TracemallocSession:
+    """tracemalloc snapshots diffed against the previous snapshot, with an automatic stop"""
+
+    def __init__(self, max_seconds: float):
+        self.max_seconds = max_seconds
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._started_at: Optional[float] = None
+        self._stop_handle: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def running(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(max(1, min(frames, 25)))
+            self._previous = None
+            self._started_at = time.time()
+
+            loop = asyncio.get_event_loop()
+            self._stop_handle = loop.call_later(self.max_seconds, self._auto_stop)
+
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        if self._stop_handle is not None:
+            self._stop_handle.cancel()
+            self._stop_handle = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._previous = None
+        self._started_at = None
+        return self.status()
+
+    def _auto_stop(self):
+        self._stop_handle = None
+        logger.warning(f"Stopping tracemalloc after {self.max_seconds:.0f}s")
+        self.stop()
+
+    def status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "frames": tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else None,
+            "started_at": self._started_at,
+            "stops_in": max(self._started_at + self.max_seconds - time.time(), 0.0) if self._started_at else None,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "overhead_bytes": tracemalloc.get_tracemalloc_memory()
+        }
+
+    async def snapshot(self, target: Optional[str] = None, group_by: str = "lineno", limit: int = 25) -> Dict[str, Any]:
+        """Take a snapshot and report the largest allocation changes since the previous one"""
+        if not tracemalloc.is_tracing():
+            raise ValueError("tracemalloc is not running; start it first")
+        if target is not None and target not in TRACEMALLOC_TARGETS:
+            raise ValueError(f"Unknown target. Supported: {', '.join(TRACEMALLOC_TARGETS)}")
+
+        loop = asyncio.get_event_loop()
+        snapshot = await loop.run_in_executor(None, tracemalloc.take_snapshot)
+        previous, self._previous = self._previous, snapshot
+
+        def compare() -> List[Dict[str, Any]]:
+            current, baseline = snapshot, previous
+            if target is not None:
+                filters = [tracemalloc.Filter(True, pattern, all_frames=True) for pattern in TRACEMALLOC_TARGETS[target]]
+                current = current.filter_traces(filters)
+                baseline = baseline.filter_traces(filters) if baseline is not None else None
+
+            if baseline is None:
+                stats = [(stat, stat.size, stat.count) for stat in current.statistics(group_by)]
+            else:
+                stats = [(stat, stat.size_diff, stat.count_diff) for stat in current.compare_to(baseline, group_by)]
+
+            return [
+                {
+                    "location": [str(frame) for frame in stat.traceback],
+                    "size": stat.size,
+                    "size_diff": size_diff if baseline is not None else None,
+                    "count": stat.count,
+                    "count_diff": count_diff if baseline is not None else None
+                }
+                for stat, size_diff, count_diff in stats[:max(1, min(limit, 200))]
+            ]
+
+        top = await loop.run_in_executor(None, compare)
+        return {
+            "baseline": previous is not None,
+            "target": target,
+            "group_by": group_by,
+            "top": top,
+            **self.status()
+        }
+
+
+# Global profiler instances
+_global_sampling_profiler: Optional[SamplingProfiler] = None
+_global_request_profiler: Optional[RequestProfiler] = None
+_global_tracemalloc_session: Optional[TracemallocSession] = None
+
+
+def get_sampling_profiler() -> SamplingProfiler:
+    """Get global sampling profiler instance"""
+    global _global_sampling_profiler
+
+    if _global_sampling_profiler is None:
+        settings = get_settings()
+        _global_sampling_profiler = SamplingProfiler(
+            max_seconds=settings.profiling_max_seconds,
+            max_output_bytes=settings.profiling_max_output_bytes
+        )
+
+    return _global_sampling_profiler
+
+
+def get_request_profiler() -> RequestProfiler:
+    """Get global request profiler instance"""
+    global _global_request_profiler
+
+    if _global_request_profiler is None:
+        _global_request_profiler = RequestProfiler(get_settings().profiling_max_output_bytes)
+
+    return _global_request_profiler
+
+
+def get_tracemalloc_session() -> TracemallocSession:
+    """Get global tracemalloc session"""
+    global _global_tracemalloc_session
+
+    if _global_tracemalloc_session is None:
+        _global_tracemalloc_session = TracemallocSession(get_settings().profiling_tracemalloc_max_seconds)
+
+    return _global_tracemalloc_session
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Whether token matches the configured ADMIN_TOKEN (never true when none is set)"""
+    admin_token = get_settings().admin_token
+    return bool(admin_token and token and hmac.compare_digest(token.encode("utf-8"), admin_token.encode("utf-8")))
+
+
+# Routes whose single requests may be profiled with the X-Profile header
+PROFILED_PREFIXES = ("/nlp/", "/ocr/", "/ingest")
+
+
+class RequestProfilingMiddleware:
+    """ASGI middleware running cProfile around requests sent with X-Profile: 1 and a valid X-Admin-Token
+
+    cProfile traces the event loop thread, so other requests served at the same
+    time appear in the report; work in executor threads does not.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(PROFILED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        if headers.get(b"x-profile") not in (b"1", b"true") or \
+                not is_admin_token(headers.get(b"x-admin-token", b"").decode("latin-1")):
+            await self.app(scope, receive, send)
+            return
+
+        request_profiler = get_request_profiler()
+        profiler = request_profiler.start()
+        if profiler is None:
+            logger.warning(f"Request profile skipped for {scope['path']}: another profile is running")
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers") or []) + [
+                    (b"x-profile-id", profile_id.encode("latin-1"))
+                ]}
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            request_profiler.finish(profiler, profile_id, scope["method"], scope["path"], time.perf_counter() - start)
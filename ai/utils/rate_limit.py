@@ -0,0 +1,289 @@
+"""
+Per-client rate limiting and load shedding for HTTP requests
+
+Requests are grouped into route classes. Each client gets its own token
+bucket per class, so polling /health or /qa/suggestions never spends the
+budget for OCR and extraction. Interactive and heavy classes also have a
+concurrency cap with a short admission queue: when the estimated wait
+(queue depth times the class's recent service time) exceeds the class's
+limit, the request is shed with 429 and a Retry-After instead of joining
+a queue that would push everyone's latency into minutes.
+"""
+
+import math
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Optional, Dict, Any, List, Tuple
+
+from starlette.responses import JSONResponse
+
+from .config import get_settings
+from .llm_governor import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# First matching (method, prefix) wins, a None method matches any; anything unmatched (docs, /providers) is cheap
+ROUTE_CLASSES: List[Tuple[Optional[str], str, str]] = [
+    (None, "/health", "cheap"),
+    (None, "/qa/suggestions", "cheap"),
+    (None, "/qa/capabilities", "cheap"),
+    (None, "/qa/metrics", "cheap"),
+    (None, "/qa/index", "heavy"),
+    (None, "/qa/batch-query", "heavy"),
+    (None, "/qa", "interactive"),
+    (None, "/ocr", "heavy"),
+    (None, "/nlp", "heavy"),
+    (None, "/ingest", "heavy"),
+    # Polling job status is cheap; submitting (and cancelling) queues OCR and extraction work
+    ("GET", "/jobs", "cheap"),
+    (None, "/jobs", "jobs")
+]
+
+# Buckets for clients not seen recently are dropped beyond this many
+MAX_TRACKED_CLIENTS = 10000
+
+# Smoothing factor for the per-class service time estimate
+SERVICE_TIME_ALPHA = 0.2
+
+
+class RateLimitExceeded(Exception):
+    """Request rejected by the rate limiter"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RouteClass:
+    """Per-class rate budget, concurrency cap and admission queue"""
+
+    def __init__(self, name: str, per_minute: int, max_concurrency: int = 0, max_queue_wait: float = 0.0):
+        self.name = name
+        self.per_minute = per_minute
+        self.max_concurrency = max_concurrency
+        self.max_queue_wait = max_queue_wait
+
+        self.in_flight = 0
+        self.waiters: deque = deque()
+        # Seed the estimate so the first overload has a sensible Retry-After
+        self.service_time = 1.0
+
+        self.stats = {
+            "admitted": 0,
+            "rejected_rate": 0,
+            "rejected_overload": 0,
+            "queued": 0,
+            "total_wait_time": 0.0
+        }
+
+    def estimated_wait(self, position: int) -> float:
+        """Seconds until a request at this queue position is admitted"""
+        if self.max_concurrency <= 0:
+            return 0.0
+        return (position // self.max_concurrency + 1) * self.service_time
+
+    def record_service_time(self, seconds: float):
+        """Update the moving average of request duration"""
+        self.service_time += SERVICE_TIME_ALPHA * (seconds - self.service_time)
+
+
+class RateLimiter:
+    """Per-client token buckets and per-class admission control"""
+
+    def __init__(self, classes: Dict[str, RouteClass], trust_proxy_headers: bool = False):
+        self.classes = classes
+        self.trust_proxy_headers = trust_proxy_headers
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+
+    def classify(self, path: str, method: str = "GET") -> RouteClass:
+        """Route class for a request method and path"""
+        for route_method, prefix, name in ROUTE_CLASSES:
+            if route_method not in (None, method):
+                continue
+            if path == prefix or path.startswith(prefix + "/"):
+                return self.classes[name]
+        return self.classes["cheap"]
+
+    def client_id(self, scope: Dict[str, Any]) -> str:
+        """Identify the client by its address (the first X-Forwarded-For hop behind a trusted proxy)"""
+        if self.trust_proxy_headers:
+            forwarded = dict(scope.get("headers") or []).get(b"x-forwarded-for")
+            if forwarded:
+                return forwarded.decode("latin-1").split(",")[0].strip()
+
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def check_rate(self, client: str, route_class: RouteClass):
+        """Spend one token from the client's bucket for the class or raise RateLimitExceeded"""
+        if route_class.per_minute <= 0:
+            return
+
+        key = (client, route_class.name)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(route_class.per_minute)
+            self._buckets[key] = bucket
+            if len(self._buckets) > MAX_TRACKED_CLIENTS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        bucket.refill(time.monotonic())
+        retry_after = bucket.time_until(1)
+        if retry_after > 0:
+            route_class.stats["rejected_rate"] += 1
+            raise RateLimitExceeded(f"Rate limit exceeded for {route_class.name} requests", retry_after)
+
+        bucket.consume(1)
+
+    async def acquire(self, route_class: RouteClass):
+        """Wait for a concurrency slot, or shed the request if the wait would be too long"""
+        if route_class.max_concurrency <= 0:
+            route_class.stats["admitted"] += 1
+            return
+
+        if route_class.in_flight < route_class.max_concurrency and not route_class.waiters:
+            route_class.in_flight += 1
+            route_class.stats["admitted"] += 1
+            return
+
+        estimated_wait = route_class.estimated_wait(len(route_class.waiters))
+        if estimated_wait > route_class.max_queue_wait:
+            route_class.stats["rejected_overload"] += 1
+            raise RateLimitExceeded(f"Server is busy with {route_class.name} requests", estimated_wait)
+
+        waiter = asyncio.get_event_loop().create_future()
+        route_class.waiters.append(waiter)
+        route_class.stats["queued"] += 1
+        wait_start = time.monotonic()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=route_class.max_queue_wait)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # The slot was handed over just as the wait expired
+                self._admitted(route_class, wait_start)
+                return
+            waiter.cancel()
+            route_class.waiters.remove(waiter)
+            route_class.stats["rejected_overload"] += 1
+            raise RateLimitExceeded(
+                f"Server is busy with {route_class.name} requests",
+                route_class.estimated_wait(len(route_class.waiters))
+            )
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self.release(route_class)
+            else:
+                waiter.cancel()
+                route_class.waiters.remove(waiter)
+            raise
+
+        self._admitted(route_class, wait_start)
+
+    def _admitted(self, route_class: RouteClass, wait_start: float):
+        """Record a request admitted from the queue"""
+        route_class.stats["admitted"] += 1
+        route_class.stats["total_wait_time"] += time.monotonic() - wait_start
+
+    def release(self, route_class: RouteClass):
+        """Hand the slot to the next waiter, or free it"""
+        if route_class.max_concurrency <= 0:
+            return
+
+        if route_class.waiters:
+            # The slot passes straight to the next waiter; in_flight is unchanged
+            route_class.waiters.popleft().set_result(None)
+            return
+
+        route_class.in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get rate limiter statistics"""
+        return {
+            "tracked_clients": len(self._buckets),
+            "classes": {
+                name: {
+                    "per_minute": route_class.per_minute,
+                    "max_concurrency": route_class.max_concurrency,
+                    "in_flight": route_class.in_flight,
+                    "waiting": len(route_class.waiters),
+                    "avg_service_time": route_class.service_time,
+                    **route_class.stats
+                }
+                for name, route_class in self.classes.items()
+            }
+        }
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying the global rate limiter to HTTP requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not get_settings().rate_limit_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = get_rate_limiter()
+        route_class = limiter.classify(scope["path"], scope["method"])
+
+        try:
+            limiter.check_rate(limiter.client_id(scope), route_class)
+            await limiter.acquire(route_class)
+        except RateLimitExceeded as e:
+            retry_after = max(math.ceil(e.retry_after), 1)
+            response = JSONResponse(
+                status_code=429,
+                content={"error": e.reason, "status_code": 429},
+                headers={"Retry-After": str(retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        start_time = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.record_service_time(time.monotonic() - start_time)
+            limiter.release(route_class)
+
+
+# Global rate limiter instance
+_global_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get global rate limiter instance"""
+    global _global_rate_limiter
+
+    if _global_rate_limiter is None:
+        settings = get_settings()
+        _global_rate_limiter = RateLimiter(
+            classes={
+                "cheap": RouteClass("cheap", settings.rate_limit_cheap_per_minute),
+                # Queued work is bounded by the job workers, so submissions need a budget but no concurrency cap
+                "jobs": RouteClass("jobs", settings.rate_limit_jobs_per_minute),
+                "interactive": RouteClass(
+                    "interactive",
+                    settings.rate_limit_interactive_per_minute,
+                    settings.rate_limit_interactive_max_concurrency,
+                    settings.rate_limit_interactive_max_queue_wait
+                ),
+                "heavy": RouteClass(
+                    "heavy",
+                    settings.rate_limit_per_minute,
+                    settings.rate_limit_heavy_max_concurrency,
+                    settings.rate_limit_heavy_max_queue_wait
+                )
+            },
+            trust_proxy_headers=settings.rate_limit_trust_proxy_headers
+        )
+
+    return _global_rate_limiter
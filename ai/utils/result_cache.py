@@ -0,0 +1,332 @@
+"""
+Extraction result cache for metadata and obligation results
+
+Results are keyed by the SHA-256 of the input text together with the
+provider, model and request parameters that influence the output. Entries
+are held in a bounded in-memory LRU and persisted as one JSON file per key
+so they survive restarts. Every entry records the model version it was
+produced with and is discarded when that version no longer matches.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import asyncio
+from pathlib import Path
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Dict, Any, Union
+
+from models.extraction_models import (
+    MetadataRequest, MetadataResult, ObligationRequest, ObligationResult
+)
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction logic changes in a way that alters results
+CACHE_SCHEMA_VERSION = 1
+
+RESULT_TYPES = {
+    "metadata": MetadataResult,
+    "obligations": ObligationResult
+}
+
+# Request options that control caching or only label the document, and must not be part of the key
+CACHE_CONTROL_OPTIONS = {"cache", "llm_cache", "project_id", "document_id", "document_name"}
+
+
+class ExtractionResultCache:
+    """Bounded LRU cache of extraction results with on-disk persistence"""
+
+    def __init__(
+        self,
+        cache_path: str,
+        max_entries: int = 1024,
+        max_disk_entries: int = 10000,
+        model_version: str = "1",
+        enabled: bool = True
+    ):
+        self.cache_path = Path(cache_path)
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.model_version = f"{CACHE_SCHEMA_VERSION}:{model_version}"
+        self.enabled = enabled
+
+        self._entries: "OrderedDict[str, Union[MetadataResult, ObligationResult]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._disk_entries: Optional[int] = None
+
+        self._stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "errors": 0
+        }
+
+    def make_key(
+        self,
+        kind: str,
+        provider: str,
+        model: str,
+        request: Union[MetadataRequest, ObligationRequest],
+        text: str
+    ) -> str:
+        """Build the cache key for an extraction request"""
+        options = {
+            k: v for k, v in (request.options or {}).items()
+            if k not in CACHE_CONTROL_OPTIONS
+        }
+
+        key_data = {
+            "kind": kind,
+            "text_sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            "provider": provider,
+            "model": model,
+            "extract_fields": sorted(getattr(request, "extract_fields", None) or []),
+            "confidence_threshold": request.confidence_threshold,
+            "include_penalties": getattr(request, "include_penalties", None),
+            "options": options
+        }
+
+        serialized = json.dumps(key_data, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    async def get_or_extract(
+        self,
+        kind: str,
+        extraction_service: Any,
+        request: Union[MetadataRequest, ObligationRequest],
+        text: str
+    ) -> Union[MetadataResult, ObligationResult]:
+        """Return a cached result or run the extraction and cache it"""
+        extract = getattr(extraction_service, f"extract_{kind}")
+
+        options = request.options or {}
+        if not self.enabled or options.get("cache") is False:
+            return await extract(request, text)
+
+        key = self.make_key(
+            kind,
+            getattr(extraction_service, "provider", type(extraction_service).__name__),
+            getattr(extraction_service, "model_name", ""),
+            request,
+            text
+        )
+
+        cached = await self.get(kind, key)
+        if cached is not None:
+            return cached
+
+        # Identical requests already being extracted share one result
+        while key in self._inflight:
+            inflight = self._inflight[key]
+            try:
+                result = await asyncio.shield(inflight)
+                return self._mark_cached(result)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The leading request was cancelled, not this one; extract (or wait for a new leader)
+
+        future = asyncio.get_event_loop().create_future()
+        self._inflight[key] = future
+
+        try:
+            result = await extract(request, text)
+            # The cache and waiters get their own copy; the caller may modify the returned result
+            snapshot = result.copy(deep=True)
+            future.set_result(snapshot)
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            self._inflight.pop(key, None)
+
+        await self._store(kind, key, snapshot)
+        return result
+
+    async def get(self, kind: str, key: str) -> Optional[Union[MetadataResult, ObligationResult]]:
+        """Look up a result in memory, then on disk"""
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            self._stats["memory_hits"] += 1
+            return self._mark_cached(result)
+
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(None, lambda: self._read_entry(kind, key))
+        if result is not None:
+            self._remember(key, result)
+            self._stats["hits"] += 1
+            self._stats["disk_hits"] += 1
+            return self._mark_cached(result)
+
+        self._stats["misses"] += 1
+        return None
+
+    async def set(self, kind: str, key: str, result: Union[MetadataResult, ObligationResult]):
+        """Store a copy of a result in memory and on disk"""
+        await self._store(kind, key, result.copy(deep=True))
+
+    async def _store(self, kind: str, key: str, result: Union[MetadataResult, ObligationResult]):
+        """Store a result the cache owns in memory and on disk"""
+        self._remember(key, result)
+
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, lambda: self._write_entry(kind, key, result))
+
+    async def clear(self) -> int:
+        """Remove all cached results and return the number of disk entries removed"""
+        self._entries.clear()
+
+        loop = asyncio.get_event_loop()
+        removed = await loop.run_in_executor(None, self._clear_disk)
+        self._disk_entries = 0
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "model_version": self.model_version,
+            "memory_entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "disk_entries": self._disk_entries,
+            "max_disk_entries": self.max_disk_entries,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            **self._stats
+        }
+
+    def _remember(self, key: str, result: Union[MetadataResult, ObligationResult]):
+        """Insert into the in-memory LRU, evicting the least recently used entry"""
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _mark_cached(self, result: Union[MetadataResult, ObligationResult]):
+        """Return a copy of a cached result flagged as a cache hit"""
+        result = result.copy(deep=True)
+        parameters = dict(result.processing_metadata.parameters or {})
+        parameters["cache_hit"] = True
+        result.processing_metadata.parameters = parameters
+        return result
+
+    def _entry_path(self, key: str) -> Path:
+        """Get the disk path for a cache key"""
+        return self.cache_path / key[:2] / f"{key}.json"
+
+    def _read_entry(self, kind: str, key: str) -> Optional[Union[MetadataResult, ObligationResult]]:
+        """Read a persisted entry, dropping it if it was produced by another model version"""
+        path = self._entry_path(key)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+
+            if entry.get("model_version") != self.model_version or entry.get("kind") != kind:
+                path.unlink(missing_ok=True)
+                self._stats["invalidations"] += 1
+                if self._disk_entries:
+                    self._disk_entries -= 1
+                return None
+
+            # Touch the file so disk pruning keeps recently used entries
+            os.utime(path, None)
+            return RESULT_TYPES[kind].parse_obj(entry["result"])
+
+        except Exception as e:
+            logger.error(f"Result cache read failed for {key}: {e}")
+            self._stats["errors"] += 1
+            return None
+
+    def _write_entry(self, kind: str, key: str, result: Union[MetadataResult, ObligationResult]):
+        """Persist an entry atomically and prune the disk cache if needed"""
+        path = self._entry_path(key)
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            is_new = not path.exists()
+
+            entry = {
+                "kind": kind,
+                "model_version": self.model_version,
+                "created_at": time.time(),
+                "result": json.loads(result.json())
+            }
+
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+
+            if self._disk_entries is None:
+                self._disk_entries = self._count_disk_entries()
+            elif is_new:
+                self._disk_entries += 1
+
+            if self._disk_entries > self.max_disk_entries:
+                self._prune_disk()
+
+        except Exception as e:
+            logger.error(f"Result cache write failed for {key}: {e}")
+            self._stats["errors"] += 1
+
+    def _iter_disk_entries(self):
+        """Iterate over persisted entry files"""
+        if not self.cache_path.exists():
+            return iter(())
+        return self.cache_path.glob("*/*.json")
+
+    def _count_disk_entries(self) -> int:
+        """Count persisted entries"""
+        return sum(1 for _ in self._iter_disk_entries())
+
+    def _prune_disk(self):
+        """Remove least recently used disk entries down to 90% of the limit"""
+        files = sorted(self._iter_disk_entries(), key=lambda p: p.stat().st_mtime)
+        target = int(self.max_disk_entries * 0.9)
+        excess = len(files) - target
+
+        for path in files[:max(excess, 0)]:
+            path.unlink(missing_ok=True)
+            self._stats["evictions"] += 1
+
+        self._disk_entries = min(len(files), target)
+
+    def _clear_disk(self) -> int:
+        """Remove all persisted entries"""
+        removed = 0
+        for path in list(self._iter_disk_entries()):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+
+@lru_cache()
+def get_result_cache() -> ExtractionResultCache:
+    """Get cached extraction result cache instance"""
+    settings = get_settings()
+    return ExtractionResultCache(
+        cache_path=settings.extraction_cache_path,
+        max_entries=settings.extraction_cache_max_entries,
+        max_disk_entries=settings.extraction_cache_max_disk_entries,
+        model_version=settings.extraction_model_version,
+        enabled=settings.extraction_cache_enabled
+    )
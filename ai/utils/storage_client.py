@@ -15,6 +15,8 @@ from minio import Minio
 from minio.error import S3Error
 
 from .config import get_settings
+from .metrics import STORAGE_DOWNLOAD_BYTES, STORAGE_DOWNLOAD_SECONDS
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -188,10 +190,16 @@ class StorageClient:
         await self._ensure_initialized()
 
         try:
-            if self.storage_type == "minio":
-                return await self._download_from_minio(file_path)
-            else:
-                return await self._download_from_local(file_path)
+            with span("storage.download", path=file_path, backend=self.storage_type) as download_span, \
+                    STORAGE_DOWNLOAD_SECONDS.time(backend=self.storage_type):
+                if self.storage_type == "minio":
+                    content = await self._download_from_minio(file_path)
+                else:
+                    content = await self._download_from_local(file_path)
+                download_span.set_attribute("bytes", len(content))
+
+            STORAGE_DOWNLOAD_BYTES.inc(len(content), backend=self.storage_type)
+            return content
 
         except Exception as e:
             logger.error(f"File download failed for {file_path}: {e}")
@@ -0,0 +1,478 @@
+"""
+Lightweight request tracing
+
+Every HTTP request gets a trace whose ID comes from an incoming
+`traceparent` or `X-Trace-Id` header (or is generated). Code marks the
+interesting steps with `with span("faiss.search"):`; spans nest through the
+current context, including into executor threads started with
+`run_in_executor` from this module. Spans are always recorded in memory so
+a request slower than TRACING_SLOW_REQUEST_SECONDS can log its span tree;
+only sampled traces are exported, to a local JSONL file or to an OTLP/HTTP
+collector, by a background thread.
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import asyncio
+import logging
+import threading
+import functools
+import contextvars
+import urllib.request
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable, TypeVar
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Spans beyond this many per trace are not recorded (e.g. very long documents)
+MAX_SPANS_PER_TRACE = 2000
+
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL_SECONDS = 1.0
+
+SERVICE_NAME = "ai-operations"
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Trace:
+    """Spans recorded for one request or job"""
+
+    __slots__ = ("trace_id", "sampled", "spans", "dropped")
+
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans: List[Span] = []
+        self.dropped = 0
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error", "_token")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+        self._token = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds from start to end (or to now while running)"""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned when there is no active trace"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class span:
+    """Context manager recording a child of the current span; a no-op outside a trace"""
+
+    __slots__ = ("name", "attributes", "_span", "_token")
+
+    def __init__(self, name: str, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self._span = None
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is None:
+            return _NOOP_SPAN
+
+        trace = parent.trace
+        if len(trace.spans) >= MAX_SPANS_PER_TRACE:
+            trace.dropped += 1
+            return _NOOP_SPAN
+
+        self._span = Span(trace, self.name, parent.span_id, self.attributes)
+        trace.spans.append(self._span)
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._span is not None:
+            self._span.finish(exc)
+            _current_span.reset(self._token)
+        return False
+
+
+def current_span() -> Optional[Span]:
+    """The active span, if any"""
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace ID of the active trace, if any"""
+    active = _current_span.get()
+    return active.trace.trace_id if active is not None else None
+
+
+def in_current_context(func: Callable[..., T], *args) -> Callable[[], T]:
+    """Bind func to a copy of the current context, so spans it opens in a thread nest correctly"""
+    return functools.partial(contextvars.copy_context().run, func, *args)
+
+
+async def run_in_executor(func: Callable[..., T], *args) -> T:
+    """loop.run_in_executor on the default executor, carrying the current span into the thread"""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, in_current_context(func, *args))
+
+
+def parse_trace_header(headers: Dict[str, str]) -> Dict[str, Any]:
+    """Trace ID, parent span and sampled flag from W3C traceparent or X-Trace-Id"""
+    traceparent = headers.get("traceparent")
+    if traceparent:
+        parts = traceparent.strip().split("-")
+        if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16 and _is_hex(parts[1] + parts[2]):
+            return {
+                "trace_id": parts[1].lower(),
+                "parent_id": parts[2].lower(),
+                "sampled": parts[3] == "01"
+            }
+
+    trace_id = (headers.get("x-trace-id") or "").strip().lower()
+    if len(trace_id) == 32 and _is_hex(trace_id):
+        return {"trace_id": trace_id, "parent_id": None, "sampled": False}
+
+    return {"trace_id": None, "parent_id": None, "sampled": False}
+
+
+def _is_hex(value: str) -> bool:
+    try:
+        int(value, 16)
+        return True
+    except ValueError:
+        return False
+
+
+class SpanExporter:
+    """Background thread writing finished sampled spans to JSONL or OTLP/HTTP"""
+
+    def __init__(self, exporter: str, path: str, otlp_endpoint: Optional[str]):
+        self.exporter = exporter
+        self.path = Path(path)
+        self.otlp_endpoint = otlp_endpoint
+        self._queue: "queue.Queue[Optional[List[Span]]]" = queue.Queue()
+
+        self._stats = {
+            "exported_spans": 0,
+            "export_errors": 0
+        }
+
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, spans: List[Span]):
+        self._queue.put(spans)
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued spans and stop the thread"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        batch: List[Span] = []
+        deadline = time.monotonic() + EXPORT_INTERVAL_SECONDS
+
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                item = []
+
+            if item is None:
+                self._export(batch)
+                return
+
+            batch.extend(item)
+            if len(batch) >= EXPORT_BATCH_SIZE or time.monotonic() >= deadline:
+                self._export(batch)
+                batch = []
+                deadline = time.monotonic() + EXPORT_INTERVAL_SECONDS
+
+    def _export(self, spans: List[Span]):
+        if not spans:
+            return
+
+        try:
+            if self.exporter == "otlp":
+                self._export_otlp(spans)
+            else:
+                self._export_jsonl(spans)
+            self._stats["exported_spans"] += len(spans)
+
+        except Exception as e:
+            self._stats["export_errors"] += 1
+            logger.warning(f"Span export failed: {e}")
+
+    def _export_jsonl(self, spans: List[Span]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for s in spans:
+                f.write(json.dumps(s.to_dict(), default=str) + "\n")
+
+    def _export_otlp(self, spans: List[Span]):
+        """POST spans as OTLP/HTTP JSON (e.g. to http://localhost:4318/v1/traces)"""
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [_otlp_span(s) for s in spans]
+                }]
+            }]
+        }
+        request = urllib.request.Request(
+            self.otlp_endpoint,
+            data=json.dumps(payload, default=str).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            response.read()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"exporter": self.exporter, "pending_batches": self._queue.qsize(), **self._stats}
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(s: Span) -> Dict[str, Any]:
+    otlp = {
+        "traceId": s.trace.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": 2 if s.parent_id is None else 1,
+        "startTimeUnixNano": str(s.start_ns),
+        "endTimeUnixNano": str(s.end_ns or time.time_ns()),
+        "attributes": [_otlp_attribute(k, v) for k, v in s.attributes.items()],
+        "status": {"code": 2, "message": s.error} if s.error else {"code": 1}
+    }
+    if s.parent_id:
+        otlp["parentSpanId"] = s.parent_id
+    return otlp
+
+
+class Tracer:
+    """Starts traces, applies sampling and reports finished traces"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        sample_rate: float = 0.0,
+        slow_request_seconds: float = 0.0,
+        exporter: str = "jsonl",
+        export_path: str = "./traces/spans.jsonl",
+        otlp_endpoint: Optional[str] = None
+    ):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_request_seconds = slow_request_seconds
+        if exporter == "otlp" and not otlp_endpoint:
+            logger.warning("TRACING_EXPORTER=otlp needs TRACING_OTLP_ENDPOINT; exporting to JSONL instead")
+            exporter = "jsonl"
+        self._exporter_config = (exporter, export_path, otlp_endpoint)
+        self._exporter: Optional[SpanExporter] = None
+
+        self._stats = {
+            "traces": 0,
+            "sampled_traces": 0,
+            "slow_traces": 0
+        }
+
+    def start_trace(
+        self,
+        name: str,
+        trace_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+        sampled: bool = False,
+        **attributes
+    ) -> Optional[Span]:
+        """Create the root span of a new trace and make it current; returns None when disabled"""
+        if not self.enabled:
+            return None
+
+        sampled = sampled or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        trace = Trace(trace_id or os.urandom(16).hex(), sampled)
+        root = Span(trace, name, parent_id, attributes)
+        trace.spans.append(root)
+        root._token = _current_span.set(root)
+        return root
+
+    def finish_trace(self, root: Optional[Span], error: Optional[BaseException] = None):
+        """End the root span, export it if sampled and log the span tree if it was slow"""
+        if root is None:
+            return
+
+        root.finish(error)
+        _current_span.reset(root._token)
+        trace = root.trace
+        self._stats["traces"] += 1
+
+        if trace.sampled:
+            self._stats["sampled_traces"] += 1
+            self._get_exporter().submit(trace.spans)
+
+        if self.slow_request_seconds > 0 and root.duration >= self.slow_request_seconds:
+            self._stats["slow_traces"] += 1
+            logger.warning(
+                f"Slow request {root.name} took {root.duration:.2f}s (trace {trace.trace_id}):\n"
+                f"{format_span_tree(trace)}"
+            )
+
+    def close(self):
+        if self._exporter is not None:
+            self._exporter.close()
+            self._exporter = None
+
+    def _get_exporter(self) -> SpanExporter:
+        if self._exporter is None:
+            self._exporter = SpanExporter(*self._exporter_config)
+        return self._exporter
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "slow_request_seconds": self.slow_request_seconds,
+            **self._stats,
+            **(self._exporter.get_stats() if self._exporter is not None else {})
+        }
+
+
+def format_span_tree(trace: Trace) -> str:
+    """Indented span tree with durations, children in start order"""
+    children: Dict[Optional[str], List[Span]] = {}
+    span_ids = {s.span_id for s in trace.spans}
+    for s in trace.spans:
+        parent = s.parent_id if s.parent_id in span_ids else None
+        children.setdefault(parent, []).append(s)
+
+    lines = []
+
+    def walk(parent_id: Optional[str], depth: int):
+        for s in sorted(children.get(parent_id, []), key=lambda item: item.start_ns):
+            attributes = " ".join(f"{k}={v}" for k, v in s.attributes.items())
+            error = f" ERROR {s.error}" if s.error else ""
+            lines.append(f"{'  ' * depth}{s.duration * 1000:9.1f}ms  {s.name} {attributes}{error}".rstrip())
+            walk(s.span_id, depth + 1)
+
+    walk(None, 0)
+    if trace.dropped:
+        lines.append(f"({trace.dropped} spans not recorded)")
+    return "\n".join(lines)
+
+
+class TracingMiddleware:
+    """ASGI middleware starting a trace per HTTP request and returning its ID in X-Trace-Id"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        tracer = get_tracer()
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers") or []}
+        root = tracer.start_trace(
+            f"{scope['method']} {scope['path']}",
+            **parse_trace_header(headers),
+            method=scope["method"],
+            path=scope["path"]
+        )
+        trace_header = (b"x-trace-id", root.trace.trace_id.encode("latin-1"))
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("status", message["status"])
+                message = {**message, "headers": list(message.get("headers") or []) + [trace_header]}
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            tracer.finish_trace(root, error)
+
+
+# Global tracer instance
+_global_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Get global tracer instance"""
+    global _global_tracer
+
+    if _global_tracer is None:
+        settings = get_settings()
+        _global_tracer = Tracer(
+            enabled=settings.tracing_enabled,
+            sample_rate=settings.tracing_sample_rate,
+            slow_request_seconds=settings.tracing_slow_request_seconds,
+            exporter=settings.tracing_exporter,
+            export_path=settings.tracing_export_path,
+            otlp_endpoint=settings.tracing_otlp_endpoint
+        )
+
+    return _global_tracer
+
+
+def close_tracer():
+    """Flush exported spans"""
+    if _global_tracer is not None:
+        _global_tracer.close()